@@ -0,0 +1,276 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Admission control of the deposit requests, so that a single client cannot
+starve the other ones.
+
+The limits are read from the ``admission`` section of the server configuration,
+e.g.::
+
+    admission:
+      # concurrent write requests (uploads) per client, and per collection
+      max_concurrent_uploads_per_client: 4
+      max_concurrent_uploads_per_collection: 20
+      # deposits with status partial per client
+      max_partial_deposits_per_client: 100
+      # requests waiting for a status change (long-polling or event streams) per
+      # client
+      max_concurrent_waits_per_client: 4
+      # delay (in seconds) advertised to the clients refused admission
+      retry_after: 30
+
+Missing limits are not enforced, except the requests waiting for a status change
+per client (:const:`DEFAULT_MAX_CONCURRENT_WAITS_PER_CLIENT`), as each of them holds
+a server thread for up to a few minutes; set it to ``null`` to lift it. Concurrent
+requests are counted with counters in the Django cache backend, shared by all the
+server processes when the cache is (e.g. memcached), or in the server process when
+the cache is not available.
+
+The limits are checked by the views, i.e. before the body of the request is read
+by the WSGI server, but once it was received by the ASGI one (see
+:mod:`swh.deposit.asgi`): they bound the uploads being processed, not the uploads
+being received.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import attr
+from django.core.cache import cache
+
+from swh.deposit.config import DEPOSIT_STATUS_PARTIAL
+from swh.deposit.errors import TOO_MANY_REQUESTS, DepositError
+from swh.deposit.models import Deposit, DepositClient, DepositCollection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_AFTER = 30
+DEFAULT_MAX_CONCURRENT_WAITS_PER_CLIENT = 4
+# Counters left behind by crashed server processes eventually expire, once no
+# upload was admitted for that long
+UPLOAD_COUNTER_TIMEOUT = 3600
+
+# Counters used when the cache backend fails, their slots are prefixed with
+# LOCAL_SLOT_PREFIX to be released from them
+_local_counters: Dict[str, int] = {}
+_local_counters_lock = threading.Lock()
+LOCAL_SLOT_PREFIX = "local:"
+
+
+@attr.s(frozen=True)
+class AdmissionLimits:
+    """Limits of the admission control, None when not enforced (the default, except
+    for the requests waiting for a status change)"""
+
+    max_concurrent_uploads_per_client = attr.ib(type=Optional[int], default=None)
+    max_concurrent_uploads_per_collection = attr.ib(type=Optional[int], default=None)
+    max_partial_deposits_per_client = attr.ib(type=Optional[int], default=None)
+    max_concurrent_waits_per_client = attr.ib(
+        type=Optional[int], default=DEFAULT_MAX_CONCURRENT_WAITS_PER_CLIENT
+    )
+    retry_after = attr.ib(type=int, default=DEFAULT_RETRY_AFTER)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "AdmissionLimits":
+        return cls(**config.get("admission", {}))
+
+
+def _client_key(client: DepositClient) -> str:
+    return f"swh.deposit.uploads.client.{client.id}"
+
+
+def _collection_key(collection: DepositCollection) -> str:
+    return f"swh.deposit.uploads.collection.{collection.id}"
+
+
+def _wait_key(client: DepositClient) -> str:
+    return f"swh.deposit.waits.client.{client.id}"
+
+
+def _concurrent_uploads(key: str) -> int:
+    try:
+        count = cache.get(key, 0)
+    except Exception as e:
+        logger.warning("Admission cache unavailable, using local counters: %s", e)
+        count = _local_counters.get(key, 0)
+    return max(count, 0)
+
+
+def _release(slot: str) -> None:
+    if slot.startswith(LOCAL_SLOT_PREFIX):
+        key = slot[len(LOCAL_SLOT_PREFIX) :]
+        with _local_counters_lock:
+            _local_counters[key] -= 1
+            if not _local_counters[key]:
+                del _local_counters[key]
+        return
+    try:
+        cache.decr(slot)
+    except ValueError:
+        # the counter expired in the meantime
+        pass
+    except Exception as e:
+        # the counter expires once the cache backend is available again
+        logger.warning("Admission cache unavailable, slot not released: %s", e)
+
+
+def _count_cached_upload(key: str) -> int:
+    cache.add(key, 0, timeout=UPLOAD_COUNTER_TIMEOUT)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # the counter expired right after it was added
+        cache.add(key, 1, timeout=UPLOAD_COUNTER_TIMEOUT)
+        count = 1
+    cache.touch(key, timeout=UPLOAD_COUNTER_TIMEOUT)
+    return count
+
+
+def _count_local_upload(key: str) -> int:
+    with _local_counters_lock:
+        _local_counters[key] = _local_counters.get(key, 0) + 1
+        return _local_counters[key]
+
+
+def _acquire(
+    key: str,
+    limit: Optional[int],
+    retry_after: int,
+    summary: str,
+    requests: str = "uploads",
+) -> str:
+    try:
+        count = _count_cached_upload(key)
+        slot = key
+    except Exception as e:
+        logger.warning("Admission cache unavailable, using local counters: %s", e)
+        count = _count_local_upload(key)
+        slot = f"{LOCAL_SLOT_PREFIX}{key}"
+    if limit is not None and count > limit:
+        _release(slot)
+        raise DepositError(
+            TOO_MANY_REQUESTS,
+            summary,
+            f"At most {limit} concurrent {requests} are allowed, "
+            f"retry in {retry_after} seconds.",
+            retry_after=retry_after,
+        )
+    return slot
+
+
+def acquire_upload_slots(
+    limits: AdmissionLimits, client: DepositClient, collection: DepositCollection
+) -> List[str]:
+    """Count a new upload of the client in the collection.
+
+    Raises:
+        DepositError (429) if the client or the collection has too many uploads in
+        progress
+
+    Returns:
+        the slots to release (see :func:`release_upload_slots`) once the upload
+        is over
+
+    """
+    client_slot = _acquire(
+        _client_key(client),
+        limits.max_concurrent_uploads_per_client,
+        limits.retry_after,
+        f"Too many concurrent uploads for client {client.username}",
+    )
+    try:
+        collection_slot = _acquire(
+            _collection_key(collection),
+            limits.max_concurrent_uploads_per_collection,
+            limits.retry_after,
+            f"Too many concurrent uploads in collection {collection.name}",
+        )
+    except DepositError:
+        _release(client_slot)
+        raise
+    return [client_slot, collection_slot]
+
+
+def release_upload_slots(slots: List[str]) -> None:
+    """Count the end of the uploads acquired by :func:`acquire_upload_slots`."""
+    for slot in slots:
+        _release(slot)
+
+
+def acquire_wait_slot(limits: AdmissionLimits, client: DepositClient) -> str:
+    """Count a new request of the client waiting for a status change.
+
+    Raises:
+        DepositError (429) if the client has too many requests waiting
+
+    Returns:
+        the slot to release (see :func:`release_wait_slot`) once the request is
+        over
+
+    """
+    return _acquire(
+        _wait_key(client),
+        limits.max_concurrent_waits_per_client,
+        limits.retry_after,
+        f"Too many requests waiting for a status change for client "
+        f"{client.username}",
+        requests="status waits",
+    )
+
+
+def release_wait_slot(slot: str) -> None:
+    """Count the end of the request acquired by :func:`acquire_wait_slot`."""
+    _release(slot)
+
+
+def partial_deposits(client: DepositClient) -> int:
+    return Deposit.objects.filter(client=client, status=DEPOSIT_STATUS_PARTIAL).count()
+
+
+def check_new_deposit(limits: AdmissionLimits, client: DepositClient) -> None:
+    """Check the client can start a new deposit.
+
+    Raises:
+        DepositError (429) if the client has too many partial deposits
+
+    """
+    limit = limits.max_partial_deposits_per_client
+    if limit is not None and partial_deposits(client) >= limit:
+        raise DepositError(
+            TOO_MANY_REQUESTS,
+            f"Too many partial deposits for client {client.username}",
+            f"At most {limit} deposits with status {DEPOSIT_STATUS_PARTIAL} are "
+            "allowed, complete or delete some of them first.",
+            retry_after=limits.retry_after,
+        )
+
+
+def client_usage(
+    limits: AdmissionLimits, client: DepositClient
+) -> Dict[str, Dict[str, Optional[int]]]:
+    """Current usage of the client, with the matching limits."""
+    return {
+        "concurrent_uploads": {
+            "count": _concurrent_uploads(_client_key(client)),
+            "limit": limits.max_concurrent_uploads_per_client,
+        },
+        "partial_deposits": {
+            "count": partial_deposits(client),
+            "limit": limits.max_partial_deposits_per_client,
+        },
+    }
+
+
+def collection_usage(
+    limits: AdmissionLimits, collection: DepositCollection
+) -> Dict[str, Dict[str, Optional[int]]]:
+    """Current usage of the collection, with the matching limits."""
+    return {
+        "concurrent_uploads": {
+            "count": _concurrent_uploads(_collection_key(collection)),
+            "limit": limits.max_concurrent_uploads_per_collection,
+        },
+    }
@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2020  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -89,6 +89,8 @@ class CollectionAPI(ListAPIView, APIPost):
         - archive deposit (1 zip)
         - multipart (1 zip + 1 atom entry)
         - atom entry
+        - resumable archive upload session (empty body with an Upload-Length
+          header)
 
         Args:
             req (Request): the request holding the information to parse
@@ -132,7 +134,9 @@ class CollectionAPI(ListAPIView, APIPost):
 
         deposit = self._deposit_create(req, collection_name, external_id=headers.slug)
 
-        if req.content_type in ACCEPT_ARCHIVE_CONTENT_TYPES:
+        if headers.upload_length is not None:
+            receipt = self._start_upload_session(req, headers, collection_name, deposit)
+        elif req.content_type in ACCEPT_ARCHIVE_CONTENT_TYPES:
             receipt = self._binary_upload(req, headers, collection_name, deposit)
         elif req.content_type.startswith("multipart/"):
             receipt = self._multipart_upload(req, headers, collection_name, deposit)
@@ -8,25 +8,62 @@ import contextlib
 import datetime
 import hashlib
 import json
-from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 import uuid
 from xml.etree import ElementTree
 
 import attr
 from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 from django.http import FileResponse, HttpResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import parse_header_parameters
 from rest_framework import status
-from rest_framework.authentication import BaseAuthentication, BasicAuthentication
+from rest_framework.authentication import BaseAuthentication
 from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.views import APIView
 
+from swh.deposit import lookups
+from swh.deposit.api.admission import (
+    AdmissionLimits,
+    acquire_upload_slots,
+    check_new_deposit,
+    release_upload_slots,
+)
 from swh.deposit.api.converters import convert_status_detail
-from swh.deposit.auth import HasDepositPermission, KeycloakBasicAuthentication
+from swh.deposit.api.direct_upload import direct_upload_url
+from swh.deposit.api.idempotency import (
+    DEFAULT_IDEMPOTENCY_CLAIM_LEASE,
+    DEFAULT_IDEMPOTENCY_KEY_TTL,
+    idempotent,
+)
+from swh.deposit.api.status_changes import notify_status_change
+from swh.deposit.api.throttling import (
+    ARCHIVE_BUCKET,
+    METADATA_BUCKET,
+    check_rate_limit,
+    rate_limits_from_config,
+)
+from swh.deposit.auth import (
+    CachedBasicAuthentication,
+    HasDepositPermission,
+    KeycloakBasicAuthentication,
+)
 from swh.deposit.config import (
     ARCHIVE_KEY,
     ARCHIVE_TYPE,
@@ -40,6 +77,7 @@ from swh.deposit.config import (
     RAW_METADATA_KEY,
     SE_IRI,
     STATE_IRI,
+    UPLOAD_SESSION_IRI,
     APIConfig,
 )
 from swh.deposit.errors import (
@@ -55,15 +93,19 @@ from swh.deposit.errors import (
     DepositError,
     ParserError,
 )
-from swh.deposit.loader.checks import check_metadata
+from swh.deposit.loader.checks import DEFAULT_VALIDATION_ENGINE
+from swh.deposit.metadata_checks import check_raw_metadata
 from swh.deposit.models import (
     DEPOSIT_METADATA_ONLY,
     Deposit,
     DepositClient,
     DepositCollection,
     DepositRequest,
+    UploadSession,
+    store_content_addressed_archive,
 )
 from swh.deposit.parsers import parse_xml
+from swh.deposit.uploadhandler import get_checksums
 from swh.deposit.utils import (
     compute_metadata_context,
     extended_swhid_from_qualified,
@@ -72,6 +114,7 @@ from swh.deposit.utils import (
     parse_swh_metadata_provenance,
     parse_swh_reference,
 )
+from swh.deposit.webhooks import enqueue_status_change
 from swh.model import hashutil
 from swh.model.model import (
     MetadataAuthority,
@@ -90,6 +133,12 @@ from swh.scheduler.utils import create_oneshot_task
 ACCEPT_PACKAGINGS = ["http://purl.org/net/sword/package/SimpleZip"]
 ACCEPT_ARCHIVE_CONTENT_TYPES = ["application/zip", "application/x-tar"]
 
+# Methods of the requests counted as uploads by the admission control
+UPLOAD_METHODS = ("POST", "PUT", "PATCH")
+
+UPLOAD_MODE_CHUNKED = "chunked"
+UPLOAD_MODE_DIRECT = "direct"
+
 
 @attr.s
 class ParsedRequestHeaders:
@@ -103,6 +152,8 @@ class ParsedRequestHeaders:
     on_behalf_of = attr.ib(type=Optional[str])
     metadata_relevant = attr.ib(type=Optional[str])
     swhid = attr.ib(type=Optional[str])
+    upload_length = attr.ib(type=Optional[int], default=None)
+    upload_mode = attr.ib(type=Optional[str], default=None)
 
 
 @attr.s
@@ -114,6 +165,8 @@ class Receipt:
     deposit_date = attr.ib(type=datetime.datetime)
     status = attr.ib(type=str)
     archive = attr.ib(type=Optional[str])
+    upload_session_id = attr.ib(type=Optional[int], default=None)
+    upload_url = attr.ib(type=Optional[str], default=None)
 
 
 def _compute_md5(filehandler: UploadedFile) -> bytes:
@@ -129,7 +182,9 @@ def get_deposit_by_id(
     """Gets an existing Deposit object if it exists, or raises `DepositError`.
     If `collection` is not None, also checks the deposit belongs to the collection."""
     try:
-        deposit = Deposit.objects.get(pk=deposit_id)
+        deposit = Deposit.objects.select_related("collection", "client").get(
+            pk=deposit_id
+        )
     except Deposit.DoesNotExist:
         raise DepositError(NOT_FOUND, f"Deposit {deposit_id} does not exist")
 
@@ -147,7 +202,7 @@ def get_deposit_by_id(
 def get_collection_by_name(collection_name: str):
     """Gets an existing Deposit object if it exists, or raises `DepositError`."""
     try:
-        collection = DepositCollection.objects.get(name=collection_name)
+        collection = lookups.get_collection_by_name(collection_name)
     except DepositCollection.DoesNotExist:
         raise DepositError(NOT_FOUND, f"Unknown collection name {collection_name}")
 
@@ -187,10 +242,13 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
 
     def __init__(self):
         super().__init__()
+        self.admission_limits = AdmissionLimits.from_config(self.config)
+        self.rate_limits = rate_limits_from_config(self.config)
+        self._upload_slots: List[str] = []
         auth_provider = self.config.get("authentication_provider")
         if auth_provider == "basic":
             self.authentication_classes: Sequence[Type[BaseAuthentication]] = (
-                BasicAuthentication,
+                CachedBasicAuthentication,
             )
             self.permission_classes: Sequence[Type[BasePermission]] = (IsAuthenticated,)
         elif auth_provider == "keycloak":
@@ -224,6 +282,8 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
                 - packaging
                 - slug
                 - on-behalf-of
+                - upload-length
+                - upload-mode
 
         """
         meta = request._request.META
@@ -241,6 +301,17 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
         if content_md5sum:
             content_md5sum = bytes.fromhex(content_md5sum)
 
+        upload_length = meta.get("HTTP_UPLOAD_LENGTH")
+        if upload_length is not None:
+            try:
+                upload_length = int(upload_length)
+            except ValueError:
+                raise DepositError(
+                    BAD_REQUEST,
+                    "Invalid Upload-Length header",
+                    "The Upload-Length header must be the archive size in bytes.",
+                )
+
         return ParsedRequestHeaders(
             content_type=request.content_type,
             content_length=content_length,
@@ -252,6 +323,8 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
             on_behalf_of=meta.get("HTTP_ON_BEHALF_OF"),
             metadata_relevant=meta.get("HTTP_METADATA_RELEVANT"),
             swhid=meta.get("HTTP_X_CHECK_SWHID"),
+            upload_length=upload_length,
+            upload_mode=meta.get("HTTP_UPLOAD_MODE"),
         )
 
     @contextlib.contextmanager
@@ -282,8 +355,9 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
 
     def _complete_deposit(self, deposit: Deposit) -> None:
         """Marks the deposit as 'deposited', then schedule a check task if configured
-        to do so."""
+        to do so, and notify the client of the status change."""
 
+        previous_status = deposit.status
         deposit.complete_date = timezone.now()
         deposit.status = DEPOSIT_STATUS_DEPOSITED
         deposit.save()
@@ -303,7 +377,11 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
                 check_task_id = scheduler.create_tasks([task])[0].id
                 deposit.check_task_id = str(check_task_id)
 
-        deposit.save()
+        with transaction.atomic():
+            deposit.save()
+            if deposit.status != previous_status:
+                notify_status_change(deposit)
+                enqueue_status_change(deposit)
 
     def _deposit_request_put(
         self,
@@ -340,6 +418,17 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
             deposit_request = DepositRequest(
                 type=ARCHIVE_TYPE, deposit=deposit, archive=archive_file
             )
+            checksums = get_checksums(archive_file)
+            if checksums:
+                deposit_request.archive_length = checksums.length
+                deposit_request.archive_md5 = hashutil.hash_to_hex(checksums.md5)
+                deposit_request.archive_sha1 = hashutil.hash_to_hex(checksums.sha1)
+                deposit_request.archive_sha256 = hashutil.hash_to_hex(checksums.sha256)
+                # content-addressed, so that archives sent again are not stored
+                # again
+                deposit_request.archive = store_content_addressed_archive(
+                    archive_file, deposit_request.archive_sha256
+                )
             deposit_request.save()
 
         raw_metadata = deposit_request_data.get(RAW_METADATA_KEY)
@@ -390,6 +479,8 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
                 BAD_REQUEST, summary=summary, verbose_description=description
             )
 
+        for upload_session in UploadSession.objects.filter(deposit=deposit):
+            upload_session.discard()
         DepositRequest.objects.filter(deposit=deposit).delete()
         deposit.delete()
 
@@ -403,6 +494,8 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
         """Check the filehandler passed as argument has exactly the
         expected content_length
 
+        The length counted while the file was uploaded is used when available.
+
         Args:
             filehandler: The file to check
             content_length: the expected length if provided.
@@ -411,12 +504,13 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
             DepositError if the actual length does not match
         """
         max_upload_size = self.config["max_upload_size"]
+        checksums = get_checksums(filehandler)
+        length = checksums.length if checksums else filehandler.size
         if content_length:
-            length = filehandler.size
             if length != content_length:
                 raise DepositError(status.HTTP_412_PRECONDITION_FAILED, "Wrong length")
 
-        if filehandler.size > max_upload_size:
+        if length > max_upload_size:
             raise DepositError(
                 MAX_UPLOAD_SIZE_EXCEEDED,
                 f"Upload size limit exceeded (max {max_upload_size} bytes)."
@@ -430,6 +524,9 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
     ) -> None:
         """Check the filehandler passed as argument has the expected md5sum
 
+        The md5sum computed while the file was uploaded is used when available,
+        otherwise the file is read again to compute it.
+
         Args:
             filehandler: The file to check
             md5sum: md5 hash expected from the file's content
@@ -439,7 +536,8 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
 
         """
         if md5sum:
-            _md5sum = _compute_md5(filehandler)
+            checksums = get_checksums(filehandler)
+            _md5sum = checksums.md5 if checksums else _compute_md5(filehandler)
             if _md5sum != md5sum:
                 raise DepositError(
                     CHECKSUM_MISMATCH,
@@ -535,6 +633,118 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
             archive=filehandler.name,
         )
 
+    def _start_upload_session(
+        self,
+        request: Request,
+        headers: ParsedRequestHeaders,
+        collection_name: str,
+        deposit: Deposit,
+        replace_archives: bool = False,
+    ) -> Receipt:
+        """Open a resumable upload session for an archive of ``Upload-Length``
+        bytes, to be sent in several chunks to the upload session IRI.
+
+        With an ``Upload-Mode: direct`` header, the archive is instead to be sent
+        in a single PUT request to a pre-signed URL of the archive storage, given
+        in the receipt (see :mod:`swh.deposit.api.direct_upload`).
+
+        Args:
+            request: the request holding information to parse
+                and inject in db
+            headers: parsed request headers
+            collection_name: the associated client
+            deposit: deposit to be updated
+            replace_archives: whether committing the session replaces existing
+              archives of the deposit (otherwise the archive is added)
+
+        Raises:
+            - 400 (bad request) if the Upload-Length, Upload-Mode,
+              Content-Disposition or packaging headers are missing or invalid
+            - 415 (unsupported media type) if a wrong media type is provided
+
+        """
+        if request.content_type not in ACCEPT_ARCHIVE_CONTENT_TYPES:
+            raise DepositError(
+                ERROR_CONTENT,
+                "Packaging format supported is restricted to %s"
+                % (", ".join(ACCEPT_ARCHIVE_CONTENT_TYPES)),
+            )
+
+        if headers.content_length:
+            raise DepositError(
+                BAD_REQUEST,
+                "Upload session creation requests must have an empty body",
+                "The archive content must be sent to the upload session IRI.",
+            )
+
+        upload_length = headers.upload_length
+        if not upload_length or upload_length < 0:
+            raise DepositError(
+                BAD_REQUEST,
+                "Upload-Length header must be a positive number of bytes",
+            )
+
+        filename = None
+        if headers.content_disposition:
+            _, params = parse_header_parameters(headers.content_disposition)
+            filename = params.get("filename")
+        if not filename:
+            raise DepositError(
+                BAD_REQUEST,
+                "CONTENT_DISPOSITION header is mandatory",
+                "For archive deposit, the CONTENT_DISPOSITION header must be sent "
+                "with a filename.",
+            )
+
+        packaging = headers.packaging
+        if packaging and packaging not in ACCEPT_PACKAGINGS:
+            raise DepositError(
+                BAD_REQUEST,
+                f"Only packaging {ACCEPT_PACKAGINGS} is supported",
+                f"The packaging provided {packaging} is not supported",
+            )
+
+        if headers.upload_mode not in (None, UPLOAD_MODE_CHUNKED, UPLOAD_MODE_DIRECT):
+            raise DepositError(
+                BAD_REQUEST,
+                f"Unsupported upload mode {headers.upload_mode}",
+                f"Upload-Mode must be either {UPLOAD_MODE_CHUNKED} (default) or "
+                f"{UPLOAD_MODE_DIRECT}.",
+            )
+
+        if deposit.pk is None:
+            deposit.status = DEPOSIT_STATUS_PARTIAL
+            deposit.save()
+
+        upload_session = UploadSession(
+            deposit=deposit,
+            filename=filename,
+            content_type=request.content_type,
+            length=upload_length,
+            replace_archives=replace_archives,
+        )
+        upload_url = None
+        if headers.upload_mode == UPLOAD_MODE_DIRECT:
+            archive_field = DepositRequest._meta.get_field("archive")
+            upload_session.archive_name = archive_field.storage.get_available_name(
+                archive_field.generate_filename(
+                    DepositRequest(deposit=deposit), filename
+                )
+            )
+            upload_session.save()
+            upload_url = direct_upload_url(request, upload_session)
+        else:
+            upload_session.save()
+
+        return Receipt(
+            deposit_id=deposit.id,
+            deposit_date=deposit.reception_date,
+            status=deposit.status,
+            archive=None,
+            upload_session_id=upload_session.id,
+            upload_url=upload_url,
+        )
+
     def _read_metadata(self, metadata_stream) -> Tuple[bytes, ElementTree.Element]:
         """
         Given a metadata stream, reads the metadata and returns the metadata in three
@@ -709,7 +919,13 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
             Tuple of target swhid, deposit, and deposit request
 
         """
-        metadata_ok, error_details = check_metadata(metadata_tree)
+        metadata_ok, error_details = check_raw_metadata(
+            raw_metadata,
+            metadata_tree,
+            engine=self.config.get(
+                "metadata_validation_engine", DEFAULT_VALIDATION_ENGINE
+            ),
+        )
         if not metadata_ok:
             assert error_details, "Details should be set when a failure occurs"
             raise DepositError(
@@ -1039,9 +1255,12 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
         username = request.user.username
         assert username is not None
 
+        if self._client is None and isinstance(request.user, DepositClient):
+            # already read by the authentication
+            self._client = request.user
         if self._client is None:
             try:
-                self._client = DepositClient.objects.get(username=username)
+                self._client = lookups.get_client_by_username(username)
             except DepositClient.DoesNotExist:
                 raise DepositError(NOT_FOUND, f"Unknown client name {username}")
 
@@ -1068,6 +1287,18 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
                 f"Client {client.username} cannot access collection {collection_name}",
             )
 
+        bucket = self.rate_limit_bucket(request)
+        if bucket is not None:
+            check_rate_limit(self.rate_limits, bucket, client, collection)
+
+        if request.method in UPLOAD_METHODS and not self._upload_slots:
+            # before the request body is read
+            if deposit is None and request.method == "POST":
+                check_new_deposit(self.admission_limits, client)
+            self._upload_slots = acquire_upload_slots(
+                self.admission_limits, client, collection
+            )
+
         headers = self._read_headers(request)
 
         if deposit is not None:
@@ -1080,6 +1311,46 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
 
         return headers
 
+    def idempotent(
+        self, request: Request, get_response: Callable[[], HttpResponse]
+    ) -> HttpResponse:
+        """Process the request with ``get_response``, or replay the response to
+        the request first sent with the same Idempotency-Key header (see
+        :mod:`swh.deposit.api.idempotency`).
+
+        This happens before the checks on the deposit, which would refuse
+        requests replayed once the deposit is completed.
+        """
+        if not request.META.get("HTTP_IDEMPOTENCY_KEY"):
+            # private views have no client
+            return get_response()
+        ttl = self.config.get("idempotency_key_ttl", DEFAULT_IDEMPOTENCY_KEY_TTL)
+        lease = self.config.get(
+            "idempotency_claim_lease", DEFAULT_IDEMPOTENCY_CLAIM_LEASE
+        )
+        return idempotent(
+            request, self.get_client(request), ttl, get_response, lease=lease
+        )
+
+    def rate_limit_bucket(self, request: Request) -> Optional[str]:
+        """Rate limit bucket of the request (see :mod:`swh.deposit.api.throttling`),
+        or None if it is not rate limited."""
+        if request.method not in UPLOAD_METHODS:
+            return None
+        content_type = parse_header_parameters(request.content_type)[0]
+        if content_type in ACCEPT_ARCHIVE_CONTENT_TYPES or content_type.startswith(
+            "multipart/"
+        ):
+            return ARCHIVE_BUCKET
+        return METADATA_BUCKET
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            release_upload_slots(self._upload_slots)
+            self._upload_slots = []
+
     def restrict_access(
         self, request: Request, headers: ParsedRequestHeaders, deposit: Deposit
     ) -> None:
@@ -1093,6 +1364,46 @@ class APIBase(APIConfig, APIView, metaclass=ABCMeta):
                 BAD_REQUEST, summary=summary, verbose_description=description
             )
 
+    def _make_deposit_receipt(
+        self,
+        request,
+        collection_name: str,
+        status: int,
+        iri_key: str,
+        receipt: Receipt,
+    ) -> HttpResponse:
+        """Returns an HttpResponse with a SWORD Deposit receipt as content."""
+
+        # Build the IRIs in the receipt
+        args = [collection_name, receipt.deposit_id]
+        iris = {
+            iri: request.build_absolute_uri(reverse(iri, args=args))
+            for iri in [EM_IRI, EDIT_IRI, CONT_FILE_IRI, SE_IRI, STATE_IRI]
+        }
+
+        context = {
+            **attr.asdict(receipt),
+            **iris,
+            "packagings": ACCEPT_PACKAGINGS,
+        }
+        location = iris[iri_key]
+
+        if receipt.upload_session_id is not None:
+            # the archive content is expected at the upload session IRI
+            location = context[UPLOAD_SESSION_IRI] = request.build_absolute_uri(
+                reverse(UPLOAD_SESSION_IRI, args=[*args, receipt.upload_session_id])
+            )
+
+        response = render(
+            request,
+            "deposit/deposit_receipt.xml",
+            context=context,
+            content_type="application/xml",
+            status=status,
+        )
+        response["Location"] = location
+        return response
+
     def _basic_not_allowed_method(self, request: Request, method: str):
         raise DepositError(
             METHOD_NOT_ALLOWED,
@@ -1172,6 +1483,13 @@ class APIPost(APIBase, metaclass=ABCMeta):
             404 if the deposit or the collection does not exist
 
         """
+        return self.idempotent(
+            request, lambda: self._post(request, collection_name, deposit_id)
+        )
+
+    def _post(
+        self, request: Request, collection_name: str, deposit_id: Optional[int]
+    ) -> HttpResponse:
         if deposit_id is None:
             deposit = None
         else:
@@ -1190,39 +1508,6 @@ class APIPost(APIBase, metaclass=ABCMeta):
             receipt,
         )
 
-    def _make_deposit_receipt(
-        self,
-        request,
-        collection_name: str,
-        status: int,
-        iri_key: str,
-        receipt: Receipt,
-    ) -> HttpResponse:
-        """Returns an HttpResponse with a SWORD Deposit receipt as content."""
-
-        # Build the IRIs in the receipt
-        args = [collection_name, receipt.deposit_id]
-        iris = {
-            iri: request.build_absolute_uri(reverse(iri, args=args))
-            for iri in [EM_IRI, EDIT_IRI, CONT_FILE_IRI, SE_IRI, STATE_IRI]
-        }
-
-        context = {
-            **attr.asdict(receipt),
-            **iris,
-            "packagings": ACCEPT_PACKAGINGS,
-        }
-
-        response = render(
-            request,
-            "deposit/deposit_receipt.xml",
-            context=context,
-            content_type="application/xml",
-            status=status,
-        )
-        response["Location"] = iris[iri_key]
-        return response
-
     @abstractmethod
     def process_post(
         self,
@@ -1257,12 +1542,24 @@ class APIPut(APIBase, metaclass=ABCMeta):
             404 if the deposit or the collection does not exist
 
         """
+        return self.idempotent(
+            request, lambda: self._put(request, collection_name, deposit_id)
+        )
+
+    def _put(
+        self, request: Request, collection_name: str, deposit_id: int
+    ) -> HttpResponse:
         if deposit_id is None:
             deposit = None
         else:
             deposit = get_deposit_by_id(deposit_id, collection_name)
         headers = self.checks(request, collection_name, deposit)
-        self.process_put(request, headers, collection_name, deposit)
+        receipt = self.process_put(request, headers, collection_name, deposit)
+
+        if receipt is not None:
+            return self._make_deposit_receipt(
+                request, collection_name, status.HTTP_201_CREATED, EM_IRI, receipt
+            )
 
         return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
@@ -1273,11 +1570,12 @@ class APIPut(APIBase, metaclass=ABCMeta):
         headers: ParsedRequestHeaders,
         collection_name: str,
         deposit: Deposit,
-    ) -> None:
+    ) -> Optional[Receipt]:
         """Routine to deal with updating a deposit in some way.
 
         Returns
-            dictionary of the processing result
+            None, or a Receipt when the request created a resource (e.g. an upload
+            session) to be described in a deposit receipt
 
         """
         pass
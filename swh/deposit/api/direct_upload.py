@@ -0,0 +1,171 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Direct upload of archives to the archive storage, bypassing the deposit server.
+
+When an upload session is opened in ``direct`` mode, the server hands out a
+pre-signed URL to which the client sends the archive with a single PUT request.
+
+With the Azure storage backend, this URL is a blob URL with a write-only shared
+access signature, so archives go straight to the blob storage. With the other
+storage backends, the URL targets :class:`DirectUploadAPI`, a local stand-in
+mimicking that flow: the request is authorized by a signed token instead of the
+client credentials.
+"""
+
+import hashlib
+import tempfile
+from typing import Optional, Tuple
+
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from swh.deposit.config import DIRECT_UPLOAD_IRI
+from swh.deposit.errors import (
+    BAD_REQUEST,
+    FORBIDDEN,
+    MAX_UPLOAD_SIZE_EXCEEDED,
+    NOT_FOUND,
+    DepositError,
+)
+from swh.deposit.models import UploadSession
+from swh.model import hashutil
+
+try:
+    from storages.backends.azure_storage import AzureStorage
+except ImportError:
+    AzureStorage = None
+
+# Validity (in seconds) of the pre-signed upload URLs
+DIRECT_UPLOAD_EXPIRATION = 3600
+
+DIRECT_UPLOAD_SALT = "swh.deposit.direct_upload"
+
+
+def _is_azure_storage() -> bool:
+    return AzureStorage is not None and isinstance(default_storage, AzureStorage)
+
+
+def direct_upload_url(request: Request, upload_session: UploadSession) -> str:
+    """Pre-signed URL to send the archive of a direct upload session to."""
+    assert upload_session.archive_name is not None
+    if _is_azure_storage():
+        return default_storage.url(
+            upload_session.archive_name, expire=DIRECT_UPLOAD_EXPIRATION, mode="cw"
+        )
+    token = signing.dumps(
+        {"session": upload_session.id, "name": upload_session.archive_name},
+        salt=DIRECT_UPLOAD_SALT,
+    )
+    return request.build_absolute_uri(reverse(DIRECT_UPLOAD_IRI, args=[token]))
+
+
+def direct_upload_properties(
+    upload_session: UploadSession,
+) -> Optional[Tuple[int, bytes]]:
+    """Size and md5sum of the archive sent to a direct upload session, or None if
+    it was not received yet.
+
+    With Azure, those are read from the blob properties (the blob service computes
+    the md5sum of blobs uploaded in a single request). Otherwise, the archive is
+    read from the storage to compute its md5sum.
+    """
+    name = upload_session.archive_name
+    assert name is not None
+    if not default_storage.exists(name):
+        return None
+
+    if _is_azure_storage():
+        blob_client = default_storage.client.get_blob_client(
+            default_storage._get_valid_path(name)
+        )
+        properties = blob_client.get_blob_properties(timeout=default_storage.timeout)
+        content_md5 = properties.content_settings.content_md5
+        if content_md5:
+            return properties.size, bytes(content_md5)
+
+    md5 = hashlib.md5()
+    with default_storage.open(name, "rb") as archive:
+        for chunk in archive.chunks():
+            md5.update(chunk)
+    return default_storage.size(name), md5.digest()
+
+
+class DirectUploadAPI(APIView):
+    """Local stand-in for pre-signed upload URLs of object storages, used when the
+    archive storage does not provide them.
+
+    HTTP verbs supported: PUT
+
+    """
+
+    authentication_classes = ()
+    permission_classes = ()
+
+    def put(self, request: Request, token: str) -> HttpResponse:
+        """Store the request body as the archive of a direct upload session.
+
+        Returns:
+            201 once the archive is stored
+            403 if the token is invalid or expired
+            404 if the upload session does not exist anymore
+            413 if the archive is larger than announced by the upload session
+
+        """
+        try:
+            signed = signing.loads(
+                token, salt=DIRECT_UPLOAD_SALT, max_age=DIRECT_UPLOAD_EXPIRATION
+            )
+        except signing.BadSignature:
+            raise DepositError(FORBIDDEN, "Invalid or expired upload URL")
+
+        upload_session = UploadSession.objects.filter(
+            pk=signed["session"], archive_name=signed["name"]
+        ).first()
+        if upload_session is None:
+            raise DepositError(NOT_FOUND, "Unknown upload session")
+
+        if request.stream is None:
+            raise DepositError(BAD_REQUEST, "Empty archive")
+
+        # refused before reading it, then while reading it in case the header lies
+        content_length = request.META.get("CONTENT_LENGTH")
+        if content_length and int(content_length) > upload_session.length:
+            raise _archive_too_large(upload_session)
+
+        with tempfile.TemporaryFile() as archive:
+            received = 0
+            while True:
+                data = request.stream.read(hashutil.HASH_BLOCK_SIZE)
+                if not data:
+                    break
+                received += len(data)
+                if received > upload_session.length:
+                    raise _archive_too_large(upload_session)
+                archive.write(data)
+
+            # PUT overwrites any previously uploaded archive, like object storages do
+            name = signed["name"]
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            archive.seek(0)
+            default_storage.save(name, File(archive))
+
+        return HttpResponse(status=status.HTTP_201_CREATED)
+
+
+def _archive_too_large(upload_session: UploadSession) -> DepositError:
+    return DepositError(
+        MAX_UPLOAD_SIZE_EXCEEDED,
+        f"Archive size limit exceeded (max {upload_session.length} bytes).",
+        "The archive is larger than the length announced when opening the upload "
+        "session.",
+    )
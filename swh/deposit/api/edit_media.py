@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2020  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -37,15 +37,25 @@ class EditMediaAPI(APIPost, APIPut, APIDelete):
 
     def process_put(
         self, req, headers: ParsedRequestHeaders, collection_name: str, deposit: Deposit
-    ) -> None:
+    ) -> Optional[Receipt]:
         """Replace existing content for the existing deposit.
 
            source: http://swordapp.github.io/SWORDv2-Profile/SWORDProfile.html#protocoloperations_editingcontent_binary  # noqa
 
+        With an empty body and an Upload-Length header, this opens a resumable
+        upload session whose archive replaces the existing ones once committed.
+
         Returns:
             204 No content
+            201 Created with the upload session IRI as Location, when opening an
+            upload session
 
         """
+        if headers.upload_length is not None:
+            return self._start_upload_session(
+                req, headers, collection_name, deposit, replace_archives=True
+            )
+
         if req.content_type not in ACCEPT_ARCHIVE_CONTENT_TYPES:
             msg = "Packaging format supported is restricted to %s" % (
                 ", ".join(ACCEPT_ARCHIVE_CONTENT_TYPES)
@@ -55,6 +65,7 @@ class EditMediaAPI(APIPost, APIPut, APIDelete):
         self._binary_upload(
             req, headers, collection_name, deposit=deposit, replace_archives=True
         )
+        return None
 
     def process_post(
         self,
@@ -67,15 +78,25 @@ class EditMediaAPI(APIPost, APIPut, APIDelete):
 
            source: http://swordapp.github.io/SWORDv2-Profile/SWORDProfile.html#protocoloperations_addingcontent_mediaresource  # noqa
 
+        With an empty body and an Upload-Length header, this opens a resumable
+        upload session whose archive is added to the deposit once committed.
+
         Returns:
             201 Created
-            Headers: Location: [Cont-File-IRI]
+            Headers: Location: [Cont-File-IRI] (or the upload session IRI)
 
             Body: [optional Deposit Receipt]
 
         """
         assert deposit is not None
 
+        if headers.upload_length is not None:
+            return (
+                status.HTTP_201_CREATED,
+                CONT_FILE_IRI,
+                self._start_upload_session(req, headers, collection_name, deposit),
+            )
+
         if req.content_type not in ACCEPT_ARCHIVE_CONTENT_TYPES:
             msg = "Packaging format supported is restricted to %s" % (
                 ", ".join(ACCEPT_ARCHIVE_CONTENT_TYPES)
@@ -0,0 +1,182 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Idempotent deposit creations and updates.
+
+Requests sent with an ``Idempotency-Key`` header are processed once per client and
+key: the (successful) response of the first request is stored, and replayed to the
+requests sent again with the same key (e.g. retries after a timeout) for
+``idempotency_key_ttl`` seconds (a day by default).
+
+Keys are claimed by inserting them in the database before processing the request,
+so concurrent requests with the same key are refused by the unique constraint on
+(client, key) instead of racing. Claims are leased for ``idempotency_claim_lease``
+seconds (15 minutes by default): keys claimed for longer without response (e.g.
+by a crashed server process) are claimed again by the next request sent with them.
+"""
+
+import datetime
+from typing import Callable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.utils.timezone import now
+from rest_framework.request import Request
+
+from swh.deposit.errors import BAD_REQUEST, IDEMPOTENCY_KEY_IN_USE, DepositError
+from swh.deposit.models import DepositClient, IdempotencyKey
+
+DEFAULT_IDEMPOTENCY_KEY_TTL = 24 * 3600
+DEFAULT_IDEMPOTENCY_CLAIM_LEASE = 15 * 60
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+# Attempts to claim a key released by the request holding it, between the failed
+# claim and the read of the key
+MAX_CLAIM_ATTEMPTS = 3
+
+
+def _replay(idempotency_key: IdempotencyKey) -> HttpResponse:
+    assert idempotency_key.response_status is not None
+    response = HttpResponse(
+        bytes(idempotency_key.response_content or b""),
+        status=idempotency_key.response_status,
+        content_type=idempotency_key.response_content_type,
+    )
+    if idempotency_key.response_location:
+        response["Location"] = idempotency_key.response_location
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _claim(
+    client: DepositClient, key: str, request: Request, ttl: datetime.timedelta
+) -> IdempotencyKey:
+    """Insert the key, or raise IntegrityError if it is already used"""
+    IdempotencyKey.objects.filter(client=client, date__lt=now() - ttl).delete()
+    with transaction.atomic():
+        return IdempotencyKey.objects.create(
+            client=client, key=key, method=request.method, path=request.path
+        )
+
+
+def _reclaim(
+    idempotency_key: IdempotencyKey, lease: datetime.timedelta
+) -> Optional[IdempotencyKey]:
+    """Claim again the key whose claim is abandoned, None if it is still leased
+    (or reclaimed concurrently)."""
+    claim_date = now()
+    reclaimed = IdempotencyKey.objects.filter(
+        pk=idempotency_key.pk,
+        response_status__isnull=True,
+        claim_date__lt=claim_date - lease,
+    ).update(claim_date=claim_date)
+    if not reclaimed:
+        return None
+    idempotency_key.claim_date = claim_date
+    return idempotency_key
+
+
+def _claimed(idempotency_key: IdempotencyKey) -> QuerySet:
+    """The key, unless it was reclaimed by another request since it was claimed"""
+    return IdempotencyKey.objects.filter(
+        pk=idempotency_key.pk, claim_date=idempotency_key.claim_date
+    )
+
+
+def idempotent(
+    request: Request,
+    client: DepositClient,
+    ttl: int,
+    get_response: Callable[[], HttpResponse],
+    lease: int = DEFAULT_IDEMPOTENCY_CLAIM_LEASE,
+) -> HttpResponse:
+    """Process the request with ``get_response``, once per Idempotency-Key.
+
+    Args:
+        request: the request, processed as usual without Idempotency-Key header
+        client: the client sending the request
+        ttl: duration (in seconds) during which responses are replayed
+        get_response: processes the request
+        lease: duration (in seconds) after which a key claimed without response
+          can be claimed again
+
+    Raises:
+        DepositError (409) if a request with the same key is being processed,
+        (400) if the key was sent with another request
+
+    Returns:
+        the response to the request, or the replayed response to the first
+        request sent with the key
+
+    """
+    key = request.META.get("HTTP_IDEMPOTENCY_KEY")
+    if not key:
+        return get_response()
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise DepositError(
+            BAD_REQUEST,
+            "Invalid Idempotency-Key header",
+            f"Idempotency keys are at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters.",
+        )
+
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        try:
+            idempotency_key = _claim(
+                client, key, request, datetime.timedelta(seconds=ttl)
+            )
+            break
+        except IntegrityError:
+            pass
+        try:
+            idempotency_key = IdempotencyKey.objects.get(client=client, key=key)
+        except IdempotencyKey.DoesNotExist:
+            # released (or expired) by the request which held it since the claim
+            # failed, claimed again
+            continue
+        if (idempotency_key.method, idempotency_key.path) != (
+            request.method,
+            request.path,
+        ):
+            raise DepositError(
+                BAD_REQUEST,
+                "Idempotency-Key already used",
+                f"The key {key} was sent with {idempotency_key.method} "
+                f"{idempotency_key.path}, use a new key for each request.",
+            )
+        if idempotency_key.response_status is not None:
+            return _replay(idempotency_key)
+        reclaimed = _reclaim(idempotency_key, datetime.timedelta(seconds=lease))
+        if reclaimed is None:
+            raise DepositError(
+                IDEMPOTENCY_KEY_IN_USE,
+                "A request with the same Idempotency-Key is being processed",
+                retry_after=1,
+            )
+        idempotency_key = reclaimed
+        break
+    else:
+        raise DepositError(
+            IDEMPOTENCY_KEY_IN_USE,
+            "A request with the same Idempotency-Key is being processed",
+            retry_after=1,
+        )
+
+    try:
+        response = get_response()
+    except BaseException:
+        # the request can be sent again with the same key
+        _claimed(idempotency_key).delete()
+        raise
+    if not 200 <= response.status_code < 300:
+        _claimed(idempotency_key).delete()
+        return response
+
+    _claimed(idempotency_key).update(
+        response_status=response.status_code,
+        response_content_type=response.get("Content-Type"),
+        response_location=response.get("Location"),
+        response_content=response.content,
+    )
+    return response
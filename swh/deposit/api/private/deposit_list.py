@@ -1,9 +1,9 @@
-# Copyright (C) 2018-2022  The Software Heritage developers
+# Copyright (C) 2018-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 from xml.etree import ElementTree
 
 from django.conf import settings
@@ -22,20 +22,28 @@ import sentry_sdk
 
 from swh.deposit.api.private import APIPrivateView
 from swh.deposit.api.utils import DefaultPagination, DepositSerializer
-from swh.deposit.models import Deposit
+from swh.deposit.models import Deposit, DepositRequest
 from swh.deposit.utils import parse_swh_deposit_origin, parse_swh_metadata_provenance
 from swh.model.swhids import QualifiedSWHID
 
 
-def _enrich_deposit_with_metadata(deposit: Deposit) -> Deposit:
-    deposit_requests = deposit.depositrequest_set.filter(type="metadata")
-    deposit_requests = deposit_requests.order_by("-id")
-    # enrich deposit with raw metadata when we have some
-    if deposit_requests and len(deposit_requests) > 0:
-        raw_meta = deposit_requests[0].raw_metadata
+def _enrich_deposits_with_metadata(deposits: List[Deposit]) -> List[Deposit]:
+    """Enrich the deposits with the raw metadata of their last metadata request, if
+    any (read in a single query)."""
+    last_requests = (
+        DepositRequest.objects.filter(deposit__in=deposits, type="metadata")
+        .order_by("deposit_id", "-id")
+        .distinct("deposit_id")
+        .only("deposit_id", "raw_metadata")
+    )
+    raw_metadata = {
+        request.deposit_id: request.raw_metadata for request in last_requests
+    }
+    for deposit in deposits:
+        raw_meta = raw_metadata.get(deposit.id)
         if raw_meta:
             deposit.set_raw_metadata(raw_meta)
-    return deposit
+    return deposits
 
 
 class APIList(ListAPIView, APIPrivateView):
@@ -57,12 +65,7 @@ class APIList(ListAPIView, APIPrivateView):
             queryset, self.request, view=self
         )
 
-        deposits = []
-        for deposit in page_result:
-            _enrich_deposit_with_metadata(deposit)
-            deposits.append(deposit)
-
-        return deposits
+        return _enrich_deposits_with_metadata(list(page_result))
 
     def get_queryset(self):
         """Retrieve queryset of deposits (with some optional filtering)."""
@@ -135,8 +138,10 @@ def deposit_list_datatables(request: Request) -> JsonResponse:
         paginator = Paginator(deposits, length)
 
         data = [
-            DepositSerializer(_enrich_deposit_with_metadata(d)).data
-            for d in paginator.page(page).object_list
+            DepositSerializer(d).data
+            for d in _enrich_deposits_with_metadata(
+                list(paginator.page(page).object_list)
+            )
         ]
 
         table_data["recordsTotal"] = deposits_count
@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2024  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -17,6 +17,7 @@ from swh.core import tarball
 from swh.deposit.api.common import APIGet
 from swh.deposit.api.private import APIPrivateView, DepositReadMixin
 from swh.deposit.config import ARCHIVE_TYPE, SWH_PERSON
+from swh.deposit.metadata_checks import cached_metadata_check
 from swh.deposit.models import Deposit
 from swh.deposit.utils import NAMESPACES, normalize_date
 from swh.model.hashutil import hash_to_hex
@@ -173,6 +174,14 @@ class APIReadMetadata(APIPrivateView, APIGet, DepositReadMixin):
                 **deposit** (Dict): deposit information relevant to build the revision
                   (author_date, committer_date, etc...)
 
+            and, when the ``check_metadata=true`` query parameter is set and the
+            metadata was already checked (see
+            :func:`swh.deposit.metadata_checks.cached_metadata_check`), the result
+            of :func:`swh.deposit.loader.checks.check_metadata` on it:
+
+                **metadata_check** (Dict): whether the check is ``ok``, and its
+                  ``details``
+
         """
         raw_metadata = self._metadata_get(deposit)
         author_date: Optional[dict]
@@ -231,4 +240,15 @@ class APIReadMetadata(APIPrivateView, APIGet, DepositReadMixin):
         self, request, collection_name: str, deposit: Deposit
     ) -> Tuple[int, Dict, str]:
         data = self.metadata_read(deposit)
+        if (
+            request.query_params.get("check_metadata") == "true"
+            and data["raw_metadata"]
+        ):
+            # for the deposit checker, which reuses the checks already made on the
+            # same metadata (and checks it itself otherwise, not to validate it in
+            # the request)
+            metadata_check = cached_metadata_check(data["raw_metadata"].encode("utf-8"))
+            if metadata_check is not None:
+                metadata_ok, details = metadata_check
+                data["metadata_check"] = {"ok": metadata_ok, "details": details}
         return status.HTTP_200_OK, data if data else {}, "application/json"
@@ -1,12 +1,14 @@
-# Copyright (C) 2017-2025  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
+from django.db import transaction
 from rest_framework.parsers import JSONParser
 
 from swh.deposit.api.common import APIPut, ParsedRequestHeaders
 from swh.deposit.api.private import APIPrivateView
+from swh.deposit.api.status_changes import notify_status_change
 from swh.deposit.errors import BAD_REQUEST, DepositError
 from swh.deposit.models import (
     DEPOSIT_STATUS_DETAIL,
@@ -14,6 +16,7 @@ from swh.deposit.models import (
     DEPOSIT_STATUS_VERIFIED,
     Deposit,
 )
+from swh.deposit.webhooks import enqueue_status_change
 from swh.model.hashutil import hash_to_bytes
 from swh.model.swhids import CoreSWHID, ObjectType, QualifiedSWHID
 from swh.scheduler.utils import create_oneshot_task
@@ -76,7 +79,8 @@ class APIUpdateStatus(APIPrivateView, APIPut):
         collection_name: str,
         deposit: Deposit,
     ) -> None:
-        """Update the deposit with status, SWHIDs and release infos.
+        """Update the deposit with status, SWHIDs and release infos, and notify
+        the clients of the status change.
 
         Returns:
             204 No content
@@ -85,6 +89,7 @@ class APIUpdateStatus(APIPrivateView, APIPut):
         data = request.data
 
         status = data["status"]
+        previous_status = deposit.status
         deposit.status = status
         if status == DEPOSIT_STATUS_LOAD_SUCCESS:
             origin_url = data["origin_url"]
@@ -129,4 +134,8 @@ class APIUpdateStatus(APIPrivateView, APIPut):
         if "status_detail" in data:
             deposit.status_detail = data["status_detail"]
 
-        deposit.save()
+        with transaction.atomic():
+            deposit.save()
+            if status != previous_status:
+                notify_status_change(deposit)
+                enqueue_status_change(deposit)
@@ -1,15 +1,108 @@
-# Copyright (C) 2017-2020  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
-from django.http import HttpResponse
+import datetime
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlencode, urlsafe_base64_decode, urlsafe_base64_encode
 from rest_framework import status
+from rest_framework.renderers import BaseRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
 
+from swh.deposit.api.admission import acquire_wait_slot, release_wait_slot
 from swh.deposit.api.common import APIBase, get_deposit_by_id
 from swh.deposit.api.converters import convert_status_detail
-from swh.deposit.models import DEPOSIT_STATUS_DETAIL
+from swh.deposit.api.status_changes import (
+    DEFAULT_POLL_INTERVAL,
+    FINAL_STATUSES,
+    wait_for_status_change,
+)
+from swh.deposit.api.throttling import STATUS_BUCKET
+from swh.deposit.errors import BAD_REQUEST, DepositError
+from swh.deposit.models import DEPOSIT_STATUS_DETAIL, Deposit
+
+# Maximum number of deposits whose status is returned by a single request
+MAX_STATUSES = 1000
+# Default maximum duration (in seconds) of the long-polling of a deposit status
+DEFAULT_STATUS_MAX_WAIT = 60
+# Default maximum duration (in seconds) of the event streams of a deposit status
+# (clients reconnect to get the next events)
+DEFAULT_STATUS_STREAM_MAX_DURATION = 120
+# Seconds between two comments sent to keep the event streams alive
+KEEPALIVE_INTERVAL = 15.0
+
+STATUS_KEYS = (
+    "status",
+    "swhid",
+    "swhid_context",
+    "external_id",
+    "origin_url",
+)
+
+
+def deposit_status_detail(deposit: Deposit) -> str:
+    status_detail = convert_status_detail(deposit.status_detail)
+    if not status_detail:
+        status_detail = DEPOSIT_STATUS_DETAIL[deposit.status]
+    return status_detail
+
+
+def deposit_status_context(deposit: Deposit) -> Dict[str, Any]:
+    context = {
+        "deposit_id": deposit.id,
+        "status_detail": deposit_status_detail(deposit),
+    }
+    for k in STATUS_KEYS:
+        context[k] = getattr(deposit, k, None)
+    return context
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Accept ``text/event-stream`` requests, answered with a streaming response
+    rather than rendered."""
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+
+
+async def _aiter_in_thread(iterator: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Iterate over a blocking iterator in the thread of the request, for the ASGI
+    handler to send each item as soon as it is produced."""
+    next_item = sync_to_async(next)
+    while True:
+        item = await next_item(iterator, None)
+        if item is None:
+            return
+        yield item
+
+
+class StatusStreamResponse(StreamingHttpResponse):
+    """Event stream of a deposit status, releasing the wait slot of the client
+    (see :func:`swh.deposit.api.admission.acquire_wait_slot`) once closed."""
+
+    def __init__(self, *args, wait_slot: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_slot: Optional[str] = wait_slot
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self.wait_slot is not None:
+                release_wait_slot(self.wait_slot)
+                self.wait_slot = None
 
 
 class StateAPI(APIBase):
@@ -17,37 +110,244 @@ class StateAPI(APIBase):
 
     What's known as 'State-IRI' in the sword specification.
 
+    Rather than polling it, clients can wait for the status to change: either with
+    the ``wait`` parameter (in seconds, and optionally the ``since_status``
+    parameter, by default the current status), the response being sent once the
+    status changed or on timeout; or by accepting ``text/event-stream``
+    responses, an event being sent (as a Server-Sent Event) on each status change
+    until the deposit reaches a final status. See
+    :mod:`swh.deposit.api.status_changes`. The requests waiting at once are
+    limited per client (see :mod:`swh.deposit.api.admission`).
+
     HTTP verbs supported: GET
 
     """
 
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer)
+
+    def rate_limit_bucket(self, request: Request) -> Optional[str]:
+        return STATUS_BUCKET
+
     def get(self, req, collection_name: str, deposit_id: int) -> HttpResponse:
         deposit = get_deposit_by_id(deposit_id, collection_name)
 
         self.checks(req, collection_name, deposit)
 
-        status_detail = convert_status_detail(deposit.status_detail)
-        if not status_detail:
-            status_detail = DEPOSIT_STATUS_DETAIL[deposit.status]
+        poll_interval = self.config.get("status_poll_interval", DEFAULT_POLL_INTERVAL)
+        if isinstance(req.accepted_renderer, EventStreamRenderer):
+            duration = self.config.get(
+                "status_stream_max_duration", DEFAULT_STATUS_STREAM_MAX_DURATION
+            )
+            wait_slot = acquire_wait_slot(self.admission_limits, self.get_client(req))
+            events = self._status_events(deposit, duration, poll_interval)
+            response = StatusStreamResponse(
+                (
+                    _aiter_in_thread(events)
+                    if isinstance(req._request, ASGIRequest)
+                    else events
+                ),
+                content_type="text/event-stream",
+                wait_slot=wait_slot,
+            )
+            response["Cache-Control"] = "no-cache"
+            # do not let proxies buffer the events
+            response["X-Accel-Buffering"] = "no"
+            return response
 
-        context = {
-            "deposit_id": deposit.id,
-            "status_detail": status_detail,
-        }
-        keys = (
-            "status",
-            "swhid",
-            "swhid_context",
-            "external_id",
-            "origin_url",
-        )
-        for k in keys:
-            context[k] = getattr(deposit, k, None)
+        wait = req.query_params.get("wait")
+        if wait is not None:
+            since_status = req.query_params.get("since_status", deposit.status)
+            if since_status not in DEPOSIT_STATUS_DETAIL:
+                raise DepositError(
+                    BAD_REQUEST,
+                    f"Unknown status {since_status}, possible statuses are "
+                    f"{list(DEPOSIT_STATUS_DETAIL)}",
+                )
+            try:
+                timeout = float(wait)
+            except ValueError:
+                raise DepositError(BAD_REQUEST, f"Invalid wait duration: {wait}")
+            max_wait = self.config.get("status_max_wait", DEFAULT_STATUS_MAX_WAIT)
+            wait_slot = acquire_wait_slot(self.admission_limits, self.get_client(req))
+            try:
+                deposit = wait_for_status_change(
+                    deposit.id,
+                    since_status,
+                    timeout=max(0.0, min(timeout, max_wait)),
+                    poll_interval=poll_interval,
+                )
+            finally:
+                release_wait_slot(wait_slot)
 
         return render(
             req,
             "deposit/state.xml",
-            context=context,
+            context=deposit_status_context(deposit),
+            content_type="application/xml",
+            status=status.HTTP_200_OK,
+        )
+
+    def _status_events(
+        self, deposit: Deposit, duration: float, poll_interval: float
+    ) -> Iterator[bytes]:
+        """Events sent on each status change of the deposit (starting with its
+        current status), until it reaches a final status or for ``duration``
+        seconds."""
+        deadline = time.monotonic() + duration
+        while True:
+            context = deposit_status_context(deposit)
+            # same keys as the tags of the state.xml template
+            data = {
+                "deposit_id": deposit.id,
+                "deposit_status": context["status"],
+                "deposit_status_detail": context["status_detail"],
+                "deposit_swh_id": context["swhid"],
+                "deposit_swh_id_context": context["swhid_context"],
+                "deposit_external_id": context["external_id"],
+                "deposit_origin_url": context["origin_url"],
+            }
+            yield f"event: status\ndata: {json.dumps(data)}\n\n".encode()
+            while True:
+                remaining = deadline - time.monotonic()
+                if deposit.status in FINAL_STATUSES or remaining <= 0:
+                    return
+                new_deposit = wait_for_status_change(
+                    deposit.id,
+                    deposit.status,
+                    timeout=min(remaining, KEEPALIVE_INTERVAL),
+                    poll_interval=poll_interval,
+                )
+                if new_deposit.status != deposit.status:
+                    deposit = new_deposit
+                    break
+                yield b": keep-alive\n\n"
+
+
+def encode_cursor(deposit: Deposit) -> str:
+    """Opaque position of the deposit in the deposits of its collection, ordered by
+    modification date then id."""
+    position = f"{deposit.update_date.isoformat()} {deposit.id}"
+    return urlsafe_base64_encode(position.encode())
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """Modification date and id of the deposit encoded by :func:`encode_cursor`
+
+    Raises:
+        ValueError if the cursor is invalid
+
+    """
+    try:
+        update_date, deposit_id = urlsafe_base64_decode(cursor).decode().split(" ")
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    date = parse_datetime(update_date)
+    if date is None or timezone.is_naive(date):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return date, int(deposit_id)
+
+
+class CollectionStateAPI(APIBase):
+    """Status of many deposits of the client in a collection at once.
+
+    Either of the deposits whose ids are given (``ids`` parameter, comma-separated),
+    or of the deposits modified since a date (``since`` parameter, in ISO 8601
+    format), at most :const:`MAX_STATUSES` at once, the following ones being
+    linked by the ``Link`` header (with an opaque ``cursor`` parameter).
+
+    HTTP verbs supported: GET
+
+    """
+
+    def rate_limit_bucket(self, request: Request) -> Optional[str]:
+        return STATUS_BUCKET
+
+    def get(self, req, collection_name: str) -> HttpResponse:
+        self.checks(req, collection_name)
+
+        ids = req.query_params.get("ids")
+        since = req.query_params.get("since")
+        cursor = req.query_params.get("cursor")
+        if [ids, since, cursor].count(None) != 2:
+            raise DepositError(
+                BAD_REQUEST,
+                "Exactly one of 'ids', 'since' or 'cursor' parameter must be given",
+            )
+
+        # only the deposits of the client, as collections may be shared by clients
+        deposits = Deposit.objects.filter(
+            collection__name=collection_name, client=self.get_client(req)
+        ).only("id", "update_date", "status_detail", *STATUS_KEYS)
+        links = []
+        if ids is not None:
+            deposit_ids = self._parse_ids(ids)
+            results = list(deposits.filter(id__in=deposit_ids).order_by("id"))
+        else:
+            if since is not None:
+                deposits = deposits.filter(update_date__gte=self._parse_date(since))
+            else:
+                # the deposits after the last one sent, in the order of modification
+                # date then id: deposits modified at the same date are neither sent
+                # again nor missed
+                update_date, deposit_id = self._parse_cursor(cursor)
+                deposits = deposits.filter(
+                    Q(update_date__gt=update_date)
+                    | Q(update_date=update_date, id__gt=deposit_id)
+                )
+            results = list(deposits.order_by("update_date", "id")[:MAX_STATUSES])
+            if len(results) == MAX_STATUSES:
+                next_cursor = encode_cursor(results[-1])
+                next_url = req.build_absolute_uri(
+                    f"{req.path}?{urlencode({'cursor': next_cursor})}"
+                )
+                links.append(f'<{next_url}>; rel="next"')
+
+        response = render(
+            req,
+            "deposit/collection_state.xml",
+            context={
+                "count": len(results),
+                "results": [self._deposit_status(deposit) for deposit in results],
+            },
             content_type="application/xml",
             status=status.HTTP_200_OK,
         )
+        if links:
+            response["Link"] = ",".join(links)
+        return response
+
+    def _parse_ids(self, ids: str) -> List[int]:
+        try:
+            deposit_ids = [int(id_) for id_ in ids.split(",") if id_]
+        except ValueError:
+            raise DepositError(BAD_REQUEST, f"Invalid deposit ids: {ids}")
+        if len(deposit_ids) > MAX_STATUSES:
+            raise DepositError(
+                BAD_REQUEST,
+                f"Too many deposit ids, at most {MAX_STATUSES} can be given at once",
+            )
+        return deposit_ids
+
+    def _parse_cursor(self, cursor: str) -> Tuple[datetime.datetime, int]:
+        try:
+            update_date, deposit_id = decode_cursor(cursor)
+        except ValueError:
+            raise DepositError(BAD_REQUEST, f"Invalid cursor: {cursor}")
+        return update_date, deposit_id
+
+    def _parse_date(self, since: str) -> datetime.datetime:
+        try:
+            date = parse_datetime(since)
+        except ValueError:
+            date = None
+        if date is None:
+            raise DepositError(BAD_REQUEST, f"Invalid date: {since}")
+        if timezone.is_naive(date):
+            date = timezone.make_aware(date, datetime.timezone.utc)
+        return date
+
+    def _deposit_status(self, deposit: Deposit) -> Dict[str, Any]:
+        return {
+            **deposit_status_context(deposit),
+            "update_date": deposit.update_date.isoformat(),
+        }
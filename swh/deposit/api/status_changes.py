@@ -0,0 +1,170 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Notification of the status changes of the deposits, to answer the clients
+waiting for them on the State-IRI (long-polling or Server-Sent Events) as soon as
+they happen.
+
+On PostgreSQL, status changes are notified on the :const:`CHANNEL` channel
+(``NOTIFY``, sent once the transaction is committed). While requests wait for
+status changes, a thread of the server process listens to that channel to wake
+them up. The deposits waited for are also read again from the database every
+``poll_interval`` seconds, which is all that happens on other databases, or when
+the notifications are not received (e.g. in tests, whose transactions are never
+committed).
+"""
+
+from functools import partial
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+
+from swh.deposit.config import (
+    DEPOSIT_STATUS_LOAD_FAILURE,
+    DEPOSIT_STATUS_LOAD_SUCCESS,
+    DEPOSIT_STATUS_REJECTED,
+)
+from swh.deposit.models import Deposit
+
+logger = logging.getLogger(__name__)
+
+# Channel of the status change notifications, whose payload is the deposit id
+CHANNEL = "deposit_status"
+# Seconds between two reads of a deposit waited for
+DEFAULT_POLL_INTERVAL = 5.0
+# Seconds the listener waits for notifications before checking it is still needed
+LISTEN_TIMEOUT = 1.0
+# Seconds before listening again after the listener failed
+LISTEN_RETRY_DELAY = 60.0
+
+# Statuses no longer changing
+FINAL_STATUSES = (
+    DEPOSIT_STATUS_LOAD_SUCCESS,
+    DEPOSIT_STATUS_LOAD_FAILURE,
+    DEPOSIT_STATUS_REJECTED,
+)
+
+
+def _notify(deposit_id: int) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, str(deposit_id)])
+
+
+def notify_status_change(deposit: Deposit) -> None:
+    """Notify the requests waiting for a status change of ``deposit``, once the
+    current transaction is committed (no-op on databases other than PostgreSQL)."""
+    if connection.vendor != "postgresql":
+        return
+    transaction.on_commit(partial(_notify, deposit.id))
+
+
+class StatusListener:
+    """Listens to the status change notifications in a thread, running while
+    requests wait for status changes, to wake them up."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: Dict[int, Set[threading.Event]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        # the listener is not started again before that time after a failure
+        self._retry_time = 0.0
+
+    def register(self, deposit_id: int) -> threading.Event:
+        """Returns an event set when a status change of the deposit is notified,
+        to unregister once no longer waited for."""
+        event = threading.Event()
+        with self._lock:
+            self._events.setdefault(deposit_id, set()).add(event)
+            if (
+                self._thread is None
+                and connection.vendor == "postgresql"
+                and time.monotonic() >= self._retry_time
+            ):
+                self._stopping = False
+                self._thread = threading.Thread(
+                    target=self._run, name="deposit-status-listener", daemon=True
+                )
+                self._thread.start()
+        return event
+
+    def unregister(self, deposit_id: int, event: threading.Event) -> None:
+        with self._lock:
+            events = self._events.get(deposit_id, set())
+            events.discard(event)
+            if not events:
+                self._events.pop(deposit_id, None)
+
+    def stop(self) -> None:
+        """Stop listening, and wait for the thread to close its connection."""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+        if thread is not None:
+            thread.join()
+
+    def _wake_up(self, deposit_id: int) -> None:
+        with self._lock:
+            for event in self._events.get(deposit_id, ()):
+                event.set()
+
+    def _run(self) -> None:
+        db = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            db.connect()
+            db.connection.execute(f"LISTEN {CHANNEL}")
+            while True:
+                for notify in db.connection.notifies(timeout=LISTEN_TIMEOUT):
+                    try:
+                        self._wake_up(int(notify.payload))
+                    except ValueError:
+                        logger.warning("Invalid status notification %r", notify)
+                with self._lock:
+                    if self._stopping or not self._events:
+                        self._thread = None
+                        return
+        except Exception:
+            logger.exception(
+                "Cannot listen to the status changes, the deposits are polled"
+            )
+            with self._lock:
+                self._thread = None
+                self._retry_time = time.monotonic() + LISTEN_RETRY_DELAY
+        finally:
+            db.close()
+
+
+listener = StatusListener()
+
+
+def wait_for_status_change(
+    deposit_id: int,
+    since_status: str,
+    timeout: float,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> Deposit:
+    """Wait at most ``timeout`` seconds for the status of the deposit to be other
+    than ``since_status``.
+
+    Returns:
+        the deposit, read from the database once its status changed or on timeout
+
+    """
+    deadline = time.monotonic() + timeout
+    # registered before reading the deposit, not to miss a change in between
+    event = listener.register(deposit_id)
+    try:
+        while True:
+            deposit = Deposit.objects.get(pk=deposit_id)
+            remaining = deadline - time.monotonic()
+            if deposit.status != since_status or remaining <= 0:
+                return deposit
+            event.wait(min(poll_interval, remaining))
+            event.clear()
+    finally:
+        listener.unregister(deposit_id, event)
@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2020  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -11,8 +11,6 @@ from swh.deposit.api.common import APIPost, ParsedRequestHeaders, Receipt
 from swh.deposit.config import EDIT_IRI, EM_IRI
 from swh.deposit.models import Deposit
 from swh.deposit.parsers import SWHAtomEntryParser, SWHMultiPartParser
-from swh.storage import get_storage
-from swh.storage.interface import StorageInterface
 
 
 class SwordEditAPI(APIPost):
@@ -26,12 +24,6 @@ class SwordEditAPI(APIPost):
 
     parser_classes = (SWHMultiPartParser, SWHAtomEntryParser)
 
-    def __init__(self):
-        super().__init__()
-        self.storage_metadata: StorageInterface = get_storage(
-            **self.config["storage_metadata"]
-        )
-
     def process_post(
         self,
         request,
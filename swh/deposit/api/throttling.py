@@ -0,0 +1,152 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Rate limiting of the deposit requests, with a token bucket per client,
+collection and kind of requests.
+
+The limits are read from the ``rate_limits`` section of the server configuration,
+e.g.::
+
+    rate_limits:
+      # requests per second, and maximum number of requests in a burst
+      metadata:
+        rate: 1
+        burst: 20
+      archive:
+        rate: 0.1
+        burst: 5
+      status:
+        rate: 0.5
+        burst: 30
+
+Kinds of requests without limit are not rate limited. The buckets are stored in
+the Django cache backend (so they are shared by all the server processes when the
+cache is), or in the server process when the cache is not available.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import attr
+from django.core.cache import cache
+
+from swh.deposit.errors import TOO_MANY_REQUESTS, DepositError
+from swh.deposit.models import DepositClient, DepositCollection
+
+logger = logging.getLogger(__name__)
+
+# Metadata-only requests
+METADATA_BUCKET = "metadata"
+# Requests sending an archive (possibly with its metadata)
+ARCHIVE_BUCKET = "archive"
+# Polling of the deposit status
+STATUS_BUCKET = "status"
+
+BUCKETS = (METADATA_BUCKET, ARCHIVE_BUCKET, STATUS_BUCKET)
+
+# Buckets used when the cache backend fails, as (tokens, last update) per key
+_local_buckets: Dict[str, Tuple[float, float]] = {}
+_local_buckets_lock = threading.Lock()
+
+
+@attr.s(frozen=True)
+class RateLimit:
+    """Limit of a token bucket: ``rate`` tokens are added per second, up to
+    ``burst`` tokens"""
+
+    rate = attr.ib(type=float)
+    burst = attr.ib(type=int)
+
+    def refill_duration(self) -> float:
+        """Seconds for an empty bucket to be full again"""
+        return self.burst / self.rate
+
+
+def rate_limits_from_config(config: Dict[str, Any]) -> Dict[str, RateLimit]:
+    """Read the rate limits per bucket from the server configuration."""
+    limits = {}
+    for bucket, limit in config.get("rate_limits", {}).items():
+        if bucket not in BUCKETS:
+            raise ValueError(
+                f"Unknown rate limit {bucket!r}, expected one of {BUCKETS}"
+            )
+        limits[bucket] = RateLimit(**limit)
+    return limits
+
+
+def take_token(
+    state: Optional[Tuple[float, float]], limit: RateLimit, now: float
+) -> Tuple[Tuple[float, float], float]:
+    """Take a token from a bucket.
+
+    Args:
+        state: the bucket as (tokens, last update), None for a new (full) bucket
+        limit: the limit of the bucket
+        now: the current time
+
+    Returns:
+        the new state of the bucket, and the delay (in seconds) before a token is
+        available (0 if a token was taken)
+
+    """
+    tokens, updated = state if state is not None else (float(limit.burst), now)
+    tokens = min(float(limit.burst), tokens + max(now - updated, 0) * limit.rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / limit.rate
+
+
+def _take_cached_token(key: str, limit: RateLimit, now: float) -> float:
+    # Concurrent requests of a client may read the same bucket state, which lets
+    # a few more requests in than the limit: an acceptable approximation for
+    # traffic shaping, which does not need locks in the cache backend
+    state, delay = take_token(cache.get(key), limit, now)
+    cache.set(key, state, timeout=math.ceil(limit.refill_duration()) + 1)
+    return delay
+
+
+def _take_local_token(key: str, limit: RateLimit, now: float) -> float:
+    with _local_buckets_lock:
+        state, delay = take_token(_local_buckets.get(key), limit, now)
+        _local_buckets[key] = state
+    return delay
+
+
+def check_rate_limit(
+    limits: Dict[str, RateLimit],
+    bucket: str,
+    client: DepositClient,
+    collection: DepositCollection,
+) -> None:
+    """Take a token from the bucket of the client in the collection.
+
+    Raises:
+        DepositError (429) if the bucket is empty
+
+    """
+    limit = limits.get(bucket)
+    if limit is None:
+        return
+    key = f"swh.deposit.rate-limit.{bucket}.{client.id}.{collection.id}"
+    now = time.time()
+    try:
+        delay = _take_cached_token(key, limit, now)
+    except Exception as e:
+        logger.warning("Rate limit cache unavailable, using local buckets: %s", e)
+        delay = _take_local_token(key, limit, now)
+
+    if delay:
+        retry_after = math.ceil(delay)
+        raise DepositError(
+            TOO_MANY_REQUESTS,
+            f"Rate limit exceeded for {bucket} requests of client "
+            f"{client.username} in collection {collection.name}",
+            f"At most {limit.rate} {bucket} requests per second are allowed "
+            f"(bursts of {limit.burst} requests), retry in {retry_after} seconds.",
+            retry_after=retry_after,
+        )
@@ -0,0 +1,416 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import hashlib
+import re
+import tempfile
+from typing import Optional, Tuple
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import transaction
+from django.http import HttpResponse
+from django.shortcuts import render
+from rest_framework import status
+from rest_framework.request import Request
+
+from swh.deposit.api.common import (
+    APIBase,
+    ParsedRequestHeaders,
+    Receipt,
+    get_deposit_by_id,
+)
+from swh.deposit.api.direct_upload import direct_upload_properties
+from swh.deposit.config import ARCHIVE_KEY, EDIT_IRI
+from swh.deposit.errors import (
+    BAD_REQUEST,
+    CHECKSUM_MISMATCH,
+    MAX_UPLOAD_SIZE_EXCEEDED,
+    NOT_FOUND,
+    UPLOAD_OFFSET_MISMATCH,
+    DepositError,
+)
+from swh.deposit.inspector import TAR_BLOCK_SIZE, ArchiveInspector
+from swh.deposit.models import Deposit, UploadSession
+from swh.deposit.uploadhandler import CHECKSUM_ALGORITHMS, UploadChecksums
+from swh.model import hashutil
+from swh.model.hashutil import MultiHash
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (?P<start>\d+)-(?P<end>\d+)/(?P<total>\d+|\*)$")
+
+
+def get_upload_session(
+    deposit: Deposit, session_id: int, for_update: bool = False
+) -> UploadSession:
+    """Gets an upload session of the deposit (locked until the end of the
+    transaction if ``for_update``), or raises `DepositError`."""
+    upload_sessions = UploadSession.objects
+    if for_update:
+        upload_sessions = upload_sessions.select_for_update()
+    try:
+        return upload_sessions.get(pk=session_id, deposit=deposit)
+    except (UploadSession.DoesNotExist, ValueError):
+        raise DepositError(
+            NOT_FOUND, f"Upload session {session_id} of deposit {deposit.id} unknown"
+        )
+
+
+def assemble_upload_session(upload_session: UploadSession) -> TemporaryUploadedFile:
+    """Concatenate the chunks received by a complete upload session into a
+    temporary file, computing its checksums (see
+    :func:`swh.deposit.uploadhandler.get_checksums`) and inspecting it (see
+    :class:`swh.deposit.inspector.ArchiveInspector`) on the way."""
+    archive = TemporaryUploadedFile(
+        upload_session.filename,
+        upload_session.content_type,
+        upload_session.length,
+        None,
+    )
+    hasher = MultiHash(hash_names=CHECKSUM_ALGORITHMS)
+    inspector = ArchiveInspector()
+    offset = 0
+    try:
+        while offset < upload_session.length:
+            chunk_path = upload_session.chunk_path(offset)
+            with default_storage.open(chunk_path, "rb") as chunk:
+                for data in chunk.chunks():
+                    inspector.feed(data)
+                    hasher.update(data)
+                    archive.write(data)
+                    offset += len(data)
+        inspector.close()
+    except Exception:
+        archive.close()
+        raise
+    archive.seek(0)
+    archive.checksums = UploadChecksums.from_dict(offset, hasher.digest())
+    return archive
+
+
+class UploadSessionAPI(APIBase):
+    """Resumable upload of an archive, opened on the Col-IRI or EM-IRI with an
+    empty request and an Upload-Length header.
+
+    HTTP verbs supported: GET (progress), PATCH (send a chunk), POST (commit the
+    archive to the deposit), DELETE (abort the upload)
+
+    Direct upload sessions do not accept chunks, the archive is sent to the
+    pre-signed URL provided when opening the session instead.
+
+    """
+
+    def rate_limit_bucket(self, request: Request) -> Optional[str]:
+        # the upload was rate limited when the session was opened
+        return None
+
+    def _session_response(
+        self, request: Request, upload_session: UploadSession, status_code: int
+    ) -> HttpResponse:
+        if status_code == status.HTTP_204_NO_CONTENT:
+            response = HttpResponse(status=status_code)
+        else:
+            response = render(
+                request,
+                "deposit/upload_session.xml",
+                context={"upload_session": upload_session},
+                content_type="application/xml",
+                status=status_code,
+            )
+        response["Upload-Offset"] = str(upload_session.offset)
+        response["Upload-Length"] = str(upload_session.length)
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def _check_offset(self, upload_session: UploadSession, start: int) -> None:
+        if upload_session.offset != start:
+            raise DepositError(
+                UPLOAD_OFFSET_MISMATCH,
+                "Chunk does not start at the current offset of the upload session",
+                f"The chunk starts at byte {start} but the upload session expects "
+                f"byte {upload_session.offset}; check the upload session to resume "
+                "the upload.",
+            )
+
+    def _parse_content_range(
+        self, request: Request, upload_session: UploadSession
+    ) -> Tuple[int, int]:
+        """Parse the Content-Range header of a chunk into its first and last byte
+        offsets (both inclusive)."""
+        content_range = request._request.META.get("HTTP_CONTENT_RANGE", "")
+        match = CONTENT_RANGE_RE.match(content_range)
+        if not match:
+            raise DepositError(
+                BAD_REQUEST,
+                "CONTENT_RANGE header is mandatory",
+                "Chunks must be sent with a 'Content-Range: bytes <first>-<last>/"
+                "<length>' header.",
+            )
+        start, end = int(match["start"]), int(match["end"])
+        total = match["total"]
+        if end < start or end >= upload_session.length:
+            raise DepositError(
+                BAD_REQUEST,
+                f"Invalid range {content_range!r}",
+                f"The upload session length is {upload_session.length} bytes.",
+            )
+        if total != "*" and int(total) != upload_session.length:
+            raise DepositError(
+                BAD_REQUEST,
+                "Archive length does not match the upload session length",
+                f"The upload session length is {upload_session.length} bytes.",
+            )
+        return start, end
+
+    def get(
+        self, request: Request, collection_name: str, deposit_id: int, session_id: int
+    ) -> HttpResponse:
+        """Describe the upload session (notably its current offset, to resume an
+        interrupted upload).
+
+        Returns:
+            200 with the upload session description
+
+        """
+        deposit = get_deposit_by_id(deposit_id, collection_name)
+        self.checks(request, collection_name, deposit)
+        upload_session = get_upload_session(deposit, session_id)
+        return self._session_response(request, upload_session, status.HTTP_200_OK)
+
+    def patch(
+        self, request: Request, collection_name: str, deposit_id: int, session_id: int
+    ) -> HttpResponse:
+        """Append a chunk to the upload session.
+
+        Returns:
+            204 with the new offset in the Upload-Offset header
+            400 if the Content-Range header is missing or invalid
+            409 if the chunk does not start at the current offset
+            412 if the Content-MD5 header does not match the chunk
+            413 if the chunk exceeds the max upload size configured
+
+        """
+        deposit = get_deposit_by_id(deposit_id, collection_name)
+        headers = self.checks(request, collection_name, deposit)
+        upload_session = get_upload_session(deposit, session_id)
+
+        if upload_session.archive_name is not None:
+            raise DepositError(
+                BAD_REQUEST,
+                "Direct upload sessions do not accept chunks",
+                "The archive must be sent to the upload URL of the upload session.",
+            )
+
+        start, end = self._parse_content_range(request, upload_session)
+        self._check_offset(upload_session, start)
+
+        length = end - start + 1
+        if headers.content_length != length:
+            raise DepositError(
+                BAD_REQUEST,
+                "Wrong length",
+                f"The Content-Range header announces {length} bytes but the "
+                f"Content-Length header is {headers.content_length}.",
+            )
+        max_upload_size = self.config["max_upload_size"]
+        if length > max_upload_size:
+            raise DepositError(
+                MAX_UPLOAD_SIZE_EXCEEDED,
+                f"Chunk size limit exceeded (max {max_upload_size} bytes).",
+            )
+
+        with tempfile.TemporaryFile() as chunk:
+            self._receive_chunk(request, chunk, headers, length)
+            if start == 0:
+                # reject content which is not an archive from the first chunk
+                chunk.seek(0)
+                ArchiveInspector().feed(chunk.read(TAR_BLOCK_SIZE))
+
+            with transaction.atomic():
+                upload_session = UploadSession.objects.select_for_update().get(
+                    pk=upload_session.pk
+                )
+                # concurrent requests may have sent the same chunk meanwhile
+                self._check_offset(upload_session, start)
+
+                chunk_path = upload_session.chunk_path(start)
+                if default_storage.exists(chunk_path):
+                    # leftover of an interrupted request
+                    default_storage.delete(chunk_path)
+                chunk.seek(0)
+                default_storage.save(chunk_path, File(chunk))
+
+                upload_session.offset = end + 1
+                upload_session.save(update_fields=["offset"])
+
+        return self._session_response(
+            request, upload_session, status.HTTP_204_NO_CONTENT
+        )
+
+    def _receive_chunk(
+        self, request: Request, chunk, headers: ParsedRequestHeaders, length: int
+    ) -> None:
+        """Read the chunk from the request body into the ``chunk`` file, then check
+        its length and md5sum."""
+        md5 = hashlib.md5()
+        received = 0
+        stream = request.stream
+        while stream is not None:
+            data = stream.read(hashutil.HASH_BLOCK_SIZE)
+            if not data:
+                break
+            md5.update(data)
+            chunk.write(data)
+            received += len(data)
+
+        if received != length:
+            raise DepositError(
+                BAD_REQUEST,
+                "Incomplete chunk",
+                f"Received {received} bytes out of the {length} bytes announced.",
+            )
+
+        md5sum = md5.digest()
+        if headers.content_md5sum and headers.content_md5sum != md5sum:
+            raise DepositError(
+                CHECKSUM_MISMATCH,
+                "Wrong md5 hash",
+                f"The checksum sent {hashutil.hash_to_hex(headers.content_md5sum)} "
+                f"and the actual checksum {hashutil.hash_to_hex(md5sum)} of the chunk "
+                "does not match.",
+            )
+
+    def post(
+        self, request: Request, collection_name: str, deposit_id: int, session_id: int
+    ) -> HttpResponse:
+        """Commit the complete upload session as an archive of the deposit.
+
+        The optional Content-MD5 header is the md5sum of the whole archive.
+
+        Returns:
+            201 with the deposit receipt
+            400 if the upload session did not receive the whole archive yet
+            404 if the upload session is unknown, or was already committed
+            412 if the Content-MD5 header does not match the archive, or if the
+            archive sent to the upload URL does not have the expected length
+
+        """
+        return self.idempotent(
+            request,
+            lambda: self._commit(request, collection_name, deposit_id, session_id),
+        )
+
+    def _commit(
+        self, request: Request, collection_name: str, deposit_id: int, session_id: int
+    ) -> HttpResponse:
+        deposit = get_deposit_by_id(deposit_id, collection_name)
+        headers = self.checks(request, collection_name, deposit)
+        with transaction.atomic():
+            # concurrent commits of the session (e.g. retries without
+            # Idempotency-Key) wait for this one, then find the session discarded
+            upload_session = get_upload_session(deposit, session_id, for_update=True)
+
+            if upload_session.archive_name is not None:
+                self._commit_direct_upload(deposit, upload_session, headers)
+            else:
+                self._commit_chunks(deposit, upload_session, headers)
+
+            upload_session.discard(delete_archive=False)
+
+        receipt = Receipt(
+            deposit_id=deposit.id,
+            deposit_date=deposit.reception_date,
+            status=deposit.status,
+            archive=upload_session.filename,
+        )
+        return self._make_deposit_receipt(
+            request, collection_name, status.HTTP_201_CREATED, EDIT_IRI, receipt
+        )
+
+    def _commit_chunks(
+        self,
+        deposit: Deposit,
+        upload_session: UploadSession,
+        headers: ParsedRequestHeaders,
+    ) -> None:
+        if upload_session.offset != upload_session.length:
+            raise DepositError(
+                BAD_REQUEST,
+                "Upload session is incomplete",
+                f"Only {upload_session.offset} bytes out of {upload_session.length} "
+                "were received.",
+            )
+
+        archive = assemble_upload_session(upload_session)
+        try:
+            self._check_file_md5sum(archive, headers.content_md5sum)
+
+            with self._deposit_put(deposit=deposit, in_progress=headers.in_progress):
+                self._deposit_request_put(
+                    deposit,
+                    {ARCHIVE_KEY: archive},
+                    replace_archives=upload_session.replace_archives,
+                )
+        finally:
+            archive.close()
+
+    def _commit_direct_upload(
+        self,
+        deposit: Deposit,
+        upload_session: UploadSession,
+        headers: ParsedRequestHeaders,
+    ) -> None:
+        """Check the archive sent to the pre-signed URL against the upload session,
+        without reading it again when the storage provides its md5sum."""
+        properties = direct_upload_properties(upload_session)
+        if properties is None:
+            raise DepositError(
+                BAD_REQUEST,
+                "Upload session is incomplete",
+                "The archive must be sent to the upload URL before committing it.",
+            )
+
+        length, md5sum = properties
+        if length != upload_session.length:
+            raise DepositError(
+                CHECKSUM_MISMATCH,
+                "Wrong length",
+                f"The archive uploaded is {length} bytes long, "
+                f"{upload_session.length} bytes were expected.",
+            )
+        if headers.content_md5sum and headers.content_md5sum != md5sum:
+            raise DepositError(
+                CHECKSUM_MISMATCH,
+                "Wrong md5 hash",
+                f"The checksum sent {hashutil.hash_to_hex(headers.content_md5sum)} "
+                f"and the actual checksum {hashutil.hash_to_hex(md5sum)} "
+                "does not match.",
+            )
+
+        with self._deposit_put(deposit=deposit, in_progress=headers.in_progress):
+            deposit_request = self._deposit_request_put(
+                deposit,
+                {ARCHIVE_KEY: upload_session.archive_name},
+                replace_archives=upload_session.replace_archives,
+            )
+            deposit_request.archive_length = length
+            deposit_request.archive_md5 = hashutil.hash_to_hex(md5sum)
+            deposit_request.save(update_fields=["archive_length", "archive_md5"])
+
+    def delete(
+        self, request: Request, collection_name: str, deposit_id: int, session_id: int
+    ) -> HttpResponse:
+        """Abort the upload session, discarding the chunks (or the archive of
+        direct uploads) received so far.
+
+        Returns:
+            204 response when no error during routine occurred.
+
+        """
+        deposit = get_deposit_by_id(deposit_id, collection_name)
+        self.checks(request, collection_name, deposit)
+        upload_session = get_upload_session(deposit, session_id)
+        upload_session.discard()
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2023  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -10,19 +10,24 @@ from django.urls import re_path as url
 
 from swh.deposit.api.collection import CollectionAPI
 from swh.deposit.api.content import ContentAPI
+from swh.deposit.api.direct_upload import DirectUploadAPI
 from swh.deposit.api.edit import EditAPI
 from swh.deposit.api.edit_media import EditMediaAPI
 from swh.deposit.api.service_document import ServiceDocumentAPI
-from swh.deposit.api.state import StateAPI
+from swh.deposit.api.state import CollectionStateAPI, StateAPI
 from swh.deposit.api.sword_edit import SwordEditAPI
+from swh.deposit.api.upload_session import UploadSessionAPI
 from swh.deposit.config import (
     COL_IRI,
+    COL_STATE_IRI,
     CONT_FILE_IRI,
+    DIRECT_UPLOAD_IRI,
     EDIT_IRI,
     EM_IRI,
     SD_IRI,
     SE_IRI,
     STATE_IRI,
+    UPLOAD_SESSION_IRI,
 )
 
 
@@ -37,9 +42,23 @@ urlpatterns = [
     # SD IRI - Service Document IRI
     # -> GET
     url(r"^servicedocument/", ServiceDocumentAPI.as_view(), name=SD_IRI),
+    # Pre-signed archive upload URL, when the archive storage does not provide them
+    # -> PUT
+    url(
+        r"^upload/(?P<token>[^/]+)/$",
+        DirectUploadAPI.as_view(),
+        name=DIRECT_UPLOAD_IRI,
+    ),
     # Col-IRI - Collection IRI
     # -> POST
     url(r"^(?P<collection_name>[^/]+)/$", CollectionAPI.as_view(), name=COL_IRI),
+    # Status of many deposits of the collection at once
+    # -> GET
+    url(
+        r"^(?P<collection_name>[^/]+)/status/$",
+        CollectionStateAPI.as_view(),
+        name=COL_STATE_IRI,
+    ),
     # EM IRI - Atom Edit Media IRI (update archive IRI)
     # -> PUT (update-in-place existing archive)
     # -> POST (add new archive)
@@ -48,6 +67,17 @@ urlpatterns = [
         EditMediaAPI.as_view(),
         name=EM_IRI,
     ),
+    # Upload session IRI - resumable archive upload (opened on Col-IRI or EM IRI)
+    # -> GET (upload progress)
+    # -> PATCH (send a chunk)
+    # -> POST (commit the archive to the deposit)
+    # -> DELETE (abort the upload)
+    url(
+        r"^(?P<collection_name>[^/]+)/(?P<deposit_id>[^/]+)/media/upload/"
+        r"(?P<session_id>[^/]+)/$",
+        UploadSessionAPI.as_view(),
+        name=UPLOAD_SESSION_IRI,
+    ),
     # Edit IRI - Atom Entry Edit IRI (update metadata IRI)
     # -> PUT (update in place)
     # -> DELETE (delete container)
@@ -1,4 +1,4 @@
-# Copyright (C) 2017  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -9,3 +9,8 @@ from django.apps import AppConfig
 class DepositConfig(AppConfig):
     name = "swh.deposit"
     label = "deposit"
+
+    def ready(self):
+        from swh.deposit.lookups import connect_signals
+
+        connect_signals()
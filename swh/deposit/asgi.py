@@ -0,0 +1,51 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""ASGI entry point of the deposit server, e.g.::
+
+    gunicorn -k asgi -c swh/deposit/gunicorn_config.py swh.deposit.asgi
+
+Request bodies (notably archive uploads to the Col-IRI, EM-IRI and Edit-IRI) are
+received asynchronously, so a slow client only holds a coroutine of the worker
+while it sends its archive. The (synchronous) API views are then run in threads
+once the whole body is received, with their blocking database and storage calls.
+"""
+
+import asyncio
+import os
+
+import django
+from django.core.handlers.asgi import ASGIHandler
+
+# Maximum number of views running concurrently (in threads) per worker process,
+# requests whose body was received wait for a thread to be available
+DEFAULT_ASGI_THREADS = 10
+
+
+class DepositASGIHandler(ASGIHandler):
+    """ASGI handler running at most ``max_threads`` views concurrently."""
+
+    def __init__(self, max_threads: int = DEFAULT_ASGI_THREADS):
+        super().__init__()
+        self.max_threads = max_threads
+        self.threads = asyncio.Semaphore(max_threads)
+
+    async def get_response_async(self, request):
+        async with self.threads:
+            return await super().get_response_async(request)
+
+
+def get_asgi_application() -> DepositASGIHandler:
+    """Setup django (the production platform by default) and returns the deposit
+    ASGI application. The number of threads is read from the ``ASGI_THREADS``
+    environment variable."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "swh.deposit.settings.production")
+    django.setup(set_prefix=False)
+    return DepositASGIHandler(
+        max_threads=int(os.environ.get("ASGI_THREADS", DEFAULT_ASGI_THREADS))
+    )
+
+
+application = get_asgi_application()
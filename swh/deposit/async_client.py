@@ -0,0 +1,369 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Asynchronous deposit clients, to send many queries concurrently from a single
+event loop (e.g. to poll the status of many deposits), without a thread per query.
+
+They are built on httpx (install the ``async`` extra of swh.deposit), and reuse
+the queries and the parsing of the responses of the clients of
+:mod:`swh.deposit.client`::
+
+    async with AsyncPublicApiDepositClient(url, auth=(username, password)) as client:
+        statuses = await asyncio.gather(
+            *(client.deposit_status(collection, id) for id in deposit_ids)
+        )
+
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Type
+from urllib.parse import urljoin
+
+import httpx
+import requests
+
+from swh.deposit import __version__ as swh_deposit_version
+from swh.deposit.client import (
+    DEFAULT_POOL_SIZE,
+    HASH_BLOCK_SIZE,
+    RETRY_STATUSES,
+    BaseDepositClient,
+    Client,
+    CollectionListDepositClient,
+    CreateArchiveDepositClient,
+    CreateMetadataDepositClient,
+    CreateMetadataOnlyDepositClient,
+    CreateMultipartDepositClient,
+    ProgressCallback,
+    RetryPolicy,
+    ServiceDocumentDepositClient,
+    StatusDepositClient,
+    StreamingBody,
+    new_idempotency_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _stream(body: StreamingBody) -> AsyncIterator[bytes]:
+    """Read a request body in a thread, so that reading its files does not block
+    the event loop."""
+    try:
+        while True:
+            block = await asyncio.to_thread(body.read, HASH_BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+    finally:
+        body.close()
+
+
+class AsyncBaseApiDepositClient:
+    """Asynchronous deposit client base class, to use as an async context manager
+    (or close with :meth:`aclose`).
+
+    Args:
+        url: url of the deposit server api
+        auth: username and password of the deposit client
+        retry_policy: retries of the queries refused by an overloaded or
+          unavailable server, none by default
+        max_connections: number of concurrent connections to the server, further
+          queries wait for a connection to be available
+        timeout: timeout (in seconds) of the network operations
+        transport: httpx transport sending the queries, e.g. to mock the server
+
+    """
+
+    def __init__(
+        self,
+        url: str,
+        auth: Optional[Tuple[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        max_connections: int = DEFAULT_POOL_SIZE,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = url.strip("/") + "/"
+        self.auth = auth
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.http = httpx.AsyncClient(
+            auth=auth,
+            headers={"user-agent": f"swh-deposit/{swh_deposit_version}"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+            transport=transport,
+        )
+        # the synchronous clients only build the queries and parse the responses,
+        # so they never use their http session: they share this one, rather than
+        # each building (and leaking) its own session and connection pool
+        self._session = requests.Session()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the connections to the deposit server."""
+        await self.http.aclose()
+        self._session.close()
+
+    def client(self, cls: Type[Client]) -> Client:
+        """Build the synchronous client of class ``cls``, to build the queries to
+        the deposit server and parse its responses."""
+        return cls(
+            url=self.base_url,
+            auth=self.auth,
+            session=self._session,
+            retry_policy=self.retry_policy,
+        )
+
+    async def do(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a query to the deposit server, the url being relative to its api
+        url."""
+        full_url = urljoin(self.base_url, url.lstrip("/"))
+        return await self.http.request(method, full_url, **kwargs)
+
+    async def execute(
+        self, cls: Type[BaseDepositClient], *args, **kwargs
+    ) -> Dict[str, Any]:
+        """Asynchronous counterpart of :meth:`BaseDepositClient.execute`, sending
+        the query built by a client of class ``cls`` and parsing its response.
+
+        Raises:
+            MaintenanceError if some api maintenance is happening.
+
+        """
+        client = self.client(cls)
+        # in a thread, as the checksums of the archives are computed when preparing
+        # their queries
+        method, url, info, params = await asyncio.to_thread(
+            client.prepare, *args, **kwargs
+        )
+        try:
+            response = await self._execute_with_retries(
+                client, method, url, info, params
+            )
+        except Exception as e:
+            return client.error_result(url, e)
+        # parse_result_ok expects the header names as sent by the server
+        headers = {
+            name.decode(): value.decode() for name, value in response.headers.raw
+        }
+        return client.parse_response(response.status_code, response.text, headers)
+
+    async def _execute_with_retries(
+        self,
+        client: BaseDepositClient,
+        method: str,
+        url: str,
+        info: Dict[str, Any],
+        params: Dict[str, Any],
+    ) -> httpx.Response:
+        for attempt in itertools.count(1):
+            headers, body = client.compute_request(info)
+            content: Any = body
+            if isinstance(body, StreamingBody):
+                # sent with its length rather than in chunks, as with the
+                # synchronous clients
+                headers["CONTENT-LENGTH"] = str(len(body))
+                content = _stream(body)
+            response = await self.do(
+                method, url, content=content, headers=headers, params=params
+            )
+            if (
+                response.status_code not in RETRY_STATUSES
+                or attempt > self.retry_policy.retries
+            ):
+                break
+            delay = self.retry_policy.delay(
+                attempt, response.headers.get("Retry-After")
+            )
+            logger.warning(
+                "%s %s refused (%s), retry %s/%s in %s seconds",
+                method.upper(),
+                url,
+                response.status_code,
+                attempt,
+                self.retry_policy.retries,
+                delay,
+            )
+            await asyncio.sleep(delay)
+        return response
+
+
+class AsyncPublicApiDepositClient(AsyncBaseApiDepositClient):
+    """Asynchronous public api deposit client, see
+    :class:`swh.deposit.client.PublicApiDepositClient`."""
+
+    async def service_document(self) -> Dict[str, Any]:
+        """Retrieve service document endpoint's information."""
+        return await self.execute(ServiceDocumentDepositClient)
+
+    async def deposit_status(
+        self,
+        collection: str,
+        deposit_id: int,
+        wait: Optional[float] = None,
+        since_status: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Retrieve status information on a deposit, see
+        :meth:`swh.deposit.client.PublicApiDepositClient.deposit_status`
+        (``wait`` must be shorter than the timeout of the client)."""
+        return await self.execute(
+            StatusDepositClient,
+            collection,
+            deposit_id,
+            wait=wait,
+            since_status=since_status,
+        )
+
+    async def deposit_list(
+        self,
+        collection: str,
+        page: Optional[int] = None,
+        page_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """List deposits from the collection"""
+        return await self.execute(
+            CollectionListDepositClient, collection, page=page, page_size=page_size
+        )
+
+    async def deposit_create(
+        self,
+        collection: str,
+        slug: Optional[str],
+        archive: Optional[str] = None,
+        metadata: Optional[str] = None,
+        in_progress: bool = False,
+        idempotency_key: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Create a new deposit (archive, metadata, both as multipart), see
+        :meth:`swh.deposit.client.PublicApiDepositClient.deposit_create`.
+
+        ``progress`` is called from the threads reading the archive.
+        """
+        cls: Type[BaseDepositClient]
+        if archive and not metadata:
+            cls = CreateArchiveDepositClient
+        elif not archive and metadata:
+            cls = CreateMetadataDepositClient
+        else:
+            cls = CreateMultipartDepositClient
+        return await self.execute(
+            cls,
+            collection,
+            in_progress,
+            slug,
+            archive_path=archive,
+            metadata_path=metadata,
+            idempotency_key=idempotency_key or new_idempotency_key(),
+            progress=progress,
+        )
+
+    async def deposit_metadata_only(
+        self,
+        collection: str,
+        metadata: str,
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Create a metadata-only deposit."""
+        return await self.execute(
+            CreateMetadataOnlyDepositClient,
+            collection,
+            metadata_path=metadata,
+            idempotency_key=idempotency_key or new_idempotency_key(),
+        )
+
+
+class AsyncPrivateApiDepositClient(AsyncBaseApiDepositClient):
+    """Asynchronous private api deposit client, see
+    :class:`swh.deposit.client.PrivateApiDepositClient`."""
+
+    async def archive_get(self, archive_update_url: str, archive: str) -> str:
+        """Retrieve the archive from the deposit to a local file, written while it
+        is received.
+
+        Raises:
+            ValueError if the archive cannot be retrieved
+
+        Returns:
+            The archive path to the local archive to load.
+
+        """
+        full_url = urljoin(self.base_url, archive_update_url.lstrip("/"))
+        async with self.http.stream("GET", full_url) as response:
+            if response.is_success:
+                with open(archive, "wb") as f:
+                    async for chunk in response.aiter_bytes(HASH_BLOCK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+                return archive
+
+        msg = "Problem when retrieving deposit archive at %s" % (archive_update_url,)
+        logger.error(msg)
+
+        raise ValueError(msg)
+
+    async def metadata_get(self, metadata_url: str) -> Dict[str, Any]:
+        """Retrieve the metadata information on a given deposit.
+
+        Raises:
+            ValueError if the metadata cannot be retrieved
+
+        """
+        response = await self.do("get", metadata_url)
+        if response.is_success:
+            return response.json()
+
+        msg = "Problem when retrieving metadata at %s" % metadata_url
+        logger.error(msg)
+
+        raise ValueError(msg)
+
+    async def status_update(
+        self,
+        update_status_url: str,
+        status: str,
+        status_detail: Optional[str] = None,
+        release_id: Optional[str] = None,
+        directory_id: Optional[str] = None,
+        origin_url: Optional[str] = None,
+    ) -> None:
+        """Update the deposit's status, see
+        :meth:`swh.deposit.client.PrivateApiDepositClient.status_update`."""
+        payload = {"status": status}
+        if release_id:
+            payload["release_id"] = release_id
+        if directory_id:
+            payload["directory_id"] = directory_id
+        if origin_url:
+            payload["origin_url"] = origin_url
+        if status_detail:
+            payload["status_detail"] = status_detail
+
+        await self.do("put", update_status_url, json=payload)
+
+    async def check(self, check_url: str) -> str:
+        """Check the deposit's associated data (metadata, archive(s)).
+
+        Raises:
+            ValueError if the check cannot be run
+
+        """
+        response = await self.do("get", check_url)
+        if response.is_success:
+            return response.json()["status"]
+
+        msg = "Problem when checking deposit %s" % check_url
+        logger.error(msg)
+
+        raise ValueError(msg)
@@ -1,18 +1,24 @@
-# Copyright (C) 2017-2021  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
+from collections import OrderedDict
 import logging
+import math
+import threading
+import time
 from typing import Optional
 
+import attr
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
 from django.core.cache import cache
-from django.utils import timezone
+from django.utils.crypto import salted_hmac
 from rest_framework import status
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import BasePermission
-from sentry_sdk import capture_exception
 
 from swh.auth.django.models import OIDCUser
 from swh.auth.django.utils import oidc_user_from_profile
@@ -22,6 +28,7 @@ from swh.auth.keycloak import (
     keycloak_error_message,
 )
 from swh.deposit.errors import UNAUTHORIZED, make_error_response
+from swh.deposit.lookups import get_client_by_username
 from swh.deposit.models import DepositClient
 
 logger = logging.getLogger(__name__)
@@ -91,7 +98,155 @@ class HasDepositPermission(BasePermission):
 
     def has_permission(self, request, view):
         assert isinstance(request.user, DepositClient)
-        return request.user.oidc_user.has_perm(DEPOSIT_PERMISSION)
+        return request.user.has_deposit_permission
+
+
+@attr.s(frozen=True)
+class VerifiedCredentials:
+    """Result of the authentication of a user against keycloak, reused until
+    ``expires_at`` (a timestamp)"""
+
+    expires_at = attr.ib(type=float)
+    has_deposit_permission = attr.ib(type=bool, default=False)
+
+
+# Seconds verified credentials are reused at most, before they are checked against
+# keycloak again (e.g. to take into account revoked permissions)
+CREDENTIALS_CACHE_TIMEOUT = 300
+# Maximum number of verified credentials kept in the memory of each server process
+LOCAL_CREDENTIALS_CACHE_SIZE = 1024
+
+_local_credentials: "OrderedDict[str, VerifiedCredentials]" = OrderedDict()
+_local_credentials_lock = threading.Lock()
+
+
+def credentials_cache_key(
+    username: str, password: str, stored_password: str = ""
+) -> str:
+    """Cache key of the verified credentials, which does not reveal the password:
+    HMAC of the credentials, with the secret key of the server.
+
+    With the ``stored_password`` (hash) of the user, the key changes with the
+    password of the user.
+
+    """
+    digest = salted_hmac(
+        "swh.deposit.auth.credentials",
+        f"{username}:{password}:{stored_password}",
+        algorithm="sha256",
+    ).hexdigest()
+    return f"swh.deposit.auth.credentials.{digest}"
+
+
+def get_verified_credentials(key: str) -> Optional[VerifiedCredentials]:
+    """Verified credentials not expired yet, kept in the memory of the process or
+    in the Django cache (shared by the server processes when the cache is)."""
+    now = time.time()
+    with _local_credentials_lock:
+        credentials = _local_credentials.get(key)
+        if credentials is not None:
+            if credentials.expires_at > now:
+                _local_credentials.move_to_end(key)
+                return credentials
+            del _local_credentials[key]
+    try:
+        credentials = cache.get(key)
+    except Exception as e:
+        logger.warning("Credentials cache unavailable: %s", e)
+        return None
+    if credentials is None or credentials.expires_at <= now:
+        return None
+    _remember_locally(key, credentials)
+    return credentials
+
+
+def remember_verified_credentials(key: str, oidc_user: OIDCUser) -> VerifiedCredentials:
+    """Keep the credentials of ``oidc_user`` at most
+    :const:`CREDENTIALS_CACHE_TIMEOUT` seconds, and until its access token expires.
+
+    Returns:
+        the verified credentials
+
+    """
+    now = time.time()
+    expires_at = now + CREDENTIALS_CACHE_TIMEOUT
+    if oidc_user.expires_at is not None:
+        expires_at = min(expires_at, oidc_user.expires_at.timestamp())
+    credentials = VerifiedCredentials(
+        expires_at=expires_at,
+        has_deposit_permission=oidc_user.has_perm(DEPOSIT_PERMISSION),
+    )
+    if expires_at > now:
+        _remember(key, credentials)
+    return credentials
+
+
+def _remember(key: str, credentials: VerifiedCredentials) -> None:
+    _remember_locally(key, credentials)
+    timeout = math.ceil(credentials.expires_at - time.time())
+    try:
+        cache.set(key, credentials, timeout=timeout)
+    except Exception as e:
+        logger.warning("Credentials cache unavailable: %s", e)
+
+
+def _remember_locally(key: str, credentials: VerifiedCredentials) -> None:
+    with _local_credentials_lock:
+        _local_credentials[key] = credentials
+        _local_credentials.move_to_end(key)
+        while len(_local_credentials) > LOCAL_CREDENTIALS_CACHE_SIZE:
+            _local_credentials.popitem(last=False)
+
+
+def forget_verified_credentials() -> None:
+    """Forget the credentials verified by the process (not the shared ones)."""
+    with _local_credentials_lock:
+        _local_credentials.clear()
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """Django basic authentication, against the password of the deposit clients.
+
+    Checking a password hash is purposely costly (e.g. PBKDF2), so the verified
+    credentials are cached as the keycloak ones, for
+    :const:`CREDENTIALS_CACHE_TIMEOUT` seconds at most. Their cache key depends on
+    the password hash of the user, so they are no longer used once the password is
+    changed, and the user is checked to be active on each request.
+
+    The password hash and active flag of the client (whose lookup may be cached by
+    another process, see :mod:`swh.deposit.lookups`) are checked against the
+    database on each request, with a cheap query by primary key.
+
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        try:
+            deposit_client = get_client_by_username(userid)
+            if not User.objects.filter(
+                pk=deposit_client.pk,
+                password=deposit_client.password,
+                is_active=deposit_client.is_active,
+            ).exists():
+                # modified since it was cached, e.g. by another server process
+                deposit_client = DepositClient.objects.get(pk=deposit_client.pk)
+        except DepositClient.DoesNotExist:
+            # as costly as for an existing user, not to reveal it does not exist
+            make_password(password)
+            raise AuthenticationFailed("Invalid username/password.")
+
+        key = credentials_cache_key(userid, password, deposit_client.password)
+        if get_verified_credentials(key) is None:
+            if not deposit_client.check_password(password):
+                raise AuthenticationFailed("Invalid username/password.")
+            _remember(
+                key,
+                VerifiedCredentials(expires_at=time.time() + CREDENTIALS_CACHE_TIMEOUT),
+            )
+
+        if not deposit_client.is_active:
+            raise AuthenticationFailed("User inactive or deleted.")
+
+        return (deposit_client, None)
 
 
 class KeycloakBasicAuthentication(BasicAuthentication):
@@ -104,8 +259,10 @@ class KeycloakBasicAuthentication(BasicAuthentication):
     Technically, reuses :class:`rest_framework.BasicAuthentication` and overrides the
     func:`authenticate_credentials` method to discuss with keycloak.
 
-    As an implementation detail, this also uses the django cache mechanism to avoid too
-    many authentication request to keycloak.
+    As an implementation detail, verified credentials (with the deposit permission
+    of the user) are cached in the memory of the process and with the django cache
+    mechanism, to avoid authentication requests to keycloak on each deposit request
+    (see :func:`get_verified_credentials`).
 
     """
 
@@ -119,23 +276,9 @@ class KeycloakBasicAuthentication(BasicAuthentication):
             )
         return self._client
 
-    def _cache_key(self, user_id: str) -> str:
-        """Internal key to use to store user id token."""
-        return f"oidc_user_{self.client.realm_name}_{self.client.client_id}_{user_id}"
-
-    def get_user(self, user_id: str) -> Optional[OIDCUser]:
-        """Retrieve user from cache if any."""
-        oidc_profile = cache.get(self._cache_key(user_id))
-        if oidc_profile:
-            try:
-                return oidc_user_from_profile(self.client, oidc_profile)
-            except Exception as e:
-                logger.warning("Error during cache token retrieval: %s", e)
-                capture_exception(e)
-        return None
-
     def authenticate_credentials(self, user_id, password, request):
-        """Authenticate the user_id/password against keycloak.
+        """Authenticate the user_id/password against keycloak (unless they were
+        recently verified).
 
         Raises:
             AuthenticationFailed in case of authentication failure
@@ -144,33 +287,28 @@ class KeycloakBasicAuthentication(BasicAuthentication):
             Tuple of deposit_client, None.
 
         """
-        try:
-            oidc_profile = self.client.login(user_id, password)
-        except KeycloakError as e:
-            logger.debug("KeycloakError: e: %s", e)
-            error_msg = keycloak_error_message(e)
-            raise AuthenticationFailed(error_msg)
+        key = credentials_cache_key(user_id, password)
+        credentials = get_verified_credentials(key)
+        if credentials is None:
+            try:
+                oidc_profile = self.client.login(user_id, password)
+            except KeycloakError as e:
+                logger.debug("KeycloakError: e: %s", e)
+                error_msg = keycloak_error_message(e)
+                raise AuthenticationFailed(error_msg)
 
-        oidc_user = oidc_user_from_profile(self.client, oidc_profile)
-        ttl = int(oidc_user.refresh_expires_at.timestamp() - timezone.now().timestamp())
+            oidc_user = oidc_user_from_profile(self.client, oidc_profile)
+            credentials = remember_verified_credentials(key, oidc_user)
 
         # Making sure the associated deposit client is correctly configured in backend
         try:
-            deposit_client = DepositClient.objects.get(username=user_id)
+            deposit_client = get_client_by_username(user_id)
         except DepositClient.DoesNotExist:
             raise AuthenticationFailed(f"Unknown user {user_id}")
 
         if not deposit_client.is_active:
             raise AuthenticationFailed(f"Deactivated user {user_id}")
 
-        deposit_client.oidc_user = oidc_user
-
-        if ttl:
-            # cache the oidc_profile user while it's valid
-            cache.set(
-                self._cache_key(user_id),
-                oidc_profile,
-                timeout=max(0, ttl),
-            )
+        deposit_client.has_deposit_permission = credentials.has_deposit_permission
 
         return (deposit_client, None)
@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2020  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -7,11 +7,13 @@
 # control
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import datetime
+from typing import TYPE_CHECKING, Optional
 
 import click
 
 from swh.deposit.cli import deposit
+from swh.deposit.gc import DEFAULT_BATCH_SIZE, DEFAULT_GRACE_PERIOD
 
 if TYPE_CHECKING:
     from swh.deposit.models import DepositCollection
@@ -36,7 +38,7 @@ if TYPE_CHECKING:
 )
 @click.pass_context
 def admin(ctx, config_file: str, platform: str):
-    """Server administration tasks (manipulate user or collections)"""
+    """Server administration tasks (manipulate user, collections or archives)"""
     from swh.deposit.config import setup_django_for
 
     # configuration happens here
@@ -83,6 +85,16 @@ def _create_collection(name: str) -> DepositCollection:
 @click.option("--collection", help="User's collection")
 @click.option("--provider-url", default="", help="Provider URL")
 @click.option("--domain", default="", help="The domain")
+@click.option(
+    "--webhook-url",
+    default=None,
+    help="URL notified of the status changes of the user's deposits",
+)
+@click.option(
+    "--webhook-secret",
+    default=None,
+    help="Secret signing the webhook notifications (generated if not provided)",
+)
 @click.pass_context
 def user_create(
     ctx,
@@ -94,6 +106,8 @@ def user_create(
     collection: str,
     provider_url: str,
     domain: str,
+    webhook_url: Optional[str],
+    webhook_secret: Optional[str],
 ):
     """Create a user with some needed information (password, collection)
 
@@ -102,6 +116,9 @@ def user_create(
 
     The password is stored encrypted using django's utilities.
 
+    With a webhook url, the user is notified of the status changes of its deposits
+    (see ``swh deposit admin webhooks deliver``), signed with the webhook secret.
+
     """
     # to avoid loading too early django namespaces
     from swh.deposit.models import DepositClient
@@ -132,6 +149,15 @@ def user_create(
     user.is_active = True
     user.provider_url = provider_url
     user.domain = domain
+    if webhook_url is not None:
+        user.webhook_url = webhook_url or None
+    if webhook_secret:
+        user.webhook_secret = webhook_secret
+    elif user.webhook_url and not user.webhook_secret:
+        import secrets
+
+        user.webhook_secret = secrets.token_hex(32)
+        click.echo(f"Webhook secret of user '{username}': {user.webhook_secret}")
     user.save()
 
     click.echo(f"User '{username}' {action_done}.")
@@ -287,3 +313,140 @@ def adm_deposit_reschedule(ctx, deposit_id):
         status="next_run_not_scheduled",
         next_run=datetime.datetime.now(tz=datetime.timezone.utc),
     )
+
+
+@admin.group("archive")
+@click.pass_context
+def adm_archive(ctx):
+    """Manipulate archive files."""
+    pass
+
+
+@adm_archive.command("gc")
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Only list the orphan archives, without removing them",
+)
+@click.option(
+    "--batch-size",
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of files checked against the database at once",
+)
+@click.option(
+    "--grace-period",
+    default=DEFAULT_GRACE_PERIOD // datetime.timedelta(hours=1),
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Age (in hours) under which orphan archives are kept, as they may "
+    "belong to uploads in progress",
+)
+@click.pass_context
+def adm_archive_gc(ctx, dry_run: bool, batch_size: int, grace_period: int):
+    """Remove the archive files not referenced by any deposit request
+
+    Replacing or deleting the archives of a deposit only removes its deposit
+    requests, the archive files are left in the storage (they may be shared by
+    several deposits). This scans the archive storage for those orphan archives.
+
+    """
+    # to avoid loading too early django namespaces
+    from swh.deposit.gc import CollectStats, collect_orphan_archives
+
+    def report(stats: CollectStats):
+        click.echo(
+            f"Scanned {stats.scanned} files ({stats.throughput:.1f} files/s), "
+            f"{stats.orphans} orphans, {stats.removed} "
+            f"{'to remove' if dry_run else 'removed'} "
+            f"({stats.removed_bytes} bytes), {stats.recent} too recent."
+        )
+
+    stats = collect_orphan_archives(
+        batch_size=batch_size,
+        grace_period=datetime.timedelta(hours=grace_period),
+        dry_run=dry_run,
+        progress=report,
+    )
+    click.echo(
+        f"Done in {stats.duration:.1f}s: "
+        f"{stats.removed} orphan archives {'to remove' if dry_run else 'removed'} "
+        f"({stats.removed_bytes} bytes)."
+    )
+
+
+@admin.group("webhooks")
+@click.pass_context
+def adm_webhooks(ctx):
+    """Notify the users of the status changes of their deposits."""
+    pass
+
+
+@adm_webhooks.command("deliver")
+@click.option(
+    "--batch-size",
+    default=100,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of notifications sent at once to a webhook",
+)
+@click.option(
+    "--max-attempts",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of failed deliveries after which a notification is given up",
+)
+@click.option(
+    "--timeout",
+    default=10.0,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Timeout (in seconds) of the requests to the webhooks",
+)
+@click.option(
+    "--interval",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Run forever, checking for notifications to send every INTERVAL seconds",
+)
+@click.pass_context
+def adm_webhooks_deliver(
+    ctx,
+    batch_size: int,
+    max_attempts: int,
+    timeout: float,
+    interval: Optional[float],
+):
+    """Send the pending notifications to the webhooks of the users
+
+    Notifications are recorded when the status of a deposit changes, and sent by
+    this command (failed deliveries are retried later with an exponential
+    backoff). Several instances of this command may run concurrently.
+
+    """
+    # to avoid loading too early django namespaces
+    from swh.deposit.webhooks import DeliveryStats, deliver_webhooks, run_worker
+
+    def report(stats: DeliveryStats):
+        click.echo(
+            f"{stats.requests} requests sent: {stats.delivered} notifications "
+            f"delivered, {stats.retried} to retry, {stats.failed} given up."
+        )
+
+    if interval is not None:
+        run_worker(
+            interval,
+            batch_size=batch_size,
+            max_attempts=max_attempts,
+            timeout=timeout,
+            progress=report,
+        )
+    else:
+        report(
+            deliver_webhooks(
+                batch_size=batch_size, max_attempts=max_attempts, timeout=timeout
+            )
+        )
@@ -13,7 +13,8 @@ import logging
 # control
 import os
 import sys
-from typing import TYPE_CHECKING, Any, Collection, Dict, List, Optional
+import time
+from typing import TYPE_CHECKING, Any, Callable, Collection, Dict, List, Optional
 import warnings
 
 import click
@@ -312,6 +313,29 @@ def client_command_parse_input(
     }
 
 
+def _progress_reporter(interval: float = 1.0) -> Callable[[int, int], None]:
+    """Build a callback reporting the progress and throughput of an upload on
+    stderr, at most every ``interval`` seconds (and once the upload is done)."""
+    start = time.monotonic()
+    last_report = float("-inf")
+
+    def report(sent: int, total: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if sent < total and now - last_report < interval:
+            return
+        last_report = now
+        mib = 1024 * 1024
+        throughput = sent / max(now - start, 1e-6) / mib
+        click.echo(
+            f"Uploaded {sent / mib:.1f} / {total / mib:.1f} MiB "
+            f"({throughput:.1f} MiB/s)",
+            err=True,
+        )
+
+    return report
+
+
 def _subdict(d: Dict[str, Any], keys: Collection[str]) -> Dict[str, Any]:
     "return a dict from d with only given keys"
     return {k: v for k, v in d.items() if k in keys}
@@ -334,6 +358,19 @@ def credentials_decorator(f):
     return f
 
 
+def retries_decorator(f):
+    """Add --retries flag to cli."""
+    return click.option(
+        "--retries",
+        type=click.IntRange(min=0),
+        default=3,
+        help=(
+            "(Optional) Number of retries of the requests refused because the "
+            "deposit server is overloaded or in maintenance, with exponential backoff"
+        ),
+    )(f)
+
+
 def output_format_decorator(f):
     """Add --format output flag decorator to cli."""
     return click.option(
@@ -420,6 +457,20 @@ def output_format_decorator(f):
     default=False,
     help="(Optional) Update by replacing existing metadata to a deposit",
 )
+@click.option(
+    "--idempotency-key",
+    default=None,
+    help=(
+        "(Optional) Key identifying this deposit request, to provide again when "
+        "retrying it so that it is processed once. Generated if not provided."
+    ),
+)
+@click.option(
+    "--progress/--no-progress",
+    default=False,
+    help="(Optional) Report the progress of the upload on stderr",
+)
+@retries_decorator
 @click.option("--verbose/--no-verbose", default=False, help="Verbose mode")
 @click.option("--name", help="Software name")
 @click.option(
@@ -446,6 +497,9 @@ def upload(
     deposit_id: Optional[int],
     swhid: Optional[str],
     replace: bool,
+    idempotency_key: Optional[str],
+    progress: bool,
+    retries: int,
     url: str,
     verbose: bool,
     name: Optional[str],
@@ -462,7 +516,7 @@ def upload(
     """
     import tempfile
 
-    from swh.deposit.client import PublicApiDepositClient
+    from swh.deposit.client import PublicApiDepositClient, RetryPolicy
 
     if archive_deposit or metadata_deposit:
         warnings.warn(
@@ -489,7 +543,9 @@ def upload(
 
     url = _url(url)
 
-    client = PublicApiDepositClient(url=url, auth=(username, password))
+    client = PublicApiDepositClient(
+        url=url, auth=(username, password), retry_policy=RetryPolicy(retries=retries)
+    )
     with tempfile.TemporaryDirectory() as temp_dir:
         with trap_and_report_exceptions():
             logger.debug("Parsing cli options")
@@ -514,12 +570,17 @@ def upload(
 
         if verbose:
             logger.info("Parsed configuration: %s", config)
+        # the client generates a key if none is provided
+        config["idempotency_key"] = idempotency_key
+        config["progress"] = _progress_reporter() if progress else None
 
         keys = [
             "archive",
             "collection",
+            "idempotency_key",
             "in_progress",
             "metadata",
+            "progress",
             "slug",
         ]
         if config["deposit_id"]:
@@ -533,23 +594,48 @@ def upload(
 
 @deposit.command()
 @credentials_decorator
-@click.option("--deposit-id", default=None, required=True, help="Deposit identifier.")
+@click.option(
+    "--deposit-id",
+    "deposit_ids",
+    multiple=True,
+    type=int,
+    help="Deposit identifier, repeat the option to get the status of many deposits.",
+)
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    default=None,
+    help="Get the status of the deposits modified since this date (UTC).",
+)
 @output_format_decorator
 @click.pass_context
-def status(ctx, url, username, password, deposit_id, output_format):
-    """Deposit's status"""
+def status(ctx, url, username, password, deposit_ids, since, output_format):
+    """Deposit's status
+
+    The status of many deposits, given by id or modified since a date, is
+    retrieved with a few queries, and displayed as a list.
+    """
     from swh.deposit.client import PublicApiDepositClient
 
     url = _url(url)
     logger.debug("Status deposit")
     with trap_and_report_exceptions():
+        if bool(deposit_ids) == bool(since):
+            raise InputError("Provide either --deposit-id or --since")
         client = PublicApiDepositClient(url=_url(url), auth=(username, password))
         collection = _collection(client)
 
-    print_result(
-        client.deposit_status(collection=collection, deposit_id=deposit_id),
-        output_format,
-    )
+    if len(deposit_ids) == 1:
+        data = client.deposit_status(collection=collection, deposit_id=deposit_ids[0])
+    else:
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        data = client.deposit_statuses(
+            collection=collection,
+            deposit_ids=list(deposit_ids) if deposit_ids else None,
+            since=since,
+        )
+    print_result(data, output_format)
 
 
 def print_result(data: Dict[str, Any], output_format: Optional[str]) -> None:
@@ -608,6 +694,210 @@ def metadata_only(ctx, url, username, password, metadata_path, output_format):
     print_result(result, output_format)
 
 
+def _bulk_items(
+    manifest: Optional[str], metadata_dir: Optional[str]
+) -> List[Dict[str, Optional[str]]]:
+    """Read the deposits of a bulk upload, as dicts with the ``archive`` (None for
+    metadata-only deposits) and ``metadata`` paths.
+
+    The manifest is either a CSV file with ``archive`` and ``metadata`` columns,
+    or a JSON lines file with objects with those keys (``.jsonl`` extension).
+    Relative paths are relative to the manifest directory.
+    """
+    import csv
+    import json
+
+    if metadata_dir is not None:
+        return [
+            {"archive": None, "metadata": os.path.join(metadata_dir, name)}
+            for name in sorted(os.listdir(metadata_dir))
+            if name.endswith(".xml")
+        ]
+
+    assert manifest is not None
+    with open(manifest, newline="") as f:
+        if manifest.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    base_dir = os.path.dirname(os.path.abspath(manifest))
+    items = []
+    for i, row in enumerate(rows, start=1):
+        if not row.get("metadata"):
+            raise InputError(f"Manifest entry {i} has no metadata file")
+        items.append(
+            {
+                key: os.path.join(base_dir, row[key]) if row.get(key) else None
+                for key in ("archive", "metadata")
+            }
+        )
+    return items
+
+
+def _bulk_item_key(item: Dict[str, Optional[str]]) -> str:
+    """Identifier of a bulk upload deposit in the report: its metadata file"""
+    assert item["metadata"] is not None
+    return item["metadata"]
+
+
+def _bulk_idempotency_key(collection: str, item: Dict[str, Optional[str]]) -> str:
+    """Idempotency key of a bulk upload deposit, which does not change as long as
+    its files do not: a deposit interrupted before it was recorded in the report
+    is not created again when the bulk upload is resumed."""
+    import uuid
+
+    files = [
+        (path, os.path.getsize(path), os.path.getmtime(path))
+        for path in (item["archive"], item["metadata"])
+        if path is not None
+    ]
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, repr((collection, files))))
+
+
+def _bulk_deposit(
+    client: PublicApiDepositClient,
+    collection: str,
+    item: Dict[str, Optional[str]],
+    partial: bool,
+) -> Dict[str, Any]:
+    """Send a deposit of a bulk upload, errors are reported in the result"""
+    try:
+        idempotency_key = _bulk_idempotency_key(collection, item)
+        if item["archive"] is None:
+            result = client.deposit_metadata_only(
+                collection, item["metadata"], idempotency_key=idempotency_key
+            )
+        else:
+            result = client.deposit_create(
+                collection,
+                None,
+                archive=item["archive"],
+                metadata=item["metadata"],
+                in_progress=partial,
+                idempotency_key=idempotency_key,
+            )
+    except Exception as e:
+        logger.exception("Deposit of %s failed", _bulk_item_key(item))
+        return {"error": str(e)}
+    if "error" not in result and result.get("status", 200) >= 400:
+        # error responses which could not be parsed
+        result["error"] = f"Deposit failure: {result['status']}"
+    return result
+
+
+@deposit.command("bulk-upload")
+@credentials_decorator
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    help=(
+        "CSV (or JSON lines, with a .jsonl extension) file listing the archive and "
+        "metadata files of each deposit, in archive and metadata columns (keys)"
+    ),
+)
+@click.option(
+    "--metadata-dir",
+    type=click.Path(exists=True, file_okay=False),
+    help="Directory of xml metadata files, each sent as a metadata-only deposit",
+)
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help=(
+        "JSON lines file where the result of each deposit is appended; deposits "
+        "already successful in the report are skipped, so that an interrupted bulk "
+        "upload resumes where it stopped"
+    ),
+)
+@click.option(
+    "--collection",
+    help="(Optional) User's collection, retrieved from the service document if "
+    "not provided",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=4,
+    help="Number of deposits sent concurrently",
+)
+@click.option(
+    "--partial/--no-partial",
+    default=False,
+    help="(Optional) The deposits will be partial",
+)
+@retries_decorator
+@output_format_decorator
+@click.pass_context
+def bulk_upload(
+    ctx,
+    url: str,
+    username: str,
+    password: str,
+    manifest: Optional[str],
+    metadata_dir: Optional[str],
+    report: str,
+    collection: Optional[str],
+    workers: int,
+    partial: bool,
+    retries: int,
+    output_format: Optional[str],
+):
+    """Send many deposits, listed in a manifest or as the metadata files of a
+    directory, through a pool of workers sharing the same client (and its
+    connections to the deposit server).
+
+    The result of each deposit is appended to the report, and a summary is
+    displayed once all the deposits are sent. The command fails if any deposit
+    failed; run it again to retry them.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    import json
+
+    from swh.deposit.client import PublicApiDepositClient, RetryPolicy
+
+    with trap_and_report_exceptions():
+        if (manifest is None) == (metadata_dir is None):
+            raise InputError("Provide exactly one of --manifest or --metadata-dir")
+        items = _bulk_items(manifest, metadata_dir)
+        client = PublicApiDepositClient(
+            url=_url(url),
+            auth=(username, password),
+            retry_policy=RetryPolicy(retries=retries),
+            pool_size=workers,
+        )
+        if collection is None:
+            collection = _collection(client)
+
+    done = set()
+    if os.path.exists(report):
+        with open(report) as f:
+            for line in f:
+                result = json.loads(line)
+                if "error" not in result:
+                    done.add(result["item"])
+    pending = [item for item in items if _bulk_item_key(item) not in done]
+    summary = {"deposited": 0, "failed": 0, "skipped": len(items) - len(pending)}
+
+    with open(report, "a") as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_bulk_deposit, client, collection, item, partial): item
+            for item in pending
+        }
+        for future in as_completed(futures):
+            result = {"item": _bulk_item_key(futures[future]), **future.result()}
+            # written as the deposits complete, so that the report can be used
+            # to resume the bulk upload at any time
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            summary["failed" if "error" in result else "deposited"] += 1
+
+    print_result(summary, output_format)
+    if summary["failed"]:
+        ctx.exit(1)
+
+
 @deposit.command("list")
 @credentials_decorator
 @output_format_decorator
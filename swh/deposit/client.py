@@ -1,20 +1,39 @@
-# Copyright (C) 2017-2022  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
 """Module in charge of defining an swh-deposit client"""
 
+import base64
+import datetime
 import hashlib
+import io
+import itertools
 import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple
-from urllib.parse import urljoin
+import time
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+from urllib.parse import parse_qs, urljoin, urlparse
+import uuid
 import warnings
 from xml.etree import ElementTree
 
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
 from requests.utils import parse_header_links
 
 from swh.core.config import load_from_envvar
@@ -23,6 +42,161 @@ from swh.deposit.utils import NAMESPACES
 
 logger = logging.getLogger(__name__)
 
+# Default size of the chunks sent for resumable archive uploads
+DEFAULT_UPLOAD_CHUNK_SIZE = 50 * 1024 * 1024
+# Size of the blocks read to hash archives, so that hashing uses constant memory
+HASH_BLOCK_SIZE = 1024 * 1024
+# Connections kept alive to the deposit server, per client session
+DEFAULT_POOL_SIZE = 10
+# Responses of an overloaded (429) or unavailable (503) server, worth retrying
+RETRY_STATUSES = (429, 503)
+# Deposits whose status is queried at once, short enough to fit in an url
+STATUSES_BATCH_SIZE = 200
+# Timeouts (in seconds) to connect to the archive storage of direct uploads, and
+# to wait for it while the archive is sent or its response is received
+DIRECT_UPLOAD_TIMEOUT = (30, 300)
+
+
+def file_md5(
+    filepath: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    md5: Optional["hashlib._Hash"] = None,
+) -> "hashlib._Hash":
+    """Hash the bytes ``start`` to ``end`` (excluded, end of file if not provided)
+    of a file, reading it in blocks of :const:`HASH_BLOCK_SIZE` bytes.
+
+    Args:
+        filepath: the file to hash
+        start: offset of the first byte to hash
+        end: offset after the last byte to hash
+        md5: hash object to update, a new one is created if not provided
+
+    Returns:
+        the updated md5 hash object
+
+    """
+    md5 = md5 if md5 is not None else hashlib.md5()
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        remaining = end - start if end is not None else None
+        while remaining is None or remaining > 0:
+            size = (
+                HASH_BLOCK_SIZE
+                if remaining is None
+                else min(remaining, HASH_BLOCK_SIZE)
+            )
+            block = f.read(size)
+            if not block:
+                break
+            md5.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return md5
+
+
+# Called with the number of bytes sent so far and the size of the request body
+ProgressCallback = Callable[[int, int], None]
+
+
+class StreamingBody:
+    """Request body made of bytes and files (given by their paths), read one
+    block at a time while it is sent.
+
+    Its length is known beforehand, so requests streams it with a Content-Length
+    header (which the deposit server needs to parse multipart bodies) instead of
+    loading it in memory: the client memory does not depend on the size of the
+    archives sent.
+
+    Args:
+        parts: bytes and paths of the files, in the order they are sent
+        progress: called each time a block of the body is sent
+        content_type: content type of the body, if it sets its own
+
+    """
+
+    def __init__(
+        self,
+        parts: List[Union[bytes, str]],
+        progress: Optional[ProgressCallback] = None,
+        content_type: Optional[str] = None,
+    ):
+        self.parts = parts
+        self.progress = progress
+        self.content_type = content_type
+        self.length = sum(
+            len(part) if isinstance(part, bytes) else os.path.getsize(part)
+            for part in parts
+        )
+        self.sent = 0
+        self._next_parts = iter(parts)
+        self._current: Optional[IO[bytes]] = None
+
+    @classmethod
+    def multipart(
+        cls,
+        files: List[Tuple[str, Tuple[str, str, str]]],
+        progress: Optional[ProgressCallback] = None,
+    ) -> "StreamingBody":
+        """Encode files as a multipart/form-data body.
+
+        Args:
+            files: the files as (field name, (filename, path, content type))
+            progress: called each time a block of the body is sent
+
+        """
+        boundary = uuid.uuid4().hex
+        parts: List[Union[bytes, str]] = []
+        for name, (filename, path, content_type) in files:
+            filename = filename.replace('"', "%22")
+            parts += [
+                (
+                    f"--{boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{name}"; '
+                    f'filename="{filename}"\r\n'
+                    f"Content-Type: {content_type}\r\n\r\n"
+                ).encode(),
+                path,
+                b"\r\n",
+            ]
+        parts.append(f"--{boundary}--\r\n".encode())
+        return cls(
+            parts, progress, content_type=f"multipart/form-data; boundary={boundary}"
+        )
+
+    def __len__(self) -> int:
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        blocks = []
+        while size != 0:
+            if self._current is None:
+                part = next(self._next_parts, None)
+                if part is None:
+                    break
+                self._current = (
+                    io.BytesIO(part) if isinstance(part, bytes) else open(part, "rb")
+                )
+            block = self._current.read(size)
+            if not block:
+                self._current.close()
+                self._current = None
+                continue
+            blocks.append(block)
+            if size > 0:
+                size -= len(block)
+
+        data = b"".join(blocks)
+        self.sent += len(data)
+        if data and self.progress is not None:
+            self.progress(self.sent, self.length)
+        return data
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
 
 def compute_unified_information(
     collection: str,
@@ -31,6 +205,7 @@ def compute_unified_information(
     *,
     filepath: Optional[str] = None,
     swhid: Optional[str] = None,
+    with_md5sum: bool = True,
     **kwargs,
 ) -> Dict[str, Any]:
     """Given a filepath, compute necessary information on that file.
@@ -41,6 +216,8 @@ def compute_unified_information(
         slug: external id to use
         filepath: Path to the file to compute the necessary information out of
         swhid: Deposit swhid if any
+        with_md5sum: whether to hash the file, read in blocks of
+          :const:`HASH_BLOCK_SIZE` bytes
 
     Returns:
         dict with keys:
@@ -48,7 +225,7 @@ def compute_unified_information(
             'slug': external id to use
             'in_progress': do we finalize the deposit?
             'content-type': content type associated
-            'md5sum': md5 sum
+            'md5sum': md5 sum (None if not computed)
             'filename': filename
             'filepath': filepath
             'swhid': deposit swhid
@@ -64,7 +241,8 @@ def compute_unified_information(
 
     if filepath:
         filename = os.path.basename(filepath)
-        md5sum = hashlib.md5(open(filepath, "rb").read()).hexdigest()
+        if with_md5sum:
+            md5sum = file_md5(filepath).hexdigest()
         extension = filename.split(".")[-1]
         if "zip" in extension:
             content_type = "application/zip"
@@ -104,14 +282,58 @@ def handle_deprecated_config(config: Dict) -> Tuple[str, Optional[Tuple[str, str
     return (url, auth)
 
 
+# Body of a request to the deposit server
+RequestBody = Union[bytes, StreamingBody]
+
+
+class RetryPolicy(NamedTuple):
+    """Retries of the requests refused because the deposit server is overloaded
+    (429) or unavailable (503, e.g. during a maintenance)."""
+
+    retries: int = 0
+    """Number of retries, once the request is refused"""
+    backoff_factor: float = 1.0
+    """Delay (in seconds) before the first retry, doubled before each other one"""
+    max_backoff: float = 60.0
+    """Maximum delay (in seconds) between retries, unless the server asks for
+    a longer one"""
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay (in seconds) before the given retry (starting at 1): the one
+        given by the Retry-After header of the response if any, an exponential
+        backoff otherwise."""
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        return min(self.backoff_factor * 2 ** (attempt - 1), self.max_backoff)
+
+
+Client = TypeVar("Client", bound="BaseApiDepositClient")
+
+
 class BaseApiDepositClient:
-    """Deposit client base class"""
+    """Deposit client base class
+
+    Args:
+        config: deprecated, use url and auth instead
+        url: url of the deposit server api
+        auth: username and password of the deposit client
+        session: http session to send the requests with, shared with the clients
+          built by :meth:`client`; a new one is created if not provided
+        retry_policy: retries of the requests refused by an overloaded or
+          unavailable server, none by default
+        pool_size: number of connections to the server kept alive by a new
+          session
+
+    """
 
     def __init__(
         self,
         config: Optional[Dict] = None,
         url: Optional[str] = None,
         auth: Optional[Tuple[str, str]] = None,
+        session: Optional[requests.Session] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
     ):
         if not url and not config:
             config = load_from_envvar()
@@ -123,11 +345,25 @@ class BaseApiDepositClient:
 
         self.base_url = url.strip("/") + "/"
         self.auth = auth
-        self.session = requests.Session()
-        if auth:
-            self.session.auth = auth
-        self.session.headers.update(
-            {"user-agent": f"swh-deposit/{swh_deposit_version}"}
+        self.retry_policy = retry_policy or RetryPolicy()
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if auth:
+                session.auth = auth
+            session.headers.update({"user-agent": f"swh-deposit/{swh_deposit_version}"})
+        self.session = session
+
+    def client(self, cls: Type[Client]) -> Client:
+        """Build a client of the same deposit server, sharing the session (and its
+        kept alive connections) and the retry policy of this client."""
+        return cls(
+            url=self.base_url,
+            auth=self.auth,
+            session=self.session,
+            retry_policy=self.retry_policy,
         )
 
     def do(self, method, url, *args, **kwargs):
@@ -256,9 +492,15 @@ class BaseDepositClient(BaseApiDepositClient):
     """Base Deposit client to access the public api."""
 
     def __init__(
-        self, config=None, url=None, auth=None, error_msg=None, empty_result={}
+        self,
+        config=None,
+        url=None,
+        auth=None,
+        error_msg=None,
+        empty_result={},
+        **kwargs,
     ):
-        super().__init__(url=url, auth=auth, config=config)
+        super().__init__(url=url, auth=auth, config=config, **kwargs)
         self.error_msg = error_msg
         self.empty_result = empty_result
 
@@ -305,19 +547,132 @@ class BaseDepositClient(BaseApiDepositClient):
             ).strip(),
         }
 
-    def do_execute(self, method: str, url: str, info: Dict, **kwargs) -> Response:
-        """Execute the http query to url using method and info information.
+    def compute_body(self, info: Dict[str, Any]) -> Optional[RequestBody]:
+        """Body of the http query, none by default. It is built again for each
+        attempt to send the query, as streamed bodies are consumed when sent."""
+        return None
+
+    def compute_request(
+        self, info: Dict[str, Any]
+    ) -> Tuple[Dict[str, str], Optional[RequestBody]]:
+        """Headers and body of the http query (see :meth:`compute_body`)."""
+        headers = dict(info.get("headers", {}))
+        body = self.compute_body(info)
+        if isinstance(body, StreamingBody) and body.content_type is not None:
+            headers["CONTENT-TYPE"] = body.content_type
+        return headers, body
 
-        By default, execute a simple query to url with the http method. Override this in
-        subclass to improve the default behavior if needed.
+    def do_execute(self, method: str, url: str, info: Dict, **kwargs) -> Response:
+        """Execute the http query to url using method and info information, with
+        the headers and body given by :meth:`compute_request`.
 
         """
-        return self.do(method, url, **kwargs)
+        headers, body = self.compute_request(info)
+        try:
+            return self.do(method, url, data=body, headers=headers, **kwargs)
+        finally:
+            if isinstance(body, StreamingBody):
+                body.close()
 
     def compute_params(self, **kwargs) -> Dict[str, Any]:
         """Determine the params out of the kwargs"""
         return {}
 
+    def execute_with_retries(
+        self, method: str, url: str, info: Dict, **kwargs
+    ) -> Response:
+        """Execute the http query (see :meth:`do_execute`), and execute it again
+        while the server is overloaded or unavailable, as allowed by the retry
+        policy."""
+        for attempt in itertools.count(1):
+            response = self.do_execute(method, url, info, **kwargs)
+            if (
+                response.status_code not in RETRY_STATUSES
+                or attempt > self.retry_policy.retries
+            ):
+                break
+            delay = self.retry_policy.delay(
+                attempt, response.headers.get("Retry-After")
+            )
+            logger.warning(
+                "%s %s refused (%s), retry %s/%s in %s seconds",
+                method.upper(),
+                url,
+                response.status_code,
+                attempt,
+                self.retry_policy.retries,
+                delay,
+            )
+            time.sleep(delay)
+        return response
+
+    def prepare(
+        self, *args, **kwargs
+    ) -> Tuple[str, str, Dict[str, Any], Dict[str, Any]]:
+        """Compute the method, url, information (see :meth:`compute_information`)
+        and params of the http query to the api."""
+        url = self.compute_url(*args, **kwargs)
+        method = self.compute_method(*args, **kwargs)
+        info = self.compute_information(*args, **kwargs)
+        params = self.compute_params(**kwargs)
+        if kwargs.get("idempotency_key"):
+            # the server replays its first response to requests sent again with
+            # the same key, instead of processing them again
+            info.setdefault("headers", {})["IDEMPOTENCY-KEY"] = kwargs[
+                "idempotency_key"
+            ]
+        if kwargs.get("progress"):
+            info["progress"] = kwargs["progress"]
+        return method, url, info, params
+
+    def error_result(self, url: str, error: Exception) -> Dict[str, Any]:
+        """Result of a query which could not be sent, or got no response."""
+        result = self.empty_result
+        result.update(
+            {
+                "error": self.error_msg % (url, error),
+            }
+        )
+        return result
+
+    def parse_response(
+        self, status_code: int, text: str, headers: Optional[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Parse the response of the http query to the api.
+
+        Raises:
+            MaintenanceError if some api maintenance is happening.
+
+        """
+        if status_code < 400:
+            if status_code == 204:  # 204 returns no body
+                return {"status": status_code}
+            else:
+                return self.parse_result_ok(text, headers or None)
+        else:
+            try:
+                error = self.parse_result_error(text)
+            except ElementTree.ParseError:
+                logger.warning(
+                    "Error message in response is not xml parsable: %s",
+                    text,
+                )
+                error = {}
+            empty = self.empty_result
+            error.update(empty)
+            if status_code == 503:
+                summary = error.get("summary")
+                detail = error.get("sword:verboseDescription")
+                # Maintenance error
+                if summary and detail:
+                    raise MaintenanceError(f"{summary}: {detail}")
+            error.update(
+                {
+                    "status": status_code,
+                }
+            )
+            return error
+
     def execute(self, *args, **kwargs) -> Dict[str, Any]:
         """Main endpoint to prepare and execute the http query to the api.
 
@@ -328,62 +683,25 @@ class BaseDepositClient(BaseApiDepositClient):
             Dict of computed api data
 
         """
-        url = self.compute_url(*args, **kwargs)
-        method = self.compute_method(*args, **kwargs)
-        info = self.compute_information(*args, **kwargs)
-        params = self.compute_params(**kwargs)
-
+        method, url, info, params = self.prepare(*args, **kwargs)
         try:
-            response = self.do_execute(method, url, info, params=params)
+            response = self.execute_with_retries(method, url, info, params=params)
         except Exception as e:
-            msg = self.error_msg % (url, e)
-            result = self.empty_result
-            result.update(
-                {
-                    "error": msg,
-                }
-            )
-            return result
-        else:
-            if response.ok:
-                if int(response.status_code) == 204:  # 204 returns no body
-                    return {"status": response.status_code}
-                else:
-                    headers = dict(response.headers) if response.headers else None
-                    return self.parse_result_ok(response.text, headers)
-            else:
-                try:
-                    error = self.parse_result_error(response.text)
-                except ElementTree.ParseError:
-                    logger.warning(
-                        "Error message in response is not xml parsable: %s",
-                        response.text,
-                    )
-                    error = {}
-                empty = self.empty_result
-                error.update(empty)
-                if response.status_code == 503:
-                    summary = error.get("summary")
-                    detail = error.get("sword:verboseDescription")
-                    # Maintenance error
-                    if summary and detail:
-                        raise MaintenanceError(f"{summary}: {detail}")
-                error.update(
-                    {
-                        "status": response.status_code,
-                    }
-                )
-                return error
+            return self.error_result(url, e)
+        return self.parse_response(
+            response.status_code, response.text, dict(response.headers)
+        )
 
 
 class ServiceDocumentDepositClient(BaseDepositClient):
     """Service Document information retrieval."""
 
-    def __init__(self, config=None, url=None, auth=None):
+    def __init__(self, config=None, url=None, auth=None, **kwargs):
         super().__init__(
             url=url,
             auth=auth,
             config=config,
+            **kwargs,
             error_msg="Service document failure at %s: %s",
             empty_result={"collection": None},
         )
@@ -443,11 +761,12 @@ class ServiceDocumentDepositClient(BaseDepositClient):
 class StatusDepositClient(BaseDepositClient):
     """Status information on a deposit."""
 
-    def __init__(self, config=None, url=None, auth=None):
+    def __init__(self, config=None, url=None, auth=None, **kwargs):
         super().__init__(
             url=url,
             auth=auth,
             config=config,
+            **kwargs,
             error_msg="Status check failure at %s: %s",
             empty_result={
                 "deposit_status": None,
@@ -456,12 +775,26 @@ class StatusDepositClient(BaseDepositClient):
             },
         )
 
-    def compute_url(self, collection, deposit_id):
+    def compute_url(self, collection, deposit_id, **kwargs):
         return "/%s/%s/status/" % (collection, deposit_id)
 
     def compute_method(self, *args, **kwargs):
         return "get"
 
+    def compute_params(
+        self,
+        wait: Optional[float] = None,
+        since_status: Optional[str] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Transmit the long-polling params if provided"""
+        params: Dict[str, Any] = {}
+        if wait is not None:
+            params["wait"] = wait
+            if since_status is not None:
+                params["since_status"] = since_status
+        return params
+
     def parse_result_ok(
         self, xml_content: str, headers: Optional[Dict] = None
     ) -> Dict[str, Any]:
@@ -478,14 +811,79 @@ class StatusDepositClient(BaseDepositClient):
         return {key: data.findtext("swh:" + key, namespaces=NAMESPACES) for key in keys}
 
 
+class CollectionStatusDepositClient(BaseDepositClient):
+    """Status information on many deposits of a collection, given by id or modified
+    since a date."""
+
+    def __init__(self, config=None, url=None, auth=None, **kwargs):
+        super().__init__(
+            url=url,
+            auth=auth,
+            config=config,
+            **kwargs,
+            error_msg="Status check failure at %s: %s",
+            empty_result={"deposits": []},
+        )
+
+    def compute_url(self, collection, **kwargs):
+        return f"/{collection}/status/"
+
+    def compute_method(self, *args, **kwargs):
+        return "get"
+
+    def compute_params(
+        self,
+        deposit_ids: Optional[List[int]] = None,
+        since: Optional[datetime.datetime] = None,
+        cursor: Optional[str] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        if deposit_ids is not None:
+            return {"ids": ",".join(str(id_) for id_ in deposit_ids)}
+        if cursor is not None:
+            return {"cursor": cursor}
+        assert since is not None
+        return {"since": since.isoformat()}
+
+    def parse_result_ok(
+        self, xml_content: str, headers: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Given an xml content as string, returns the deposits' status dicts."""
+        link_header = headers.get("Link", "") if headers else ""
+        links = parse_header_links(link_header)
+        data = ElementTree.fromstring(xml_content)
+        keys = [
+            "deposit_id",
+            "deposit_status",
+            "deposit_status_detail",
+            "deposit_update_date",
+            "deposit_swh_id",
+            "deposit_swh_id_context",
+            "deposit_external_id",
+            "deposit_origin_url",
+        ]
+        entries = data.findall("atom:entry", namespaces=NAMESPACES)
+        return {
+            "deposits": [
+                {
+                    key: entry.findtext("swh:" + key, namespaces=NAMESPACES)
+                    for key in keys
+                }
+                for entry in entries
+            ],
+            **{link["rel"]: link["url"] for link in links},
+        }
+
+
 class CollectionListDepositClient(BaseDepositClient):
     """List a collection of deposits (owned by a user)"""
 
-    def __init__(self, config=None, url=None, auth=None):
+    def __init__(self, config=None, url=None, auth=None, **kwargs):
         super().__init__(
             url=url,
             auth=auth,
             config=config,
+            **kwargs,
             error_msg="List deposits failure at %s: %s",
             empty_result={},
         )
@@ -542,11 +940,12 @@ class CollectionListDepositClient(BaseDepositClient):
 class BaseCreateDepositClient(BaseDepositClient):
     """Deposit client base class to post new deposit."""
 
-    def __init__(self, config=None, url=None, auth=None):
+    def __init__(self, config=None, url=None, auth=None, **kwargs):
         super().__init__(
             url=url,
             auth=auth,
             config=config,
+            **kwargs,
             error_msg="Post Deposit failure at %s: %s",
             empty_result={
                 "swh:deposit_id": None,
@@ -576,9 +975,8 @@ class BaseCreateDepositClient(BaseDepositClient):
     def compute_headers(self, info: Dict[str, Any]) -> Dict[str, Any]:
         return info
 
-    def do_execute(self, method, url, info, **kwargs):
-        with open(info["filepath"], "rb") as f:
-            return self.do(method, url, data=f, headers=info["headers"])
+    def compute_body(self, info: Dict[str, Any]) -> Optional[RequestBody]:
+        return StreamingBody([info["filepath"]], info.get("progress"))
 
 
 class CreateArchiveDepositClient(BaseCreateDepositClient):
@@ -687,18 +1085,12 @@ class CreateMultipartDepositClient(BaseCreateDepositClient):
     """Create a multipart deposit client."""
 
     def _multipart_info(self, info, info_meta):
+        # files as (field name, (filename, path, content type)), read when sent
         files = [
-            (
-                "file",
-                (info["filename"], open(info["filepath"], "rb"), info["content-type"]),
-            ),
+            ("file", (info["filename"], info["filepath"], info["content-type"])),
             (
                 "atom",
-                (
-                    info_meta["filename"],
-                    open(info_meta["filepath"], "rb"),
-                    "application/atom+xml",
-                ),
+                (info_meta["filename"], info_meta["filepath"], "application/atom+xml"),
             ),
         ]
 
@@ -719,12 +1111,13 @@ class CreateMultipartDepositClient(BaseCreateDepositClient):
         info_meta = compute_unified_information(
             *args,
             filepath=kwargs["metadata_path"],
+            with_md5sum=False,
         )
         files, headers = self._multipart_info(info, info_meta)
         return {"files": files, "headers": headers}
 
-    def do_execute(self, method, url, info, **kwargs):
-        return self.do(method, url, files=info["files"], headers=info["headers"])
+    def compute_body(self, info: Dict[str, Any]) -> Optional[RequestBody]:
+        return StreamingBody.multipart(info["files"], info.get("progress"))
 
 
 class UpdateMultipartDepositClient(CreateMultipartDepositClient):
@@ -737,19 +1130,218 @@ class UpdateMultipartDepositClient(CreateMultipartDepositClient):
         return "put" if replace else "post"
 
 
+class UploadSessionCreateDepositClient(BaseCreateDepositClient):
+    """Open a resumable upload session for an archive, on a new deposit (Col-IRI)
+    or on an existing one (EM-IRI)."""
+
+    def compute_url(self, collection, *args, deposit_id=None, **kwargs):
+        if deposit_id is None:
+            return f"/{collection}/"
+        return f"/{collection}/{deposit_id}/media/"
+
+    def compute_method(self, *args, deposit_id=None, replace=False, **kwargs):
+        return "put" if deposit_id is not None and replace else "post"
+
+    def compute_information(self, *args, **kwargs) -> Dict[str, Any]:
+        archive_path = kwargs["archive_path"]
+        # the archive is hashed while it is uploaded
+        info = compute_unified_information(
+            *args, filepath=archive_path, with_md5sum=False
+        )
+        headers = {
+            "IN-PROGRESS": str(info["in_progress"]),
+            "CONTENT-TYPE": info["content-type"],
+            "CONTENT-DISPOSITION": "attachment; filename=%s" % (info["filename"],),
+            "UPLOAD-LENGTH": str(os.path.getsize(archive_path)),
+        }
+        if info.get("slug"):
+            headers["SLUG"] = info["slug"]
+        if kwargs.get("upload_mode"):
+            headers["UPLOAD-MODE"] = kwargs["upload_mode"]
+        info["headers"] = headers
+        return info
+
+    def compute_body(self, info: Dict[str, Any]) -> Optional[RequestBody]:
+        return None
+
+    def parse_result_ok(
+        self, xml_content: str, headers: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Given an xml content as string, returns a deposit dict with the upload
+        session url (and the pre-signed upload url of direct upload sessions)."""
+        result = super().parse_result_ok(xml_content, headers)
+        data = ElementTree.fromstring(xml_content)
+        for key in ["upload_session", "upload_url"]:
+            result[key] = data.findtext(f"swh:{key}", namespaces=NAMESPACES)
+        return result
+
+
+class UploadSessionStatusDepositClient(BaseDepositClient):
+    """Retrieve the progress of a resumable upload session."""
+
+    def __init__(self, config=None, url=None, auth=None, **kwargs):
+        super().__init__(
+            url=url,
+            auth=auth,
+            config=config,
+            **kwargs,
+            error_msg="Upload session status failure at %s: %s",
+            empty_result={"upload_offset": None, "upload_length": None},
+        )
+
+    def compute_url(self, upload_session, **kwargs):
+        return upload_session
+
+    def compute_method(self, *args, **kwargs):
+        return "get"
+
+    def parse_result_ok(
+        self, xml_content: str, headers: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        data = ElementTree.fromstring(xml_content)
+        return {
+            key: int(data.findtext(f"swh:{key}", namespaces=NAMESPACES))
+            for key in ["upload_offset", "upload_length"]
+        }
+
+
+class UploadChunkDepositClient(BaseDepositClient):
+    """Send a chunk of an archive (``data``, starting at byte ``start``) to a
+    resumable upload session."""
+
+    def __init__(self, config=None, url=None, auth=None, **kwargs):
+        super().__init__(
+            url=url,
+            auth=auth,
+            config=config,
+            **kwargs,
+            error_msg="Upload chunk failure at %s: %s",
+            empty_result={},
+        )
+
+    def compute_url(self, upload_session, **kwargs):
+        return upload_session
+
+    def compute_method(self, *args, **kwargs):
+        return "patch"
+
+    def compute_information(
+        self, upload_session, *, data, start, length, **kwargs
+    ) -> Dict[str, Any]:
+        end = start + len(data) - 1
+        return {
+            "data": data,
+            "headers": {
+                "CONTENT-TYPE": "application/octet-stream",
+                "CONTENT-RANGE": f"bytes {start}-{end}/{length}",
+                "CONTENT-MD5": hashlib.md5(data).hexdigest(),
+            },
+        }
+
+    def compute_body(self, info: Dict[str, Any]) -> Optional[RequestBody]:
+        return info["data"]
+
+
+class UploadSessionCommitDepositClient(BaseCreateDepositClient):
+    """Commit a complete resumable upload session as an archive of its deposit."""
+
+    def compute_url(self, upload_session, **kwargs):
+        return upload_session
+
+    def compute_information(
+        self, upload_session, *, in_progress, md5sum, **kwargs
+    ) -> Dict[str, Any]:
+        return {
+            "headers": {
+                "IN-PROGRESS": str(in_progress),
+                "CONTENT-MD5": md5sum,
+            }
+        }
+
+    def compute_body(self, info: Dict[str, Any]) -> Optional[RequestBody]:
+        return None
+
+
+def _is_error(result: Dict[str, Any]) -> bool:
+    return "error" in result or result.get("status", 200) >= 400
+
+
+def new_idempotency_key() -> str:
+    """Generate a key identifying a deposit creation or update, to be sent again
+    when retrying it (see the ``idempotency_key`` arguments of
+    :class:`PublicApiDepositClient`)"""
+    return str(uuid.uuid4())
+
+
 class PublicApiDepositClient(BaseApiDepositClient):
     """Public api deposit client."""
 
     def service_document(self):
         """Retrieve service document endpoint's information."""
-        return ServiceDocumentDepositClient(url=self.base_url, auth=self.auth).execute()
+        return self.client(ServiceDocumentDepositClient).execute()
 
-    def deposit_status(self, collection: str, deposit_id: int):
-        """Retrieve status information on a deposit."""
-        return StatusDepositClient(url=self.base_url, auth=self.auth).execute(
-            collection, deposit_id
+    def deposit_status(
+        self,
+        collection: str,
+        deposit_id: int,
+        wait: Optional[float] = None,
+        since_status: Optional[str] = None,
+    ):
+        """Retrieve status information on a deposit.
+
+        With ``wait`` (in seconds), the server answers once the status of the
+        deposit is other than ``since_status`` (by default, its current status),
+        or after that delay (capped by the server).
+        """
+        return self.client(StatusDepositClient).execute(
+            collection, deposit_id, wait=wait, since_status=since_status
         )
 
+    def deposit_statuses(
+        self,
+        collection: str,
+        deposit_ids: Optional[List[int]] = None,
+        since: Optional[datetime.datetime] = None,
+    ) -> Dict[str, Any]:
+        """Retrieve status information on many deposits of a collection at once,
+        either the deposits whose ids are given, or those modified since a date.
+
+        Many queries are sent if there are too many deposits for a single one.
+
+        Returns:
+            Dict with the status dicts of the deposits (see
+            :meth:`deposit_status`) in the ``deposits`` key, or the error of the
+            first query which failed
+
+        """
+        if (deposit_ids is None) == (since is None):
+            raise ValueError("Exactly one of deposit_ids or since must be given")
+        client = self.client(CollectionStatusDepositClient)
+        deposits: Dict[str, Dict[str, Any]] = {}
+        if deposit_ids is not None:
+            for start in range(0, len(deposit_ids), STATUSES_BATCH_SIZE):
+                result = client.execute(
+                    collection,
+                    deposit_ids=deposit_ids[start : start + STATUSES_BATCH_SIZE],
+                )
+                if _is_error(result):
+                    return result
+                for deposit in result["deposits"]:
+                    deposits[deposit["deposit_id"]] = deposit
+        else:
+            cursor = None
+            while True:
+                result = client.execute(collection, since=since, cursor=cursor)
+                if _is_error(result):
+                    return result
+                for deposit in result["deposits"]:
+                    deposits[deposit["deposit_id"]] = deposit
+                if "next" not in result:
+                    break
+                # the next deposits are those after the last one returned
+                (cursor,) = parse_qs(urlparse(result["next"]).query)["cursor"]
+        return {"deposits": list(deposits.values())}
+
     def deposit_list(
         self,
         collection: str,
@@ -757,7 +1349,7 @@ class PublicApiDepositClient(BaseApiDepositClient):
         page_size: Optional[int] = None,
     ):
         """List deposits from the collection"""
-        return CollectionListDepositClient(url=self.base_url, auth=self.auth).execute(
+        return self.client(CollectionListDepositClient).execute(
             collection, page=page, page_size=page_size
         )
 
@@ -768,25 +1360,43 @@ class PublicApiDepositClient(BaseApiDepositClient):
         archive: Optional[str] = None,
         metadata: Optional[str] = None,
         in_progress: bool = False,
+        idempotency_key: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
     ):
-        """Create a new deposit (archive, metadata, both as multipart)."""
+        """Create a new deposit (archive, metadata, both as multipart).
+
+        A new idempotency key is generated if none is provided; provide the same
+        key when retrying the creation of a deposit, so that it is created once.
+        Archives are streamed, and ``progress`` is called with the number of bytes
+        sent (and to send) as they are.
+        """
+        idempotency_key = idempotency_key or new_idempotency_key()
         if archive and not metadata:
-            return CreateArchiveDepositClient(
-                url=self.base_url, auth=self.auth
-            ).execute(collection, in_progress, slug, archive_path=archive)
+            return self.client(CreateArchiveDepositClient).execute(
+                collection,
+                in_progress,
+                slug,
+                archive_path=archive,
+                idempotency_key=idempotency_key,
+                progress=progress,
+            )
         elif not archive and metadata:
-            return CreateMetadataDepositClient(
-                url=self.base_url, auth=self.auth
-            ).execute(collection, in_progress, slug, metadata_path=metadata)
+            return self.client(CreateMetadataDepositClient).execute(
+                collection,
+                in_progress,
+                slug,
+                metadata_path=metadata,
+                idempotency_key=idempotency_key,
+            )
         else:
-            return CreateMultipartDepositClient(
-                url=self.base_url, auth=self.auth
-            ).execute(
+            return self.client(CreateMultipartDepositClient).execute(
                 collection,
                 in_progress,
                 slug,
                 archive_path=archive,
                 metadata_path=metadata,
+                idempotency_key=idempotency_key,
+                progress=progress,
             )
 
     def deposit_update(
@@ -799,8 +1409,15 @@ class PublicApiDepositClient(BaseApiDepositClient):
         in_progress: bool = False,
         replace: bool = False,
         swhid: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
     ):
-        """Update (add/replace) existing deposit (archive, metadata, both)."""
+        """Update (add/replace) existing deposit (archive, metadata, both).
+
+        A new idempotency key is generated if none is provided, and ``progress``
+        reports the upload of archives (see :meth:`deposit_create`).
+        """
+        idempotency_key = idempotency_key or new_idempotency_key()
         response = self.deposit_status(collection, deposit_id)
         if "error" in response:
             return response
@@ -821,42 +1438,38 @@ class PublicApiDepositClient(BaseApiDepositClient):
                 "deposit_id": deposit_id,
             }
         if archive and not metadata:
-            result = UpdateArchiveDepositClient(
-                url=self.base_url, auth=self.auth
-            ).execute(
+            result = self.client(UpdateArchiveDepositClient).execute(
                 collection,
                 in_progress,
                 slug,
                 deposit_id=deposit_id,
                 archive_path=archive,
                 replace=replace,
+                idempotency_key=idempotency_key,
+                progress=progress,
             )
         elif not archive and metadata and swhid is None:
-            result = UpdateMetadataOnPartialDepositClient(
-                url=self.base_url, auth=self.auth
-            ).execute(
+            result = self.client(UpdateMetadataOnPartialDepositClient).execute(
                 collection,
                 in_progress,
                 slug,
                 deposit_id=deposit_id,
                 metadata_path=metadata,
                 replace=replace,
+                idempotency_key=idempotency_key,
             )
         elif not archive and metadata and swhid is not None:
-            result = UpdateMetadataOnDoneDepositClient(
-                url=self.base_url, auth=self.auth
-            ).execute(
+            result = self.client(UpdateMetadataOnDoneDepositClient).execute(
                 collection,
                 in_progress,
                 slug,
                 deposit_id=deposit_id,
                 metadata_path=metadata,
                 swhid=swhid,
+                idempotency_key=idempotency_key,
             )
         else:
-            result = UpdateMultipartDepositClient(
-                url=self.base_url, auth=self.auth
-            ).execute(
+            result = self.client(UpdateMultipartDepositClient).execute(
                 collection,
                 in_progress,
                 slug,
@@ -864,18 +1477,215 @@ class PublicApiDepositClient(BaseApiDepositClient):
                 archive_path=archive,
                 metadata_path=metadata,
                 replace=replace,
+                idempotency_key=idempotency_key,
+                progress=progress,
             )
 
         if "error" in result:
             return result
         return self.deposit_status(collection, deposit_id)
 
+    def deposit_upload_resumable(
+        self,
+        collection: str,
+        archive: str,
+        slug: Optional[str] = None,
+        in_progress: bool = False,
+        deposit_id: Optional[int] = None,
+        replace: bool = False,
+        upload_session: Optional[str] = None,
+        chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE,
+        max_retries: int = 5,
+        retry_delay: float = 1.0,
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Upload an archive in chunks through a resumable upload session, which
+        allows to send archives larger than the server's max upload size and to
+        resume interrupted uploads.
+
+        Args:
+            collection: Deposit collection
+            archive: Path to the archive to upload
+            slug: external id to use (new deposits only)
+            in_progress: do we finalize the deposit once the archive is uploaded?
+            deposit_id: the existing deposit to add the archive to, a new
+              deposit is created if not provided
+            replace: whether the archive replaces the existing archives of the
+              deposit
+            upload_session: url of an already opened upload session to resume
+            chunk_size: size of each chunk sent
+            max_retries: number of consecutive failures to send a chunk before
+              giving up
+            retry_delay: delay (in seconds) before retrying, multiplied by the
+              number of consecutive failures
+            idempotency_key: key identifying the upload (see
+              :meth:`deposit_create`), generated if not provided
+
+        Returns:
+            the deposit receipt as a dict, or a dict with the error and the
+            ``upload_session`` url to resume the upload from
+
+        """
+        idempotency_key = idempotency_key or new_idempotency_key()
+        if upload_session is None:
+            result = self.client(UploadSessionCreateDepositClient).execute(
+                collection,
+                in_progress,
+                slug,
+                deposit_id=deposit_id,
+                archive_path=archive,
+                replace=replace,
+                idempotency_key=idempotency_key,
+            )
+            if _is_error(result):
+                return result
+            upload_session = result["upload_session"]
+
+        length = os.path.getsize(archive)
+        # the archive is hashed while its chunks are sent, the bytes already
+        # uploaded (when resuming) are hashed from the file beforehand
+        md5 = hashlib.md5()
+        hashed = 0
+        failures = 0
+        offset: Optional[int] = None
+        with open(archive, "rb") as f:
+            while offset is None or offset < length:
+                if offset is None:
+                    # (re)synchronize with the server, e.g. after an interruption
+                    result = self.client(UploadSessionStatusDepositClient).execute(
+                        upload_session
+                    )
+                    if not _is_error(result):
+                        offset = result["upload_offset"]
+                        if offset < hashed:
+                            md5, hashed = hashlib.md5(), 0
+                        file_md5(archive, hashed, offset, md5)
+                        hashed = offset
+                        continue
+                else:
+                    f.seek(offset)
+                    data = f.read(min(chunk_size, length - offset))
+                    result = self.client(UploadChunkDepositClient).execute(
+                        upload_session,
+                        data=data,
+                        start=offset,
+                        length=length,
+                    )
+                    if not _is_error(result):
+                        failures = 0
+                        md5.update(data)
+                        offset = hashed = offset + len(data)
+                        continue
+                    offset = None
+
+                failures += 1
+                if failures > max_retries:
+                    return {**result, "upload_session": upload_session}
+                logger.warning(
+                    "Upload to %s failed (%s), retrying", upload_session, result
+                )
+                time.sleep(retry_delay * failures)
+
+        result = self.client(UploadSessionCommitDepositClient).execute(
+            upload_session,
+            in_progress=in_progress,
+            md5sum=md5.hexdigest(),
+            idempotency_key=f"{idempotency_key}-commit",
+        )
+        if _is_error(result):
+            return {**result, "upload_session": upload_session}
+        return result
+
+    def deposit_upload_direct(
+        self,
+        collection: str,
+        archive: str,
+        slug: Optional[str] = None,
+        in_progress: bool = False,
+        deposit_id: Optional[int] = None,
+        replace: bool = False,
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Upload an archive straight to the archive storage of the deposit server,
+        through the pre-signed url of a direct upload session.
+
+        The archive is sent in a single request which does not go through the
+        deposit server (when its archive storage supports it), so its size is not
+        limited by the server's max upload size.
+
+        Args:
+            collection: Deposit collection
+            archive: Path to the archive to upload
+            slug: external id to use (new deposits only)
+            in_progress: do we finalize the deposit once the archive is uploaded?
+            deposit_id: the existing deposit to add the archive to, a new
+              deposit is created if not provided
+            replace: whether the archive replaces the existing archives of the
+              deposit
+            idempotency_key: key identifying the upload (see
+              :meth:`deposit_create`), generated if not provided
+
+        Returns:
+            the deposit receipt as a dict, or a dict with the error (and the
+            ``upload_session`` url once it is opened)
+
+        """
+        idempotency_key = idempotency_key or new_idempotency_key()
+        result = self.client(UploadSessionCreateDepositClient).execute(
+            collection,
+            in_progress,
+            slug,
+            deposit_id=deposit_id,
+            archive_path=archive,
+            replace=replace,
+            upload_mode="direct",
+            idempotency_key=idempotency_key,
+        )
+        if _is_error(result):
+            return result
+        upload_session = result["upload_session"]
+
+        # the pre-signed url carries its own authorization, the deposit
+        # credentials must not be sent to the archive storage
+        # the pre-signed url needs the checksum before the archive is sent
+        md5 = file_md5(archive)
+        with open(archive, "rb") as f:
+            response = requests.put(
+                result["upload_url"],
+                data=f,
+                headers={
+                    "Content-Type": "application/octet-stream",
+                    "Content-MD5": base64.b64encode(md5.digest()).decode(),
+                    "x-ms-blob-type": "BlockBlob",
+                },
+                timeout=DIRECT_UPLOAD_TIMEOUT,
+            )
+        if not response.ok:
+            return {
+                "error": f"Archive upload failure: {response.status_code}",
+                "status": response.status_code,
+                "upload_session": upload_session,
+            }
+
+        result = self.client(UploadSessionCommitDepositClient).execute(
+            upload_session,
+            in_progress=in_progress,
+            md5sum=md5.hexdigest(),
+            idempotency_key=f"{idempotency_key}-commit",
+        )
+        if _is_error(result):
+            return {**result, "upload_session": upload_session}
+        return result
+
     def deposit_metadata_only(
         self,
         collection: str,
         metadata: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
     ):
         assert metadata is not None
-        return CreateMetadataOnlyDepositClient(
-            url=self.base_url, auth=self.auth
-        ).execute(collection, metadata_path=metadata)
+        return self.client(CreateMetadataOnlyDepositClient).execute(
+            collection,
+            metadata_path=metadata,
+            idempotency_key=idempotency_key or new_idempotency_key(),
+        )
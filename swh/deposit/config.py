@@ -1,15 +1,20 @@
-# Copyright (C) 2017-2025  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
 import os
-from typing import Any, Dict, Optional
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 from swh.core import config
 from swh.deposit import __version__
 from swh.model.model import MetadataAuthority, MetadataAuthorityType, MetadataFetcher
 
+if TYPE_CHECKING:
+    from swh.scheduler.interface import SchedulerInterface
+    from swh.storage.interface import StorageInterface
+
 # IRIs (Internationalized Resource identifier) sword 2.0 specified
 EDIT_IRI = "edit_iri"
 SE_IRI = "se_iri"
@@ -18,6 +23,9 @@ CONT_FILE_IRI = "cont_file_iri"
 SD_IRI = "servicedocument"
 COL_IRI = "upload"
 STATE_IRI = "state_iri"
+COL_STATE_IRI = "col_state_iri"
+UPLOAD_SESSION_IRI = "upload_session_iri"
+DIRECT_UPLOAD_IRI = "direct_upload_iri"
 PRIVATE_GET_RAW_CONTENT = "private-download"
 PRIVATE_PUT_DEPOSIT = "private-update"
 PRIVATE_GET_DEPOSIT_METADATA = "private-read"
@@ -88,29 +96,87 @@ def setup_django_for(platform: Optional[str] = None, config_file: Optional[str]
     setup()
 
 
+class APIClients:
+    """Configuration of the server, and clients of the services it uses, shared by
+    all the API views of a process (see :func:`get_api_clients`).
+
+    The configuration must not be modified.
+
+    """
+
+    def __init__(self, config_key: Tuple, config: Dict[str, Any]):
+        from swh.scheduler import get_scheduler
+        from swh.storage import get_storage
+
+        self.config_key = config_key
+        self.config = config
+        self.scheduler: SchedulerInterface = get_scheduler(**config["scheduler"])
+        self.storage: StorageInterface = get_storage(**config["storage"])
+        if config["storage_metadata"] == config["storage"]:
+            self.storage_metadata = self.storage
+        else:
+            self.storage_metadata = get_storage(**config["storage_metadata"])
+
+
+_api_clients: Optional[APIClients] = None
+_api_clients_lock = threading.Lock()
+
+
+def _forget_api_clients() -> None:
+    """Clients are not shared with forked processes (e.g. the gunicorn workers), as
+    their connections would be."""
+    global _api_clients, _api_clients_lock
+    _api_clients = None
+    _api_clients_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_api_clients)
+
+
+def get_api_clients() -> APIClients:
+    """Configuration and service clients of the process, created on first use, then
+    created again only when the configuration file (``SWH_CONFIG_FILENAME``) is
+    changed."""
+    global _api_clients
+    path = os.environ.get("SWH_CONFIG_FILENAME")
+    key: Tuple = (path,)
+    if path:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            pass
+        else:
+            key = (path, stat.st_mtime_ns, stat.st_size)
+    clients = _api_clients
+    if clients is not None and clients.config_key == key:
+        return clients
+    with _api_clients_lock:
+        if _api_clients is None or _api_clients.config_key != key:
+            _api_clients = APIClients(key, config.load_from_envvar(DEFAULT_CONFIG))
+        return _api_clients
+
+
 class APIConfig:
     """API Configuration centralized class. This loads explicitly the configuration file out
     of the SWH_CONFIG_FILENAME environment variable.
 
+    The configuration and the service clients are loaded once per process, and
+    shared by all the instances (see :func:`get_api_clients`).
+
     """
 
     def __init__(self):
-        from swh.scheduler import get_scheduler
-        from swh.scheduler.interface import SchedulerInterface
-        from swh.storage import get_storage
-        from swh.storage.interface import StorageInterface
-
-        self.config: Dict[str, Any] = config.load_from_envvar(DEFAULT_CONFIG)
-        self.scheduler: SchedulerInterface = get_scheduler(**self.config["scheduler"])
+        clients = get_api_clients()
+        self.config: Dict[str, Any] = clients.config
+        self.scheduler: SchedulerInterface = clients.scheduler
         self.tool = {
             "name": "swh-deposit",
             "version": __version__,
             "configuration": {"sword_version": "2"},
         }
-        self.storage: StorageInterface = get_storage(**self.config["storage"])
-        self.storage_metadata: StorageInterface = get_storage(
-            **self.config["storage_metadata"]
-        )
+        self.storage: StorageInterface = clients.storage
+        self.storage_metadata: StorageInterface = clients.storage_metadata
 
     def swh_deposit_authority(self):
         return MetadataAuthority(
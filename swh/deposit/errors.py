@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2020  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -20,6 +20,9 @@ MEDIATION_NOT_ALLOWED = "mediation-not-allowed"
 METHOD_NOT_ALLOWED = "method-not-allowed"
 MAX_UPLOAD_SIZE_EXCEEDED = "max_upload_size_exceeded"
 PARSING_ERROR = "parsing-error"
+UPLOAD_OFFSET_MISMATCH = "upload-offset-mismatch"
+TOO_MANY_REQUESTS = "too-many-requests"
+IDEMPOTENCY_KEY_IN_USE = "idempotency-key-in-use"
 
 
 logger = logging.getLogger(__name__)
@@ -82,6 +85,21 @@ ERRORS = {
         "iri": "http://purl.org/net/sword/error/MaxUploadSizeExceeded",
         "tag": "sword:MaxUploadSizeExceeded",
     },
+    UPLOAD_OFFSET_MISMATCH: {
+        "status": status.HTTP_409_CONFLICT,
+        "iri": "http://purl.org/net/sword/error/UploadOffsetMismatch",
+        "tag": "sword:UploadOffsetMismatch",
+    },
+    TOO_MANY_REQUESTS: {
+        "status": status.HTTP_429_TOO_MANY_REQUESTS,
+        "iri": "http://purl.org/net/sword/error/TooManyRequests",
+        "tag": "sword:TooManyRequests",
+    },
+    IDEMPOTENCY_KEY_IN_USE: {
+        "status": status.HTTP_409_CONFLICT,
+        "iri": "http://purl.org/net/sword/error/IdempotencyKeyInUse",
+        "tag": "sword:IdempotencyKeyInUse",
+    },
 }
 
 
@@ -152,12 +170,14 @@ def make_error_response(req, key, summary=None, verbose_description=None):
 
 
 class DepositError(ValueError):
-    """Represents an error that should be reported to the client"""
+    """Represents an error that should be reported to the client, with the delay
+    (in seconds) after which the client may retry, if any"""
 
-    def __init__(self, key, summary, verbose_description=None):
+    def __init__(self, key, summary, verbose_description=None, retry_after=None):
         self.key = key
         self.summary = summary
         self.verbose_description = verbose_description
+        self.retry_after = retry_after
 
     def to_dict(self):
         return make_error_dict(self.key, self.summary, self.verbose_description)
@@ -187,6 +207,11 @@ class DepositErrorMiddleware:
                 exception.summary,
                 exception.verbose_description,
             )
-            return make_error_response_from_dict(request, exception.to_dict()["error"])
+            response = make_error_response_from_dict(
+                request, exception.to_dict()["error"]
+            )
+            if exception.retry_after is not None:
+                response["Retry-After"] = str(exception.retry_after)
+            return response
         else:
             return None
@@ -0,0 +1,174 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Garbage collection of the archive files which are not referenced by any deposit
+request anymore (e.g. after their deposit requests were replaced or deleted).
+
+Deleting deposit requests never removes their archive files from the storage, as
+content-addressed archives may be shared by several deposit requests. The archive
+storage is instead scanned periodically against the live deposit requests.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import time
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional
+
+import attr
+
+# Django is only imported by the functions of this module, so that its defaults can
+# be used by the cli and the celery task before Django is set up
+if TYPE_CHECKING:
+    from django.core.files.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+# Files more recent than this are never collected, as their deposit request may
+# not be committed yet
+DEFAULT_GRACE_PERIOD = datetime.timedelta(days=1)
+
+
+@attr.s
+class CollectStats:
+    """Progress of an orphan archives collection"""
+
+    scanned = attr.ib(type=int, default=0)
+    orphans = attr.ib(type=int, default=0)
+    removed = attr.ib(type=int, default=0)
+    removed_bytes = attr.ib(type=int, default=0)
+    # orphans skipped as they are more recent than the grace period
+    recent = attr.ib(type=int, default=0)
+    duration = attr.ib(type=float, default=0.0)
+
+    @property
+    def throughput(self) -> float:
+        """Number of files scanned per second"""
+        return self.scanned / self.duration if self.duration else 0.0
+
+
+def iter_archive_files(storage: Storage, directory: str = "") -> Iterator[str]:
+    """Yields the names of the archive files of the storage, recursively.
+
+    The chunks of the upload sessions are not archive files, they are removed with
+    their upload session.
+    """
+    from swh.deposit.models import UPLOAD_SESSIONS_DIRECTORY
+
+    directories, files = storage.listdir(directory)
+    prefix = f"{directory}/" if directory else ""
+    for filename in files:
+        yield f"{prefix}{filename}"
+    for subdirectory in directories:
+        if not directory and subdirectory == UPLOAD_SESSIONS_DIRECTORY:
+            continue
+        yield from iter_archive_files(storage, f"{prefix}{subdirectory}")
+
+
+def _live_names(names: List[str]) -> set:
+    """Names referenced by a deposit request, or reserved by a direct upload
+    session whose archive is being uploaded."""
+    from swh.deposit.models import DepositRequest, UploadSession
+
+    live = set(
+        DepositRequest.objects.filter(archive__in=names).values_list(
+            "archive", flat=True
+        )
+    )
+    live.update(
+        UploadSession.objects.filter(archive_name__in=names).values_list(
+            "archive_name", flat=True
+        )
+    )
+    return live
+
+
+def _collect_batch(
+    storage: Storage,
+    names: List[str],
+    stats: CollectStats,
+    cutoff: datetime.datetime,
+    dry_run: bool,
+) -> None:
+    live = _live_names(names)
+    for name in names:
+        if name in live:
+            continue
+        stats.orphans += 1
+        if storage.get_modified_time(name) > cutoff:
+            stats.recent += 1
+            continue
+        # checked again right before removal, the archive may have been referenced
+        # or rewritten again (content-addressed archives are reused, see
+        # swh.deposit.models.store_content_addressed_archive) since the batch was
+        # checked
+        if not dry_run:
+            if _live_names([name]):
+                continue
+            if storage.get_modified_time(name) > cutoff:
+                stats.recent += 1
+                continue
+        size = storage.size(name)
+        if dry_run:
+            logger.info("Would remove orphan archive %s (%s bytes)", name, size)
+        else:
+            logger.info("Removing orphan archive %s (%s bytes)", name, size)
+            storage.delete(name)
+        stats.removed += 1
+        stats.removed_bytes += size
+
+
+def collect_orphan_archives(
+    storage: Optional[Storage] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    grace_period: datetime.timedelta = DEFAULT_GRACE_PERIOD,
+    dry_run: bool = False,
+    progress: Optional[Callable[[CollectStats], None]] = None,
+) -> CollectStats:
+    """Remove the archive files of the storage not referenced by any deposit request.
+
+    Args:
+        storage: the archive storage, defaults to the storage of deposit requests
+        batch_size: number of files checked against the database at once
+        grace_period: files modified more recently are kept, as uploads in progress
+          write their archive before referencing it
+        dry_run: only report the orphan archives, without removing them
+        progress: called with the current statistics after each batch
+
+    Returns:
+        the statistics of the collection
+
+    """
+    from django.utils.timezone import now
+
+    from swh.deposit.models import DepositRequest
+
+    if storage is None:
+        storage = DepositRequest._meta.get_field("archive").storage
+    cutoff = now() - grace_period
+    stats = CollectStats()
+    start = time.monotonic()
+
+    batch: List[str] = []
+    for name in iter_archive_files(storage):
+        batch.append(name)
+        if len(batch) < batch_size:
+            continue
+        _collect_batch(storage, batch, stats, cutoff, dry_run)
+        stats.scanned += len(batch)
+        stats.duration = time.monotonic() - start
+        batch = []
+        if progress:
+            progress(stats)
+
+    if batch:
+        _collect_batch(storage, batch, stats, cutoff, dry_run)
+        stats.scanned += len(batch)
+        stats.duration = time.monotonic() - start
+        if progress:
+            progress(stats)
+    return stats
@@ -0,0 +1,311 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Inspection of archives while they are uploaded, to reject obviously broken
+archives before they are stored and checked by the deposit checker (see
+:mod:`swh.deposit.loader.checker`).
+
+The archive format is sniffed from its first bytes, then the zip local file
+headers or tar headers (possibly compressed) are parsed as the chunks arrive, to
+detect archives containing a single archive. Inspection stops as soon as the
+archive is known to be fine (at least two entries), or when the archive cannot be
+parsed incrementally (the deposit checker then has the final word).
+"""
+
+import bz2
+import lzma
+import struct
+from typing import Callable, Generator, Iterator, List, Optional
+import zlib
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+from swh.deposit.api.common import ACCEPT_ARCHIVE_CONTENT_TYPES
+from swh.deposit.errors import BAD_REQUEST, ERROR_CONTENT, DepositError
+from swh.deposit.loader.checker import (
+    MANDATORY_ARCHIVE_INVALID,
+    PATTERN_ARCHIVE_EXTENSION,
+)
+
+TAR_BLOCK_SIZE = 512
+ZIP_LOCAL_FILE_HEADER = b"PK\x03\x04"
+ZIP_EMPTY_ARCHIVE = b"PK\x05\x06"
+# Decompression is done by bounded steps, so that highly compressed archives do
+# not need much memory
+DECOMPRESSION_STEP_SIZE = 1024 * 1024
+# Long names and pax headers larger than this are skipped
+MAX_HEADER_DATA_SIZE = 64 * 1024
+
+# Parsers are generators yielding the number of bytes they need next (which are
+# sent back to them), or the negated number of bytes to skip
+Parser = Generator[int, Optional[bytes], None]
+
+
+class _IncompleteArchive(Exception):
+    pass
+
+
+def _tar_number(field: bytes) -> int:
+    if field[0] & 0x80:
+        # base-256 encoding (GNU extension for large values)
+        return int.from_bytes(bytes([field[0] & 0x7F]) + field[1:], "big")
+    return int(field.split(b"\0", 1)[0].strip() or b"0", 8)
+
+
+def _tar_checksum_ok(header: bytes) -> bool:
+    try:
+        checksum = _tar_number(header[148:156])
+    except ValueError:
+        return False
+    unsigned = sum(header[:148]) + 8 * 0x20 + sum(header[156:])
+    signed = unsigned - 2 * sum(b for b in header[:148] + header[156:] if b > 127)
+    return checksum in (unsigned, signed)
+
+
+def _pax_path(data: bytes) -> Optional[bytes]:
+    while data:
+        length, _, rest = data.partition(b" ")
+        record = rest[: int(length) - len(length) - 1]
+        data = data[int(length) :]
+        key, _, value = record.rstrip(b"\n").partition(b"=")
+        if key == b"path":
+            return value
+    return None
+
+
+def _tar_parser(names: List[str]) -> Parser:
+    next_name: Optional[bytes] = None
+    while True:
+        header = yield TAR_BLOCK_SIZE
+        assert header is not None
+        if header == bytes(TAR_BLOCK_SIZE):
+            # end of archive
+            return
+        if not _tar_checksum_ok(header):
+            raise _IncompleteArchive()
+        size = _tar_number(header[124:136])
+        padded_size = -(-size // TAR_BLOCK_SIZE) * TAR_BLOCK_SIZE
+        typeflag = header[156:157]
+
+        if typeflag in (b"L", b"x") and size <= MAX_HEADER_DATA_SIZE:
+            # GNU long name or pax extended header of the next entry
+            data = yield padded_size
+            assert data is not None
+            if typeflag == b"L":
+                next_name = data[:size].split(b"\0", 1)[0]
+            else:
+                next_name = _pax_path(data[:size]) or next_name
+            continue
+        if typeflag in (b"L", b"K", b"x", b"g"):
+            yield -padded_size
+            continue
+
+        name = header[:100].split(b"\0", 1)[0]
+        prefix = header[345:500].split(b"\0", 1)[0]
+        if header[257:263] == b"ustar\0" and prefix:
+            name = prefix + b"/" + name
+        names.append((next_name or name).decode("utf-8", "replace"))
+        next_name = None
+        yield -padded_size
+
+
+def _zip_parser(names: List[str]) -> Parser:
+    while True:
+        signature = yield 4
+        if signature != ZIP_LOCAL_FILE_HEADER:
+            # start of the central directory, after the last entry
+            return
+        header = yield 26
+        assert header is not None
+        flags, compressed_size, name_length, extra_length = struct.unpack(
+            "<2xH10xI4xHH", header
+        )
+        name = yield name_length
+        extra = yield extra_length
+        assert name is not None and extra is not None
+        names.append(name.decode("utf-8" if flags & 0x800 else "cp437", "replace"))
+        if flags & 0x08:
+            # the size of the entry is only known after its data
+            raise _IncompleteArchive()
+        if compressed_size == 0xFFFFFFFF:
+            compressed_size = _zip64_compressed_size(extra)
+        yield -compressed_size
+
+
+def _zip64_compressed_size(extra: bytes) -> int:
+    while len(extra) >= 4:
+        header_id, size = struct.unpack("<HH", extra[:4])
+        if header_id == 0x0001 and size >= 16:
+            return struct.unpack("<Q", extra[12:20])[0]
+        extra = extra[4 + size :]
+    raise _IncompleteArchive()
+
+
+class _StreamParser:
+    """Feed the chunks of a stream to a parser"""
+
+    def __init__(self, parser: Parser):
+        self.parser = parser
+        self.buffer = bytearray()
+        self.finished = False
+        self.wanted = next(parser)
+
+    def _send(self, value: Optional[bytes]) -> None:
+        try:
+            self.wanted = self.parser.send(value)
+        except StopIteration:
+            self.finished = True
+
+    def feed(self, data: bytes) -> None:
+        view = memoryview(data)
+        while not self.finished:
+            if self.wanted < 0:
+                skipped = min(-self.wanted, len(view))
+                view = view[skipped:]
+                self.wanted += skipped
+                if self.wanted < 0:
+                    return
+                self._send(None)
+            else:
+                missing = self.wanted - len(self.buffer)
+                self.buffer += view[:missing]
+                view = view[missing:]
+                if len(self.buffer) < self.wanted:
+                    return
+                chunk = bytes(self.buffer)
+                self.buffer.clear()
+                self._send(chunk)
+
+    @property
+    def at_boundary(self) -> bool:
+        """Whether the parser is waiting for the start of a new structure"""
+        return self.finished or (self.wanted >= 0 and not self.buffer)
+
+
+def _decompressed(
+    decompress: Callable[[bytes, int], bytes], more: Callable[[], bool], data: bytes
+) -> Iterator[bytes]:
+    chunk = decompress(data, DECOMPRESSION_STEP_SIZE)
+    while chunk:
+        yield chunk
+        if len(chunk) < DECOMPRESSION_STEP_SIZE and not more():
+            break
+        chunk = decompress(b"", DECOMPRESSION_STEP_SIZE)
+
+
+class ArchiveInspector:
+    """Incremental inspection of an uploaded archive.
+
+    :meth:`feed` raises a :class:`DepositError` as soon as the data received
+    cannot be an archive, :meth:`close` once the whole archive is received if it
+    contains a single archive.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.done = False
+        self._head = bytearray()
+        self._parser: Optional[_StreamParser] = None
+        self._decompress: Optional[Callable[[bytes], Iterator[bytes]]] = None
+
+    def _start(self) -> None:
+        head = bytes(self._head)
+        if head.startswith(ZIP_LOCAL_FILE_HEADER) or head.startswith(ZIP_EMPTY_ARCHIVE):
+            self._parser = _StreamParser(_zip_parser(self.names))
+        elif head.startswith(b"\x1f\x8b"):
+            gzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            self._decompress = lambda data: _decompressed(
+                lambda d, n: gzip.decompress(gzip.unconsumed_tail + d, n),
+                lambda: bool(gzip.unconsumed_tail),
+                data,
+            )
+        elif head.startswith(b"BZh"):
+            bzip2 = bz2.BZ2Decompressor()
+            self._decompress = lambda data: _decompressed(
+                bzip2.decompress, lambda: not bzip2.needs_input and not bzip2.eof, data
+            )
+        elif head.startswith(b"\xfd7zXZ\x00"):
+            xz = lzma.LZMADecompressor()
+            self._decompress = lambda data: _decompressed(
+                xz.decompress, lambda: not xz.needs_input and not xz.eof, data
+            )
+        elif len(head) >= TAR_BLOCK_SIZE and _tar_checksum_ok(head[:TAR_BLOCK_SIZE]):
+            self._parser = _StreamParser(_tar_parser(self.names))
+        else:
+            raise DepositError(
+                ERROR_CONTENT,
+                "Archive content does not match its content type",
+                "The content sent is neither a zip nor a (possibly compressed) "
+                "tar archive.",
+            )
+        if self._decompress is not None:
+            self._parser = _StreamParser(_tar_parser(self.names))
+
+    def _feed_parser(self, data: bytes) -> None:
+        assert self._parser is not None
+        try:
+            if self._decompress is None:
+                self._parser.feed(data)
+            else:
+                for chunk in self._decompress(data):
+                    self._parser.feed(chunk)
+                    if self._parser.finished or len(self.names) > 1:
+                        break
+        except (_IncompleteArchive, ValueError, OSError, EOFError, zlib.error):
+            # leave it to the deposit checker
+            self.done = True
+        if len(self.names) > 1:
+            # cannot be an archive in an archive anymore
+            self.done = True
+
+    def feed(self, data: bytes) -> None:
+        """Inspect the next chunk of the archive."""
+        if self.done:
+            return
+        if self._parser is None:
+            self._head += data
+            if len(self._head) < TAR_BLOCK_SIZE:
+                return
+            self._start()
+            data, self._head = bytes(self._head), bytearray()
+        self._feed_parser(data)
+
+    def close(self) -> None:
+        """Inspect the archive once all its chunks are received."""
+        if not self.done and self._parser is None:
+            # archives smaller than a tar block
+            self._start()
+            self._feed_parser(bytes(self._head))
+        if self.done or self._parser is None or not self._parser.at_boundary:
+            return
+        self.done = True
+        if len(self.names) == 1 and PATTERN_ARCHIVE_EXTENSION.match(self.names[0]):
+            raise DepositError(
+                BAD_REQUEST,
+                MANDATORY_ARCHIVE_INVALID,
+                f"The archive only contains the archive {self.names[0]}.",
+            )
+
+
+class ArchiveInspectionUploadHandler(FileUploadHandler):
+    """Upload handler inspecting uploaded archives (see :class:`ArchiveInspector`),
+    to be set before the upload handlers actually storing the uploaded files.
+    """
+
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, *args, **kwargs)
+        self.inspector = (
+            ArchiveInspector() if content_type in ACCEPT_ARCHIVE_CONTENT_TYPES else None
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.inspector is not None:
+            self.inspector.feed(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.inspector is not None:
+            self.inspector.close()
+        return None
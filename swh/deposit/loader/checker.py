@@ -1,8 +1,9 @@
-# Copyright (C) 2017-2025  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
+from functools import lru_cache
 from itertools import chain
 import logging
 import os
@@ -21,7 +22,7 @@ import sentry_sdk
 from swh.core import config
 from swh.deposit.client import PrivateApiDepositClient
 from swh.deposit.config import DEPOSIT_STATUS_REJECTED, DEPOSIT_STATUS_VERIFIED
-from swh.deposit.loader.checks import check_metadata
+from swh.deposit.loader.checks import DEFAULT_VALIDATION_ENGINE, check_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +49,9 @@ ARCHIVE_EXTENSIONS = [
     "7z",
 ]
 
+# Number of metadata documents whose checks are memoized by the checker process
+METADATA_CHECKS_CACHE_SIZE = 1024
+
 PATTERN_ARCHIVE_EXTENSION = re.compile(r".*\.(%s)$" % "|".join(ARCHIVE_EXTENSIONS))
 
 
@@ -144,6 +148,13 @@ def _check_deposit_archives(
     return False, {"archive": errors}
 
 
+@lru_cache(maxsize=METADATA_CHECKS_CACHE_SIZE)
+def _check_raw_metadata(raw_metadata: str, engine: str) -> Tuple[bool, Optional[Dict]]:
+    """Checks the metadata document, memoized in the checker process (e.g. for
+    the deposits sent again with the same metadata)."""
+    return check_metadata(ElementTree.fromstring(raw_metadata), engine=engine)
+
+
 class DepositChecker:
     """Deposit checker implementation.
 
@@ -161,9 +172,11 @@ class DepositChecker:
         logger.debug("deposit-upload-urls: %s", deposit_upload_urls)
         details_dict: Dict = {}
         try:
-            raw_metadata = self.client.metadata_get(f"/{deposit_id}/meta/").get(
-                "raw_metadata"
+            # with the checks of the metadata already made by the server, if any
+            metadata = self.client.metadata_get(
+                f"/{deposit_id}/meta/?check_metadata=true"
             )
+            raw_metadata = metadata.get("raw_metadata")
 
             # will check each deposit's associated request (both of type
             # archive and metadata) for errors
@@ -181,8 +194,16 @@ class DepositChecker:
                 metadata_status_ok = False
                 details_dict["metadata"] = [{"summary": "Missing Atom document"}]
             else:
-                metadata_tree = ElementTree.fromstring(raw_metadata)
-                metadata_status_ok, details = check_metadata(metadata_tree)
+                if "metadata_check" in metadata:
+                    metadata_status_ok = metadata["metadata_check"]["ok"]
+                    details = metadata["metadata_check"]["details"]
+                else:  # not checked yet, or by older servers
+                    metadata_status_ok, details = _check_raw_metadata(
+                        raw_metadata,
+                        self.config.get(
+                            "metadata_validation_engine", DEFAULT_VALIDATION_ENGINE
+                        ),
+                    )
                 # Ensure in case of error, we do have the rejection details
                 assert metadata_status_ok or (
                     not metadata_status_ok and details is not None
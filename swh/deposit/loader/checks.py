@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2025  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -16,14 +16,20 @@ Suggested fields:
 
 import dataclasses
 import functools
+import hashlib
 import importlib.resources
 import re
-from typing import Dict, Iterator, Optional, Tuple, cast
+from typing import Dict, FrozenSet, Iterator, Optional, Set, Tuple, cast
 import urllib
 from xml.etree import ElementTree
 
 import xmlschema
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # the lxml validation engine is optional
+    lxml_etree = None
+
 from swh.deposit.utils import NAMESPACES, parse_swh_metadata_provenance
 
 MANDATORY_FIELDS_MISSING = "Mandatory fields are missing"
@@ -198,27 +204,166 @@ def absolute_uri_validator(
             )
 
 
+# To be increased when the checks of check_metadata change, so that their results
+# memoized by the deposit server are no longer used
+CHECKS_VERSION = 1
+
+
+def _xsd_path(name: str):
+    return importlib.resources.files("swh.deposit").joinpath(f"xsd/{name}.xsd")
+
+
+@functools.lru_cache(1)
+def checks_version() -> str:
+    """Version of the checks of :func:`check_metadata`, which changes with
+    :const:`CHECKS_VERSION` and the schemas they use."""
+    version = hashlib.sha256(str(CHECKS_VERSION).encode())
+    for name in ("swh", "codemeta"):
+        version.update(_xsd_path(name).read_bytes())
+    return version.hexdigest()
+
+
 @dataclasses.dataclass
 class Schemas:
     swh: xmlschema.XMLSchema11
     codemeta: xmlschema.XMLSchema11
+    codemeta_root_elements: Dict[str, xmlschema.XsdElement] = dataclasses.field(
+        init=False
+    )
+    """Root elements of the codemeta schema, by tag (e.g.
+    ``{https://doi.org/10.5063/SCHEMA/CODEMETA-2.0}author``)"""
+
+    def __post_init__(self):
+        self.codemeta_root_elements = {
+            element.name: element for element in self.codemeta.root_elements
+        }
 
 
 @functools.lru_cache(1)
 def schemas() -> Schemas:
     def load_xsd(name) -> xmlschema.XMLSchema11:
-        xsd_path = importlib.resources.files("swh.deposit").joinpath(f"xsd/{name}.xsd")
-        with importlib.resources.as_file(xsd_path) as xsd:
+        with importlib.resources.as_file(_xsd_path(name)) as xsd:
             return xmlschema.XMLSchema11(xsd.as_posix())
 
     return Schemas(swh=load_xsd("swh"), codemeta=load_xsd("codemeta"))
 
 
-def check_metadata(metadata: ElementTree.Element) -> Tuple[bool, Optional[Dict]]:
+# Engines validating the metadata against the schemas:
+# - xmlschema: the pure Python validators of :func:`schemas`
+# - lxml: the validators compiled by libxml2 (see :func:`compiled_schemas`), for the
+#   elements they support, and xmlschema otherwise
+VALIDATION_ENGINES = ("xmlschema", "lxml")
+DEFAULT_VALIDATION_ENGINE = "xmlschema"
+
+XSD_NAMESPACE = "http://www.w3.org/2001/XMLSchema"
+# constructs of XML Schema 1.1 that libxml2 cannot compile
+XSD11_CONSTRUCTS = (
+    f"{{{XSD_NAMESPACE}}}assert",
+    f"{{{XSD_NAMESPACE}}}alternative",
+    f"{{{XSD_NAMESPACE}}}openContent",
+    f"{{{XSD_NAMESPACE}}}all/{{{XSD_NAMESPACE}}}any",
+)
+
+
+@dataclasses.dataclass
+class CompiledSchema:
+    """Part of a schema compiled by libxml2, which only supports XML Schema 1.0"""
+
+    schema: "lxml_etree.XMLSchema"
+    tags: FrozenSet[str]
+    """Tags of the root elements it validates"""
+
+
+def _compile_xsd10(name: str) -> CompiledSchema:
+    """Compiles the declarations of the schema ``name`` which do not use XML Schema
+    1.1 constructs, nor depend on declarations which do."""
+    with importlib.resources.as_file(_xsd_path(name)) as xsd_file:
+        xsd = lxml_etree.parse(xsd_file.as_posix())
+    root = xsd.getroot()
+    target_namespace = root.get("targetNamespace")
+    prefixes = [
+        prefix for prefix, ns in root.nsmap.items() if prefix and ns == target_namespace
+    ]
+
+    removed: Set[str] = set()
+    changed = True
+    while changed:
+        changed = False
+        for declaration in list(root.iterchildren(lxml_etree.Element)):
+            references = {
+                reference
+                for node in declaration.iter()
+                for attribute in ("type", "ref", "base", "memberTypes")
+                for reference in (node.get(attribute) or "").split()
+            }
+            if references & removed or any(
+                declaration.find(f".//{construct}") is not None
+                for construct in XSD11_CONSTRUCTS
+            ):
+                removed.update(
+                    f"{prefix}:{declaration.get('name')}" for prefix in prefixes
+                )
+                root.remove(declaration)
+                changed = True
+
+    return CompiledSchema(
+        schema=lxml_etree.XMLSchema(xsd),
+        tags=frozenset(
+            f"{{{target_namespace}}}{element.get('name')}"
+            for element in root.iterchildren(f"{{{XSD_NAMESPACE}}}element")
+        ),
+    )
+
+
+@functools.lru_cache(1)
+def compiled_schemas() -> Dict[str, CompiledSchema]:
+    """The schemas compiled by libxml2, for the lxml validation engine.
+
+    Only the codemeta schema is compiled, as its root elements are most of the
+    elements of the documents (and the swh schema relies on XML Schema 1.1
+    assertions anyway).
+
+    Raises:
+        ImportError if lxml is not installed
+
+    """
+    if lxml_etree is None:
+        raise ImportError(
+            "The lxml validation engine requires lxml "
+            "(install the lxml extra of swh.deposit)"
+        )
+    return {"codemeta": _compile_xsd10("codemeta")}
+
+
+def _valid_by_compiled_schema(
+    compiled_schema: CompiledSchema,
+    element: ElementTree.Element,
+    lxml_element: "lxml_etree._Element",
+    xsd_element: xmlschema.XsdElement,
+) -> bool:
+    """Whether the element is known to be valid by the compiled schema, and by the
+    extra checks of :func:`extra_validator`.
+
+    Elements it does not validate, or finds invalid, are to be validated by xmlschema
+    (which reports their errors)."""
+    return (
+        element.tag in compiled_schema.tags
+        # the extra checks are made on the element only, not on its children
+        and xsd_element.type.has_simple_content()
+        and compiled_schema.schema.validate(lxml_element)
+        and next(extra_validator(element, xsd_element), None) is None
+    )
+
+
+def check_metadata(
+    metadata: ElementTree.Element, engine: str = DEFAULT_VALIDATION_ENGINE
+) -> Tuple[bool, Optional[Dict]]:
     """Check metadata for mandatory field presence and date format.
 
     Args:
         metadata: Metadata dictionary to check
+        engine: engine validating the metadata against the schemas (one of
+          :const:`VALIDATION_ENGINES`), which all report the same errors
 
     Returns:
         tuple (status, error_detail):
@@ -227,6 +372,12 @@ def check_metadata(metadata: ElementTree.Element) -> Tuple[bool, Optional[Dict]]
           - (False, <detailed-error>) otherwise.
 
     """
+    if engine not in VALIDATION_ENGINES:
+        raise ValueError(
+            f"Unknown validation engine {engine!r}, "
+            f"should be one of {', '.join(VALIDATION_ENGINES)}"
+        )
+
     if metadata.tag != "{http://www.w3.org/2005/Atom}entry":
         return False, {
             "metadata": [
@@ -285,26 +436,37 @@ def check_metadata(metadata: ElementTree.Element) -> Tuple[bool, Optional[Dict]]
             return False, {"metadata": [{"fields": ["swh:deposit"], "summary": str(e)}]}
 
     detail = []
+    codemeta_root_elements = schemas().codemeta_root_elements
+    if engine == "lxml":
+        compiled_schema = compiled_schemas()["codemeta"]
+        # the same children, parsed once by lxml
+        lxml_children = dict(
+            zip(metadata, lxml_etree.fromstring(ElementTree.tostring(metadata)))
+        )
     for child in metadata:
-        for schema_element in schemas().codemeta.root_elements:
-            if child.tag in schema_element.name:
-                break
-        else:
+        schema_element = codemeta_root_elements.get(child.tag)
+        if schema_element is None:
             # Tag is not specified in the schema, don't validate it
             continue
         try:
-            schemas().codemeta.validate(
-                child,
-                extra_validator=cast(
-                    # ExtraValidatorType is a callable with "SchemaType" as second
-                    # argument, but extra_validator() is actually passed Xsd11Element
-                    # as second argument
-                    # https://github.com/sissaschool/xmlschema/issues/291
-                    xmlschema.aliases.ExtraValidatorType,
-                    extra_validator,
-                ),
-                namespaces=NAMESPACES,
-            )
+            if engine != "lxml" or not _valid_by_compiled_schema(
+                compiled_schema, child, lxml_children[child], schema_element
+            ):
+                # validated by its element of the schema, rather than by the schema
+                # which would look it up again (and parse the child as a new
+                # document)
+                schema_element.validate(
+                    child,
+                    extra_validator=cast(
+                        # ExtraValidatorType is a callable with "SchemaType" as
+                        # second argument, but extra_validator() is actually passed
+                        # Xsd11Element as second argument
+                        # https://github.com/sissaschool/xmlschema/issues/291
+                        xmlschema.aliases.ExtraValidatorType,
+                        extra_validator,
+                    ),
+                    namespaces=NAMESPACES,
+                )
         except xmlschema.exceptions.XMLSchemaException as e:
             detail.append({"fields": [schema_element.prefixed_name], "summary": str(e)})
         else:
@@ -1,12 +1,15 @@
-# Copyright (C) 2015-2024  The Software Heritage developers
+# Copyright (C) 2015-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
-from typing import Mapping
+import datetime
+from typing import Any, Dict, Mapping
 
 from celery import shared_task
 
+from swh.deposit.gc import DEFAULT_BATCH_SIZE, DEFAULT_GRACE_PERIOD
+
 
 @shared_task(name=__name__ + ".ChecksDepositTsk")
 def check_deposit(collection: str, deposit_id: str) -> Mapping[str, str]:
@@ -18,3 +21,35 @@ def check_deposit(collection: str, deposit_id: str) -> Mapping[str, str]:
 
     checker = DepositChecker()
     return checker.check(collection, deposit_id)
+
+
+@shared_task(name=__name__ + ".CollectOrphanArchivesTsk")
+def collect_orphan_archives(
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    grace_period: int = DEFAULT_GRACE_PERIOD // datetime.timedelta(hours=1),
+) -> Dict[str, Any]:
+    """Remove the archive files not referenced by any deposit request, see
+    :func:`swh.deposit.gc.collect_orphan_archives` (``grace_period`` is in
+    hours).
+
+    This needs access to the deposit server database and archive storage,
+    configured through the ``SWH_CONFIG_FILENAME`` environment variable.
+    """
+    import attr
+
+    from swh.deposit.config import setup_django_for
+
+    setup_django_for("production")
+
+    from swh.deposit.gc import collect_orphan_archives
+
+    stats = collect_orphan_archives(
+        batch_size=batch_size,
+        grace_period=datetime.timedelta(hours=grace_period),
+        dry_run=dry_run,
+    )
+    return {
+        "status": "eventful" if stats.removed else "uneventful",
+        **attr.asdict(stats),
+    }
@@ -0,0 +1,103 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Cached lookups of the deposit clients and collections, read by every request.
+
+Clients and collections are kept in the Django cache backend for
+:const:`LOOKUP_CACHE_TIMEOUT` seconds, and removed from it when they are saved or
+deleted through the Django models (e.g. by ``swh deposit admin``). When the cache
+backend is not shared by the server processes, the changes made by other
+processes are therefore seen after that delay at most.
+
+The database is queried directly when the cache backend is not available.
+"""
+
+import logging
+from typing import Any, Callable, Optional, TypeVar
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from swh.deposit.models import DepositClient, DepositCollection
+
+logger = logging.getLogger(__name__)
+
+# Seconds the clients and collections are kept in the cache
+LOOKUP_CACHE_TIMEOUT = 60
+
+T = TypeVar("T")
+
+
+def _client_key(username: str) -> str:
+    return f"swh.deposit.lookups.client.{username}"
+
+
+def _collection_key(name: str) -> str:
+    return f"swh.deposit.lookups.collection.{name}"
+
+
+def _cached(key: str, get: Callable[[], T]) -> T:
+    try:
+        value: Optional[T] = cache.get(key)
+    except Exception as e:
+        logger.warning("Lookup cache unavailable: %s", e)
+        return get()
+    if value is None:
+        value = get()
+        try:
+            cache.set(key, value, timeout=LOOKUP_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning("Lookup cache unavailable: %s", e)
+    return value
+
+
+def get_client_by_username(username: str) -> DepositClient:
+    """Gets the deposit client named ``username``.
+
+    Raises:
+        DepositClient.DoesNotExist if there is no such client
+
+    """
+    return _cached(
+        _client_key(username), lambda: DepositClient.objects.get(username=username)
+    )
+
+
+def get_collection_by_name(name: str) -> DepositCollection:
+    """Gets the collection named ``name``.
+
+    Raises:
+        DepositCollection.DoesNotExist if there is no such collection
+
+    """
+    return _cached(
+        _collection_key(name), lambda: DepositCollection.objects.get(name=name)
+    )
+
+
+def _forget(key: str) -> None:
+    try:
+        cache.delete(key)
+    except Exception as e:
+        logger.warning("Lookup cache unavailable: %s", e)
+
+
+def _forget_client(sender: Any, instance: User, **kwargs) -> None:
+    _forget(_client_key(instance.username))
+
+
+def _forget_collection(sender: Any, instance: DepositCollection, **kwargs) -> None:
+    _forget(_collection_key(instance.name))
+
+
+def connect_signals() -> None:
+    """Remove the clients and collections from the cache when they are modified
+    (called once the application is ready)."""
+    for signal in (post_save, post_delete):
+        # also when the user is saved as a Django user (e.g. its password)
+        signal.connect(_forget_client, sender=User)
+        signal.connect(_forget_client, sender=DepositClient)
+        signal.connect(_forget_collection, sender=DepositCollection)
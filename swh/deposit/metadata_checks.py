@@ -0,0 +1,93 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Memoized results of the functional checks of the metadata documents.
+
+Validating a document against the schemas is the costliest step of its checks, and
+the same document is checked several times (e.g. when clients send it again, and
+by the deposit checker). Results are therefore kept in the Django cache backend,
+by SHA256 of the document and version of the checks (see
+:func:`swh.deposit.loader.checks.checks_version`), for
+:const:`METADATA_CHECK_CACHE_TIMEOUT` seconds at most; the cache backend evicts
+them sooner when full.
+
+The document is checked again when the cache backend is not available.
+
+Results are only computed when the metadata are received; the private API reads
+them for the deposit checker (see :func:`cached_metadata_check`), which checks the
+documents itself when they are not memoized.
+"""
+
+import hashlib
+import logging
+from typing import Dict, Optional, Tuple
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+
+from swh.deposit.loader.checks import (
+    DEFAULT_VALIDATION_ENGINE,
+    check_metadata,
+    checks_version,
+)
+from swh.deposit.parsers import parse_xml
+
+logger = logging.getLogger(__name__)
+
+# Seconds the results of the checks are kept in the cache
+METADATA_CHECK_CACHE_TIMEOUT = 24 * 60 * 60
+
+MetadataCheck = Tuple[bool, Optional[Dict]]
+
+
+def metadata_check_key(raw_metadata: bytes) -> str:
+    digest = hashlib.sha256(raw_metadata).hexdigest()
+    return f"swh.deposit.metadata_checks.{checks_version()}.{digest}"
+
+
+def cached_metadata_check(raw_metadata: bytes) -> Optional[MetadataCheck]:
+    """The memoized result of the checks of ``raw_metadata``, None if it was not
+    checked yet (or the cache backend is not available)."""
+    try:
+        return cache.get(metadata_check_key(raw_metadata))
+    except Exception as e:
+        logger.warning("Metadata check cache unavailable: %s", e)
+        return None
+
+
+def check_raw_metadata(
+    raw_metadata: bytes,
+    metadata_tree: Optional[ElementTree.Element] = None,
+    engine: str = DEFAULT_VALIDATION_ENGINE,
+) -> MetadataCheck:
+    """Checks the metadata document ``raw_metadata``, as
+    :func:`swh.deposit.loader.checks.check_metadata` does, unless it was already.
+
+    Args:
+        raw_metadata: the metadata document
+        metadata_tree: the document, when already parsed
+        engine: engine validating the document against the schemas (the same
+          errors are reported by all the engines, so their results are shared)
+
+    Returns:
+        the result of check_metadata on the document
+
+    """
+    result = cached_metadata_check(raw_metadata)
+    if result is not None:
+        return result
+
+    if metadata_tree is None:
+        metadata_tree = parse_xml(raw_metadata)
+    result = check_metadata(metadata_tree, engine=engine)
+    try:
+        cache.set(
+            metadata_check_key(raw_metadata),
+            result,
+            timeout=METADATA_CHECK_CACHE_TIMEOUT,
+        )
+    except Exception as e:
+        logger.warning("Metadata check cache unavailable: %s", e)
+    return result
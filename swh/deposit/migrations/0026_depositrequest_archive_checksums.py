@@ -0,0 +1,36 @@
+# Copyright (C) 2026 The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deposit", "0025_set_release_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="depositrequest",
+            name="archive_length",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="depositrequest",
+            name="archive_md5",
+            field=models.CharField(max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name="depositrequest",
+            name="archive_sha1",
+            field=models.CharField(max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name="depositrequest",
+            name="archive_sha256",
+            field=models.CharField(max_length=64, null=True),
+        ),
+    ]
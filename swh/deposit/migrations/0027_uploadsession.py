@@ -0,0 +1,39 @@
+# Copyright (C) 2026 The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deposit", "0026_depositrequest_archive_checksums"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("date", models.DateTimeField(auto_now_add=True)),
+                ("filename", models.TextField()),
+                ("content_type", models.TextField()),
+                ("length", models.BigIntegerField()),
+                ("offset", models.BigIntegerField(default=0)),
+                ("replace_archives", models.BooleanField(default=False)),
+                (
+                    "deposit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="deposit.deposit",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "deposit_upload_session",
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Copyright (C) 2026 The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deposit", "0027_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="archive_name",
+            field=models.TextField(null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Copyright (C) 2026 The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.db import migrations, models
+
+import swh.deposit.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deposit", "0028_uploadsession_archive_name"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="depositrequest",
+            name="archive",
+            field=models.FileField(
+                db_index=True,
+                null=True,
+                upload_to=swh.deposit.models.client_directory_path,
+            ),
+        ),
+    ]
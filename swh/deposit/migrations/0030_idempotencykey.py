@@ -0,0 +1,47 @@
+# Copyright (C) 2026 The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deposit", "0029_depositrequest_archive_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("key", models.CharField(max_length=255)),
+                ("date", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.TextField()),
+                ("response_status", models.IntegerField(null=True)),
+                ("response_content_type", models.TextField(null=True)),
+                ("response_location", models.TextField(null=True)),
+                ("response_content", models.BinaryField(null=True)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="deposit.depositclient",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "deposit_idempotency_key",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("client", "key"),
+                        name="deposit_idempotency_key_client_key",
+                    )
+                ],
+            },
+        ),
+    ]
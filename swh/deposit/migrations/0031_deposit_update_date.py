@@ -0,0 +1,43 @@
+# Copyright (C) 2026 The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def fill_deposit_update_date(apps, schema_editor):
+    """Existing deposits were last modified when they were completed, or else when
+    they were received."""
+    Deposit = apps.get_model("deposit", "Deposit")
+    Deposit.objects.update(update_date=Coalesce("complete_date", "reception_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deposit", "0030_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deposit",
+            name="update_date",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            fill_deposit_update_date,
+            reverse_code=migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name="deposit",
+            index=models.Index(
+                fields=["collection", "update_date"], name="deposit_collection_update"
+            ),
+        ),
+    ]
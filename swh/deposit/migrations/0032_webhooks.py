@@ -0,0 +1,80 @@
+# Copyright (C) 2026 The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+import swh.deposit.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deposit", "0031_deposit_update_date"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="depositclient",
+            name="webhook_secret",
+            field=models.TextField(null=True),
+        ),
+        migrations.AddField(
+            model_name="depositclient",
+            name="webhook_url",
+            field=models.TextField(null=True),
+        ),
+        migrations.CreateModel(
+            name="WebhookDelivery",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("payload", swh.deposit.models.JSONField()),
+                ("creation_date", models.DateTimeField(auto_now_add=True)),
+                (
+                    "state",
+                    models.TextField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("delivered", "delivered"),
+                            ("failed", "failed"),
+                        ],
+                        default="pending",
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("last_error", models.TextField(null=True)),
+                (
+                    "next_attempt_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("end_date", models.DateTimeField(null=True)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="deposit.depositclient",
+                    ),
+                ),
+                (
+                    "deposit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="deposit.deposit",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "deposit_webhook_delivery",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("state", "pending")),
+                        fields=["next_attempt_date"],
+                        name="deposit_webhook_pending",
+                    )
+                ],
+            },
+        ),
+    ]
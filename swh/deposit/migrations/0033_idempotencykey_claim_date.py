@@ -0,0 +1,22 @@
+# Copyright (C) 2026 The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deposit", "0032_webhooks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="claim_date",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
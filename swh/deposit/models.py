@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2024  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -8,10 +8,15 @@
 #    python3 -m manage inspectdb
 
 import datetime
+import os
+import secrets
+import shutil
 from typing import Optional
 
 from django.contrib.auth.models import User, UserManager
 from django.contrib.postgres.fields import ArrayField
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage
 from django.db import models
 from django.utils.timezone import now
 
@@ -20,7 +25,6 @@ try:
 except ImportError:
     from django.contrib.postgres.fields import JSONField as OrigJSONField
 
-from swh.auth.django.models import OIDCUser
 from swh.deposit.config import (
     ARCHIVE_TYPE,
     DEPOSIT_STATUS_DEPOSITED,
@@ -106,7 +110,13 @@ class DepositClient(User):
 
     provider_url = models.TextField(null=False)
     domain = models.TextField(null=False)
-    oidc_user: Optional[OIDCUser] = None
+    # URL notified of the status changes of the client's deposits, with the
+    # secret signing the notifications (see swh.deposit.webhooks)
+    webhook_url = models.TextField(null=True)
+    webhook_secret = models.TextField(null=True)
+    # Whether the user has the deposit permission in keycloak, set by its
+    # authentication (see swh.deposit.auth)
+    has_deposit_permission: bool = False
 
     class Meta:
         db_table = "deposit_client"
@@ -142,6 +152,8 @@ class Deposit(models.Model):
     reception_date = models.DateTimeField(auto_now_add=True)
     # Date when the deposit is deemed complete and ready for loading
     complete_date = models.DateTimeField(null=True)
+    # Date of the last modification of the deposit (e.g. of its status)
+    update_date = models.DateTimeField(auto_now=True)
     # collection concerned by the deposit
     collection = models.ForeignKey("DepositCollection", models.DO_NOTHING)
     # Deprecated: Deposit's external identifier
@@ -175,6 +187,13 @@ class Deposit(models.Model):
     class Meta:
         db_table = "deposit"
         app_label = "deposit"
+        indexes = [
+            # deposits of a collection modified since a given date
+            models.Index(
+                fields=["collection", "update_date"],
+                name="deposit_collection_update",
+            )
+        ]
 
     def __str__(self):
         d = {
@@ -222,6 +241,44 @@ def client_directory_path(instance: "DepositRequest", filename: str) -> str:
     return f"client_{instance.deposit.client.id}/{folder}/{filename}"
 
 
+CONTENT_ADDRESSED_ARCHIVES_DIRECTORY = "archives"
+
+
+def archive_extension(filename: str) -> str:
+    """Extension of an archive filename, including compression suffixes known
+    to :mod:`shutil` (e.g. ``.tar.gz``)."""
+    extensions = [
+        extension
+        for _, format_extensions, _ in shutil.get_unpack_formats()
+        for extension in format_extensions
+        if filename.lower().endswith(extension)
+    ]
+    if extensions:
+        return filename[-max(map(len, extensions)) :]
+    return os.path.splitext(filename)[1]
+
+
+def content_addressed_path(sha256: str, filename: str) -> str:
+    """Content-addressed archive path, ``archives/<sha256[0:2]>/<sha256[2:4]>/
+    <sha256><extension>``.
+
+    The extension of the uploaded filename is kept, as the archive format may be
+    guessed from it when the archive is unpacked.
+
+    Args:
+        sha256: hex sha256 checksum of the archive
+        filename: Filename of the uploaded file
+
+    Returns:
+        The content-addressed archive path.
+
+    """
+    return (
+        f"{CONTENT_ADDRESSED_ARCHIVES_DIRECTORY}/{sha256[0:2]}/{sha256[2:4]}/"
+        f"{sha256}{archive_extension(filename)}"
+    )
+
+
 REQUEST_TYPES = [(ARCHIVE_TYPE, ARCHIVE_TYPE), (METADATA_TYPE, METADATA_TYPE)]
 
 
@@ -237,7 +294,17 @@ class DepositRequest(models.Model):
     metadata = JSONField(null=True)
     raw_metadata = models.TextField(null=True)
     # this can be null when type is 'metadata'
-    archive = models.FileField(null=True, upload_to=client_directory_path)
+    # archives uploaded with their checksums are stored at a content-addressed
+    # path (see content_addressed_path), which may be shared by several requests
+    archive = models.FileField(
+        null=True, upload_to=client_directory_path, db_index=True
+    )
+    # checksums (hex) and length of the archive, computed while it was uploaded;
+    # these can be null when type is 'metadata' (or for older archives)
+    archive_length = models.BigIntegerField(null=True)
+    archive_md5 = models.CharField(max_length=32, null=True)
+    archive_sha1 = models.CharField(max_length=40, null=True)
+    archive_sha256 = models.CharField(max_length=64, null=True)
 
     type = models.CharField(max_length=8, choices=REQUEST_TYPES, null=True)
 
@@ -266,6 +333,65 @@ class DepositRequest(models.Model):
         )
 
 
+def count_archive_references(name: str) -> int:
+    """Number of deposit requests referencing the archive stored as ``name``.
+
+    Content-addressed archives are shared by all the deposit requests of the same
+    archive content, they can only be removed from the storage once they are not
+    referenced anymore.
+    """
+    return DepositRequest.objects.filter(archive=name).count()
+
+
+def store_content_addressed_archive(archive: File, sha256: str) -> str:
+    """Store an uploaded archive at its content-addressed path, unless an archive
+    with the same content is already stored and referenced there.
+
+    Stored archives are never removed here, as other deposit requests may be
+    referencing them concurrently: they are replaced at once instead (see
+    :func:`replace_archive`).
+
+    Args:
+        archive: the uploaded archive
+        sha256: hex sha256 checksum of the archive
+
+    Returns:
+        the storage name of the archive, to reference from a deposit request
+
+    """
+    storage = DepositRequest._meta.get_field("archive").storage
+    name = content_addressed_path(sha256, archive.name)
+    if (
+        storage.exists(name)
+        and storage.size(name) == archive.size
+        and count_archive_references(name) > 0
+    ):
+        return name
+    # unreferenced archives are rewritten: they may be leftovers of an
+    # interrupted write, or about to be removed by the garbage collector
+    # (which keeps recently written files)
+    return replace_archive(storage, name, archive)
+
+
+def replace_archive(storage: Storage, name: str, archive: File) -> str:
+    """Write ``archive`` at ``name`` in ``storage``, replacing the file already
+    stored there at once, so that readers never see a missing or partial file.
+
+    Returns:
+        the storage name of the archive
+
+    """
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # remote storages (e.g. Azure blobs) overwrite the blobs once uploaded
+        return storage.save(name, archive)
+    # the temporary file is collected with the orphan archives when interrupted
+    tmp_name = storage.save(f"{name}.{secrets.token_hex(8)}.part", archive)
+    os.replace(storage.path(tmp_name), path)
+    return name
+
+
 class DepositCollection(models.Model):
     id = models.BigAutoField(primary_key=True)
     # Human readable name for the collection type e.g HAL, arXiv, etc...
@@ -277,3 +403,164 @@ class DepositCollection(models.Model):
 
     def __str__(self):
         return str({"id": self.id, "name": self.name})
+
+
+UPLOAD_SESSIONS_DIRECTORY = "upload_sessions"
+
+
+class UploadSession(models.Model):
+    """Resumable upload of a single archive, sent as a sequence of byte-range chunks
+    before being committed as one archive deposit request."""
+
+    id = models.BigAutoField(primary_key=True)
+    deposit = models.ForeignKey(Deposit, models.DO_NOTHING)
+    date = models.DateTimeField(auto_now_add=True)
+    # Name and content type of the archive being uploaded
+    filename = models.TextField()
+    content_type = models.TextField()
+    # Total size of the archive, announced when opening the session
+    length = models.BigIntegerField()
+    # Number of bytes received so far, i.e. the offset of the next expected chunk
+    offset = models.BigIntegerField(default=0)
+    # Whether committing the session replaces the existing archives of the deposit
+    replace_archives = models.BooleanField(default=False)
+    # Storage name of the archive for direct uploads (sent by the client in one
+    # request to a pre-signed URL), null for uploads in chunks
+    archive_name = models.TextField(null=True)
+
+    class Meta:
+        db_table = "deposit_upload_session"
+        app_label = "deposit"
+
+    def __str__(self):
+        return str(
+            {
+                "id": self.id,
+                "deposit": self.deposit_id,
+                "filename": self.filename,
+                "length": self.length,
+                "offset": self.offset,
+            }
+        )
+
+    def chunk_path(self, offset: int) -> str:
+        """Path in the archive storage of the chunk starting at ``offset``. Chunks
+        are staged under MEDIA_ROOT/upload_sessions/<session_id>/ until the session
+        is committed."""
+        return f"{UPLOAD_SESSIONS_DIRECTORY}/{self.id}/{offset:020d}"
+
+    def discard(self, delete_archive: bool = True) -> None:
+        """Remove the staged chunks of the upload session, then the session.
+
+        Args:
+            delete_archive: whether to remove the archive of a direct upload session
+              too (which must be kept once the session is committed)
+        """
+        directory = f"{UPLOAD_SESSIONS_DIRECTORY}/{self.id}"
+        if default_storage.exists(directory):
+            _, filenames = default_storage.listdir(directory)
+            for filename in filenames:
+                default_storage.delete(f"{directory}/{filename}")
+        if delete_archive and self.archive_name:
+            default_storage.delete(self.archive_name)
+        self.delete()
+
+
+class IdempotencyKey(models.Model):
+    """Request sent with an Idempotency-Key header, whose response is replayed to
+    the requests sent again by the same client with the same key (e.g. retries
+    after a timeout)."""
+
+    id = models.BigAutoField(primary_key=True)
+    client = models.ForeignKey("DepositClient", models.CASCADE)
+    key = models.CharField(max_length=255)
+    date = models.DateTimeField(auto_now_add=True, db_index=True)
+    # The request the key was first sent with
+    method = models.CharField(max_length=10)
+    path = models.TextField()
+    # Date the key was last claimed to process a request with it, the claim is
+    # abandoned (e.g. by a crashed server process) once older than the lease
+    claim_date = models.DateTimeField(default=now)
+    # The response to replay, null while the first request is processed
+    response_status = models.IntegerField(null=True)
+    response_content_type = models.TextField(null=True)
+    response_location = models.TextField(null=True)
+    response_content = models.BinaryField(null=True)
+
+    class Meta:
+        db_table = "deposit_idempotency_key"
+        app_label = "deposit"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["client", "key"], name="deposit_idempotency_key_client_key"
+            )
+        ]
+
+    def __str__(self):
+        return str(
+            {
+                "id": self.id,
+                "client": self.client_id,
+                "key": self.key,
+                "method": self.method,
+                "path": self.path,
+                "response_status": self.response_status,
+            }
+        )
+
+
+WEBHOOK_DELIVERY_PENDING = "pending"
+WEBHOOK_DELIVERY_DELIVERED = "delivered"
+WEBHOOK_DELIVERY_FAILED = "failed"
+
+WEBHOOK_DELIVERY_STATES = [
+    (WEBHOOK_DELIVERY_PENDING, WEBHOOK_DELIVERY_PENDING),
+    (WEBHOOK_DELIVERY_DELIVERED, WEBHOOK_DELIVERY_DELIVERED),
+    (WEBHOOK_DELIVERY_FAILED, WEBHOOK_DELIVERY_FAILED),
+]
+
+
+class WebhookDelivery(models.Model):
+    """Notification of a status change of a deposit to the webhook of its client,
+    recorded with the status change and sent by a background worker (see
+    :mod:`swh.deposit.webhooks`)."""
+
+    id = models.BigAutoField(primary_key=True)
+    client = models.ForeignKey("DepositClient", models.CASCADE)
+    deposit = models.ForeignKey("Deposit", models.CASCADE)
+    # The event sent to the webhook
+    payload = JSONField()
+    creation_date = models.DateTimeField(auto_now_add=True)
+    state = models.TextField(
+        choices=WEBHOOK_DELIVERY_STATES, default=WEBHOOK_DELIVERY_PENDING
+    )
+    # Number of failed attempts to deliver the notification, and the last error
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(null=True)
+    # Date of the next attempt of a pending delivery
+    next_attempt_date = models.DateTimeField(default=now)
+    # Date of the delivery, or of the last attempt of a failed delivery
+    end_date = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = "deposit_webhook_delivery"
+        app_label = "deposit"
+        indexes = [
+            # pending deliveries, by date of their next attempt
+            models.Index(
+                fields=["next_attempt_date"],
+                name="deposit_webhook_pending",
+                condition=models.Q(state=WEBHOOK_DELIVERY_PENDING),
+            )
+        ]
+
+    def __str__(self):
+        return str(
+            {
+                "id": self.id,
+                "client": self.client_id,
+                "deposit": self.deposit_id,
+                "state": self.state,
+                "attempts": self.attempts,
+            }
+        )
@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2025  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -113,8 +113,9 @@ REST_FRAMEWORK = {
 }
 
 FILE_UPLOAD_HANDLERS = [
-    "django.core.files.uploadhandler.MemoryFileUploadHandler",
-    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+    "swh.deposit.inspector.ArchiveInspectionUploadHandler",
+    "swh.deposit.uploadhandler.HashingMemoryFileUploadHandler",
+    "swh.deposit.uploadhandler.HashingTemporaryFileUploadHandler",
 ]
 
 CACHES = {
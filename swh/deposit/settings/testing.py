@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2021  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -43,7 +43,8 @@ LOGGING = {
 MEDIA_ROOT = "/tmp/swh-deposit/test/uploads/"
 
 FILE_UPLOAD_HANDLERS = [
-    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "swh.deposit.inspector.ArchiveInspectionUploadHandler",
+    "swh.deposit.uploadhandler.HashingMemoryFileUploadHandler",
 ]
 
 REST_FRAMEWORK = {
@@ -0,0 +1,184 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Tests the admission control of the deposit requests"""
+
+import attr
+from django.core.cache import cache
+from django.urls import reverse_lazy as reverse
+import pytest
+from rest_framework import status
+
+from swh.deposit.api import admission
+from swh.deposit.api.admission import (
+    AdmissionLimits,
+    acquire_upload_slots,
+    client_usage,
+    release_upload_slots,
+)
+from swh.deposit.config import COL_IRI, EM_IRI, SD_IRI
+from swh.deposit.models import Deposit
+from swh.deposit.parsers import parse_xml
+from swh.deposit.tests.common import post_archive
+from swh.deposit.utils import NAMESPACES
+
+LIMITS = AdmissionLimits(
+    max_concurrent_uploads_per_client=1,
+    max_concurrent_uploads_per_collection=2,
+    max_partial_deposits_per_client=2,
+    retry_after=12,
+)
+
+
+@pytest.fixture
+def deposit_config(deposit_config):
+    return {**deposit_config, "admission": attr.asdict(LIMITS)}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    admission._local_counters.clear()
+    yield
+    cache.clear()
+    admission._local_counters.clear()
+
+
+def test_admission_limits_from_config():
+    assert AdmissionLimits.from_config({}) == AdmissionLimits()
+    # the requests waiting for a status change hold server threads, so they are
+    # limited unless explicitly lifted
+    assert (
+        AdmissionLimits().max_concurrent_waits_per_client
+        == admission.DEFAULT_MAX_CONCURRENT_WAITS_PER_CLIENT
+    )
+    assert (
+        AdmissionLimits.from_config(
+            {"admission": {"max_concurrent_waits_per_client": None}}
+        ).max_concurrent_waits_per_client
+        is None
+    )
+    assert AdmissionLimits.from_config({"admission": attr.asdict(LIMITS)}) == LIMITS
+
+
+def test_admission_concurrent_uploads_per_client(
+    authenticated_client, deposit_collection, sample_archive
+):
+    client = authenticated_client.deposit_client
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+
+    slots = acquire_upload_slots(LIMITS, client, deposit_collection)
+    response = post_archive(authenticated_client, url, sample_archive, slug="slug")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response["Retry-After"] == "12"
+    assert b"Too many concurrent uploads for client" in response.content
+    assert not Deposit.objects.filter(external_id="slug").exists()
+
+    release_upload_slots(slots)
+    response = post_archive(authenticated_client, url, sample_archive, slug="slug")
+    assert response.status_code == status.HTTP_201_CREATED
+    # the upload slot is released once the request is over
+    assert client_usage(LIMITS, client)["concurrent_uploads"]["count"] == 0
+
+
+def test_admission_concurrent_uploads_per_collection(
+    authenticated_client, deposit_collection, deposit_another_user, sample_archive
+):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+
+    # two uploads of another client in progress
+    slots = []
+    for _ in range(2):
+        slots += acquire_upload_slots(
+            AdmissionLimits(), deposit_another_user, deposit_collection
+        )
+    response = post_archive(authenticated_client, url, sample_archive)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert b"Too many concurrent uploads in collection" in response.content
+    # the client slot is released when the collection slot cannot be acquired
+    client = authenticated_client.deposit_client
+    assert client_usage(LIMITS, client)["concurrent_uploads"]["count"] == 0
+
+    release_upload_slots(slots)
+    response = post_archive(authenticated_client, url, sample_archive)
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_admission_cache_unavailable(
+    authenticated_client, deposit_collection, sample_archive, mocker
+):
+    for method in ["add", "incr", "touch", "decr", "get"]:
+        mocker.patch.object(admission.cache, method, side_effect=ConnectionError)
+    client = authenticated_client.deposit_client
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+
+    slots = acquire_upload_slots(LIMITS, client, deposit_collection)
+    assert client_usage(LIMITS, client)["concurrent_uploads"]["count"] == 1
+    response = post_archive(authenticated_client, url, sample_archive, slug="slug")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    release_upload_slots(slots)
+    assert admission._local_counters == {}
+    response = post_archive(authenticated_client, url, sample_archive, slug="slug")
+    assert response.status_code == status.HTTP_201_CREATED
+    assert admission._local_counters == {}
+
+
+def test_admission_slots_released_on_error(authenticated_client, deposit_collection):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    for _ in range(2):
+        response = authenticated_client.post(
+            url,
+            data=b"not an archive",
+            content_type="application/octet-stream",
+            HTTP_CONTENT_DISPOSITION="attachment; filename=archive.zip",
+        )
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+def test_admission_partial_deposits(
+    authenticated_client, deposit_collection, partial_deposit, sample_archive
+):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    response = post_archive(authenticated_client, url, sample_archive)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = post_archive(authenticated_client, url, sample_archive)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response["Retry-After"] == "12"
+    assert b"Too many partial deposits" in response.content
+
+    # existing partial deposits can still be completed
+    response = post_archive(
+        authenticated_client,
+        reverse(EM_IRI, args=[deposit_collection.name, partial_deposit.id]),
+        sample_archive,
+        in_progress="false",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_admission_service_document(
+    authenticated_client, deposit_collection, partial_deposit
+):
+    client = authenticated_client.deposit_client
+    slots = acquire_upload_slots(LIMITS, client, deposit_collection)
+    try:
+        response = authenticated_client.get(reverse(SD_IRI))
+    finally:
+        release_upload_slots(slots)
+    assert response.status_code == status.HTTP_200_OK
+
+    service_document = parse_xml(response.content)
+    uploads = service_document.find("swh:concurrentUploads", namespaces=NAMESPACES)
+    assert (uploads.text, uploads.get("limit")) == ("1", "1")
+    partial_deposits = service_document.find(
+        "swh:partialDeposits", namespaces=NAMESPACES
+    )
+    assert (partial_deposits.text, partial_deposits.get("limit")) == ("1", "2")
+    collection_uploads = service_document.find(
+        "app:workspace/app:collection/swh:concurrentUploads", namespaces=NAMESPACES
+    )
+    assert (collection_uploads.text, collection_uploads.get("limit")) == ("1", "2")
@@ -1,15 +1,23 @@
-# Copyright (C) 2017-2021  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
 """Module to check at least one basic authentication works."""
 
+import base64
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
 from django.urls import reverse_lazy as reverse
 import pytest
+from rest_framework import status
 
+from swh.deposit.auth import forget_verified_credentials
 from swh.deposit.config import SD_IRI
+from swh.deposit.models import DepositClient
 from swh.deposit.tests.api.test_service_document import check_response
+from swh.deposit.tests.conftest import TEST_USER
 
 
 @pytest.fixture()
@@ -25,3 +33,83 @@ def test_service_document_basic(basic_authenticated_client):
     url = reverse(SD_IRI)
     response = basic_authenticated_client.get(url)
     check_response(response, basic_authenticated_client.deposit_client.username)
+
+
+def _get_service_document(client, username, password):
+    token = base64.b64encode(f"{username}:{password}".encode()).decode()
+    client.credentials(HTTP_AUTHORIZATION=f"Basic {token}")
+    return client.get(reverse(SD_IRI))
+
+
+def test_basic_auth_cached(anonymous_client, deposit_user, mocker):
+    """Passwords are checked once, then the verified credentials are reused"""
+    check_password = mocker.spy(DepositClient, "check_password")
+    username, password = deposit_user.username, TEST_USER["password"]
+
+    for _ in range(3):
+        response = _get_service_document(anonymous_client, username, password)
+        assert response.status_code == status.HTTP_200_OK
+    # as in another server process
+    forget_verified_credentials()
+    response = _get_service_document(anonymous_client, username, password)
+    assert response.status_code == status.HTTP_200_OK
+    assert check_password.call_count == 1
+
+    response = _get_service_document(anonymous_client, username, "wrong-password")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert check_password.call_count == 2
+
+
+def test_basic_auth_password_changed(anonymous_client, deposit_user):
+    username, password = deposit_user.username, TEST_USER["password"]
+    response = _get_service_document(anonymous_client, username, password)
+    assert response.status_code == status.HTTP_200_OK
+
+    # changed as a Django user, e.g. in the Django admin
+    user = User.objects.get(username=username)
+    user.set_password("new-password")
+    user.save()
+
+    response = _get_service_document(anonymous_client, username, password)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    response = _get_service_document(anonymous_client, username, "new-password")
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_basic_auth_deactivated(anonymous_client, deposit_user):
+    username, password = deposit_user.username, TEST_USER["password"]
+    response = _get_service_document(anonymous_client, username, password)
+    assert response.status_code == status.HTTP_200_OK
+
+    deposit_user.is_active = False
+    deposit_user.save()
+
+    response = _get_service_document(anonymous_client, username, password)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert b"User inactive or deleted." in response.content
+
+
+def test_basic_auth_unknown_user(anonymous_client, deposit_user):
+    response = _get_service_document(anonymous_client, "unknown", "password")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert b"Invalid username/password." in response.content
+
+
+def test_basic_auth_changed_by_another_process(anonymous_client, deposit_user):
+    """Changes made without the Django models signals (e.g. by another server
+    process, whose cached lookups are not removed from this one) are seen at once"""
+    username, password = deposit_user.username, TEST_USER["password"]
+    response = _get_service_document(anonymous_client, username, password)
+    assert response.status_code == status.HTTP_200_OK
+
+    User.objects.filter(username=username).update(
+        password=make_password("new-password")
+    )
+    response = _get_service_document(anonymous_client, username, password)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    response = _get_service_document(anonymous_client, username, "new-password")
+    assert response.status_code == status.HTTP_200_OK
+
+    User.objects.filter(username=username).update(is_active=False)
+    response = _get_service_document(anonymous_client, username, "new-password")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
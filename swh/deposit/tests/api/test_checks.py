@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2025  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -14,10 +14,13 @@ from xml.etree import ElementTree
 
 import pytest
 
+from swh.deposit.loader import checks
 from swh.deposit.loader.checks import (
     METADATA_PROVENANCE_KEY,
     SUGGESTED_FIELDS_MISSING,
+    VALIDATION_ENGINES,
     check_metadata,
+    schemas,
 )
 
 METADATA_PROVENANCE_DICT: Dict[str, Any] = {
@@ -392,12 +395,15 @@ _parameters1 = [
 ]
 
 
+@pytest.mark.parametrize("engine", VALIDATION_ENGINES)
 @pytest.mark.parametrize(
     "metadata_ok",
     _parameters1,
 )
-def test_api_checks_check_metadata_ok(metadata_ok):
-    actual_check, detail = check_metadata(ElementTree.fromstring(metadata_ok))
+def test_api_checks_check_metadata_ok(metadata_ok, engine):
+    actual_check, detail = check_metadata(
+        ElementTree.fromstring(metadata_ok), engine=engine
+    )
     assert actual_check is True, f"Unexpected result:\n{pprint.pformat(detail)}"
     if "swh:deposit" in metadata_ok:
         # no missing suggested field
@@ -661,9 +667,12 @@ _parameters2 = [
 ]
 
 
+@pytest.mark.parametrize("engine", VALIDATION_ENGINES)
 @pytest.mark.parametrize("metadata_ko,expected_summary", _parameters2)
-def test_api_checks_check_metadata_ko(metadata_ko, expected_summary):
-    actual_check, error_detail = check_metadata(ElementTree.fromstring(metadata_ko))
+def test_api_checks_check_metadata_ko(metadata_ko, expected_summary, engine):
+    actual_check, error_detail = check_metadata(
+        ElementTree.fromstring(metadata_ko), engine=engine
+    )
     assert actual_check is False
     assert error_detail == {"metadata": [expected_summary]}
 
@@ -1213,9 +1222,12 @@ _parameters3 = [
 ]
 
 
+@pytest.mark.parametrize("engine", VALIDATION_ENGINES)
 @pytest.mark.parametrize("metadata_ko,expected_summaries", _parameters3)
-def test_api_checks_check_metadata_ko_schema(metadata_ko, expected_summaries):
-    actual_check, error_detail = check_metadata(ElementTree.fromstring(metadata_ko))
+def test_api_checks_check_metadata_ko_schema(metadata_ko, expected_summaries, engine):
+    actual_check, error_detail = check_metadata(
+        ElementTree.fromstring(metadata_ko), engine=engine
+    )
     assert actual_check is False
     assert len(error_detail["metadata"]) == len(expected_summaries), error_detail[
         "metadata"
@@ -1230,3 +1242,158 @@ def test_api_checks_check_metadata_ko_schema(metadata_ko, expected_summaries):
         assert re.match(
             expected_summary["summary"], summary, re.DOTALL
         ), f"Failed to match {expected_summary['summary']!r} with:\n{summary}"
+
+
+def test_api_checks_check_metadata_many_elements(mocker):
+    """Each child is validated once, by the schema element of its tag"""
+    authors = "".join(
+        f"<codemeta:author><codemeta:name>author {i}</codemeta:name></codemeta:author>"
+        for i in range(5000)
+    )
+    invalid_author = (
+        "<codemeta:author><codemeta:name><codemeta:name>nested</codemeta:name>"
+        "</codemeta:name></codemeta:author>"
+    )
+    metadata = ElementTree.fromstring(
+        f"""\
+        <entry {XMLNS}>
+            <uri>some url</uri>
+            <codemeta:name>bar</codemeta:name>
+            {authors}{invalid_author}{authors}
+            {PROVENANCE_XML}
+        </entry>
+        """
+    )
+    author_element = schemas().codemeta_root_elements[
+        "{https://doi.org/10.5063/SCHEMA/CODEMETA-2.0}author"
+    ]
+    validate = mocker.spy(author_element, "validate")
+
+    actual_check, error_detail = check_metadata(metadata)
+
+    assert actual_check is False
+    (detail,) = error_detail["metadata"]
+    assert detail["fields"] == ["codemeta:author"]
+    assert "a simple content element can't have child elements" in detail["summary"]
+    assert validate.call_count == 10001
+
+
+# values of the elements of the codemeta schema compiled by libxml2, which may be
+# validated differently by the engines
+_conformance_elements = [
+    f"<codemeta:{tag}>{value}</codemeta:{tag}>"
+    for tags, values in [
+        (
+            ["datePublished", "dateCreated", "dateModified"],
+            [
+                "2020",
+                "2020-01",
+                "2020-01-01",
+                "2020-01-01Z",
+                "2020-01-01+02:00",
+                "2020-01-01T12:00:00",
+                "2020-01-01T12:00:00.123Z",
+                "2020-01-01T24:00:00",
+                " 2020-01-01 ",
+                "2020-02-30",
+                "2020-13",
+                "20200101",
+                "-0001",
+                "01/01/2020",
+                "",
+            ],
+        ),
+        (["embargoDate"], ["2020-01-01", "2020-01", "2020-01-01T12:00:00"]),
+        (
+            ["id", "url", "installUrl", "issueTracker", "readme"],
+            [
+                "https://example.org/",
+                "https://example.org/a b",
+                "https://exa mple.org/",
+                "https://example.org/%zz",
+                "https://example.org/caf\u00e9",
+                "http://[::1]:8080/",
+                "mailto:someone@example.org",
+                "urn:isbn:0451450523",
+                "example.org",
+                "/relative",
+                " https://example.org/ ",
+                "",
+            ],
+        ),
+        (
+            ["identifier"],
+            [
+                "hal-01243573",
+                "hal-",
+                "HAL-01243573",
+                "hal-0124x",
+                "https://doi.org/10.1000/182",
+                "doi:10.1000/182",
+                "10.1000/182",
+                "",
+            ],
+        ),
+        (
+            ["name", "email", "keywords"],
+            ["something", "", "<codemeta:b>c</codemeta:b>"],
+        ),
+    ]
+    for tag in tags
+    for value in values
+]
+
+
+@pytest.mark.parametrize(
+    "metadata",
+    [
+        pytest.param(param.values[0], id=param.id)
+        for param in _parameters1 + _parameters2 + _parameters3
+    ]
+    + [
+        pytest.param(
+            f"""\
+            <entry {XMLNS}>
+                <title>something</title>
+                <codemeta:author><codemeta:name>someone</codemeta:name></codemeta:author>
+                {element}
+            </entry>""",
+            id=element,
+        )
+        for element in _conformance_elements
+    ],
+)
+def test_api_checks_validation_engines_conformance(metadata):
+    """All the validation engines report the same errors"""
+    results = [
+        check_metadata(ElementTree.fromstring(metadata), engine=engine)
+        for engine in VALIDATION_ENGINES
+    ]
+    # but for the addresses of the elements in the errors
+    results = [re.sub(r" at 0x[0-9a-f]+", "", repr(result)) for result in results]
+    assert len(set(results)) == 1, results
+
+
+def test_api_checks_check_metadata_unknown_engine():
+    metadata = ElementTree.fromstring(f"<entry {XMLNS}><title>bar</title></entry>")
+    with pytest.raises(ValueError, match="Unknown validation engine 'libxml2'"):
+        check_metadata(metadata, engine="libxml2")
+
+
+def test_api_checks_check_metadata_lxml_missing(monkeypatch):
+    metadata = ElementTree.fromstring(
+        f"""\
+        <entry {XMLNS}>
+            <title>bar</title>
+            <author>someone</author>
+        </entry>"""
+    )
+    monkeypatch.setattr(checks, "lxml_etree", None)
+    checks.compiled_schemas.cache_clear()
+    try:
+        with pytest.raises(ImportError, match="requires lxml"):
+            check_metadata(metadata, engine="lxml")
+        assert check_metadata(metadata)[0] is True
+    finally:
+        monkeypatch.undo()
+        checks.compiled_schemas.cache_clear()
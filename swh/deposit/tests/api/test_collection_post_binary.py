@@ -1,18 +1,27 @@
-# Copyright (C) 2017-2023  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
 """Tests the handling of the binary content when doing a POST Col-IRI."""
 
+import hashlib
+import os
 import uuid
+import zipfile
 
+from django.core.files.base import ContentFile
 from django.urls import reverse_lazy as reverse
 import pytest
 from rest_framework import status
 
 from swh.deposit.config import COL_IRI, DEPOSIT_STATUS_DEPOSITED
-from swh.deposit.models import Deposit, DepositRequest
+from swh.deposit.models import (
+    Deposit,
+    DepositRequest,
+    content_addressed_path,
+    count_archive_references,
+)
 from swh.deposit.parsers import parse_xml
 from swh.deposit.tests.common import (
     check_archive,
@@ -74,6 +83,57 @@ def test_post_deposit_binary_support(
         Deposit.objects.get(external_id=external_id)
 
 
+def test_post_deposit_binary_not_an_archive(authenticated_client, deposit_collection):
+    """Binary upload of content which is not an archive should return 415"""
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    data = b"not an archive" * 100
+    archive = {
+        "name": "archive.zip",
+        "data": data,
+        "length": len(data),
+        "md5sum": hashlib.md5(data).hexdigest(),
+    }
+
+    response = post_archive(
+        authenticated_client, url, archive, HTTP_SLUG="some-external-id"
+    )
+
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert b"Archive content does not match its content type" in response.content
+    assert not Deposit.objects.filter(external_id="some-external-id").exists()
+
+
+def test_post_deposit_binary_archive_in_archive(
+    authenticated_client, deposit_collection, tmp_path
+):
+    """Binary upload of an archive only containing an archive should return 400"""
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    inner = create_arborescence_archive(
+        tmp_path, "inner", "file", b"some content in file"
+    )
+    with open(inner["path"], "rb") as f:
+        inner_data = f.read()
+    archive_path = os.path.join(tmp_path, "archive.zip")
+    with zipfile.ZipFile(archive_path, "w") as zip_file:
+        zip_file.writestr(inner["name"], inner_data)
+    with open(archive_path, "rb") as f:
+        data = f.read()
+    archive = {
+        "name": "archive.zip",
+        "data": data,
+        "length": len(data),
+        "md5sum": hashlib.md5(data).hexdigest(),
+    }
+
+    response = post_archive(
+        authenticated_client, url, archive, HTTP_SLUG="some-external-id"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert b"Mandatory archive is invalid" in response.content
+    assert not Deposit.objects.filter(external_id="some-external-id").exists()
+
+
 def test_post_deposit_binary_upload_ok(
     authenticated_client, deposit_collection, sample_archive
 ):
@@ -108,6 +168,14 @@ def test_post_deposit_binary_upload_ok(
 
     assert deposit_request.metadata is None
     assert deposit_request.raw_metadata is None
+    # checksums computed while the archive was uploaded
+    assert deposit_request.archive_length == sample_archive["length"]
+    assert deposit_request.archive_md5 == sample_archive["md5sum"]
+    assert deposit_request.archive_sha1 == sample_archive["sha1sum"]
+    assert (
+        deposit_request.archive_sha256
+        == hashlib.sha256(sample_archive["data"]).hexdigest()
+    )
 
     response_content = parse_xml(response.content)
 
@@ -338,3 +406,99 @@ def test_post_deposit_2_post_2_different_deposits(
     deposits = Deposit.objects.all().order_by("id")
     assert len(deposits) == 2
     assert list(deposits), [deposit == deposit2]
+
+
+def test_post_deposit_binary_same_archive_stored_once(
+    authenticated_client, deposit_collection, sample_archive, mocker
+):
+    """Archives are content-addressed, sending the same archive in another deposit
+    references the archive already stored"""
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    storage = DepositRequest._meta.get_field("archive").storage
+    archive_name = content_addressed_path(
+        hashlib.sha256(sample_archive["data"]).hexdigest(), sample_archive["name"]
+    )
+    # the media root is shared between tests
+    storage.delete(archive_name)
+    save = mocker.spy(storage, "save")
+
+    for slug in ["some-external-id-1", "another-external-id"]:
+        response = post_archive(
+            authenticated_client,
+            url,
+            sample_archive,
+            HTTP_SLUG=slug,
+            HTTP_IN_PROGRESS="false",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    deposit_requests = DepositRequest.objects.filter(type="archive")
+    assert len(deposit_requests) == 2
+    assert {r.archive.name for r in deposit_requests} == {archive_name}
+    assert count_archive_references(archive_name) == 2
+    assert save.call_count == 1
+    assert deposit_requests[0].archive.read() == sample_archive["data"]
+
+
+def test_post_deposit_binary_overwrites_unreferenced_archive(
+    authenticated_client, deposit_collection, sample_archive, mocker
+):
+    """An unreferenced archive at the content-addressed path (e.g. left by an
+    interrupted write) is replaced, without removing it first"""
+    storage = DepositRequest._meta.get_field("archive").storage
+    archive_name = content_addressed_path(
+        hashlib.sha256(sample_archive["data"]).hexdigest(), sample_archive["name"]
+    )
+    storage.delete(archive_name)
+    assert (
+        storage.save(archive_name, ContentFile(sample_archive["data"][:10]))
+        == archive_name
+    )
+    delete = mocker.spy(storage, "delete")
+
+    response = post_archive(
+        authenticated_client,
+        reverse(COL_IRI, args=[deposit_collection.name]),
+        sample_archive,
+        HTTP_IN_PROGRESS="false",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    deposit_request = DepositRequest.objects.get(type="archive")
+    assert deposit_request.archive.name == archive_name
+    assert deposit_request.archive.read() == sample_archive["data"]
+    delete.assert_not_called()
+    # no temporary file is left next to the archive
+    directory, filename = os.path.split(archive_name)
+    assert [f for f in storage.listdir(directory)[1] if filename in f] == [filename]
+
+
+def test_post_deposit_binary_replaces_truncated_archive(
+    authenticated_client, deposit_collection, sample_archive
+):
+    """A referenced archive whose size does not match the uploaded one is replaced"""
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    storage = DepositRequest._meta.get_field("archive").storage
+    archive_name = content_addressed_path(
+        hashlib.sha256(sample_archive["data"]).hexdigest(), sample_archive["name"]
+    )
+    storage.delete(archive_name)
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IN_PROGRESS="false"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    with open(storage.path(archive_name), "r+b") as f:
+        f.truncate(10)
+
+    response = post_archive(
+        authenticated_client,
+        url,
+        sample_archive,
+        HTTP_SLUG="another-external-id",
+        HTTP_IN_PROGRESS="false",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert count_archive_references(archive_name) == 2
+    with storage.open(archive_name) as f:
+        assert f.read() == sample_archive["data"]
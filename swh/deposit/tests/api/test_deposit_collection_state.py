@@ -0,0 +1,190 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import datetime
+
+from django.urls import reverse_lazy as reverse
+from requests.utils import parse_header_links
+from rest_framework import status
+
+from swh.deposit.api import state
+from swh.deposit.config import (
+    COL_STATE_IRI,
+    DEPOSIT_STATUS_DEPOSITED,
+    DEPOSIT_STATUS_LOAD_SUCCESS,
+    DEPOSIT_STATUS_PARTIAL,
+)
+from swh.deposit.models import DEPOSIT_STATUS_DETAIL, Deposit, DepositClient
+from swh.deposit.parsers import parse_xml
+from swh.deposit.tests.conftest import internal_create_deposit
+from swh.deposit.utils import NAMESPACES
+
+
+def _statuses(response):
+    assert response.status_code == status.HTTP_200_OK, response.content
+    data = parse_xml(response.content)
+    entries = data.findall("atom:entry", namespaces=NAMESPACES)
+    assert int(data.findtext("swh:count", namespaces=NAMESPACES)) == len(entries)
+    return {
+        int(entry.findtext("swh:deposit_id", namespaces=NAMESPACES)): {
+            child.tag.split("}")[1]: child.text for child in entry
+        }
+        for entry in entries
+    }
+
+
+def test_collection_state_by_ids(
+    authenticated_client, partial_deposit, deposited_deposit, complete_deposit
+):
+    """Statuses of the given deposits are returned, unknown ones are omitted"""
+    url = reverse(COL_STATE_IRI, args=[deposited_deposit.collection.name])
+    ids = [deposited_deposit.id, complete_deposit.id, 999999]
+
+    statuses = _statuses(
+        authenticated_client.get(url, {"ids": ",".join(map(str, ids))})
+    )
+
+    assert set(statuses) == {deposited_deposit.id, complete_deposit.id}
+    assert statuses[deposited_deposit.id]["deposit_status"] == DEPOSIT_STATUS_DEPOSITED
+    assert (
+        statuses[deposited_deposit.id]["deposit_status_detail"]
+        == DEPOSIT_STATUS_DETAIL[DEPOSIT_STATUS_DEPOSITED]
+    )
+    assert "deposit_swh_id" not in statuses[deposited_deposit.id]
+    complete = statuses[complete_deposit.id]
+    assert complete["deposit_status"] == DEPOSIT_STATUS_LOAD_SUCCESS
+    assert complete["deposit_swh_id"] == complete_deposit.swhid
+    assert complete["deposit_swh_id_context"] == complete_deposit.swhid_context
+    assert complete["deposit_origin_url"] == complete_deposit.origin_url
+
+
+def test_collection_state_since(
+    authenticated_client, deposit_user, deposit_collection, deposit_another_collection
+):
+    """Deposits of the collection modified since the date are returned"""
+    old = internal_create_deposit(
+        deposit_user, deposit_collection, "old", DEPOSIT_STATUS_PARTIAL
+    )
+    since = datetime.datetime.now(tz=datetime.timezone.utc)
+    new = internal_create_deposit(
+        deposit_user, deposit_collection, "new", DEPOSIT_STATUS_PARTIAL
+    )
+    internal_create_deposit(
+        deposit_user, deposit_another_collection, "other", DEPOSIT_STATUS_PARTIAL
+    )
+    url = reverse(COL_STATE_IRI, args=[deposit_collection.name])
+
+    statuses = _statuses(authenticated_client.get(url, {"since": since.isoformat()}))
+    assert list(statuses) == [new.id]
+
+    # modifying the status of a deposit updates its modification date
+    old.status = DEPOSIT_STATUS_DEPOSITED
+    old.save()
+    statuses = _statuses(authenticated_client.get(url, {"since": since.isoformat()}))
+    assert list(statuses) == [new.id, old.id]
+    assert statuses[old.id]["deposit_status"] == DEPOSIT_STATUS_DEPOSITED
+    old.refresh_from_db()
+    assert statuses[old.id]["deposit_update_date"] == old.update_date.isoformat()
+
+
+def test_collection_state_other_client(
+    authenticated_client, deposit_user, deposit_collection
+):
+    """Deposits of the other clients of the collection are not returned"""
+    other_client = DepositClient.objects.create(
+        username="other-client", collections=[deposit_collection.id]
+    )
+    own = internal_create_deposit(
+        deposit_user, deposit_collection, "own", DEPOSIT_STATUS_PARTIAL
+    )
+    other = internal_create_deposit(
+        other_client, deposit_collection, "other", DEPOSIT_STATUS_PARTIAL
+    )
+    url = reverse(COL_STATE_IRI, args=[deposit_collection.name])
+
+    statuses = _statuses(authenticated_client.get(url, {"ids": f"{own.id},{other.id}"}))
+    assert list(statuses) == [own.id]
+
+    statuses = _statuses(authenticated_client.get(url, {"since": "2000-01-01"}))
+    assert list(statuses) == [own.id]
+
+
+def test_collection_state_since_next_link(
+    authenticated_client, deposit_user, deposit_collection, mocker
+):
+    """At most MAX_STATUSES deposits are returned, the next ones being linked"""
+    mocker.patch.object(state, "MAX_STATUSES", 2)
+    deposits = [
+        internal_create_deposit(
+            deposit_user, deposit_collection, f"ext-{i}", DEPOSIT_STATUS_PARTIAL
+        )
+        for i in range(3)
+    ]
+    url = reverse(COL_STATE_IRI, args=[deposit_collection.name])
+
+    response = authenticated_client.get(url, {"since": "2000-01-01T00:00:00"})
+    assert list(_statuses(response)) == [deposits[0].id, deposits[1].id]
+    links = parse_header_links(response["Link"])
+    assert [link["rel"] for link in links] == ["next"]
+
+    response = authenticated_client.get(links[0]["url"])
+    assert list(_statuses(response)) == [deposits[2].id]
+    assert "Link" not in response
+
+
+def test_collection_state_since_same_date(
+    authenticated_client, deposit_user, deposit_collection, mocker
+):
+    """Deposits modified at the same date are all returned once, over many pages"""
+    mocker.patch.object(state, "MAX_STATUSES", 2)
+    deposits = [
+        internal_create_deposit(
+            deposit_user, deposit_collection, f"ext-{i}", DEPOSIT_STATUS_PARTIAL
+        )
+        for i in range(5)
+    ]
+    Deposit.objects.update(
+        update_date=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    )
+    url = reverse(COL_STATE_IRI, args=[deposit_collection.name])
+
+    pages = []
+    response = authenticated_client.get(url, {"since": "2026-01-01T00:00:00"})
+    while True:
+        pages.append(list(_statuses(response)))
+        if "Link" not in response:
+            break
+        (link,) = parse_header_links(response["Link"])
+        response = authenticated_client.get(link["url"])
+
+    assert pages == [
+        [deposits[0].id, deposits[1].id],
+        [deposits[2].id, deposits[3].id],
+        [deposits[4].id],
+    ]
+
+
+def test_collection_state_bad_request(authenticated_client, deposit_collection):
+    url = reverse(COL_STATE_IRI, args=[deposit_collection.name])
+    for params in (
+        {},
+        {"ids": "1", "since": "2000-01-01"},
+        {"since": "2000-01-01", "cursor": "MjAwMC0wMS0wMVQwMDowMDowMCswMDowMCAx"},
+        {"cursor": "not-a-cursor"},
+        {"cursor": "MjAwMC0wMS0wMVQwMDowMDowMCAx"},
+        {"ids": "1,abc"},
+        {"since": "yesterday"},
+        {"ids": ",".join(map(str, range(state.MAX_STATUSES + 1)))},
+    ):
+        response = authenticated_client.get(url, params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, params
+
+
+def test_collection_state_forbidden_collection(
+    authenticated_client, deposit_another_collection
+):
+    url = reverse(COL_STATE_IRI, args=[deposit_another_collection.name])
+    response = authenticated_client.get(url, {"ids": "1"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -1,8 +1,9 @@
-# Copyright (C) 2017-2023  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
+import hashlib
 from os.path import exists, join
 import tarfile
 
@@ -147,14 +148,15 @@ def test_aggregate_tarballs_with_remote_tarball(
 
     deposit_requests = DepositRequest.objects.filter(type="archive", deposit=deposit)
 
-    all_archives = [dr.archive for dr in deposit_requests]
-
-    archives = [a for a in all_archives if not a.name.endswith(archive["name"])]
+    archive_sha256 = hashlib.sha256(archive["data"]).hexdigest()
+    archives = [
+        dr.archive for dr in deposit_requests if dr.archive_sha256 != archive_sha256
+    ]
 
     # We'll patch the behavior of this archive to be read as if it were a remote one
-    interesting_archive = [a for a in all_archives if a.name.endswith(archive["name"])][
-        0
-    ]
+    interesting_archive = [
+        dr.archive for dr in deposit_requests if dr.archive_sha256 == archive_sha256
+    ][0]
 
     class RemoteTarball:
         """Basic remote tarball implementation for test purposes."""
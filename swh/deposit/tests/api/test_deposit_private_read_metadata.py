@@ -8,7 +8,10 @@ from rest_framework import status
 
 from swh.deposit import __version__
 from swh.deposit.config import PRIVATE_GET_DEPOSIT_METADATA, SE_IRI, SWH_PERSON
+from swh.deposit.loader.checks import check_metadata
+from swh.deposit.metadata_checks import check_raw_metadata
 from swh.deposit.models import Deposit
+from swh.deposit.parsers import parse_xml
 
 PRIVATE_GET_DEPOSIT_METADATA_NC = PRIVATE_GET_DEPOSIT_METADATA + "-nc"
 
@@ -338,12 +341,15 @@ def test_read_metadata_5(
     """
     deposit = partial_deposit
     # add metadata to the deposit with multiple datePublished/dateCreated
-    codemeta_entry_data = atom_dataset["metadata"] % """
+    codemeta_entry_data = (
+        atom_dataset["metadata"]
+        % """
   <codemeta:dateCreated>2015-04-06T17:08:47+02:00</codemeta:dateCreated>
   <codemeta:datePublished>2017-05-03T16:08:47+02:00</codemeta:datePublished>
   <codemeta:dateCreated>2016-04-06T17:08:47+02:00</codemeta:dateCreated>
   <codemeta:datePublished>2018-05-03T16:08:47+02:00</codemeta:datePublished>
 """
+    )
     deposit = update_deposit_with_metadata(
         authenticated_client, deposit_collection, deposit, codemeta_entry_data
     )
@@ -470,3 +476,40 @@ def test_read_metadata_multiple_release_notes(
                 ),
             },
         }
+
+
+def test_read_metadata_checked(
+    authenticated_client, deposit_collection, partial_deposit, atom_dataset
+):
+    """Private metadata read api returns the checks already made on the metadata
+    on demand"""
+    deposit = partial_deposit
+    for url in private_get_raw_url_endpoints(deposit_collection, deposit):
+        response = authenticated_client.get(url, {"check_metadata": "true"})
+        assert response.status_code == status.HTTP_200_OK
+        assert "metadata_check" not in response.json()
+
+    deposit = update_deposit_with_metadata(
+        authenticated_client,
+        deposit_collection,
+        deposit,
+        atom_dataset["entry-data2"],
+    )
+    # not checked yet, the metadata is not checked while reading it
+    for url in private_get_raw_url_endpoints(deposit_collection, deposit):
+        response = authenticated_client.get(url, {"check_metadata": "true"})
+        assert "metadata_check" not in response.json()
+
+    metadata_ok, details = check_raw_metadata(atom_dataset["entry-data2"].encode())
+    assert (metadata_ok, details) == check_metadata(
+        parse_xml(atom_dataset["entry-data2"])
+    )
+
+    for url in private_get_raw_url_endpoints(deposit_collection, deposit):
+        assert "metadata_check" not in authenticated_client.get(url).json()
+        response = authenticated_client.get(url, {"check_metadata": "true"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["metadata_check"] == {
+            "ok": metadata_ok,
+            "details": details,
+        }
@@ -1,9 +1,9 @@
-# Copyright (C) 2025  The Software Heritage developers
+# Copyright (C) 2025-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
-from hashlib import sha1
+from hashlib import sha1, sha256
 import os
 import secrets
 import shutil
@@ -132,8 +132,9 @@ def check_deposit_upload_urls(
     response = authenticated_client.get(url)
     upload_urls = response.json()
     assert len(upload_urls) == 2
-    assert sample_tarball["name"] in upload_urls[0]
-    assert "archive2.zip" in upload_urls[1]
+    # archives are stored at their content-addressed path
+    assert sha256(sample_tarball["data"]).hexdigest() in upload_urls[0]
+    assert sha256(archive2["data"]).hexdigest() in upload_urls[1]
     tarball_shasums = set()
     for upload_url in upload_urls:
         response = (
@@ -0,0 +1,244 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import json
+import threading
+import time
+
+from django.db import connection
+from django.urls import reverse_lazy as reverse
+import pytest
+from rest_framework import status
+
+from swh.deposit.api import state, status_changes
+from swh.deposit.api.admission import (
+    AdmissionLimits,
+    acquire_wait_slot,
+    release_wait_slot,
+)
+from swh.deposit.api.status_changes import listener
+from swh.deposit.config import (
+    DEPOSIT_STATUS_DEPOSITED,
+    DEPOSIT_STATUS_LOAD_FAILURE,
+    DEPOSIT_STATUS_VERIFIED,
+    PRIVATE_PUT_DEPOSIT,
+    STATE_IRI,
+)
+from swh.deposit.parsers import parse_xml
+from swh.deposit.utils import NAMESPACES
+
+
+@pytest.fixture
+def deposit_config(deposit_config):
+    return {
+        **deposit_config,
+        "status_poll_interval": 0.05,
+        "status_max_wait": 5,
+        "status_stream_max_duration": 0.3,
+        "admission": {"max_concurrent_waits_per_client": 1, "retry_after": 12},
+    }
+
+
+@pytest.fixture(autouse=True)
+def stop_listener():
+    yield
+    listener.stop()
+
+
+def _status(response):
+    assert response.status_code == status.HTTP_200_OK, response.content
+    return parse_xml(response.content).findtext(
+        "swh:deposit_status", namespaces=NAMESPACES
+    )
+
+
+def _events(response):
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "text/event-stream"
+    content = b"".join(response.streaming_content).decode()
+    return [
+        json.loads(event.split("data: ")[1]) if event.startswith("event:") else event
+        for event in content.split("\n\n")
+        if event
+    ]
+
+
+def test_state_wait_status_already_changed(authenticated_client, deposited_deposit):
+    url = reverse(
+        STATE_IRI, args=[deposited_deposit.collection.name, deposited_deposit.id]
+    )
+    start = time.monotonic()
+    response = authenticated_client.get(url, {"wait": 60, "since_status": "partial"})
+    assert _status(response) == DEPOSIT_STATUS_DEPOSITED
+    assert time.monotonic() - start < 1
+
+
+def test_state_wait_timeout(authenticated_client, deposited_deposit):
+    """Without status change, the current status is returned after the delay"""
+    url = reverse(
+        STATE_IRI, args=[deposited_deposit.collection.name, deposited_deposit.id]
+    )
+    start = time.monotonic()
+    response = authenticated_client.get(url, {"wait": 0.2})
+    assert _status(response) == DEPOSIT_STATUS_DEPOSITED
+    assert 0.2 <= time.monotonic() - start < 2
+
+
+def test_state_wait_polls_status(authenticated_client, deposited_deposit, mocker):
+    """The deposit is polled until its status changes"""
+    deposit = deposited_deposit
+    url = reverse(STATE_IRI, args=[deposit.collection.name, deposit.id])
+    get = state.Deposit.objects.get
+
+    def get_deposit(*args, **kwargs):
+        if get_mock.call_count == 3:
+            deposit.status = DEPOSIT_STATUS_VERIFIED
+            deposit.save()
+        return get(*args, **kwargs)
+
+    get_mock = mocker.patch.object(
+        state.Deposit.objects, "get", side_effect=get_deposit
+    )
+    response = authenticated_client.get(url, {"wait": 5})
+
+    assert _status(response) == DEPOSIT_STATUS_VERIFIED
+    # read by the view, polled, then read again with its new status
+    assert get_mock.call_count == 3
+
+
+def test_state_wait_bad_request(authenticated_client, deposited_deposit):
+    url = reverse(
+        STATE_IRI, args=[deposited_deposit.collection.name, deposited_deposit.id]
+    )
+    for params in ({"wait": "soon"}, {"wait": 1, "since_status": "unknown"}):
+        response = authenticated_client.get(url, params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, params
+
+
+@pytest.mark.django_db(transaction=True)
+def test_state_wait_notified(authenticated_client, deposited_deposit):
+    """Waiting requests are woken up by the status change notifications, without
+    waiting for the next poll"""
+    deposit = deposited_deposit
+    put_url = reverse(PRIVATE_PUT_DEPOSIT, args=[deposit.collection.name, deposit.id])
+
+    def update_status():
+        time.sleep(0.5)
+        try:
+            response = authenticated_client.put(
+                put_url,
+                content_type="application/json",
+                data=json.dumps({"status": DEPOSIT_STATUS_LOAD_FAILURE}),
+            )
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=update_status)
+    start = time.monotonic()
+    thread.start()
+    # polled once, then woken up by the notification
+    deposit = state.wait_for_status_change(
+        deposit.id, DEPOSIT_STATUS_DEPOSITED, timeout=30, poll_interval=30
+    )
+    thread.join()
+
+    assert deposit.status == DEPOSIT_STATUS_LOAD_FAILURE
+    assert time.monotonic() - start < 10
+
+
+def test_state_change_notified_on_commit(
+    authenticated_client, deposited_deposit, mocker, django_capture_on_commit_callbacks
+):
+    deposit = deposited_deposit
+    put_url = reverse(PRIVATE_PUT_DEPOSIT, args=[deposit.collection.name, deposit.id])
+    notify = mocker.patch.object(status_changes, "_notify")
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = authenticated_client.put(
+            put_url,
+            content_type="application/json",
+            data=json.dumps({"status": DEPOSIT_STATUS_LOAD_FAILURE}),
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+    notify.assert_not_called()
+
+    for callback in callbacks:
+        callback()
+    notify.assert_called_once_with(deposit.id)
+
+
+def test_state_event_stream(authenticated_client, deposited_deposit, mocker):
+    """Events are sent on status changes until the deposit reaches a final
+    status"""
+    deposit = deposited_deposit
+    url = reverse(STATE_IRI, args=[deposit.collection.name, deposit.id])
+    verified = state.Deposit.objects.get(pk=deposit.id)
+    verified.status = DEPOSIT_STATUS_VERIFIED
+    failed = state.Deposit.objects.get(pk=deposit.id)
+    failed.status = DEPOSIT_STATUS_LOAD_FAILURE
+    failed.status_detail = {"loading": ["loading failed"]}
+    mocker.patch.object(
+        state,
+        "wait_for_status_change",
+        side_effect=[deposit, verified, failed],
+    )
+
+    response = authenticated_client.get(url, HTTP_ACCEPT="text/event-stream")
+    events = _events(response)
+
+    assert events[0]["deposit_id"] == deposit.id
+    assert [
+        event if isinstance(event, str) else event["deposit_status"] for event in events
+    ] == [
+        DEPOSIT_STATUS_DEPOSITED,
+        ": keep-alive",
+        DEPOSIT_STATUS_VERIFIED,
+        DEPOSIT_STATUS_LOAD_FAILURE,
+    ]
+    assert events[-1]["deposit_status_detail"] == "- loading failed\n"
+    assert events[-1]["deposit_origin_url"] == deposit.origin_url
+
+
+def test_state_event_stream_max_duration(authenticated_client, deposited_deposit):
+    """Streams end after their maximum duration"""
+    deposit = deposited_deposit
+    url = reverse(STATE_IRI, args=[deposit.collection.name, deposit.id])
+    start = time.monotonic()
+    response = authenticated_client.get(url, HTTP_ACCEPT="text/event-stream")
+    events = _events(response)
+    assert events[0]["deposit_status"] == DEPOSIT_STATUS_DEPOSITED
+    assert set(events[1:]) == {": keep-alive"}
+    assert 0.3 <= time.monotonic() - start < 2
+
+
+def test_state_wait_concurrent_waits(authenticated_client, deposited_deposit):
+    """The requests of a client waiting for status changes at once are limited"""
+    deposit = deposited_deposit
+    url = reverse(STATE_IRI, args=[deposit.collection.name, deposit.id])
+    client = authenticated_client.deposit_client
+    limits = AdmissionLimits(max_concurrent_waits_per_client=1)
+
+    wait_slot = acquire_wait_slot(limits, client)
+    try:
+        for response in (
+            authenticated_client.get(url, {"wait": 0.1}),
+            authenticated_client.get(url, HTTP_ACCEPT="text/event-stream"),
+        ):
+            assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            assert response["Retry-After"] == "12"
+        # requests not waiting are not limited
+        assert _status(authenticated_client.get(url)) == DEPOSIT_STATUS_DEPOSITED
+    finally:
+        release_wait_slot(wait_slot)
+
+    # the slots are released once the requests are over
+    for _ in range(2):
+        assert (
+            _status(authenticated_client.get(url, {"wait": 0.1}))
+            == DEPOSIT_STATUS_DEPOSITED
+        )
+        response = authenticated_client.get(url, HTTP_ACCEPT="text/event-stream")
+        assert _events(response)[0]["deposit_status"] == DEPOSIT_STATUS_DEPOSITED
@@ -0,0 +1,151 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Tests archive uploads to the pre-signed URL of direct upload sessions"""
+
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.urls import reverse_lazy as reverse
+from rest_framework import status
+
+from swh.deposit.config import COL_IRI, DEPOSIT_STATUS_DEPOSITED, DIRECT_UPLOAD_IRI
+from swh.deposit.models import Deposit, DepositRequest, UploadSession
+from swh.deposit.parsers import parse_xml
+from swh.deposit.utils import NAMESPACES
+
+
+def open_direct_session(client, url, data):
+    return client.post(
+        url,
+        content_type="application/zip",
+        HTTP_UPLOAD_LENGTH=str(len(data)),
+        HTTP_UPLOAD_MODE="direct",
+        HTTP_CONTENT_DISPOSITION="attachment; filename=archive.zip",
+    )
+
+
+def test_direct_upload_create_deposit(
+    client, authenticated_client, deposit_collection, deposit_config
+):
+    """The archive is sent to the upload URL without credentials, then the upload
+    session is committed without sending the archive again"""
+    data = os.urandom(2 * deposit_config["max_upload_size"])
+
+    response = open_direct_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+    response_content = parse_xml(response.content)
+    deposit_id = int(response_content.findtext("swh:deposit_id", namespaces=NAMESPACES))
+    session_url = response["Location"]
+    upload_url = response_content.findtext("swh:upload_url", namespaces=NAMESPACES)
+    assert upload_url
+
+    # chunks are refused by direct upload sessions
+    response = authenticated_client.patch(
+        session_url,
+        data=data[:10],
+        content_type="application/octet-stream",
+        HTTP_CONTENT_RANGE=f"bytes 0-9/{len(data)}",
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # nothing to commit yet
+    response = authenticated_client.post(session_url)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.put(upload_url, data=data, content_type="application/zip")
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+
+    response = authenticated_client.post(
+        session_url, HTTP_CONTENT_MD5=hashlib.md5(data).hexdigest()
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+
+    deposit = Deposit.objects.get(pk=deposit_id)
+    assert deposit.status == DEPOSIT_STATUS_DEPOSITED
+    deposit_request = DepositRequest.objects.get(deposit=deposit)
+    assert deposit_request.archive.read() == data
+    assert deposit_request.archive_length == len(data)
+    assert deposit_request.archive_md5 == hashlib.md5(data).hexdigest()
+    assert not UploadSession.objects.filter(deposit=deposit).exists()
+
+
+def test_direct_upload_checks(client, authenticated_client, deposit_collection):
+    data = os.urandom(100)
+    response = open_direct_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    session_url = response["Location"]
+    upload_url = parse_xml(response.content).findtext(
+        "swh:upload_url", namespaces=NAMESPACES
+    )
+
+    # truncated archive
+    response = client.put(upload_url, data=data[:50], content_type="application/zip")
+    assert response.status_code == status.HTTP_201_CREATED
+    response = authenticated_client.post(session_url)
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    # the archive can be uploaded again
+    response = client.put(upload_url, data=data, content_type="application/zip")
+    assert response.status_code == status.HTTP_201_CREATED
+    response = authenticated_client.post(
+        session_url, HTTP_CONTENT_MD5=hashlib.md5(b"something else").hexdigest()
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    upload_session = UploadSession.objects.get()
+    assert default_storage.exists(upload_session.archive_name)
+    response = authenticated_client.delete(session_url)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not default_storage.exists(upload_session.archive_name)
+
+    # the upload URL is not valid anymore
+    response = client.put(upload_url, data=data, content_type="application/zip")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_direct_upload_too_large(client, authenticated_client, deposit_collection):
+    """Archives larger than announced when opening the session are not stored"""
+    data = os.urandom(100)
+    response = open_direct_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    upload_url = parse_xml(response.content).findtext(
+        "swh:upload_url", namespaces=NAMESPACES
+    )
+    upload_session = UploadSession.objects.get()
+
+    response = client.put(upload_url, data=data + b"x", content_type="application/zip")
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert not default_storage.exists(upload_session.archive_name)
+
+    response = client.put(upload_url, data=data, content_type="application/zip")
+    assert response.status_code == status.HTTP_201_CREATED
+    with default_storage.open(upload_session.archive_name, "rb") as archive:
+        assert archive.read() == data
+
+
+def test_direct_upload_invalid_token(client):
+    response = client.put(
+        reverse(DIRECT_UPLOAD_IRI, args=["forged-token"]),
+        data=b"data",
+        content_type="application/zip",
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_direct_upload_invalid_mode(authenticated_client, deposit_collection):
+    response = authenticated_client.post(
+        reverse(COL_IRI, args=[deposit_collection.name]),
+        content_type="application/zip",
+        HTTP_UPLOAD_LENGTH="10",
+        HTTP_UPLOAD_MODE="teleport",
+        HTTP_CONTENT_DISPOSITION="attachment; filename=archive.zip",
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
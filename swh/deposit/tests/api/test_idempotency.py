@@ -0,0 +1,236 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Tests the replay of deposit requests sent with an Idempotency-Key header"""
+
+import datetime
+
+from django.db import IntegrityError
+from django.urls import reverse_lazy as reverse
+from rest_framework import status
+
+from swh.deposit.api import idempotency
+from swh.deposit.config import (
+    COL_IRI,
+    DEPOSIT_STATUS_DEPOSITED,
+    DEPOSIT_STATUS_PARTIAL,
+    EM_IRI,
+)
+from swh.deposit.models import Deposit, DepositRequest, IdempotencyKey
+from swh.deposit.parsers import parse_xml
+from swh.deposit.tests.common import post_archive
+from swh.deposit.utils import NAMESPACES
+
+
+def _deposit_id(response):
+    return int(
+        parse_xml(response.content).findtext("swh:deposit_id", namespaces=NAMESPACES)
+    )
+
+
+def test_idempotency_key_create_deposit_once(
+    authenticated_client, deposit_collection, sample_archive
+):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    responses = [
+        post_archive(
+            authenticated_client,
+            url,
+            sample_archive,
+            slug="some-external-id",
+            HTTP_IDEMPOTENCY_KEY="some-key",
+        )
+        for _ in range(2)
+    ]
+
+    assert [r.status_code for r in responses] == [status.HTTP_201_CREATED] * 2
+    assert "Idempotent-Replayed" not in responses[0]
+    assert responses[1]["Idempotent-Replayed"] == "true"
+    assert responses[1].content == responses[0].content
+    assert responses[1]["Location"] == responses[0]["Location"]
+    assert responses[1]["Content-Type"] == responses[0]["Content-Type"]
+    assert Deposit.objects.filter(external_id="some-external-id").count() == 1
+
+    # a new key creates a new deposit
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="other-key"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert _deposit_id(response) != _deposit_id(responses[0])
+
+
+def test_idempotency_key_replayed_after_completion(
+    authenticated_client, deposit_collection, partial_deposit, sample_archive
+):
+    """The response is replayed even when the deposit cannot be updated anymore"""
+    url = reverse(EM_IRI, args=[deposit_collection.name, partial_deposit.id])
+    for _ in range(2):
+        response = post_archive(
+            authenticated_client,
+            url,
+            sample_archive,
+            in_progress="false",
+            HTTP_IDEMPOTENCY_KEY="some-key",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    partial_deposit.refresh_from_db()
+    assert partial_deposit.status == DEPOSIT_STATUS_DEPOSITED
+    assert (
+        DepositRequest.objects.filter(deposit=partial_deposit, type="archive").count()
+        == 2
+    )
+
+
+def test_idempotency_key_other_request(
+    authenticated_client, deposit_collection, partial_deposit, sample_archive
+):
+    post_archive(
+        authenticated_client,
+        reverse(COL_IRI, args=[deposit_collection.name]),
+        sample_archive,
+        HTTP_IDEMPOTENCY_KEY="some-key",
+    )
+    response = post_archive(
+        authenticated_client,
+        reverse(EM_IRI, args=[deposit_collection.name, partial_deposit.id]),
+        sample_archive,
+        HTTP_IDEMPOTENCY_KEY="some-key",
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert b"Idempotency-Key already used" in response.content
+
+
+def test_idempotency_key_in_progress(
+    authenticated_client, deposit_collection, sample_archive
+):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    IdempotencyKey.objects.create(
+        client=authenticated_client.deposit_client,
+        key="some-key",
+        method="POST",
+        path=str(url),
+    )
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response["Retry-After"] == "1"
+    assert not Deposit.objects.exists()
+
+
+def test_idempotency_key_claim_abandoned(
+    authenticated_client, deposit_collection, sample_archive
+):
+    """Keys claimed by a crashed server process are claimed again once their
+    lease is over"""
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    # left by a server process crashed while processing the first request
+    IdempotencyKey.objects.create(
+        client=authenticated_client.deposit_client,
+        key="some-key",
+        method="POST",
+        path=str(url),
+    )
+
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    IdempotencyKey.objects.update(
+        claim_date=datetime.datetime.now(tz=datetime.timezone.utc)
+        - datetime.timedelta(minutes=16)
+    )
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in response
+
+    replayed = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    assert replayed.status_code == status.HTTP_201_CREATED
+    assert replayed["Idempotent-Replayed"] == "true"
+    assert _deposit_id(replayed) == _deposit_id(response)
+
+
+def test_idempotency_key_released_while_claimed(
+    authenticated_client, deposit_collection, sample_archive, mocker
+):
+    """Keys released by the request holding them, between the failed claim and the
+    read of the key, are claimed again"""
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    # the key is held by a concurrent request, which fails and releases it before
+    # it is read
+    claim_key = idempotency._claim
+    released = [IntegrityError("duplicate key")]
+
+    def claim_released_key(*args):
+        if released:
+            raise released.pop()
+        return claim_key(*args)
+
+    claim = mocker.patch.object(idempotency, "_claim", side_effect=claim_released_key)
+
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert claim.call_count == 2
+    assert IdempotencyKey.objects.get().response_status == status.HTTP_201_CREATED
+
+    # the key is claimed then released again and again by concurrent requests
+    claim.reset_mock()
+    claim.side_effect = IntegrityError("duplicate key")
+    IdempotencyKey.objects.all().delete()
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert claim.call_count == idempotency.MAX_CLAIM_ATTEMPTS
+    assert Deposit.objects.count() == 1
+
+
+def test_idempotency_key_released_on_error(
+    authenticated_client, deposit_collection, sample_archive
+):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    response = post_archive(
+        authenticated_client,
+        url,
+        {**sample_archive, "md5sum": "0" * 32},
+        HTTP_IDEMPOTENCY_KEY="some-key",
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert not IdempotencyKey.objects.exists()
+
+    # the request can be fixed and sent again with the same key
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in response
+
+
+def test_idempotency_key_expired(
+    authenticated_client, deposit_collection, sample_archive
+):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    IdempotencyKey.objects.update(
+        date=datetime.datetime.now(tz=datetime.timezone.utc)
+        - datetime.timedelta(days=2)
+    )
+
+    response = post_archive(
+        authenticated_client, url, sample_archive, HTTP_IDEMPOTENCY_KEY="some-key"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in response
+    assert Deposit.objects.filter(status=DEPOSIT_STATUS_PARTIAL).count() == 2
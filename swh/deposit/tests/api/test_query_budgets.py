@@ -0,0 +1,168 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Maximum number of database queries of the requests to each endpoint, to catch
+the changes adding queries to the request path (e.g. lazy-loaded foreign keys).
+
+Clients and collections are read from the cache (see swh.deposit.lookups), filled
+by the fixtures creating the deposits.
+"""
+
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy as reverse
+import pytest
+from rest_framework import status
+
+from swh.deposit.config import (
+    COL_IRI,
+    COL_STATE_IRI,
+    CONT_FILE_IRI,
+    DEPOSIT_STATUS_VERIFIED,
+    EM_IRI,
+    PRIVATE_GET_DEPOSIT_METADATA,
+    PRIVATE_LIST_DEPOSITS,
+    PRIVATE_PUT_DEPOSIT,
+    SD_IRI,
+    SE_IRI,
+    STATE_IRI,
+)
+from swh.deposit.tests.common import post_archive, post_atom, put_archive
+
+
+def _service_document(client, deposit, **kwargs):
+    return client.get(reverse(SD_IRI))
+
+
+def _collection_list(client, deposit, **kwargs):
+    return client.get(reverse(COL_IRI, args=[deposit.collection.name]))
+
+
+def _post_atom(client, deposit, atom_dataset, **kwargs):
+    return post_atom(
+        client,
+        reverse(COL_IRI, args=[deposit.collection.name]),
+        data=atom_dataset["entry-data1"],
+        HTTP_SLUG="another-external-id",
+        HTTP_IN_PROGRESS="true",
+    )
+
+
+def _post_archive(client, deposit, sample_archive, **kwargs):
+    return post_archive(
+        client,
+        reverse(COL_IRI, args=[deposit.collection.name]),
+        sample_archive,
+        HTTP_SLUG="another-external-id",
+        HTTP_IN_PROGRESS="false",
+    )
+
+
+def _add_metadata(client, deposit, atom_dataset, **kwargs):
+    return post_atom(
+        client,
+        reverse(SE_IRI, args=[deposit.collection.name, deposit.id]),
+        data=atom_dataset["entry-data1"],
+        HTTP_IN_PROGRESS="true",
+    )
+
+
+def _replace_archive(client, deposit, sample_archive, **kwargs):
+    return put_archive(
+        client,
+        reverse(EM_IRI, args=[deposit.collection.name, deposit.id]),
+        sample_archive,
+        HTTP_IN_PROGRESS="true",
+    )
+
+
+def _state(client, deposit, **kwargs):
+    return client.get(reverse(STATE_IRI, args=[deposit.collection.name, deposit.id]))
+
+
+def _collection_state(client, deposit, **kwargs):
+    return client.get(
+        reverse(COL_STATE_IRI, args=[deposit.collection.name]),
+        {"ids": str(deposit.id)},
+    )
+
+
+def _content(client, deposit, **kwargs):
+    return client.get(
+        reverse(CONT_FILE_IRI, args=[deposit.collection.name, deposit.id])
+    )
+
+
+def _private_read(client, deposit, **kwargs):
+    return client.get(
+        reverse(
+            PRIVATE_GET_DEPOSIT_METADATA, args=[deposit.collection.name, deposit.id]
+        )
+    )
+
+
+def _private_list(client, deposit, **kwargs):
+    return client.get(reverse(PRIVATE_LIST_DEPOSITS))
+
+
+def _private_update_status(client, deposit, **kwargs):
+    return client.put(
+        reverse(PRIVATE_PUT_DEPOSIT, args=[deposit.collection.name, deposit.id]),
+        content_type="application/json",
+        data=json.dumps({"status": DEPOSIT_STATUS_VERIFIED}),
+    )
+
+
+@pytest.mark.parametrize(
+    "request_endpoint,max_queries",
+    [
+        # collections, and partial deposits of the client
+        (_service_document, 2),
+        # count and page of the deposits of the client
+        (_collection_list, 2),
+        # slug, deposit, metadata request, origin url checks and update
+        (_post_atom, 6),
+        # slug, deposit, archive request (with archive reference check), completion
+        # and notification (in a savepoint of the test transaction)
+        (_post_archive, 9),
+        (_add_metadata, 6),
+        (_replace_archive, 8),
+        (_state, 1),
+        (_collection_state, 1),
+        (_content, 1),
+        (_private_read, 2),
+        # count, page and last metadata of the deposits
+        (_private_list, 3),
+        # deposit, and update and notification (in a savepoint of the test
+        # transaction)
+        (_private_update_status, 4),
+    ],
+)
+def test_query_budget(
+    authenticated_client,
+    partial_deposit_with_metadata,
+    atom_dataset,
+    sample_archive,
+    request_endpoint,
+    max_queries,
+):
+    # loaded before building the urls of the requests
+    assert partial_deposit_with_metadata.collection is not None
+    with CaptureQueriesContext(connection) as queries:
+        response = request_endpoint(
+            authenticated_client,
+            partial_deposit_with_metadata,
+            atom_dataset=atom_dataset,
+            sample_archive=sample_archive,
+        )
+    assert status.is_success(response.status_code), response.content
+
+    sql = "\n".join(query["sql"] for query in queries.captured_queries)
+    assert len(queries) <= max_queries, sql
+    # cached, or read with the deposit
+    assert 'FROM "deposit_client"' not in sql
+    assert 'FROM "deposit_collection" WHERE "deposit_collection"."name"' not in sql
@@ -45,10 +45,13 @@ def check_response(response, username):
 <service xmlns:dcterms="http://purl.org/dc/terms/"
     xmlns:sword="http://purl.org/net/sword/terms/"
     xmlns:atom="http://www.w3.org/2005/Atom"
+    xmlns:swh="https://www.softwareheritage.org/schema/2018/deposit"
     xmlns="http://www.w3.org/2007/app">
 
     <sword:version>2.0</sword:version>
     <sword:maxUploadSize>%s</sword:maxUploadSize>
+    <swh:concurrentUploads>0</swh:concurrentUploads>
+    <swh:partialDeposits>0</swh:partialDeposits>
 
     <workspace>
         <atom:title>The Software Heritage (SWH) Archive</atom:title>
@@ -64,6 +67,7 @@ def check_response(response, username):
             <sword:acceptPackaging>http://purl.org/net/sword/package/SimpleZip</sword:acceptPackaging>
             <sword:service>http://testserver/1/%s/</sword:service>
             <sword:name>%s</sword:name>
+            <swh:concurrentUploads>0</swh:concurrentUploads>
         </collection>
     </workspace>
 </service>
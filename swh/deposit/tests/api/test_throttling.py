@@ -0,0 +1,109 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Tests the rate limiting of the deposit requests"""
+
+from django.core.cache import cache
+from django.urls import reverse_lazy as reverse
+import pytest
+from rest_framework import status
+
+from swh.deposit.api import throttling
+from swh.deposit.api.throttling import RateLimit, rate_limits_from_config, take_token
+from swh.deposit.config import COL_IRI, STATE_IRI
+from swh.deposit.tests.common import post_archive, post_atom
+
+RATE_LIMITS = {
+    "metadata": {"rate": 0.001, "burst": 1},
+    "archive": {"rate": 0.001, "burst": 1},
+    "status": {"rate": 0.01, "burst": 2},
+}
+
+
+@pytest.fixture
+def deposit_config(deposit_config):
+    return {**deposit_config, "rate_limits": RATE_LIMITS}
+
+
+@pytest.fixture(autouse=True)
+def clear_buckets():
+    cache.clear()
+    throttling._local_buckets.clear()
+    yield
+    cache.clear()
+    throttling._local_buckets.clear()
+
+
+def test_rate_limits_from_config():
+    assert rate_limits_from_config({}) == {}
+    assert rate_limits_from_config({"rate_limits": RATE_LIMITS})["status"] == RateLimit(
+        rate=0.01, burst=2
+    )
+    with pytest.raises(ValueError, match="Unknown rate limit"):
+        rate_limits_from_config({"rate_limits": {"foo": {"rate": 1, "burst": 1}}})
+
+
+def test_take_token():
+    limit = RateLimit(rate=2, burst=3)
+    state = None
+    for _ in range(3):
+        state, delay = take_token(state, limit, now=100.0)
+        assert delay == 0
+    state, delay = take_token(state, limit, now=100.0)
+    assert delay == 0.5
+    # tokens are added over time, up to the burst size
+    state, delay = take_token(state, limit, now=100.5)
+    assert delay == 0
+    state, delay = take_token(state, limit, now=1000.0)
+    assert delay == 0
+    assert state == (2.0, 1000.0)
+
+
+def test_rate_limit_status_polling(
+    authenticated_client, deposit_collection, partial_deposit
+):
+    url = reverse(STATE_IRI, args=[deposit_collection.name, partial_deposit.id])
+    for _ in range(2):
+        response = authenticated_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+
+    response = authenticated_client.get(url)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response["Retry-After"] == "100"
+    assert b"Rate limit exceeded for status requests" in response.content
+
+
+def test_rate_limit_buckets(
+    authenticated_client, deposit_collection, sample_archive, atom_dataset
+):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+    response = post_archive(authenticated_client, url, sample_archive)
+    assert response.status_code == status.HTTP_201_CREATED
+    response = post_archive(authenticated_client, url, sample_archive)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert b"Rate limit exceeded for archive requests" in response.content
+
+    # metadata-only requests have their own bucket
+    origin_url = authenticated_client.deposit_client.provider_url + "foo"
+    atom_entry = atom_dataset["entry-data0"] % origin_url
+    response = post_atom(authenticated_client, url, data=atom_entry)
+    assert response.status_code == status.HTTP_201_CREATED
+    response = post_atom(authenticated_client, url, data=atom_entry)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert b"Rate limit exceeded for metadata requests" in response.content
+
+
+def test_rate_limit_cache_unavailable(
+    authenticated_client, deposit_collection, partial_deposit, mocker
+):
+    mocker.patch.object(throttling.cache, "get", side_effect=ConnectionError)
+    url = reverse(STATE_IRI, args=[deposit_collection.name, partial_deposit.id])
+    for _ in range(2):
+        response = authenticated_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+
+    response = authenticated_client.get(url)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert len(throttling._local_buckets) == 1
@@ -0,0 +1,374 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Tests resumable archive uploads through upload sessions"""
+
+import hashlib
+import io
+import os
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy as reverse
+from rest_framework import status
+
+from swh.deposit.config import (
+    COL_IRI,
+    DEPOSIT_STATUS_DEPOSITED,
+    DEPOSIT_STATUS_PARTIAL,
+    EM_IRI,
+)
+from swh.deposit.models import (
+    UPLOAD_SESSIONS_DIRECTORY,
+    Deposit,
+    DepositRequest,
+    UploadSession,
+)
+from swh.deposit.parsers import parse_xml
+from swh.deposit.utils import NAMESPACES
+
+CHUNK_SIZE = 1000
+
+
+def _zip(content):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("file", content)
+    return archive.getvalue()
+
+
+def archive_data(size):
+    """Zip archive of exactly ``size`` bytes, with random content"""
+    return _zip(os.urandom(size - len(_zip(b""))))
+
+
+def open_session(client, url, data, method="post", **kwargs):
+    return getattr(client, method)(
+        url,
+        content_type="application/zip",
+        HTTP_UPLOAD_LENGTH=str(len(data)),
+        HTTP_CONTENT_DISPOSITION="attachment; filename=archive.zip",
+        **kwargs,
+    )
+
+
+def patch_chunk(client, url, data, start, end=None, md5sum=None):
+    end = end if end is not None else min(start + CHUNK_SIZE, len(data)) - 1
+    chunk = data[start : end + 1]
+    return client.patch(
+        url,
+        data=chunk,
+        content_type="application/octet-stream",
+        HTTP_CONTENT_RANGE=f"bytes {start}-{end}/{len(data)}",
+        HTTP_CONTENT_MD5=md5sum or hashlib.md5(chunk).hexdigest(),
+    )
+
+
+def upload_all_chunks(client, url, data):
+    for start in range(0, len(data), CHUNK_SIZE):
+        response = patch_chunk(client, url, data, start)
+        assert response.status_code == status.HTTP_204_NO_CONTENT, response.content
+        assert response["Upload-Offset"] == str(min(start + CHUNK_SIZE, len(data)))
+
+
+def test_upload_session_create_deposit(
+    authenticated_client, deposit_collection, deposit_config
+):
+    """An archive larger than max_upload_size can be sent in chunks, then committed
+    as a single archive"""
+    data = archive_data(3 * deposit_config["max_upload_size"] + 42)
+
+    response = open_session(
+        authenticated_client,
+        reverse(COL_IRI, args=[deposit_collection.name]),
+        data,
+        HTTP_SLUG="external-id",
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+    response_content = parse_xml(response.content)
+    deposit_id = int(response_content.findtext("swh:deposit_id", namespaces=NAMESPACES))
+    session_url = response["Location"]
+    assert (
+        response_content.findtext("swh:upload_session", namespaces=NAMESPACES)
+        == session_url
+    )
+
+    deposit = Deposit.objects.get(pk=deposit_id)
+    assert deposit.status == DEPOSIT_STATUS_PARTIAL
+    assert deposit.external_id == "external-id"
+    assert not DepositRequest.objects.filter(deposit=deposit).exists()
+
+    upload_all_chunks(authenticated_client, session_url, data)
+
+    response = authenticated_client.get(session_url)
+    assert response.status_code == status.HTTP_200_OK
+    response_content = parse_xml(response.content)
+    assert response_content.findtext("swh:upload_offset", namespaces=NAMESPACES) == str(
+        len(data)
+    )
+
+    response = authenticated_client.post(
+        session_url, HTTP_CONTENT_MD5=hashlib.md5(data).hexdigest()
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+    response_content = parse_xml(response.content)
+    assert (
+        response_content.findtext("swh:deposit_archive", namespaces=NAMESPACES)
+        == "archive.zip"
+    )
+
+    deposit.refresh_from_db()
+    assert deposit.status == DEPOSIT_STATUS_DEPOSITED
+
+    deposit_request = DepositRequest.objects.get(deposit=deposit)
+    assert deposit_request.archive.read() == data
+    assert deposit_request.archive_length == len(data)
+    assert deposit_request.archive_sha256 == hashlib.sha256(data).hexdigest()
+
+    upload_session_id = session_url.rstrip("/").split("/")[-1]
+    assert not UploadSession.objects.filter(pk=upload_session_id).exists()
+    assert not default_storage.exists(
+        f"{UPLOAD_SESSIONS_DIRECTORY}/{upload_session_id}/{0:020d}"
+    )
+
+
+def test_upload_session_resume(
+    authenticated_client, deposit_collection, deposit_config
+):
+    """Chunks not starting at the session offset are refused, clients resume the
+    upload from the offset advertised by the upload session"""
+    data = archive_data(3 * CHUNK_SIZE)
+    response = open_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    session_url = response["Location"]
+
+    response = patch_chunk(authenticated_client, session_url, data, 0)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    # the same chunk again, e.g. the client did not get the response
+    response = patch_chunk(authenticated_client, session_url, data, 0)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    # skipping a chunk
+    response = patch_chunk(authenticated_client, session_url, data, 2 * CHUNK_SIZE)
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    response = authenticated_client.head(session_url)
+    assert response.status_code == status.HTTP_200_OK
+    offset = int(response["Upload-Offset"])
+    assert offset == CHUNK_SIZE
+
+    # committing an incomplete upload is refused
+    response = authenticated_client.post(session_url)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    for start in range(offset, len(data), CHUNK_SIZE):
+        response = patch_chunk(authenticated_client, session_url, data, start)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = authenticated_client.post(session_url)
+    assert response.status_code == status.HTTP_201_CREATED
+    deposit_id = int(
+        parse_xml(response.content).findtext("swh:deposit_id", namespaces=NAMESPACES)
+    )
+    deposit_request = DepositRequest.objects.get(deposit=deposit_id)
+    assert deposit_request.archive.read() == data
+
+
+def test_upload_session_committed_once(authenticated_client, deposit_collection):
+    """The session is locked while committed, so that commits sent again (e.g.
+    retries without Idempotency-Key) find it committed"""
+    data = archive_data(2 * CHUNK_SIZE)
+    response = open_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    session_url = response["Location"]
+    upload_all_chunks(authenticated_client, session_url, data)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = authenticated_client.post(session_url, HTTP_IN_PROGRESS="true")
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+    assert any(
+        'FROM "deposit_upload_session"' in query["sql"]
+        and query["sql"].endswith("FOR UPDATE")
+        for query in queries.captured_queries
+    )
+
+    response = authenticated_client.post(session_url, HTTP_IN_PROGRESS="true")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert DepositRequest.objects.filter(type="archive").count() == 1
+
+
+def test_upload_session_chunk_checks(authenticated_client, deposit_collection):
+    data = archive_data(2 * CHUNK_SIZE)
+    response = open_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    session_url = response["Location"]
+
+    # corrupted chunk
+    response = patch_chunk(
+        authenticated_client,
+        session_url,
+        data,
+        0,
+        md5sum=hashlib.md5(b"something else").hexdigest(),
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    # missing content range
+    response = authenticated_client.patch(
+        session_url, data=data[:CHUNK_SIZE], content_type="application/octet-stream"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # range past the end of the archive
+    response = patch_chunk(authenticated_client, session_url, data, 0, len(data))
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = authenticated_client.get(session_url)
+    assert response["Upload-Offset"] == "0"
+
+
+def test_upload_session_committed_archive_checksum_mismatch(
+    authenticated_client, deposit_collection
+):
+    data = archive_data(CHUNK_SIZE)
+    response = open_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    session_url = response["Location"]
+    upload_all_chunks(authenticated_client, session_url, data)
+
+    response = authenticated_client.post(
+        session_url, HTTP_CONTENT_MD5=hashlib.md5(b"something else").hexdigest()
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    # the upload session can still be committed
+    response = authenticated_client.post(session_url)
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_upload_session_replace_archive(
+    authenticated_client, deposit_collection, partial_deposit
+):
+    """An upload session opened by a PUT on the EM-IRI replaces existing archives"""
+    deposit = partial_deposit
+    assert DepositRequest.objects.filter(deposit=deposit, type="archive").count() == 1
+
+    data = archive_data(CHUNK_SIZE + 1)
+    response = open_session(
+        authenticated_client,
+        reverse(EM_IRI, args=[deposit_collection.name, deposit.id]),
+        data,
+        method="put",
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+    session_url = response["Location"]
+
+    upload_all_chunks(authenticated_client, session_url, data)
+    response = authenticated_client.post(session_url, HTTP_IN_PROGRESS="true")
+    assert response.status_code == status.HTTP_201_CREATED
+
+    deposit.refresh_from_db()
+    assert deposit.status == DEPOSIT_STATUS_PARTIAL
+    archive_requests = DepositRequest.objects.filter(deposit=deposit, type="archive")
+    assert [r.archive.read() for r in archive_requests] == [data]
+
+
+def test_upload_session_add_archive(
+    authenticated_client, deposit_collection, partial_deposit
+):
+    """An upload session opened by a POST on the EM-IRI adds an archive"""
+    deposit = partial_deposit
+    data = archive_data(200)
+    response = open_session(
+        authenticated_client,
+        reverse(EM_IRI, args=[deposit_collection.name, deposit.id]),
+        data,
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+    session_url = response["Location"]
+
+    upload_all_chunks(authenticated_client, session_url, data)
+    response = authenticated_client.post(session_url)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert DepositRequest.objects.filter(deposit=deposit, type="archive").count() == 2
+
+
+def test_upload_session_abort(authenticated_client, deposit_collection):
+    data = archive_data(2 * CHUNK_SIZE)
+    response = open_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    session_url = response["Location"]
+    response = patch_chunk(authenticated_client, session_url, data, 0)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = authenticated_client.delete(session_url)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = authenticated_client.get(session_url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_upload_session_open_errors(authenticated_client, deposit_collection):
+    url = reverse(COL_IRI, args=[deposit_collection.name])
+
+    # no filename
+    response = authenticated_client.post(
+        url, content_type="application/zip", HTTP_UPLOAD_LENGTH="10"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # not an archive
+    response = authenticated_client.post(
+        url,
+        content_type="text/plain",
+        HTTP_UPLOAD_LENGTH="10",
+        HTTP_CONTENT_DISPOSITION="attachment; filename=archive.zip",
+    )
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    # invalid length
+    response = open_session(authenticated_client, url, b"")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_upload_session_not_an_archive(authenticated_client, deposit_collection):
+    """Content which is not an archive is refused from its first chunk"""
+    data = os.urandom(2 * CHUNK_SIZE)
+    response = open_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    session_url = response["Location"]
+
+    response = patch_chunk(authenticated_client, session_url, data, 0)
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert b"Archive content does not match its content type" in response.content
+
+
+def test_upload_session_archive_in_archive(authenticated_client, deposit_collection):
+    """Archives only containing an archive are refused when committed"""
+    data = _zip(os.urandom(2 * CHUNK_SIZE))
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as zip_file:
+        zip_file.writestr("inner.zip", data)
+    data = inner.getvalue()
+    response = open_session(
+        authenticated_client, reverse(COL_IRI, args=[deposit_collection.name]), data
+    )
+    session_url = response["Location"]
+    upload_all_chunks(authenticated_client, session_url, data)
+
+    response = authenticated_client.post(session_url)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert b"Mandatory archive is invalid" in response.content
+    assert not DepositRequest.objects.filter(
+        deposit__collection=deposit_collection, type="archive"
+    ).exists()
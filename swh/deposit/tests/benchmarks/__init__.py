@@ -0,0 +1,35 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Benchmarks of the optimizations of the deposit server and checker, skipped
+unless the ``SWH_DEPOSIT_BENCHMARKS`` environment variable is set, e.g.::
+
+    SWH_DEPOSIT_BENCHMARKS=1 pytest -s swh/deposit/tests/benchmarks
+
+They print their measures, and only check the optimized code is faster, as the
+durations depend on the machine running them.
+"""
+
+import time
+from typing import Callable
+
+
+def duration(func: Callable[[], object], number: int = 10, repeat: int = 3) -> float:
+    """Best duration (in seconds) of a call to ``func``, over ``repeat`` rounds of
+    ``number`` calls."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        durations.append((time.perf_counter() - start) / number)
+    return min(durations)
+
+
+def report(name: str, before: float, after: float) -> None:
+    print(
+        f"\n{name}: {before * 1e3:.3f} ms -> {after * 1e3:.3f} ms "
+        f"({before / after:.1f}x)"
+    )
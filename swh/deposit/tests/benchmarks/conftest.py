@@ -0,0 +1,18 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import os
+
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("SWH_DEPOSIT_BENCHMARKS"):
+        return
+    skip = pytest.mark.skip(reason="set SWH_DEPOSIT_BENCHMARKS=1 to run benchmarks")
+    directory = os.path.dirname(__file__)
+    for item in items:
+        if str(item.fspath).startswith(directory + os.sep):
+            item.add_marker(skip)
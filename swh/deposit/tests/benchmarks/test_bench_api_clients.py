@@ -0,0 +1,24 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Construction of the API views, which used to read the configuration and create
+the service clients for each request."""
+
+from swh.core import config
+from swh.deposit.api.state import StateAPI
+from swh.deposit.config import DEFAULT_CONFIG, APIClients, get_api_clients
+from swh.deposit.tests.benchmarks import duration, report
+
+
+def test_bench_view_construction():
+    get_api_clients()
+
+    def load_clients():
+        APIClients((), config.load_from_envvar(DEFAULT_CONFIG))
+
+    before = duration(load_clients)
+    after = duration(StateAPI, number=1000)
+    report("view construction", before + after, after)
+    assert after < before
@@ -0,0 +1,34 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Basic authentication of the requests, whose password hash used to be checked
+on each request."""
+
+from django.core.cache import cache
+
+from swh.deposit.auth import CachedBasicAuthentication, forget_verified_credentials
+from swh.deposit.tests.benchmarks import duration, report
+
+
+def test_bench_basic_auth(deposit_user, settings):
+    # the default hasher of production, rather than the fast one of the tests
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.PBKDF2PasswordHasher"]
+    deposit_user.set_password("password")
+    deposit_user.save()
+    authentication = CachedBasicAuthentication()
+
+    def authenticate():
+        authentication.authenticate_credentials(deposit_user.username, "password")
+
+    def authenticate_uncached():
+        forget_verified_credentials()
+        cache.clear()
+        authenticate()
+
+    before = duration(authenticate_uncached, number=3)
+    authenticate()
+    after = duration(authenticate, number=100)
+    report("basic authentication", before, after)
+    assert after < before
@@ -0,0 +1,47 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Validation of the metadata by libxml2 (the lxml engine), rather than by
+xmlschema, of the elements of the codemeta schema it compiles."""
+
+from xml.etree import ElementTree
+
+import pytest
+
+from swh.deposit.loader.checks import check_metadata, compiled_schemas, schemas
+from swh.deposit.tests.benchmarks import duration, report
+
+XMLNS = """xmlns="http://www.w3.org/2005/Atom"
+           xmlns:codemeta="https://doi.org/10.5063/SCHEMA/CODEMETA-2.0" """
+
+ELEMENTS = [
+    "<codemeta:dateCreated>2020-01-01</codemeta:dateCreated>",
+    "<codemeta:url>https://example.org/foo</codemeta:url>",
+    "<codemeta:identifier>https://doi.org/10.1234/foo</codemeta:identifier>",
+    "<codemeta:keywords>foo</codemeta:keywords>",
+]
+
+
+def test_bench_validation_engine():
+    pytest.importorskip("lxml")
+    count = 5000
+    metadata = ElementTree.fromstring(
+        f"<entry {XMLNS}><codemeta:name>bar</codemeta:name>"
+        "<codemeta:author><codemeta:name>author</codemeta:name></codemeta:author>"
+        + "".join(ELEMENTS[i % len(ELEMENTS)] for i in range(count))
+        + "</entry>"
+    )
+    # loaded once by the checker
+    schemas()
+    compiled_schemas()
+
+    assert check_metadata(metadata, engine="lxml") == check_metadata(
+        metadata, engine="xmlschema"
+    )
+    before = duration(lambda: check_metadata(metadata, engine="xmlschema"), number=1)
+    after = duration(lambda: check_metadata(metadata, engine="lxml"), number=1)
+    report(f"check_metadata of {count} elements", before, after)
+    print(f"elements/s: {count / before:.0f} -> {count / after:.0f}")
+    assert after < before
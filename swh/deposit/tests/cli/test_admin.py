@@ -3,6 +3,8 @@
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
+import os
+
 import pytest
 
 from swh.deposit.cli.admin import admin as cli
@@ -113,9 +115,12 @@ def test_cli_admin_create_collection(cli_runner):
     collection = DepositCollection.objects.get(name=collection_name)
     assert collection is not None
 
-    assert result.output == f"""Create collection '{collection_name}'.
+    assert (
+        result.output
+        == f"""Create collection '{collection_name}'.
 Collection '{collection_name}' created.
 """
+    )
 
     result2 = cli_runner.invoke(
         cli,
@@ -127,8 +132,11 @@ Collection '{collection_name}' created.
         ],
     )
     assert result2.exit_code == 0, f"Unexpected output: {result.output}"
-    assert result2.output == f"""Collection '{collection_name}' exists, skipping.
+    assert (
+        result2.output
+        == f"""Collection '{collection_name}' exists, skipping.
 """
+    )
 
 
 def test_cli_admin_user_create(cli_runner):
@@ -162,11 +170,14 @@ def test_cli_admin_user_create(cli_runner):
     collection = DepositCollection.objects.get(name=collection_name)
     assert collection is not None
 
-    assert result.output == f"""Create collection '{user_name}'.
+    assert (
+        result.output
+        == f"""Create collection '{user_name}'.
 Collection '{collection_name}' created.
 Create user '{user_name}'.
 User '{user_name}' created.
 """
+    )
 
     assert collection.name == collection_name
     assert user.username == user_name
@@ -223,10 +234,13 @@ User '{user_name}' created.
     assert user.first_name == "User"
     assert user.last_name == "no one"
 
-    assert result2.output == f"""Collection '{collection_name}' exists, skipping.
+    assert (
+        result2.output
+        == f"""Collection '{collection_name}' exists, skipping.
 Update user '{user_name}'.
 User '{user_name}' updated.
 """
+    )
 
 
 def test_cli_admin_reschedule_unknown_deposit(cli_runner):
@@ -339,3 +353,80 @@ def test_cli_admin_reschedule_nominal(cli_runner, complete_deposit, swh_schedule
 
     task = swh_scheduler.search_tasks(task_id=deposit.load_task_id)[0]
     assert task.status == "next_run_not_scheduled"
+
+
+def test_cli_admin_archive_gc(cli_runner, settings, tmp_path, partial_deposit):
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+
+    from swh.deposit.models import DepositRequest
+
+    settings.MEDIA_ROOT = os.path.join(tmp_path, "archives")
+    DepositRequest.objects.create(
+        deposit=partial_deposit,
+        type="archive",
+        archive=default_storage.save("live.zip", ContentFile(b"live")),
+    )
+    orphan = default_storage.save("orphan.zip", ContentFile(b"orphan"))
+
+    result = cli_runner.invoke(
+        cli, ["archive", "gc", "--dry-run", "--grace-period", "0"]
+    )
+    assert result.exit_code == 0, f"Unexpected output: {result.output}"
+    assert "1 orphan archives to remove (6 bytes)." in result.output
+    assert default_storage.exists(orphan)
+
+    result = cli_runner.invoke(cli, ["archive", "gc", "--grace-period", "0"])
+    assert result.exit_code == 0, f"Unexpected output: {result.output}"
+    assert "Scanned 2 files" in result.output
+    assert "1 orphan archives removed (6 bytes)." in result.output
+    assert not default_storage.exists(orphan)
+    assert default_storage.exists("live.zip")
+
+
+def test_cli_admin_user_create_webhook(cli_runner, deposit_user):
+    result = cli_runner.invoke(
+        cli,
+        [
+            "user",
+            "create",
+            "--username",
+            deposit_user.username,
+            "--webhook-url",
+            "https://example.org/hook",
+        ],
+    )
+    assert result.exit_code == 0, f"Unexpected output: {result.output}"
+    user = DepositClient.objects.get(username=deposit_user.username)
+    assert user.webhook_url == "https://example.org/hook"
+    assert len(user.webhook_secret) == 64
+    assert f"Webhook secret of user '{user.username}': {user.webhook_secret}" in (
+        result.output
+    )
+
+    # the secret is kept when the user is updated
+    result = cli_runner.invoke(
+        cli, ["user", "create", "--username", user.username, "--domain", "domain"]
+    )
+    assert result.exit_code == 0, f"Unexpected output: {result.output}"
+    assert "Webhook secret" not in result.output
+    assert DepositClient.objects.get(username=user.username).webhook_secret == (
+        user.webhook_secret
+    )
+
+
+def test_cli_admin_webhooks_deliver(cli_runner, mocker):
+    from swh.deposit.webhooks import DeliveryStats
+
+    deliver = mocker.patch(
+        "swh.deposit.webhooks.deliver_webhooks",
+        return_value=DeliveryStats(requests=2, delivered=3, retried=1),
+    )
+
+    result = cli_runner.invoke(cli, ["webhooks", "deliver", "--batch-size", "10"])
+
+    assert result.exit_code == 0, f"Unexpected output: {result.output}"
+    deliver.assert_called_once_with(batch_size=10, max_attempts=10, timeout=10.0)
+    assert result.output == (
+        "2 requests sent: 3 notifications delivered, 1 to retry, 0 given up.\n"
+    )
@@ -1,9 +1,10 @@
-# Copyright (C) 2020-2025  The Software Heritage developers
+# Copyright (C) 2020-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
 import ast
+from datetime import datetime, timezone
 import contextlib
 import json
 import logging
@@ -334,6 +335,47 @@ def test_cli_single_minimal_deposit_with_slug(
     ), "We should have 1 warning as we are using slug instead of create_origin"
 
 
+def test_cli_single_deposit_with_progress(
+    sample_archive, slug, patched_tmp_path, requests_mock_datadir, cli_runner, mocker
+):
+    """The progress of the upload is reported on stderr"""
+
+    def deposit_create(progress, **kwargs):
+        for sent in [1, 2, 4]:
+            progress(sent * 1024 * 1024, 4 * 1024 * 1024)
+        return {"deposit_id": "615"}
+
+    mocker.patch(
+        "swh.deposit.client.PublicApiDepositClient.deposit_create",
+        side_effect=deposit_create,
+    )
+    # fmt: off
+    result = cli_runner.invoke(
+        cli,
+        [
+            "upload",
+            "--url", "https://deposit.swh.test/1",
+            "--username", TEST_USER["username"],
+            "--password", TEST_USER["password"],
+            "--name", "test-project",
+            "--archive", sample_archive["path"],
+            "--metadata-provenance-url", "meta-prov-url",
+            "--author", "Jane Doe",
+            "--create-origin", slug,
+            "--progress",
+            "--format", "json",
+        ],
+    )
+    # fmt: on
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.stdout) == {"deposit_id": "615"}
+    # reports are throttled, except the last one
+    assert result.stderr.startswith("Uploaded 1.0 / 4.0 MiB (")
+    assert result.stderr.splitlines()[-1].startswith("Uploaded 4.0 / 4.0 MiB (")
+    assert result.stderr.endswith("MiB/s)\n")
+
+
 def test_cli_single_minimal_deposit_with_create_origin(
     sample_archive,
     slug,
@@ -777,6 +819,46 @@ def test_cli_deposit_status_with_output_format(
     assert actual_deposit == expected_deposit_status
 
 
+def test_cli_deposit_status_many_deposits(
+    requests_mock_datadir, cli_runner, mocker, caplog
+):
+    """The status of many deposits is retrieved at once"""
+    statuses = {"deposits": [{"deposit_id": "1"}, {"deposit_id": "2"}]}
+    deposit_statuses = mocker.patch(
+        "swh.deposit.client.PublicApiDepositClient.deposit_statuses",
+        return_value=statuses,
+    )
+    base_args = [
+        "status",
+        "--url", "https://deposit.swh.test/1",
+        "--username", TEST_USER["username"],
+        "--password", TEST_USER["password"],
+        "--format", "json",
+    ]  # fmt: skip
+
+    result = cli_runner.invoke(
+        cli, base_args + ["--deposit-id", "1", "--deposit-id", "2"]
+    )
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == statuses
+    deposit_statuses.assert_called_once_with(
+        collection="test", deposit_ids=[1, 2], since=None
+    )
+
+    deposit_statuses.reset_mock()
+    result = cli_runner.invoke(cli, base_args + ["--since", "2026-01-01"])
+    assert result.exit_code == 0, result.output
+    deposit_statuses.assert_called_once_with(
+        collection="test",
+        deposit_ids=None,
+        since=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+    result = cli_runner.invoke(cli, base_args)
+    assert result.exit_code == 1
+    assert "Provide either --deposit-id or --since" in caplog.text
+
+
 def test_cli_update_metadata_with_swhid_on_completed_deposit(
     datadir, requests_mock_datadir, cli_runner
 ):
@@ -1167,3 +1249,128 @@ def test_cli_deposit_collection_list(
 
     actual_deposit = parser_fn(result_output)
     assert actual_deposit == expected_deposits
+
+
+def _bulk_receipts(requests_mock, base_url="https://deposit.swh.test/1"):
+    """Mock the deposit creations of a bulk upload, failing the deposits whose
+    metadata contain "fail"; returns the metadata (and idempotency key) received"""
+    received = []
+
+    def receipt(request, context):
+        body = request.body.read()
+        metadata = body[body.index(b"<entry>") : body.index(b"</entry>") + 8]
+        received.append((metadata.decode(), request.headers["Idempotency-Key"]))
+        if b"fail" in metadata:
+            context.status_code = 500
+            return ""
+        context.status_code = 201
+        return (
+            '<entry xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+            f"<sd:deposit_id>{len(received)}</sd:deposit_id>"
+            "<sd:deposit_status>deposited</sd:deposit_status>"
+            "</entry>"
+        )
+
+    requests_mock.post(f"{base_url}/test/", text=receipt)
+    return received
+
+
+def _bulk_upload(cli_runner, *args):
+    # fmt: off
+    return cli_runner.invoke(
+        cli,
+        [
+            "bulk-upload",
+            "--url", "https://deposit.swh.test/1",
+            "--username", TEST_USER["username"],
+            "--password", TEST_USER["password"],
+            "--collection", "test",
+            "--format", "json",
+            *args,
+        ],
+    )
+    # fmt: on
+
+
+def test_cli_bulk_upload_manifest_resume(
+    requests_mock, cli_runner, sample_archive, tmp_path
+):
+    """Deposits of a manifest are sent concurrently, and only the failed ones are
+    sent again when resuming"""
+    received = _bulk_receipts(requests_mock)
+    entries = ["a", "b", "fail", "c"]
+    for entry in entries:
+        with open(os.path.join(tmp_path, f"{entry}.xml"), "w") as f:
+            f.write(f"<entry>{entry}</entry>")
+    manifest = os.path.join(tmp_path, "manifest.csv")
+    with open(manifest, "w") as f:
+        f.write("archive,metadata\n")
+        for entry in entries:
+            f.write(f"{sample_archive['path']},{entry}.xml\n")
+    report = os.path.join(tmp_path, "report.jsonl")
+
+    result = _bulk_upload(
+        cli_runner, "--manifest", manifest, "--report", report, "--workers", "2"
+    )
+    assert result.exit_code == 1, result.output
+    assert json.loads(result.stdout) == {"deposited": 3, "failed": 1, "skipped": 0}
+    assert sorted(metadata for metadata, _ in received) == sorted(
+        f"<entry>{entry}</entry>" for entry in entries
+    )
+    with open(report) as f:
+        results = {
+            os.path.basename(r["item"]): r for r in map(json.loads, f.readlines())
+        }
+    assert set(results) == {f"{entry}.xml" for entry in entries}
+    assert "error" in results["fail.xml"]
+    assert results["a.xml"]["deposit_status"] == "deposited"
+
+    # the failed deposit is sent again, with the same idempotency key
+    first_keys = dict(received)
+    received.clear()
+    result = _bulk_upload(cli_runner, "--manifest", manifest, "--report", report)
+    assert json.loads(result.stdout) == {"deposited": 0, "failed": 1, "skipped": 3}
+    assert received == [("<entry>fail</entry>", first_keys["<entry>fail</entry>"])]
+
+
+def test_cli_bulk_upload_metadata_dir(requests_mock, cli_runner, tmp_path):
+    """Metadata files of a directory are sent as metadata-only deposits"""
+    metadata_dir = os.path.join(tmp_path, "metadata")
+    os.mkdir(metadata_dir)
+    for entry in ["a", "b"]:
+        with open(os.path.join(metadata_dir, f"{entry}.xml"), "w") as f:
+            f.write(f"<entry>{entry}</entry>")
+    with open(os.path.join(metadata_dir, "README"), "w") as f:
+        f.write("not a metadata file")
+    received = []
+
+    def receipt(request, context):
+        received.append(request.body.read())
+        return (
+            '<entry xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+            f"<sd:deposit_id>{len(received)}</sd:deposit_id>"
+            "<sd:deposit_status>done</sd:deposit_status>"
+            "</entry>"
+        )
+
+    requests_mock.post(
+        "https://deposit.swh.test/1/test/", status_code=201, text=receipt
+    )
+    report = os.path.join(tmp_path, "report.jsonl")
+    result = _bulk_upload(
+        cli_runner, "--metadata-dir", metadata_dir, "--report", report
+    )
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.stdout) == {"deposited": 2, "failed": 0, "skipped": 0}
+    assert sorted(received) == [b"<entry>a</entry>", b"<entry>b</entry>"]
+
+
+def test_cli_bulk_upload_requires_one_source(cli_runner, tmp_path, caplog):
+    result = _bulk_upload(
+        cli_runner, "--report", os.path.join(tmp_path, "report.jsonl")
+    )
+    assert result.exit_code == 1
+    assert "Provide exactly one of --manifest or --metadata-dir" in caplog.text
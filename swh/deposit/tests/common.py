@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2023  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -13,6 +13,7 @@ import tempfile
 from django.core.files.uploadedfile import InMemoryUploadedFile
 
 from swh.core import tarball
+from swh.deposit.models import archive_extension
 
 SUPPORTED_TARBALL_MODES = ["xz", "gz", "bz2"]
 
@@ -133,13 +134,22 @@ def create_archive_with_archive(root_path, name, archive):
 
 def check_archive(archive_name: str, archive_name_to_check: str):
     """Helper function to ensure archive_name is present within the
-       archive_name_to_check.
+       archive_name_to_check (or that archive_name_to_check is the
+       content-addressed path of an archive with the same extension).
 
     Raises:
         AssertionError if archive_name is not present within
             archive_name_to_check
 
     """
+    CONTENT_ADDRESSED_FILEPATH_PATTERN = re.compile(
+        r"archives/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(\..*)?$"
+    )
+    match = CONTENT_ADDRESSED_FILEPATH_PATTERN.match(archive_name_to_check)
+    if match:
+        assert (match.group(3) or "") == archive_extension(archive_name)
+        return
+
     ARCHIVE_FILEPATH_PATTERN = re.compile(
         r"client_[0-9].*/[0-9]{8}-[0-9]{6}\.[0-9]{6}/[a-zA-Z0-9.].*"
     )
@@ -1,4 +1,4 @@
-# Copyright (C) 2019-2025  The Software Heritage developers
+# Copyright (C) 2019-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -7,6 +7,7 @@ import base64
 from copy import deepcopy
 from functools import partial
 import hashlib
+import json
 import os
 import re
 import shutil
@@ -21,7 +22,9 @@ from rest_framework import status
 from rest_framework.test import APIClient
 import yaml
 
+from swh.auth.keycloak import KeycloakError
 from swh.auth.pytest_plugin import keycloak_mock_factory
+from swh.auth.tests.sample_data import OIDC_PROFILE
 from swh.core.config import read
 from swh.core.pytest_plugin import get_response_cb
 from swh.deposit.auth import DEPOSIT_PERMISSION
@@ -227,6 +230,20 @@ def execute_sql(sql):
             cur.execute(sql)
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Clients, collections (see swh.deposit.lookups) and verified credentials (see
+    swh.deposit.auth) are cached, while the database is rolled back and keycloak
+    mocked differently by each test"""
+    yield
+    from django.core.cache import cache
+
+    from swh.deposit.auth import forget_verified_credentials
+
+    cache.clear()
+    forget_verified_credentials()
+
+
 @pytest.fixture(autouse=True, scope="session")
 def swh_proxy():
     """Automatically inject this fixture in all tests to ensure no outside
@@ -324,6 +341,31 @@ def mock_keycloakopenidconnect_ko(mocker, keycloak_mock_auth_failure):
     return mock_keycloakopenidconnect(mocker, keycloak_mock_auth_failure)
 
 
+@pytest.fixture
+def keycloak_stand_in(mocker, keycloak_mock_auth_success):
+    """Mock keycloak so it accepts the users of its ``passwords`` dict (username to
+    password) with the right permissions, and refuses the other credentials.
+
+    Its logins are counted by ``keycloak_stand_in.login.call_count``.
+
+    """
+
+    def login(username, password, **kwargs):
+        if keycloak_stand_in.passwords.get(username) != password:
+            error = {
+                "error": "invalid_grant",
+                "error_description": "Invalid user credentials",
+            }
+            raise KeycloakError(error_message=json.dumps(error), response_code=401)
+        return deepcopy(OIDC_PROFILE)
+
+    keycloak_stand_in = keycloak_mock_auth_success
+    keycloak_stand_in.passwords = {}
+    keycloak_stand_in.login.side_effect = login
+    mock_keycloakopenidconnect(mocker, keycloak_stand_in)
+    return keycloak_stand_in
+
+
 def _create_authenticated_client(client, user, password=None):
     """Return a client whose credentials will be proposed to the deposit server.
 
@@ -617,7 +659,20 @@ def complete_deposit(sample_archive, deposit_collection, authenticated_client):
 
 
 @pytest.fixture
-def ready_deposit_invalid_archive(authenticated_client, deposit_collection):
+def without_archive_inspection(settings):
+    """Accept invalid archives at upload time, like they were before archives were
+    inspected while uploaded (or when they are uploaded directly to the storage)"""
+    settings.FILE_UPLOAD_HANDLERS = [
+        handler
+        for handler in settings.FILE_UPLOAD_HANDLERS
+        if handler != "swh.deposit.inspector.ArchiveInspectionUploadHandler"
+    ]
+
+
+@pytest.fixture
+def ready_deposit_invalid_archive(
+    authenticated_client, deposit_collection, without_archive_inspection
+):
     url = reverse(COL_IRI, args=[deposit_collection.name])
 
     data = b"some data which is clearly not a zip file"
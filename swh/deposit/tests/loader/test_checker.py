@@ -1,4 +1,4 @@
-# Copyright (C) 2017-2025  The Software Heritage developers
+# Copyright (C) 2017-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -10,6 +10,7 @@ from django.urls import reverse_lazy as reverse
 import pytest
 from rest_framework import status
 
+from swh.deposit import metadata_checks
 from swh.deposit.config import (
     COL_IRI,
     DEPOSIT_STATUS_DEPOSITED,
@@ -19,13 +20,18 @@ from swh.deposit.config import (
     PRIVATE_PUT_DEPOSIT,
     SE_IRI,
 )
+from swh.deposit.loader import checker
 from swh.deposit.loader.checker import (
     MANDATORY_ARCHIVE_INVALID,
     MANDATORY_ARCHIVE_MISSING,
     MANDATORY_ARCHIVE_UNSUPPORTED,
     DepositChecker,
 )
-from swh.deposit.loader.checks import METADATA_PROVENANCE_KEY, SUGGESTED_FIELDS_MISSING
+from swh.deposit.loader.checks import (
+    METADATA_PROVENANCE_KEY,
+    SUGGESTED_FIELDS_MISSING,
+    check_metadata,
+)
 from swh.deposit.models import Deposit
 from swh.deposit.parsers import parse_xml
 from swh.deposit.tests.common import (
@@ -43,6 +49,13 @@ PRIVATE_PUT_DEPOSIT_NC = PRIVATE_PUT_DEPOSIT + "-nc"
 BASE_URL = "https://deposit.softwareheritage.org"
 
 
+@pytest.fixture(autouse=True)
+def clear_metadata_checks():
+    checker._check_raw_metadata.cache_clear()
+    yield
+    checker._check_raw_metadata.cache_clear()
+
+
 def create_deposit(archive, client, collection_name, atom_dataset):
     """Create a deposit with archive (and metadata) for client in the collection name."""
     # we deposit it
@@ -145,9 +158,12 @@ def deposited_deposit_only_metadata(partial_deposit_only_metadata):
     return partial_deposit_only_metadata
 
 
-def mock_http_requests(deposit, authenticated_client, requests_mock):
+def mock_http_requests(
+    deposit, authenticated_client, requests_mock, check_metadata=True
+):
     """Mock HTTP requests performed by deposit checker with responses
-    of django test client."""
+    of django test client (checking the metadata unless ``check_metadata`` is
+    false, as older servers)."""
     metadata_url = reverse(PRIVATE_GET_DEPOSIT_METADATA_NC, args=[deposit.id])
     upload_urls_url = reverse(PRIVATE_GET_UPLOAD_URLS, args=[deposit.id])
     archive_urls = authenticated_client.get(upload_urls_url).json()
@@ -160,8 +176,15 @@ def mock_http_requests(deposit, authenticated_client, requests_mock):
         )
 
     # mock requests to private deposit API by forwarding authenticated_client responses
-    for url in (metadata_url, upload_urls_url):
-        requests_mock.get(BASE_URL + url, json=authenticated_client.get(url).json())
+    metadata_params = {"check_metadata": "true"} if check_metadata else {}
+    requests_mock.get(
+        BASE_URL + metadata_url,
+        json=authenticated_client.get(metadata_url, metadata_params).json(),
+    )
+    requests_mock.get(
+        BASE_URL + upload_urls_url,
+        json=authenticated_client.get(upload_urls_url).json(),
+    )
 
     def status_update(request, context):
         authenticated_client.put(
@@ -255,10 +278,12 @@ def test_checker_deposit_exception_raised(
     requests_mock,
     mocker,
 ):
+    # checked by the checker
     mock_http_requests(
         deposited_deposit_valid_metadata,
         authenticated_client,
         requests_mock,
+        check_metadata=False,
     )
     mocker.patch("swh.deposit.loader.checker.check_metadata").side_effect = ValueError(
         "Error when checking metadata"
@@ -344,6 +369,7 @@ def test_deposit_invalid_tarball(
     atom_dataset,
     requests_mock,
     deposit_checker,
+    without_archive_inspection,
 ):
     """Deposit with tarball (of 1 tarball) should fail the checks: rejected"""
     deposit = create_deposit_archive_with_archive(
@@ -510,3 +536,63 @@ def test_check_deposit_metadata_ok(
             ]
         },
     }
+
+
+@pytest.mark.parametrize(
+    "server,expected_checks",
+    [
+        # already checked when the metadata was received
+        ("checked", (1, 0)),
+        ("not-checked", (0, 1)),
+        # not returning the checks
+        ("older", (0, 1)),
+    ],
+)
+def test_check_deposit_metadata_checked_once(
+    authenticated_client,
+    ready_deposit_ok,
+    requests_mock,
+    deposit_checker,
+    mocker,
+    server,
+    expected_checks,
+):
+    """The metadata checks made by the server are reused by the checker, and
+    made (once) by the checker itself otherwise, never by the server while the
+    checker reads the metadata"""
+    server_check = mocker.patch.object(
+        metadata_checks, "check_metadata", side_effect=check_metadata
+    )
+    checker_check = mocker.patch.object(
+        checker, "check_metadata", side_effect=check_metadata
+    )
+    if server == "checked":
+        raw_metadata = ready_deposit_ok.depositrequest_set.get(
+            type="metadata"
+        ).raw_metadata
+        metadata_checks.check_raw_metadata(raw_metadata.encode())
+    expected_result = {
+        "status": "eventful",
+        "status_detail": {
+            "metadata": [
+                {
+                    "summary": SUGGESTED_FIELDS_MISSING,
+                    "fields": [METADATA_PROVENANCE_KEY],
+                }
+            ]
+        },
+    }
+
+    for _ in range(2):
+        mock_http_requests(
+            ready_deposit_ok,
+            authenticated_client,
+            requests_mock,
+            check_metadata=server != "older",
+        )
+        actual_result = deposit_checker.check(
+            collection="test", deposit_id=ready_deposit_ok.id
+        )
+        assert actual_result == expected_result
+
+    assert (server_check.call_count, checker_check.call_count) == expected_checks
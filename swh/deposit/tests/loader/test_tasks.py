@@ -1,4 +1,4 @@
-# Copyright (C) 2018-2025  The Software Heritage developers
+# Copyright (C) 2018-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -40,3 +40,20 @@ def test_task_check_failure(
     assert res.successful()
 
     assert res.result == {"status": "failed"}
+
+
+def test_task_collect_orphan_archives(mocker, deposit_config_path):
+    from swh.deposit.gc import CollectStats
+    from swh.deposit.loader.tasks import collect_orphan_archives
+
+    collect = mocker.patch(
+        "swh.deposit.gc.collect_orphan_archives",
+        return_value=CollectStats(scanned=10, orphans=2, removed=1, removed_bytes=42),
+    )
+
+    result = collect_orphan_archives(dry_run=True, grace_period=2)
+
+    assert result["status"] == "eventful"
+    assert result["removed_bytes"] == 42
+    assert collect.call_args.kwargs["dry_run"] is True
+    assert collect.call_args.kwargs["grace_period"].total_seconds() == 2 * 3600
@@ -0,0 +1,146 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import asyncio
+import json
+
+from asgiref.testing import ApplicationCommunicator
+import pytest
+
+from swh.deposit.asgi import DepositASGIHandler, application
+from swh.deposit.config import DEPOSIT_STATUS_DEPOSITED, DEPOSIT_STATUS_LOAD_SUCCESS
+from swh.deposit.models import DEPOSIT_STATUS_DETAIL, DepositRequest
+from swh.deposit.parsers import parse_xml
+from swh.deposit.utils import NAMESPACES
+
+
+def http_scope(method, path, headers):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80),
+    }
+
+
+async def send_request(app, scope, body_chunks):
+    communicator = ApplicationCommunicator(app, scope)
+    for i, chunk in enumerate(body_chunks):
+        await communicator.send_input(
+            {
+                "type": "http.request",
+                "body": chunk,
+                "more_body": i < len(body_chunks) - 1,
+            }
+        )
+        # a slow client
+        await asyncio.sleep(0.01)
+    start = await communicator.receive_output(timeout=10)
+    body = b""
+    while True:
+        message = await communicator.receive_output(timeout=10)
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    await communicator.wait()
+    return start["status"], body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_asgi_post_deposit_binary(
+    authenticated_client, deposit_collection, sample_archive
+):
+    """Archives sent in several chunks through the ASGI application are received
+    as a whole"""
+    data = sample_archive["data"]
+    scope = http_scope(
+        "POST",
+        f"/1/{deposit_collection.name}/",
+        {
+            "Authorization": authenticated_client._credentials["HTTP_AUTHORIZATION"],
+            "Content-Type": "application/zip",
+            "Content-Length": str(len(data)),
+            "Content-MD5": sample_archive["md5sum"],
+            "Content-Disposition": f"attachment; filename={sample_archive['name']}",
+            "Packaging": "http://purl.org/net/sword/package/SimpleZip",
+            "In-Progress": "false",
+            "Slug": "external-id",
+        },
+    )
+    chunks = [data[i : i + 100] for i in range(0, len(data), 100)]
+
+    status, body = asyncio.run(send_request(application, scope, chunks))
+
+    assert status == 201, body
+    response_content = parse_xml(body)
+    assert (
+        response_content.findtext("swh:deposit_status", namespaces=NAMESPACES)
+        == DEPOSIT_STATUS_DEPOSITED
+    )
+    deposit_id = int(response_content.findtext("swh:deposit_id", namespaces=NAMESPACES))
+    deposit_request = DepositRequest.objects.get(deposit=deposit_id)
+    assert deposit_request.archive.read() == data
+
+
+def test_asgi_handler_limits_concurrent_views(mocker):
+    """Views wait for a thread once their request body was received"""
+    running = 0
+    max_running = 0
+
+    async def get_response_async(self, request):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    mocker.patch(
+        "django.core.handlers.asgi.ASGIHandler.get_response_async",
+        get_response_async,
+    )
+
+    async def run():
+        handler = DepositASGIHandler(max_threads=2)
+        await asyncio.gather(*(handler.get_response_async(None) for _ in range(10)))
+
+    asyncio.run(run())
+    assert max_running == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_asgi_state_event_stream(authenticated_client, complete_deposit):
+    """Status events are streamed through the ASGI application"""
+    deposit = complete_deposit
+    scope = http_scope(
+        "GET",
+        f"/1/{deposit.collection.name}/{deposit.id}/status/",
+        {
+            "Authorization": authenticated_client._credentials["HTTP_AUTHORIZATION"],
+            "Accept": "text/event-stream",
+        },
+    )
+
+    status, body = asyncio.run(send_request(application, scope, [b""]))
+
+    assert status == 200, body
+    event, data = body.decode().strip().split("\n")
+    assert event == "event: status"
+    assert json.loads(data[len("data: ") :]) == {
+        "deposit_id": deposit.id,
+        "deposit_status": DEPOSIT_STATUS_LOAD_SUCCESS,
+        "deposit_status_detail": DEPOSIT_STATUS_DETAIL[DEPOSIT_STATUS_LOAD_SUCCESS],
+        "deposit_swh_id": deposit.swhid,
+        "deposit_swh_id_context": deposit.swhid_context,
+        "deposit_external_id": deposit.external_id,
+        "deposit_origin_url": deposit.origin_url,
+    }
@@ -0,0 +1,171 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import asyncio
+import os
+import threading
+
+import httpx
+import pytest
+
+from swh.deposit import client as client_module
+from swh.deposit.async_client import (
+    AsyncPrivateApiDepositClient,
+    AsyncPublicApiDepositClient,
+)
+from swh.deposit.client import MaintenanceError, RetryPolicy
+
+URL = "https://deposit.swh.test/1"
+
+
+def receipt(deposit_id, status="partial"):
+    return (
+        '<entry xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+        f"<sd:deposit_id>{deposit_id}</sd:deposit_id>"
+        f"<sd:deposit_status>{status}</sd:deposit_status>"
+        "</entry>"
+    )
+
+
+def public_client(handler, **kwargs):
+    return AsyncPublicApiDepositClient(
+        URL, auth=("test", "test"), transport=httpx.MockTransport(handler), **kwargs
+    )
+
+
+def test_async_client_concurrent_status_polling():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        assert request.headers["Authorization"].startswith("Basic ")
+        deposit_id = request.url.path.split("/")[-3]
+        return httpx.Response(200, text=receipt(deposit_id))
+
+    async def run():
+        async with public_client(handler) as client:
+            return await asyncio.gather(
+                *(client.deposit_status("test", i) for i in range(20))
+            )
+
+    results = asyncio.run(run())
+    assert [r["deposit_id"] for r in results] == [str(i) for i in range(20)]
+    assert max_in_flight > 1
+
+
+def test_async_client_deposit_create_multipart(tmp_path, mocker):
+    data = bytes(range(256)) * 10
+    archive = os.path.join(tmp_path, "archive.zip")
+    with open(archive, "wb") as f:
+        f.write(data)
+    metadata = os.path.join(tmp_path, "metadata.xml")
+    with open(metadata, "w") as f:
+        f.write("<entry/>")
+    requests = []
+
+    async def handler(request):
+        await request.aread()
+        requests.append(request)
+        return httpx.Response(201, text=receipt(42))
+
+    md5_threads = []
+
+    def file_md5(*args, **kwargs):
+        md5_threads.append(threading.get_ident())
+        return client_file_md5(*args, **kwargs)
+
+    client_file_md5 = client_module.file_md5
+    mocker.patch.object(client_module, "file_md5", side_effect=file_md5)
+
+    async def run():
+        async with public_client(handler) as client:
+            return await client.deposit_create(
+                "test", "external-id", archive=archive, metadata=metadata
+            )
+
+    result = asyncio.run(run())
+    # the archive is hashed outside of the event loop
+    assert md5_threads and threading.get_ident() not in md5_threads
+    assert result["deposit_id"] == "42"
+    (request,) = requests
+    assert request.url == f"{URL}/test/"
+    assert request.headers["Content-Type"].startswith("multipart/form-data")
+    assert request.headers["Content-Length"] == str(len(request.content))
+    assert "Transfer-Encoding" not in request.headers
+    assert request.headers["Idempotency-Key"]
+    assert data in request.content
+
+
+def test_async_client_retries(mocker):
+    sleep = mocker.patch("swh.deposit.async_client.asyncio.sleep")
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "3"}),
+            httpx.Response(200, text=receipt(1)),
+        ]
+    )
+
+    async def run():
+        async with public_client(
+            lambda request: next(responses), retry_policy=RetryPolicy(retries=1)
+        ) as client:
+            return await client.deposit_status("test", 1)
+
+    assert asyncio.run(run())["deposit_status"] == "partial"
+    sleep.assert_called_once_with(3.0)
+
+
+def test_async_client_errors(atom_dataset):
+    error = atom_dataset["error-cli"].format(
+        summary="Maintenance", verboseDescription="Back soon"
+    )
+
+    async def run(status_code):
+        async with public_client(
+            lambda request: httpx.Response(status_code, text=error)
+        ) as client:
+            return await client.deposit_status("test", 1)
+
+    assert asyncio.run(run(404)) == {
+        "summary": "Maintenance",
+        "detail": "",
+        "sword:verboseDescription": "Back soon",
+        "deposit_status": None,
+        "deposit_status_detail": None,
+        "deposit_swh_id": None,
+        "status": 404,
+    }
+    with pytest.raises(MaintenanceError, match="Back soon"):
+        asyncio.run(run(503))
+
+
+def test_async_client_archive_get(tmp_path):
+    data = os.urandom(3 * 1024 * 1024)
+
+    def handler(request):
+        if request.url.path.endswith("/missing/"):
+            return httpx.Response(404)
+        return httpx.Response(200, content=data)
+
+    archive = os.path.join(tmp_path, "archive.tar")
+
+    async def run(url):
+        async with AsyncPrivateApiDepositClient(
+            URL, transport=httpx.MockTransport(handler)
+        ) as client:
+            return await client.archive_get(url, archive)
+
+    assert asyncio.run(run("/test/1/raw/")) == archive
+    with open(archive, "rb") as f:
+        assert f.read() == data
+
+    with pytest.raises(ValueError, match="Problem when retrieving deposit archive"):
+        asyncio.run(run("/test/1/missing/"))
@@ -1,13 +1,23 @@
-# Copyright (C) 2021  The Software Heritage developers
+# Copyright (C) 2021-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
+import time
+
+from django.core.cache import cache
+from django.urls import reverse_lazy as reverse
 import pytest
 from rest_framework.exceptions import AuthenticationFailed
 
-from swh.deposit.auth import KeycloakBasicAuthentication
-from swh.deposit.tests.conftest import TEST_USER
+from swh.deposit import auth
+from swh.deposit.auth import (
+    KeycloakBasicAuthentication,
+    credentials_cache_key,
+    forget_verified_credentials,
+)
+from swh.deposit.config import SD_IRI
+from swh.deposit.tests.conftest import TEST_USER, mock_keycloakopenidconnect
 
 REQUEST_OBJECT = "request-unused"
 PASSWORD = "some-deposit-pass"
@@ -67,3 +77,121 @@ def test_backend_authentication_ok(backend_success, deposit_user):
     assert user1 is not None
 
     assert user0 == user1, "Should have been retrieved from the cache"
+
+
+@pytest.fixture
+def stand_in_user(keycloak_stand_in, deposit_user):
+    keycloak_stand_in.passwords[deposit_user.username] = PASSWORD
+    return deposit_user
+
+
+def _authenticate(username, password=PASSWORD):
+    user, _ = KeycloakBasicAuthentication().authenticate_credentials(
+        username, password, REQUEST_OBJECT
+    )
+    return user
+
+
+def test_backend_authentication_cached(keycloak_stand_in, stand_in_user):
+    """Verified credentials are reused, from the process memory then from the
+    django cache"""
+    user = _authenticate(stand_in_user.username)
+    assert user.has_deposit_permission
+    assert keycloak_stand_in.login.call_count == 1
+
+    assert _authenticate(stand_in_user.username) == user
+    # as in another server process
+    forget_verified_credentials()
+    user = _authenticate(stand_in_user.username)
+    assert user.has_deposit_permission
+    assert keycloak_stand_in.login.call_count == 1
+
+
+def test_backend_authentication_cached_other_password(keycloak_stand_in, stand_in_user):
+    _authenticate(stand_in_user.username)
+
+    with pytest.raises(AuthenticationFailed, match="Invalid user credentials"):
+        _authenticate(stand_in_user.username, "wrong-password")
+    assert keycloak_stand_in.login.call_count == 2
+
+
+def test_backend_authentication_cache_key(stand_in_user):
+    key = credentials_cache_key(stand_in_user.username, PASSWORD)
+    assert PASSWORD not in key
+    assert stand_in_user.username not in key
+    assert key != credentials_cache_key(stand_in_user.username, "other")
+    assert key != credentials_cache_key("other", PASSWORD)
+
+
+def test_backend_authentication_cache_expired(keycloak_stand_in, stand_in_user, mocker):
+    _authenticate(stand_in_user.username)
+
+    later = time.time() + auth.CREDENTIALS_CACHE_TIMEOUT + 1
+    mocker.patch.object(auth.time, "time", return_value=later)
+    _authenticate(stand_in_user.username)
+    assert keycloak_stand_in.login.call_count == 2
+
+
+def test_backend_authentication_cache_token_expiry(
+    keycloak_stand_in, stand_in_user, mocker
+):
+    """Credentials are not reused after the access token expires"""
+    keycloak_stand_in.exp = int(time.time()) + 10
+    _authenticate(stand_in_user.username)
+    (credentials,) = auth._local_credentials.values()
+    assert credentials.expires_at == keycloak_stand_in.exp
+
+    mocker.patch.object(auth.time, "time", return_value=keycloak_stand_in.exp)
+    _authenticate(stand_in_user.username)
+    assert keycloak_stand_in.login.call_count == 2
+
+
+def test_backend_authentication_local_cache_size(
+    keycloak_stand_in, stand_in_user, mocker
+):
+    mocker.patch.object(auth, "LOCAL_CREDENTIALS_CACHE_SIZE", 2)
+    passwords = ["pass-1", "pass-2", "pass-3"]
+    for password in passwords:
+        keycloak_stand_in.passwords[stand_in_user.username] = password
+        _authenticate(stand_in_user.username, password)
+
+    assert list(auth._local_credentials) == [
+        credentials_cache_key(stand_in_user.username, password)
+        for password in passwords[1:]
+    ]
+
+
+def test_backend_authentication_cache_unavailable(
+    keycloak_stand_in, stand_in_user, mocker
+):
+    mocker.patch.object(cache, "get", side_effect=ConnectionError("down"))
+    mocker.patch.object(cache, "set", side_effect=ConnectionError("down"))
+
+    _authenticate(stand_in_user.username)
+    _authenticate(stand_in_user.username)
+    forget_verified_credentials()
+    _authenticate(stand_in_user.username)
+    assert keycloak_stand_in.login.call_count == 2
+
+
+def test_backend_authentication_cached_permissions(
+    mocker, keycloak_stand_in, stand_in_user, anonymous_client
+):
+    """Permissions are cached with the credentials"""
+    keycloak_stand_in.client_permissions = []
+    mock_keycloakopenidconnect(mocker, keycloak_stand_in)
+    anonymous_client.credentials(
+        HTTP_AUTHORIZATION=_basic_authorization(stand_in_user.username, PASSWORD)
+    )
+
+    for _ in range(2):
+        response = anonymous_client.get(reverse(SD_IRI))
+        assert response.status_code == 403
+    assert keycloak_stand_in.login.call_count == 1
+
+
+def _basic_authorization(username, password):
+    import base64
+
+    token = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return f"Basic {token}"
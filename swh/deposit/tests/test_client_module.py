@@ -1,4 +1,4 @@
-# Copyright (C) 2021  The Software Heritage developers
+# Copyright (C) 2021-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -8,14 +8,27 @@
 # they are BaseDepositClient subclasses. We could have used other classes but those ones
 # got elected as they are fairly simple ones.
 
+import datetime
+import hashlib
+import io
+import os
+from urllib.parse import quote
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler
+from django.http.multipartparser import MultiPartParser
 import pytest
 
+from swh.deposit import client as client_module
 from swh.deposit.client import (
+    DIRECT_UPLOAD_TIMEOUT,
     CollectionListDepositClient,
     MaintenanceError,
     PublicApiDepositClient,
+    RetryPolicy,
     ServiceDocumentDepositClient,
     StatusDepositClient,
+    StreamingBody,
+    file_md5,
 )
 from swh.deposit.utils import to_header_link
 
@@ -101,6 +114,185 @@ def test_client_read_data_status_error_503(requests_mock, atom_dataset):
         client.execute(collection, deposit_id)
 
 
+STATUS_PARTIAL = (
+    '<entry xmlns="http://www.w3.org/2005/Atom" '
+    'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+    "<sd:deposit_id>1</sd:deposit_id>"
+    "<sd:deposit_status>partial</sd:deposit_status>"
+    "</entry>"
+)
+
+
+def test_client_retry_policy_delay():
+    policy = RetryPolicy(retries=5, backoff_factor=0.5, max_backoff=3)
+    assert [policy.delay(attempt) for attempt in range(1, 6)] == [0.5, 1, 2, 3, 3]
+    assert policy.delay(1, retry_after="10") == 10
+    # HTTP dates are not supported
+    assert policy.delay(2, retry_after="Wed, 21 Oct 2015 07:28:00 GMT") == 1
+
+
+def test_client_retries_overloaded_server(requests_mock, atom_dataset, mocker):
+    sleep = mocker.patch("swh.deposit.client.time.sleep")
+    error_content = atom_dataset["error-cli"].format(
+        summary="Maintenance", verboseDescription="Back soon"
+    )
+    url = "https://deposit.swh.test/1"
+    requests_mock.get(
+        f"{url}/test/1/status/",
+        [
+            {"status_code": 429, "headers": {"Retry-After": "7"}},
+            {"status_code": 503, "text": error_content},
+            {"status_code": 200, "text": STATUS_PARTIAL},
+        ],
+    )
+
+    client = StatusDepositClient(
+        url=url, auth=("test", "test"), retry_policy=RetryPolicy(retries=2)
+    )
+    result = client.execute("test", 1)
+
+    assert result["deposit_status"] == "partial"
+    assert requests_mock.call_count == 3
+    assert [call.args for call in sleep.call_args_list] == [(7.0,), (2.0,)]
+
+    # the maintenance error is raised once the retries are exhausted
+    requests_mock.get(f"{url}/test/1/status/", status_code=503, text=error_content)
+    with pytest.raises(MaintenanceError, match="Back soon"):
+        client.execute("test", 1)
+    assert requests_mock.call_count == 6
+
+
+def test_client_deposit_status_wait(requests_mock):
+    """The server is asked to answer once the status changed"""
+    url = "https://deposit.swh.test/1"
+    requests_mock.get(f"{url}/test/1/status/", text=STATUS_PARTIAL)
+    client = PublicApiDepositClient(url=url, auth=("test", "test"))
+
+    client.deposit_status("test", 1)
+    assert requests_mock.last_request.qs == {}
+
+    result = client.deposit_status("test", 1, wait=30, since_status="deposited")
+    assert result["deposit_status"] == "partial"
+    assert requests_mock.last_request.qs == {
+        "wait": ["30"],
+        "since_status": ["deposited"],
+    }
+
+
+def test_client_shared_session(requests_mock, tmp_path, mocker):
+    """The sub-clients of the public api client share its session, and so its
+    connections to the server"""
+    url = "https://deposit.swh.test/1"
+    client = PublicApiDepositClient(
+        url=url, auth=("test", "test"), retry_policy=RetryPolicy(retries=1)
+    )
+    sub_client = client.client(StatusDepositClient)
+    assert sub_client.session is client.session
+    assert sub_client.retry_policy == client.retry_policy
+    assert client.session.get_adapter(url)._pool_maxsize == 10
+
+    requests_mock.get(f"{url}/test/1/status/", text=STATUS_PARTIAL)
+    requests_mock.post(f"{url}/test/1/metadata/", status_code=201, text="<entry/>")
+    metadata = os.path.join(tmp_path, "metadata.xml")
+    with open(metadata, "w") as f:
+        f.write("<entry/>")
+    request = mocker.spy(client.session, "request")
+    result = client.deposit_update("test", 1, None, metadata=metadata)
+
+    assert result["deposit_status"] == "partial"
+    assert [call.args[0] for call in request.call_args_list] == ["get", "post", "get"]
+
+
+def _statuses_feed(*deposits):
+    entries = "".join(
+        "<entry>"
+        f"<sd:deposit_id>{id_}</sd:deposit_id>"
+        f"<sd:deposit_status>{status}</sd:deposit_status>"
+        f"<sd:deposit_update_date>{date}</sd:deposit_update_date>"
+        "</entry>"
+        for (id_, status, date) in deposits
+    )
+    return (
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+        f"<sd:count>{len(deposits)}</sd:count>{entries}</feed>"
+    )
+
+
+def test_client_deposit_statuses_by_ids(requests_mock, mocker):
+    """Deposit ids are sent in batches"""
+    mocker.patch.object(client_module, "STATUSES_BATCH_SIZE", 2)
+    url = "https://deposit.swh.test/1"
+    date = "2026-01-01T00:00:00+00:00"
+    requests_mock.get(
+        f"{url}/test/status/?ids=1,2",
+        text=_statuses_feed((1, "done", date), (2, "partial", date)),
+    )
+    requests_mock.get(
+        f"{url}/test/status/?ids=3", text=_statuses_feed((3, "rejected", date))
+    )
+    client = PublicApiDepositClient(url=url, auth=("test", "test"))
+
+    result = client.deposit_statuses("test", deposit_ids=[1, 2, 3])
+
+    assert [
+        (deposit["deposit_id"], deposit["deposit_status"])
+        for deposit in result["deposits"]
+    ] == [("1", "done"), ("2", "partial"), ("3", "rejected")]
+    assert result["deposits"][0]["deposit_swh_id"] is None
+    assert requests_mock.call_count == 2
+
+
+def test_client_deposit_statuses_since(requests_mock):
+    """The deposits modified since the date are retrieved by following the next
+    links"""
+    url = "https://deposit.swh.test/1"
+    date = "2026-01-01T00:00:00+00:00"
+    requests_mock.get(
+        f"{url}/test/status/?since={quote(date)}",
+        text=_statuses_feed((1, "done", date), (2, "partial", date)),
+        headers={"Link": f'<{url}/test/status/?cursor=Y3Vyc29yMQ>; rel="next"'},
+    )
+    requests_mock.get(
+        f"{url}/test/status/?cursor=Y3Vyc29yMQ",
+        text=_statuses_feed((3, "deposited", date), (4, "partial", date)),
+        headers={"Link": f'<{url}/test/status/?cursor=Y3Vyc29yMg>; rel="next"'},
+    )
+    requests_mock.get(
+        f"{url}/test/status/?cursor=Y3Vyc29yMg",
+        text=_statuses_feed((5, "rejected", date)),
+    )
+    client = PublicApiDepositClient(url=url, auth=("test", "test"))
+
+    result = client.deposit_statuses(
+        "test", since=datetime.datetime.fromisoformat(date)
+    )
+
+    assert [
+        (deposit["deposit_id"], deposit["deposit_status"])
+        for deposit in result["deposits"]
+    ] == [
+        ("1", "done"),
+        ("2", "partial"),
+        ("3", "deposited"),
+        ("4", "partial"),
+        ("5", "rejected"),
+    ]
+    assert requests_mock.call_count == 3
+
+
+def test_client_deposit_statuses_error(requests_mock):
+    url = "https://deposit.swh.test/1"
+    requests_mock.get(f"{url}/test/status/", status_code=403, text="<error/>")
+    client = PublicApiDepositClient(url=url, auth=("test", "test"))
+
+    result = client.deposit_statuses("test", deposit_ids=[1])
+
+    assert result["status"] == 403
+    with pytest.raises(ValueError):
+        client.deposit_statuses("test")
+
+
 EXPECTED_DEPOSIT = {
     "id": "1031",
     "external_id": "check-deposit-2020-10-09T13:10:00.000000",
@@ -219,3 +411,285 @@ def test_client_collection_list_with_pagination_headers(requests_mock, atom_data
     assert requests_mock.called
     request_history = [m.url for m in requests_mock.request_history]
     assert request_history == [url_page1, url_page2] * 2
+
+
+def test_client_file_md5(tmp_path, mocker):
+    """Files are hashed in blocks, possibly only a range of their bytes"""
+    mocker.patch("swh.deposit.client.HASH_BLOCK_SIZE", 7)
+    data = bytes(range(256)) * 3
+    path = os.path.join(tmp_path, "archive.zip")
+    with open(path, "wb") as f:
+        f.write(data)
+
+    assert file_md5(path).hexdigest() == hashlib.md5(data).hexdigest()
+    assert file_md5(path, 10, 100).hexdigest() == hashlib.md5(data[10:100]).hexdigest()
+    md5 = file_md5(path, 0, 100)
+    assert file_md5(path, 100, md5=md5) is md5
+    assert md5.hexdigest() == hashlib.md5(data).hexdigest()
+
+
+def test_client_streaming_body_multipart(tmp_path):
+    """Multipart bodies are read one block at a time, and parsed by the server"""
+    archive_data = bytes(range(256)) * 40
+    archive = os.path.join(tmp_path, "archive.zip")
+    with open(archive, "wb") as f:
+        f.write(archive_data)
+    metadata = os.path.join(tmp_path, "metadata.xml")
+    with open(metadata, "wb") as f:
+        f.write(b"<entry/>")
+
+    progress = []
+    body = StreamingBody.multipart(
+        [
+            ("file", ("archive.zip", archive, "application/zip")),
+            ("atom", ("metadata.xml", metadata, "application/atom+xml")),
+        ],
+        progress=lambda sent, total: progress.append((sent, total)),
+    )
+    blocks = list(iter(lambda: body.read(1000), b""))
+    data = b"".join(blocks)
+    body.close()
+
+    assert len(data) == len(body)
+    assert max(len(block) for block in blocks) <= 1000
+    assert progress[-1] == (len(body), len(body))
+    assert [sent for sent, _ in progress] == sorted({sent for sent, _ in progress})
+
+    _, files = MultiPartParser(
+        {"CONTENT_TYPE": body.content_type, "CONTENT_LENGTH": len(data)},
+        io.BytesIO(data),
+        [MemoryFileUploadHandler()],
+    ).parse()
+    assert files["file"].name == "archive.zip"
+    assert files["file"].content_type == "application/zip"
+    assert files["file"].read() == archive_data
+    assert files["atom"].read() == b"<entry/>"
+
+
+def test_client_deposit_create_streams_archive(requests_mock, tmp_path):
+    """Archives are streamed with their length, and their upload is reported"""
+    base_url = "https://deposit.swh.test/1"
+    data = bytes(range(256)) * 100
+    archive = os.path.join(tmp_path, "archive.zip")
+    with open(archive, "wb") as f:
+        f.write(data)
+    received = []
+
+    def receipt(request, context):
+        received.append(request.body.read())
+        return (
+            '<entry xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+            "<sd:deposit_id>42</sd:deposit_id>"
+            "</entry>"
+        )
+
+    create = requests_mock.post(f"{base_url}/test/", status_code=201, text=receipt)
+    progress = []
+    client = PublicApiDepositClient(url=base_url, auth=("test", "test"))
+    result = client.deposit_create(
+        "test",
+        "external-id",
+        archive=archive,
+        progress=lambda sent, total: progress.append((sent, total)),
+    )
+
+    assert result["deposit_id"] == "42"
+    assert received == [data]
+    assert create.last_request.headers["Content-Length"] == str(len(data))
+    assert progress[-1] == (len(data), len(data))
+
+
+def test_client_deposit_upload_resumable(requests_mock, tmp_path, mocker):
+    """Archives are sent in chunks to an upload session, and the upload resumes
+    from the server's offset after a failure"""
+    mocker.patch("swh.deposit.client.time.sleep")
+    base_url = "https://deposit.swh.test/1"
+    session_url = f"{base_url}/test/42/media/upload/1/"
+    data = bytes(range(256)) * 10
+    archive = os.path.join(tmp_path, "archive.zip")
+    with open(archive, "wb") as f:
+        f.write(data)
+
+    received = bytearray()
+    failures = iter([False, True, False])
+
+    def receipt(request, context):
+        context.headers["Location"] = session_url
+        return (
+            '<entry xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+            "<sd:deposit_id>42</sd:deposit_id>"
+            "<sd:deposit_status>partial</sd:deposit_status>"
+            f"<sd:upload_session>{session_url}</sd:upload_session>"
+            "</entry>"
+        )
+
+    def session_status(request, context):
+        return (
+            '<entry xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+            f"<sd:upload_offset>{len(received)}</sd:upload_offset>"
+            f"<sd:upload_length>{len(data)}</sd:upload_length>"
+            "</entry>"
+        )
+
+    def patch_chunk(request, context):
+        start = int(request.headers["Content-Range"].split()[1].split("-")[0])
+        assert start == len(received)
+        received.extend(request.body)
+        if next(failures, False):
+            # the chunk was stored but the connection dropped before the response
+            context.status_code = 502
+            return ""
+        context.status_code = 204
+        return ""
+
+    requests_mock.post(f"{base_url}/test/", status_code=201, text=receipt)
+    requests_mock.get(session_url, status_code=200, text=session_status)
+    requests_mock.patch(session_url, text=patch_chunk)
+    commit = requests_mock.post(session_url, status_code=201, text=receipt)
+
+    client = PublicApiDepositClient(url=base_url, auth=("test", "test"))
+    result = client.deposit_upload_resumable(
+        "test", archive, slug="external-id", chunk_size=1000
+    )
+
+    assert result["deposit_id"] == "42"
+    assert bytes(received) == data
+    create_request = requests_mock.request_history[0]
+    assert create_request.headers["Upload-Length"] == str(len(data))
+    assert create_request.headers["Slug"] == "external-id"
+    assert commit.last_request.headers["Content-MD5"] == hashlib.md5(data).hexdigest()
+    assert [r.method for r in requests_mock.request_history] == [
+        "POST",
+        "GET",
+        "PATCH",
+        "PATCH",
+        "GET",
+        "PATCH",
+        "POST",
+    ]
+
+
+def test_client_deposit_create_idempotency_key(requests_mock, tmp_path):
+    """Deposit creations are sent with an idempotency key, generated if the caller
+    does not provide one"""
+    base_url = "https://deposit.swh.test/1"
+    archive = os.path.join(tmp_path, "archive.zip")
+    with open(archive, "wb") as f:
+        f.write(b"archive")
+    create = requests_mock.post(
+        f"{base_url}/test/",
+        status_code=201,
+        text=(
+            '<entry xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+            "<sd:deposit_id>42</sd:deposit_id>"
+            "</entry>"
+        ),
+    )
+
+    client = PublicApiDepositClient(url=base_url, auth=("test", "test"))
+    client.deposit_create("test", "external-id", archive=archive)
+    client.deposit_create("test", "external-id", archive=archive)
+    first_key, second_key = [
+        request.headers["Idempotency-Key"] for request in create.request_history
+    ]
+    assert first_key and second_key and first_key != second_key
+
+    client.deposit_create(
+        "test", "external-id", archive=archive, idempotency_key=first_key
+    )
+    assert create.last_request.headers["Idempotency-Key"] == first_key
+
+
+def test_client_deposit_upload_resumable_gives_up(requests_mock, tmp_path, mocker):
+    mocker.patch("swh.deposit.client.time.sleep")
+    base_url = "https://deposit.swh.test/1"
+    session_url = f"{base_url}/test/42/media/upload/1/"
+    archive = os.path.join(tmp_path, "archive.zip")
+    with open(archive, "wb") as f:
+        f.write(b"0" * 10)
+
+    requests_mock.get(session_url, status_code=502)
+
+    client = PublicApiDepositClient(url=base_url, auth=("test", "test"))
+    result = client.deposit_upload_resumable(
+        "test", archive, upload_session=session_url, max_retries=2
+    )
+
+    assert result["status"] == 502
+    assert result["upload_session"] == session_url
+    assert len(requests_mock.request_history) == 3
+
+
+def test_client_deposit_upload_direct(requests_mock, tmp_path):
+    """Archives of direct upload sessions are sent to the pre-signed url, without
+    the deposit credentials"""
+    base_url = "https://deposit.swh.test/1"
+    session_url = f"{base_url}/test/42/media/upload/1/"
+    upload_url = "https://storage.swh.test/deposits/archive.zip?sig=signature"
+    data = b"0" * 10
+    archive = os.path.join(tmp_path, "archive.zip")
+    with open(archive, "wb") as f:
+        f.write(data)
+
+    receipt = (
+        '<entry xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+        "<sd:deposit_id>42</sd:deposit_id>"
+        "<sd:deposit_status>deposited</sd:deposit_status>"
+        f"<sd:upload_session>{session_url}</sd:upload_session>"
+        f"<sd:upload_url>{upload_url}</sd:upload_url>"
+        "</entry>"
+    )
+    received = bytearray()
+
+    def upload_archive(request, context):
+        received.extend(request.body.read())
+        return ""
+
+    create = requests_mock.post(f"{base_url}/test/", status_code=201, text=receipt)
+    upload = requests_mock.put(upload_url, status_code=201, text=upload_archive)
+    commit = requests_mock.post(session_url, status_code=201, text=receipt)
+
+    client = PublicApiDepositClient(url=base_url, auth=("test", "test"))
+    result = client.deposit_upload_direct("test", archive)
+
+    assert result["deposit_id"] == "42"
+    assert create.last_request.headers["Upload-Mode"] == "direct"
+    assert bytes(received) == data
+    assert "Authorization" not in upload.last_request.headers
+    assert upload.last_request.timeout == DIRECT_UPLOAD_TIMEOUT
+    assert commit.last_request.headers["Content-MD5"] == hashlib.md5(data).hexdigest()
+
+
+def test_client_deposit_upload_direct_failure(requests_mock, tmp_path):
+    base_url = "https://deposit.swh.test/1"
+    session_url = f"{base_url}/test/42/media/upload/1/"
+    upload_url = "https://storage.swh.test/deposits/archive.zip?sig=signature"
+    archive = os.path.join(tmp_path, "archive.zip")
+    with open(archive, "wb") as f:
+        f.write(b"0" * 10)
+
+    requests_mock.post(
+        f"{base_url}/test/",
+        status_code=201,
+        text=(
+            '<entry xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:sd="https://www.softwareheritage.org/schema/2018/deposit">'
+            "<sd:deposit_id>42</sd:deposit_id>"
+            f"<sd:upload_session>{session_url}</sd:upload_session>"
+            f"<sd:upload_url>{upload_url}</sd:upload_url>"
+            "</entry>"
+        ),
+    )
+    requests_mock.put(upload_url, status_code=403)
+
+    client = PublicApiDepositClient(url=base_url, auth=("test", "test"))
+    result = client.deposit_upload_direct("test", archive)
+
+    assert result["status"] == 403
+    assert result["upload_session"] == session_url
+    assert len(requests_mock.request_history) == 2
@@ -1,13 +1,16 @@
-# Copyright (C) 2022  The Software Heritage developers
+# Copyright (C) 2022-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
 
 import os
 
+from django.urls import reverse_lazy as reverse
 import pytest
+import yaml
 
-from swh.deposit.config import setup_django_for
+from swh.deposit import config
+from swh.deposit.config import SD_IRI, APIConfig, get_api_clients, setup_django_for
 
 
 def test_setup_django_for_raise_unknown_platform():
@@ -36,3 +39,45 @@ def test_setup_django_for_ok_set_django_settings_module(
 def test_setup_django_for_ok(deposit_config_path):
     """Everything is fine, moving along (fixture sets environment appropriately)"""
     setup_django_for()
+
+
+def test_api_config_shared_clients(authenticated_client, mocker):
+    """Configuration and clients are loaded once for all the views of the process"""
+    clients = get_api_clients()
+    load_from_envvar = mocker.spy(config.config, "load_from_envvar")
+
+    for _ in range(3):
+        response = authenticated_client.get(reverse(SD_IRI))
+        assert response.status_code == 200
+
+    api_config = APIConfig()
+    assert api_config.config is clients.config
+    assert api_config.scheduler is clients.scheduler
+    assert api_config.storage is clients.storage
+    # same configuration, same client
+    assert api_config.storage_metadata is clients.storage
+    load_from_envvar.assert_not_called()
+
+
+def test_api_config_reloaded_on_change(deposit_config_path, deposit_config):
+    clients = get_api_clients()
+    assert get_api_clients() is clients
+
+    with open(deposit_config_path, "w") as f:
+        f.write(yaml.dump({**deposit_config, "max_upload_size": 42}))
+
+    new_clients = get_api_clients()
+    assert new_clients is not clients
+    assert new_clients.config["max_upload_size"] == 42
+    assert APIConfig().config["max_upload_size"] == 42
+
+
+def test_api_config_forgotten_after_fork():
+    clients = get_api_clients()
+    pid = os.fork()
+    if pid == 0:
+        # in the child process
+        os._exit(0 if get_api_clients() is not clients else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert get_api_clients() is clients
@@ -0,0 +1,102 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import datetime
+import os
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+import pytest
+
+from swh.deposit import gc
+from swh.deposit.gc import collect_orphan_archives, iter_archive_files
+from swh.deposit.models import DepositRequest, UploadSession
+
+LIVE = "archives/00/11/live.zip"
+ORPHAN = "client_1/20260101-000000.000000/orphan.zip"
+RECENT_ORPHAN = "archives/22/33/recent.tar"
+DIRECT_UPLOAD = "client_1/20260101-000000.000000/direct.zip"
+CHUNK = "upload_sessions/1/00000000000000000000"
+
+
+@pytest.fixture
+def archive_storage(tmp_path, partial_deposit):
+    storage = FileSystemStorage(location=os.path.join(tmp_path, "archives"))
+    a_week_ago = time.time() - 7 * 24 * 3600
+    for name in [LIVE, ORPHAN, RECENT_ORPHAN, DIRECT_UPLOAD, CHUNK]:
+        storage.save(name, ContentFile(b"0" * 10))
+        if name != RECENT_ORPHAN:
+            os.utime(storage.path(name), (a_week_ago, a_week_ago))
+
+    DepositRequest.objects.create(deposit=partial_deposit, type="archive", archive=LIVE)
+    UploadSession.objects.create(
+        deposit=partial_deposit,
+        filename="direct.zip",
+        content_type="application/zip",
+        length=10,
+        archive_name=DIRECT_UPLOAD,
+    )
+    return storage
+
+
+def test_iter_archive_files(archive_storage):
+    assert set(iter_archive_files(archive_storage)) == {
+        LIVE,
+        ORPHAN,
+        RECENT_ORPHAN,
+        DIRECT_UPLOAD,
+    }
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 1000])
+def test_collect_orphan_archives(archive_storage, batch_size):
+    progress = []
+    stats = collect_orphan_archives(
+        archive_storage, batch_size=batch_size, progress=progress.append
+    )
+
+    assert not archive_storage.exists(ORPHAN)
+    for name in [LIVE, RECENT_ORPHAN, DIRECT_UPLOAD, CHUNK]:
+        assert archive_storage.exists(name)
+
+    assert stats.removed == 1
+    assert stats.removed_bytes == 10
+    assert stats.recent == 1
+    assert stats.scanned == 4
+    assert progress and progress[-1] is stats
+
+
+def test_collect_orphan_archives_dry_run(archive_storage):
+    stats = collect_orphan_archives(archive_storage, dry_run=True)
+
+    assert stats.removed == 1
+    assert archive_storage.exists(ORPHAN)
+
+
+def test_collect_orphan_archives_grace_period(archive_storage):
+    stats = collect_orphan_archives(archive_storage, grace_period=datetime.timedelta(0))
+
+    assert stats.removed == 2
+    assert not archive_storage.exists(RECENT_ORPHAN)
+    assert archive_storage.exists(LIVE)
+
+
+def test_collect_orphan_archives_rewritten_while_checked(archive_storage, mocker):
+    """An orphan archive rewritten by an upload after its batch was checked, but
+    not referenced yet, is kept"""
+    live_names = gc._live_names
+
+    def _live_names(names):
+        if names == [ORPHAN]:
+            os.utime(archive_storage.path(ORPHAN))
+        return live_names(names)
+
+    mocker.patch.object(gc, "_live_names", side_effect=_live_names)
+    stats = collect_orphan_archives(archive_storage)
+
+    assert stats.removed == 0
+    assert stats.recent == 2
+    assert archive_storage.exists(ORPHAN)
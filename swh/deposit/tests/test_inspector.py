@@ -0,0 +1,127 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import io
+import random
+import tarfile
+import zipfile
+
+import pytest
+
+from swh.deposit.errors import BAD_REQUEST, ERROR_CONTENT, DepositError
+from swh.deposit.inspector import ArchiveInspectionUploadHandler, ArchiveInspector
+
+# incompressible content, the same for every run (and pytest-xdist worker)
+RANDOM_CONTENT = random.Random(0).randbytes(5000)
+
+
+def _zip(files):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in files.items():
+            zip_file.writestr(name, content)
+    return archive.getvalue()
+
+
+def _tar(files, mode="w"):
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode=mode) as tar_file:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar_file.addfile(info, io.BytesIO(content))
+    return archive.getvalue()
+
+
+ARCHIVERS = {
+    "zip": _zip,
+    "tar": _tar,
+    "tar.gz": lambda files: _tar(files, "w:gz"),
+    "tar.bz2": lambda files: _tar(files, "w:bz2"),
+    "tar.xz": lambda files: _tar(files, "w:xz"),
+}
+
+
+def _inspect(data, chunk_size=1024):
+    inspector = ArchiveInspector()
+    for start in range(0, len(data), chunk_size):
+        inspector.feed(data[start : start + chunk_size])
+    inspector.close()
+    return inspector
+
+
+@pytest.mark.parametrize("archiver", ARCHIVERS.values(), ids=ARCHIVERS.keys())
+@pytest.mark.parametrize("chunk_size", [1, 100, 1024 * 1024])
+def test_inspector_archives(archiver, chunk_size):
+    data = archiver({"README": b"readme", "src/main.c": RANDOM_CONTENT})
+    inspector = _inspect(data, chunk_size)
+    assert inspector.names == ["README", "src/main.c"]
+
+
+@pytest.mark.parametrize("archiver", ARCHIVERS.values(), ids=ARCHIVERS.keys())
+def test_inspector_single_file(archiver):
+    data = archiver({"main.c": b"int main() {}"})
+    assert _inspect(data).names == ["main.c"]
+
+
+@pytest.mark.parametrize("archiver", ARCHIVERS.values(), ids=ARCHIVERS.keys())
+def test_inspector_archive_in_archive(archiver):
+    data = archiver({"inner.tar.gz": _tar({"main.c": b""}, "w:gz")})
+    with pytest.raises(DepositError) as e:
+        _inspect(data)
+    assert e.value.key == BAD_REQUEST
+
+
+def test_inspector_long_names():
+    name = "a/" * 100 + "inner.zip"
+    for format in (tarfile.GNU_FORMAT, tarfile.PAX_FORMAT):
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w", format=format) as tar_file:
+            info = tarfile.TarInfo(name)
+            info.size = 3
+            tar_file.addfile(info, io.BytesIO(b"zip"))
+        with pytest.raises(DepositError):
+            _inspect(archive.getvalue(), chunk_size=7)
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b"foo", bytes(range(256)) * 40], ids=["empty", "text", "binary"]
+)
+def test_inspector_not_an_archive(data):
+    with pytest.raises(DepositError) as e:
+        _inspect(data)
+    assert e.value.key == ERROR_CONTENT
+
+
+def test_inspector_stops_after_two_entries():
+    data = _tar({"a": b"a", "b": b"b", "c": b"c"})
+    inspector = ArchiveInspector()
+    for start in range(0, 4 * 512, 512):
+        inspector.feed(data[start : start + 512])
+    assert inspector.done
+    assert inspector.names == ["a", "b"]
+    # the rest of the archive is not inspected anymore
+    inspector.feed(b"garbage")
+    inspector.close()
+
+
+def test_inspector_truncated_archive():
+    """Archives which cannot be parsed are left to the deposit checker"""
+    data = _zip({"inner.zip": RANDOM_CONTENT})
+    _inspect(data[:1000])
+
+
+def test_inspection_upload_handler():
+    data = _zip({"inner.zip": b"zip"})
+    handler = ArchiveInspectionUploadHandler()
+    handler.new_file("file", "archive.zip", "application/zip", len(data))
+    assert handler.receive_data_chunk(data, 0) == data
+    with pytest.raises(DepositError):
+        handler.file_complete(len(data))
+
+    # other files are not inspected
+    handler.new_file("atom", "metadata.xml", "application/atom+xml", 3)
+    assert handler.receive_data_chunk(b"foo", 0) == b"foo"
+    assert handler.file_complete(3) is None
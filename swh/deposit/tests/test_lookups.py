@@ -0,0 +1,53 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.core.cache import cache
+import pytest
+
+from swh.deposit.lookups import get_client_by_username, get_collection_by_name
+from swh.deposit.models import DepositClient, DepositCollection
+
+
+def test_lookups_cached(deposit_user, deposit_collection, django_assert_num_queries):
+    with django_assert_num_queries(2):
+        client = get_client_by_username(deposit_user.username)
+        collection = get_collection_by_name(deposit_collection.name)
+
+    with django_assert_num_queries(0):
+        assert get_client_by_username(deposit_user.username) == client
+        assert get_collection_by_name(deposit_collection.name) == collection
+
+    assert client.collections == deposit_user.collections
+    assert collection.name == deposit_collection.name
+
+
+def test_lookups_forgotten_on_change(deposit_user, deposit_collection):
+    get_client_by_username(deposit_user.username)
+    get_collection_by_name(deposit_collection.name)
+
+    deposit_user.provider_url = "https://example.org/"
+    deposit_user.save()
+    assert get_client_by_username(deposit_user.username).provider_url == (
+        "https://example.org/"
+    )
+
+    deposit_collection.delete()
+    with pytest.raises(DepositCollection.DoesNotExist):
+        get_collection_by_name(deposit_collection.name)
+
+
+def test_lookups_unknown(deposit_user):
+    with pytest.raises(DepositClient.DoesNotExist):
+        get_client_by_username("unknown")
+    DepositClient.objects.filter(pk=deposit_user.pk).update(username="unknown")
+    assert get_client_by_username("unknown").id == deposit_user.id
+
+
+def test_lookups_cache_unavailable(deposit_user, mocker):
+    mocker.patch.object(cache, "get", side_effect=ConnectionError("down"))
+    mocker.patch.object(cache, "delete", side_effect=ConnectionError("down"))
+
+    assert get_client_by_username(deposit_user.username).id == deposit_user.id
+    deposit_user.save()
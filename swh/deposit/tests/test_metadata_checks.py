@@ -0,0 +1,97 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+from django.core.cache import cache
+from django.urls import reverse_lazy as reverse
+import pytest
+from rest_framework import status
+
+from swh.deposit import metadata_checks
+from swh.deposit.config import COL_IRI
+from swh.deposit.loader import checks
+from swh.deposit.loader.checks import check_metadata
+from swh.deposit.metadata_checks import (
+    cached_metadata_check,
+    check_raw_metadata,
+    metadata_check_key,
+)
+from swh.deposit.parsers import parse_xml
+from swh.deposit.tests.common import post_atom
+from swh.model.model import Origin
+
+
+@pytest.fixture
+def deposit_config(deposit_config):
+    return {**deposit_config, "metadata_validation_engine": "lxml"}
+
+
+@pytest.fixture
+def check_metadata_spy(mocker):
+    return mocker.patch.object(
+        metadata_checks, "check_metadata", side_effect=check_metadata
+    )
+
+
+def test_check_raw_metadata_memoized(atom_dataset, check_metadata_spy):
+    valid = atom_dataset["entry-data-with-metadata-provenance"].encode()
+    invalid = atom_dataset["entry-data-fail-metadata-functional-checks"].encode()
+
+    for _ in range(3):
+        assert check_raw_metadata(valid) == (True, None)
+        metadata_ok, details = check_raw_metadata(invalid, parse_xml(invalid))
+        assert metadata_ok is False
+        assert details == check_metadata(parse_xml(invalid))[1]
+
+    assert check_metadata_spy.call_count == 2
+
+
+def test_check_raw_metadata_checks_changed(atom_dataset, monkeypatch):
+    raw_metadata = atom_dataset["entry-data-with-metadata-provenance"].encode()
+    key = metadata_check_key(raw_metadata)
+
+    monkeypatch.setattr(checks, "CHECKS_VERSION", checks.CHECKS_VERSION + 1)
+    checks.checks_version.cache_clear()
+    try:
+        assert metadata_check_key(raw_metadata) != key
+    finally:
+        monkeypatch.undo()
+        checks.checks_version.cache_clear()
+    assert metadata_check_key(raw_metadata) == key
+
+
+def test_check_raw_metadata_cache_unavailable(atom_dataset, check_metadata_spy, mocker):
+    raw_metadata = atom_dataset["entry-data-with-metadata-provenance"].encode()
+    mocker.patch.object(cache, "get", side_effect=ConnectionError("down"))
+    mocker.patch.object(cache, "set", side_effect=ConnectionError("down"))
+
+    assert check_raw_metadata(raw_metadata) == (True, None)
+    assert check_raw_metadata(raw_metadata) == (True, None)
+    assert check_metadata_spy.call_count == 2
+
+
+def test_check_raw_metadata_configured_engine(
+    authenticated_client,
+    deposit_collection,
+    atom_dataset,
+    swh_storage,
+    check_metadata_spy,
+):
+    """Metadata is checked with the configured engine when it is received, the
+    result being memoized"""
+    url = "https://gitlab.org/user/repo"
+    swh_storage.origin_add([Origin(url)])
+    xml_data = atom_dataset["entry-data-with-origin-reference"].format(url=url)
+    response = post_atom(
+        authenticated_client,
+        reverse(COL_IRI, args=[deposit_collection.name]),
+        data=xml_data,
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+    ((_, kwargs),) = check_metadata_spy.call_args_list
+    assert kwargs["engine"] == "lxml"
+    assert cached_metadata_check(xml_data.encode()) == check_metadata(
+        parse_xml(xml_data)
+    )
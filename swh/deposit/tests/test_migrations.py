@@ -1,4 +1,4 @@
-# Copyright (C) 2021-2024  The Software Heritage developers
+# Copyright (C) 2021-2026  The Software Heritage developers
 # See the AUTHORS file at the top-level directory of this distribution
 # License: GNU General Public License version 3, or any later version
 # See top-level LICENSE file for more information
@@ -60,18 +60,14 @@ def test_migrations_21_add_origin_url_column_to_deposit_model(migrator):
 
 def test_migrations_22_add_deposit_type_column_model_and_data(migrator):
     """22 migration should add the type column and migrate old values with new type"""
-    from swh.deposit.models import (
-        DEPOSIT_CODE,
-        DEPOSIT_METADATA_ONLY,
-        Deposit,
-        DepositClient,
-        DepositCollection,
-    )
+    from swh.deposit.models import DEPOSIT_CODE, DEPOSIT_METADATA_ONLY, Deposit
 
     old_state = migrator.apply_initial_migration(
         ("deposit", "0021_deposit_origin_url_20201124_1438")
     )
     old_deposit = old_state.apps.get_model("deposit", "Deposit")
+    DepositCollection = old_state.apps.get_model("deposit", "DepositCollection")
+    DepositClient = old_state.apps.get_model("deposit", "DepositClient")
 
     collection = DepositCollection.objects.create(name="hello")
 
@@ -126,7 +122,7 @@ def test_migrations_22_add_deposit_type_column_model_and_data(migrator):
 
     assert Deposit().type == DEPOSIT_CODE
 
-    all_deposits = Deposit.objects.all()
+    all_deposits = new_deposit.objects.all()
     assert len(all_deposits) == 3
     for deposit in all_deposits:
         if deposit.id in (deposit1.id, deposit2.id):
@@ -235,3 +231,31 @@ def test_migration_25_populates_release_data_fields(migrator):
     new_deposit_not_code = Deposit.objects.get(pk=deposit_not_code.id)
     assert new_deposit_not_code.software_version == ""
     assert new_deposit_not_code.release_notes == ""
+
+
+def test_migration_31_fills_update_date(migrator):
+    """Ensures the 31 migration sets the modification date of existing deposits"""
+    old_state = migrator.apply_initial_migration(("deposit", "0030_idempotencykey"))
+    Deposit = old_state.apps.get_model("deposit", "Deposit")
+    DepositCollection = old_state.apps.get_model("deposit", "DepositCollection")
+    DepositClient = old_state.apps.get_model("deposit", "DepositClient")
+
+    collection = DepositCollection.objects.create(name="hello")
+    client = DepositClient.objects.create(username="name", collections=[collection.id])
+    complete_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    deposit_done = Deposit.objects.create(
+        client=client,
+        collection=collection,
+        status=DEPOSIT_STATUS_LOAD_SUCCESS,
+        complete_date=complete_date,
+    )
+    deposit_partial = Deposit.objects.create(
+        client=client, collection=collection, status=DEPOSIT_STATUS_PARTIAL
+    )
+
+    new_state = migrator.apply_tested_migration(("deposit", "0031_deposit_update_date"))
+    Deposit = new_state.apps.get_model("deposit", "Deposit")
+
+    assert Deposit.objects.get(pk=deposit_done.id).update_date == complete_date
+    new_deposit_partial = Deposit.objects.get(pk=deposit_partial.id)
+    assert new_deposit_partial.update_date == new_deposit_partial.reception_date
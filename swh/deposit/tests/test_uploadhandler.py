@@ -0,0 +1,79 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import hashlib
+
+from django.core.files.uploadhandler import StopFutureHandlers
+import pytest
+
+from swh.deposit.uploadhandler import (
+    HashingMemoryFileUploadHandler,
+    HashingTemporaryFileUploadHandler,
+    UploadChecksums,
+    get_checksums,
+)
+
+DATA = b"some archive content" * 1000
+
+
+def _upload(handler, data, chunk_size=1024):
+    try:
+        handler.new_file("file", "archive.zip", "application/zip", len(data))
+    except StopFutureHandlers:
+        pass
+    for start in range(0, len(data), chunk_size):
+        remaining = handler.receive_data_chunk(data[start : start + chunk_size], start)
+        assert remaining is None
+    return handler.file_complete(len(data))
+
+
+def _expected_checksums(data):
+    return UploadChecksums(
+        length=len(data),
+        md5=hashlib.md5(data).digest(),
+        sha1=hashlib.sha1(data).digest(),
+        sha256=hashlib.sha256(data).digest(),
+    )
+
+
+def test_hashing_temporary_file_upload_handler():
+    uploaded_file = _upload(HashingTemporaryFileUploadHandler(), DATA)
+
+    assert get_checksums(uploaded_file) == _expected_checksums(DATA)
+    assert uploaded_file.read() == DATA
+
+
+def test_hashing_memory_file_upload_handler():
+    handler = HashingMemoryFileUploadHandler()
+    handler.handle_raw_input(None, {}, len(DATA), None)
+    assert handler.activated
+
+    uploaded_file = _upload(handler, DATA)
+
+    assert get_checksums(uploaded_file) == _expected_checksums(DATA)
+    assert uploaded_file.read() == DATA
+
+
+def test_hashing_memory_file_upload_handler_not_activated(settings):
+    """Chunks passed on to the next handler are not hashed nor kept"""
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE = len(DATA) - 1
+    handler = HashingMemoryFileUploadHandler()
+    handler.handle_raw_input(None, {}, len(DATA), None)
+    assert not handler.activated
+
+    handler.new_file("file", "archive.zip", "application/zip", len(DATA))
+    assert handler.receive_data_chunk(DATA, 0) == DATA
+    assert handler.file_complete(len(DATA)) is None
+    assert handler.hashed_length == 0
+
+
+@pytest.mark.parametrize("data", [b"", b"x"])
+def test_hashing_upload_handler_small_files(data):
+    uploaded_file = _upload(HashingTemporaryFileUploadHandler(), data)
+    assert get_checksums(uploaded_file) == _expected_checksums(data)
+
+
+def test_get_checksums_no_checksums():
+    assert get_checksums(object()) is None
@@ -0,0 +1,271 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+from django.db import connection
+from django.urls import reverse_lazy as reverse
+from django.utils.timezone import now
+import pytest
+from rest_framework import status
+
+from swh.deposit import webhooks
+from swh.deposit.config import (
+    COL_IRI,
+    DEPOSIT_STATUS_DEPOSITED,
+    DEPOSIT_STATUS_LOAD_FAILURE,
+    PRIVATE_PUT_DEPOSIT,
+)
+from swh.deposit.models import (
+    WEBHOOK_DELIVERY_DELIVERED,
+    WEBHOOK_DELIVERY_FAILED,
+    WEBHOOK_DELIVERY_PENDING,
+    WebhookDelivery,
+)
+from swh.deposit.tests.common import post_archive
+from swh.deposit.webhooks import (
+    DELIVERY_LEASE,
+    SIGNATURE_HEADER,
+    deliver_webhooks,
+    enqueue_status_change,
+    retry_delay,
+    sign,
+)
+
+SECRET = "webhook-secret"
+
+
+class WebhookStandIn(ThreadingHTTPServer):
+    """Local HTTP server standing in for the webhook of a deposit client, which
+    records the requests it receives"""
+
+    def __init__(self):
+        self.requests = []
+        # status codes of the next responses, 200 once exhausted
+        self.statuses = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                server.requests.append((dict(self.headers), body))
+                self.send_response(server.statuses.pop(0) if server.statuses else 200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/hook"
+
+    def events(self, request_index):
+        return json.loads(self.requests[request_index][1])["events"]
+
+
+@pytest.fixture
+def webhook_server(monkeypatch):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    server = WebhookStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def webhook_user(deposit_user, webhook_server):
+    deposit_user.webhook_url = webhook_server.url
+    deposit_user.webhook_secret = SECRET
+    deposit_user.save()
+    return deposit_user
+
+
+def test_webhook_enqueued_on_deposit_completion(
+    authenticated_client, webhook_user, deposit_collection, sample_archive
+):
+    response = post_archive(
+        authenticated_client,
+        reverse(COL_IRI, args=[deposit_collection.name]),
+        sample_archive,
+        HTTP_SLUG="external-id",
+        HTTP_IN_PROGRESS="false",
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.content
+
+    (delivery,) = WebhookDelivery.objects.all()
+    assert delivery.client == webhook_user
+    assert delivery.state == WEBHOOK_DELIVERY_PENDING
+    assert delivery.payload["type"] == "deposit.status"
+    assert delivery.payload["deposit_id"] == delivery.deposit_id
+    assert delivery.payload["collection"] == deposit_collection.name
+    assert delivery.payload["status"] == DEPOSIT_STATUS_DEPOSITED
+    assert delivery.payload["origin_url"] == delivery.deposit.origin_url
+
+
+def test_webhook_enqueued_on_status_update(
+    authenticated_client, deposited_deposit, webhook_user
+):
+    deposit = deposited_deposit
+    response = authenticated_client.put(
+        reverse(PRIVATE_PUT_DEPOSIT, args=[deposit.collection.name, deposit.id]),
+        content_type="application/json",
+        data=json.dumps(
+            {
+                "status": DEPOSIT_STATUS_LOAD_FAILURE,
+                "status_detail": {"loading": ["boom"]},
+            }
+        ),
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    (delivery,) = WebhookDelivery.objects.filter(deposit=deposit)
+    assert delivery.payload["status"] == DEPOSIT_STATUS_LOAD_FAILURE
+    assert delivery.payload["status_detail"] == "- boom\n"
+
+
+def test_webhook_not_enqueued_without_status_change(
+    authenticated_client, deposited_deposit, webhook_user
+):
+    deposit = deposited_deposit
+    response = authenticated_client.put(
+        reverse(PRIVATE_PUT_DEPOSIT, args=[deposit.collection.name, deposit.id]),
+        content_type="application/json",
+        data=json.dumps(
+            {"status": DEPOSIT_STATUS_DEPOSITED, "status_detail": {"checks": ["ok"]}}
+        ),
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not WebhookDelivery.objects.exists()
+
+
+def test_webhook_not_enqueued_without_url(deposit_user, deposited_deposit):
+    assert enqueue_status_change(deposited_deposit) is None
+    assert not WebhookDelivery.objects.exists()
+
+
+def test_webhook_deliver_batches(webhook_server, deposited_deposit, webhook_user):
+    """Pending events of a client are sent at once, signed with its secret"""
+    deliveries = [enqueue_status_change(deposited_deposit) for _ in range(3)]
+
+    stats = deliver_webhooks(batch_size=2)
+
+    assert (stats.requests, stats.delivered, stats.retried) == (2, 3, 0)
+    assert len(webhook_server.requests) == 2
+    headers, body = webhook_server.requests[0]
+    assert headers[SIGNATURE_HEADER] == sign(SECRET, body)
+    assert headers["Content-Type"] == "application/json"
+    events = webhook_server.events(0) + webhook_server.events(1)
+    assert [event["id"] for event in events] == [d.id for d in deliveries]
+    assert events[0]["status"] == DEPOSIT_STATUS_DEPOSITED
+    for delivery in deliveries:
+        delivery.refresh_from_db()
+        assert delivery.state == WEBHOOK_DELIVERY_DELIVERED
+        assert delivery.end_date is not None
+
+    # nothing left to deliver
+    assert deliver_webhooks().requests == 0
+
+
+def test_webhook_deliver_retries(webhook_server, deposited_deposit, webhook_user):
+    """Failed deliveries are tried again later, then given up"""
+    delivery = enqueue_status_change(deposited_deposit)
+    webhook_server.statuses = [500, 503]
+
+    before = now()
+    stats = deliver_webhooks(max_attempts=2)
+    assert (stats.delivered, stats.retried, stats.failed) == (0, 1, 0)
+    delivery.refresh_from_db()
+    assert delivery.state == WEBHOOK_DELIVERY_PENDING
+    assert delivery.attempts == 1
+    assert delivery.last_error.startswith("HTTP 500")
+    assert delivery.next_attempt_date >= before + retry_delay(1)
+
+    # not due yet
+    assert deliver_webhooks(max_attempts=2).requests == 0
+
+    WebhookDelivery.objects.update(next_attempt_date=now())
+    stats = deliver_webhooks(max_attempts=2)
+    assert (stats.delivered, stats.retried, stats.failed) == (0, 0, 1)
+    delivery.refresh_from_db()
+    assert delivery.state == WEBHOOK_DELIVERY_FAILED
+    assert delivery.attempts == 2
+    assert len(webhook_server.requests) == 2
+
+
+def test_webhook_deliver_claimed(
+    webhook_server, deposited_deposit, webhook_user, mocker
+):
+    """Deliveries are claimed, then sent outside of the claiming transaction"""
+    delivery = enqueue_status_change(deposited_deposit)
+    savepoints = list(connection.savepoint_ids)
+    post_events = webhooks._post_events
+
+    def _post_events(*args, **kwargs):
+        assert connection.savepoint_ids == savepoints
+        claimed = WebhookDelivery.objects.get(pk=delivery.pk)
+        assert claimed.next_attempt_date > now() + DELIVERY_LEASE / 2
+        return post_events(*args, **kwargs)
+
+    mocker.patch.object(webhooks, "_post_events", side_effect=_post_events)
+    stats = deliver_webhooks()
+
+    assert stats.delivered == 1
+    delivery.refresh_from_db()
+    assert delivery.state == WEBHOOK_DELIVERY_DELIVERED
+
+
+def test_webhook_deliver_lease(webhook_server, deposited_deposit, webhook_user, mocker):
+    """Deliveries claimed by a crashed worker are sent again once the lease is over,
+    results of workers whose lease is over are not recorded"""
+    delivery = enqueue_status_change(deposited_deposit)
+    mocker.patch.object(webhooks, "_post_events", side_effect=SystemExit("crashed"))
+    with pytest.raises(SystemExit):
+        deliver_webhooks()
+    mocker.stopall()
+
+    assert deliver_webhooks().requests == 0
+    WebhookDelivery.objects.update(next_attempt_date=now())
+
+    def _post_events(*args, **kwargs):
+        # the lease is over, and the delivery claimed by another worker
+        WebhookDelivery.objects.update(next_attempt_date=now() + DELIVERY_LEASE)
+        return "HTTP 500"
+
+    mocker.patch.object(webhooks, "_post_events", side_effect=_post_events)
+    stats = deliver_webhooks()
+    assert (stats.requests, stats.retried) == (1, 0)
+    delivery.refresh_from_db()
+    assert (delivery.state, delivery.attempts) == (WEBHOOK_DELIVERY_PENDING, 0)
+    mocker.stopall()
+
+    WebhookDelivery.objects.update(next_attempt_date=now())
+    assert deliver_webhooks().delivered == 1
+    assert len(webhook_server.requests) == 1
+
+
+def test_webhook_deliver_unreachable(deposited_deposit, webhook_user):
+    webhook_user.webhook_url = "http://127.0.0.1:1/hook"
+    webhook_user.save()
+    delivery = enqueue_status_change(deposited_deposit)
+
+    stats = deliver_webhooks(timeout=1)
+
+    assert stats.retried == 1
+    delivery.refresh_from_db()
+    assert delivery.state == WEBHOOK_DELIVERY_PENDING
+    assert delivery.last_error
+
+
+def test_webhook_retry_delay():
+    assert retry_delay(1) == datetime.timedelta(minutes=1)
+    assert retry_delay(3) == datetime.timedelta(minutes=4)
+    assert retry_delay(20) == datetime.timedelta(hours=6)
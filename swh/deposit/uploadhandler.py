@@ -0,0 +1,90 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Django upload handlers computing the checksums of uploaded files while the
+request body is streamed in.
+
+This spares a full extra read of the (possibly large, disk-spooled) uploaded
+file when the deposit server needs to check its length and md5sum.
+"""
+
+from typing import Dict, Optional
+
+import attr
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+from swh.model.hashutil import MultiHash
+
+CHECKSUM_ALGORITHMS = frozenset({"md5", "sha1", "sha256"})
+
+
+@attr.s(frozen=True)
+class UploadChecksums:
+    """Checksums and length of an uploaded file"""
+
+    length = attr.ib(type=int)
+    md5 = attr.ib(type=bytes)
+    sha1 = attr.ib(type=bytes)
+    sha256 = attr.ib(type=bytes)
+
+    @classmethod
+    def from_dict(cls, length: int, digests: Dict[str, bytes]) -> "UploadChecksums":
+        return cls(
+            length=length, **{algo: digests[algo] for algo in CHECKSUM_ALGORITHMS}
+        )
+
+
+def get_checksums(filehandler: UploadedFile) -> Optional[UploadChecksums]:
+    """Returns the checksums computed while uploading ``filehandler``, if any
+    (files uploaded through other upload handlers do not have them)."""
+    return getattr(filehandler, "checksums", None)
+
+
+class HashingUploadHandlerMixin:
+    """Mixin for Django upload handlers, hashing data chunks as they are written
+    by the handler and attaching the resulting :class:`UploadChecksums` to the
+    uploaded file (as its ``checksums`` attribute).
+
+    Chunks which are passed on to the next handler (the handler returned them)
+    are not hashed, the next handler in the chain takes care of them.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # must happen before calling the parent, which may raise
+        # StopFutureHandlers
+        self.hasher = MultiHash(hash_names=CHECKSUM_ALGORITHMS)
+        self.hashed_length = 0
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        remaining = super().receive_data_chunk(raw_data, start)
+        if remaining is None:
+            self.hasher.update(raw_data)
+            self.hashed_length += len(raw_data)
+        return remaining
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if uploaded_file is not None:
+            uploaded_file.checksums = UploadChecksums.from_dict(
+                self.hashed_length, self.hasher.digest()
+            )
+        return uploaded_file
+
+
+class HashingMemoryFileUploadHandler(
+    HashingUploadHandlerMixin, MemoryFileUploadHandler
+):
+    """Stream small uploads into memory, computing their checksums"""
+
+
+class HashingTemporaryFileUploadHandler(
+    HashingUploadHandlerMixin, TemporaryFileUploadHandler
+):
+    """Stream uploads into a temporary file, computing their checksums"""
@@ -0,0 +1,303 @@
+# Copyright (C) 2026  The Software Heritage developers
+# See the AUTHORS file at the top-level directory of this distribution
+# License: GNU General Public License version 3, or any later version
+# See top-level LICENSE file for more information
+
+"""Webhooks notifying the deposit clients of the status changes of their deposits.
+
+The API views never notify the clients themselves: status changes are recorded
+in the ``deposit_webhook_delivery`` table (the outbox), in the transaction changing
+the status, for the clients with a webhook url. A background worker
+(``swh deposit admin webhooks deliver``) then POSTs them to the webhook of their
+client, as a JSON object whose ``events`` are the status changes of its deposits
+pending delivery, e.g.::
+
+    {
+      "events": [
+        {
+          "id": 42,
+          "type": "deposit.status",
+          "date": "2026-01-05T10:12:54.270463+00:00",
+          "collection": "hal",
+          "deposit_id": 160,
+          "status": "done",
+          "status_detail": "The deposit has been successfully loaded ...",
+          "swhid": "swh:1:dir:...",
+          "swhid_context": "swh:1:dir:...;origin=...",
+          "external_id": "hal-01234567",
+          "origin_url": "https://hal.archives-ouvertes.fr/hal-01234567"
+        }
+      ]
+    }
+
+The body is signed with the webhook secret of the client, in the
+:const:`SIGNATURE_HEADER` header (``sha256=`` followed by the hexadecimal
+HMAC-SHA256 of the body). Events may be sent more than once (e.g. when the
+response is lost), and are identified by their ``id``.
+
+Failed deliveries (no 2xx response) are tried again with an exponential backoff,
+and given up after ``max_attempts`` attempts.
+
+Workers claim the deliveries they send by postponing their next attempt by
+:const:`DELIVERY_LEASE`, then send them without holding locks on the outbox, and
+record the results in another transaction. Deliveries claimed by a crashed worker
+are sent again once the lease is over.
+"""
+
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+import attr
+from django.db import transaction
+from django.utils.timezone import now
+import requests
+
+from swh.deposit.api.converters import convert_status_detail
+from swh.deposit.models import (
+    DEPOSIT_STATUS_DETAIL,
+    WEBHOOK_DELIVERY_DELIVERED,
+    WEBHOOK_DELIVERY_FAILED,
+    WEBHOOK_DELIVERY_PENDING,
+    Deposit,
+    DepositClient,
+    WebhookDelivery,
+)
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Swh-Deposit-Signature"
+STATUS_EVENT = "deposit.status"
+
+# Maximum number of events sent at once to a webhook
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 10
+# Timeout (in seconds) of the POST requests to the webhooks
+DEFAULT_TIMEOUT = 10.0
+# Delay before the first retry of a failed delivery, doubled on each attempt up to
+# MAX_RETRY_DELAY
+RETRY_DELAY = datetime.timedelta(minutes=1)
+MAX_RETRY_DELAY = datetime.timedelta(hours=6)
+# Duration during which the deliveries claimed by a worker are not sent by other
+# ones, longer than the requests sending a batch to the webhooks
+DELIVERY_LEASE = datetime.timedelta(minutes=30)
+
+
+def enqueue_status_change(deposit: Deposit) -> Optional[WebhookDelivery]:
+    """Record the current status of the deposit, to be sent to the webhook of its
+    client (if any)."""
+    client = deposit.client
+    if not client.webhook_url:
+        return None
+    status_detail = convert_status_detail(deposit.status_detail)
+    return WebhookDelivery.objects.create(
+        client=client,
+        deposit=deposit,
+        payload={
+            "type": STATUS_EVENT,
+            "date": now().isoformat(),
+            "collection": deposit.collection.name,
+            "deposit_id": deposit.id,
+            "status": deposit.status,
+            "status_detail": status_detail or DEPOSIT_STATUS_DETAIL[deposit.status],
+            "swhid": deposit.swhid,
+            "swhid_context": deposit.swhid_context,
+            "external_id": deposit.external_id,
+            "origin_url": deposit.origin_url,
+        },
+    )
+
+
+def sign(secret: str, body: bytes) -> str:
+    """Signature of a webhook request body, sent in the :const:`SIGNATURE_HEADER`
+    header."""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    """Delay before the next attempt of a delivery which failed ``attempts``
+    times."""
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+@attr.s
+class DeliveryStats:
+    """Progress of the deliveries of the webhooks"""
+
+    # requests sent to the webhooks
+    requests = attr.ib(type=int, default=0)
+    delivered = attr.ib(type=int, default=0)
+    # deliveries failed, and to try again later
+    retried = attr.ib(type=int, default=0)
+    # deliveries given up
+    failed = attr.ib(type=int, default=0)
+
+
+def _post_events(
+    session: requests.Session,
+    client: DepositClient,
+    deliveries: List[WebhookDelivery],
+    timeout: float,
+) -> Optional[str]:
+    """Send the events of the deliveries to the webhook of the client.
+
+    Returns:
+        the error if they were not delivered
+
+    """
+    if not client.webhook_url:
+        return "No webhook url"
+    body = json.dumps(
+        {"events": [{"id": delivery.id, **delivery.payload} for delivery in deliveries]}
+    ).encode()
+    headers = {"Content-Type": "application/json"}
+    if client.webhook_secret:
+        headers[SIGNATURE_HEADER] = sign(client.webhook_secret, body)
+    try:
+        response = session.post(
+            client.webhook_url, data=body, headers=headers, timeout=timeout
+        )
+    except requests.RequestException as e:
+        return str(e)
+    if not response.ok:
+        return f"HTTP {response.status_code}: {response.text[:1000]}"
+    return None
+
+
+def deliver_webhooks(
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    timeout: float = DEFAULT_TIMEOUT,
+    session: Optional[requests.Session] = None,
+    progress: Optional[Callable[[DeliveryStats], None]] = None,
+) -> DeliveryStats:
+    """Send the pending deliveries due to the webhooks, at most ``batch_size`` events
+    per request.
+
+    Deliveries are claimed before they are sent, so that several workers may run
+    concurrently.
+
+    Args:
+        batch_size: maximum number of events sent at once to a webhook
+        max_attempts: deliveries failing that many times are given up
+        timeout: timeout (in seconds) of the requests to the webhooks
+        session: the session sending the requests
+        progress: called with the current statistics after each request
+
+    Returns:
+        the statistics of the deliveries
+
+    """
+    if session is None:
+        session = requests.Session()
+    stats = DeliveryStats()
+    while True:
+        deliveries = _claim_deliveries(batch_size)
+        if not deliveries:
+            return stats
+        by_client: Dict[int, List[WebhookDelivery]] = {}
+        for delivery in deliveries:
+            by_client.setdefault(delivery.client_id, []).append(delivery)
+        for client_deliveries in by_client.values():
+            client = client_deliveries[0].client
+            error = _post_events(session, client, client_deliveries, timeout)
+            stats.requests += 1
+            with transaction.atomic():
+                for delivery in client_deliveries:
+                    _record_attempt(delivery, error, max_attempts, stats)
+            if progress is not None:
+                progress(stats)
+
+
+def _claim_deliveries(batch_size: int) -> List[WebhookDelivery]:
+    """Claim the pending deliveries due, by postponing their next attempt for
+    :const:`DELIVERY_LEASE`."""
+    with transaction.atomic():
+        deliveries = list(
+            WebhookDelivery.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(state=WEBHOOK_DELIVERY_PENDING, next_attempt_date__lte=now())
+            .select_related("client")
+            .order_by("next_attempt_date", "id")[:batch_size]
+        )
+        claimed_until = now() + DELIVERY_LEASE
+        WebhookDelivery.objects.filter(
+            pk__in=[delivery.pk for delivery in deliveries]
+        ).update(next_attempt_date=claimed_until)
+    for delivery in deliveries:
+        delivery.next_attempt_date = claimed_until
+    return deliveries
+
+
+def _record_attempt(
+    delivery: WebhookDelivery,
+    error: Optional[str],
+    max_attempts: int,
+    stats: DeliveryStats,
+) -> None:
+    claimed_until = delivery.next_attempt_date
+    if error is None:
+        delivery.state = WEBHOOK_DELIVERY_DELIVERED
+        delivery.end_date = now()
+    else:
+        delivery.attempts += 1
+        delivery.last_error = error
+        if delivery.attempts >= max_attempts:
+            delivery.state = WEBHOOK_DELIVERY_FAILED
+            delivery.end_date = now()
+        else:
+            delivery.next_attempt_date = now() + retry_delay(delivery.attempts)
+
+    # unless the lease is over, and the delivery was claimed by another worker
+    recorded = WebhookDelivery.objects.filter(
+        pk=delivery.pk, next_attempt_date=claimed_until
+    ).update(
+        state=delivery.state,
+        attempts=delivery.attempts,
+        last_error=delivery.last_error,
+        next_attempt_date=delivery.next_attempt_date,
+        end_date=delivery.end_date,
+    )
+    if not recorded:
+        logger.warning("Delivery %s claimed by another worker", delivery.id)
+    elif delivery.state == WEBHOOK_DELIVERY_DELIVERED:
+        stats.delivered += 1
+    elif delivery.state == WEBHOOK_DELIVERY_FAILED:
+        logger.warning(
+            "Giving up delivery %s to %s after %s attempts: %s",
+            delivery.id,
+            delivery.client.webhook_url,
+            delivery.attempts,
+            error,
+        )
+        stats.failed += 1
+    else:
+        stats.retried += 1
+
+
+def run_worker(
+    interval: float,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    timeout: float = DEFAULT_TIMEOUT,
+    progress: Optional[Callable[[DeliveryStats], None]] = None,
+) -> None:
+    """Deliver the webhooks forever, checking for due deliveries every ``interval``
+    seconds."""
+    session = requests.Session()
+    while True:
+        try:
+            deliver_webhooks(
+                batch_size=batch_size,
+                max_attempts=max_attempts,
+                timeout=timeout,
+                session=session,
+                progress=progress,
+            )
+        except Exception:
+            logger.exception("Webhook deliveries failed")
+        time.sleep(interval)